@@ -15,6 +15,7 @@ import os
 import json
 import logging
 import time
+import tempfile
 from datetime import datetime
 from typing import List, Dict, Any
 
@@ -48,6 +49,15 @@ except ImportError:
     logger.warning("⚠️ database.neo4j_conn não encontrado. Neo4j desativado.")
     get_neo4j_connection = None
 
+from database.dossie_store import get_dossie_store
+from telemetria import ganchos_httpx
+from rastreamento import span, atual, rastrear
+
+try:
+    from database.cnpj_local import get_cnpj_local
+except ImportError:
+    get_cnpj_local = None
+
 # ── IMPORTAÇÃO DE HTTPX ───────────────────────────────────────────────────────
 try:
     import httpx
@@ -78,7 +88,8 @@ class AgenteColetorAutonomo:
                 timeout=30.0,
                 headers={
                     "User-Agent": "GovTech-Trasparente/2.0 (Auditoria Cidadã; contact@trasparente.gov.br)"
-                }
+                },
+                event_hooks=ganchos_httpx(),
             )
         else:
             self.client = None
@@ -88,6 +99,8 @@ class AgenteColetorAutonomo:
         else:
             self.drive = None
 
+        self.base_cnpj = get_cnpj_local() if get_cnpj_local else None
+
     async def _requisicao_segura(self, url: str, origem: str, params: dict = None) -> Dict:
         """
         Faz a requisição HTTP com logging explícito e re-lança erros reais.
@@ -138,6 +151,13 @@ class AgenteColetorAutonomo:
             contratos = dados if isinstance(dados, list) else dados.get("data", [])
             logger.info(f"[PNCP] ✅ {len(contratos)} contratos carregados para CNPJ {cnpj_limpo}")
 
+            # Enriquecimento só com a base local: não gera uma requisição extra por contrato
+            if self.base_cnpj:
+                for c in contratos:
+                    fornecedor = c.get("niFornecedor")
+                    if fornecedor:
+                        c["fornecedor_receita"] = self.base_cnpj.buscar(fornecedor)
+
             # Opcionalmente: salvar raw dump no Drive
             if self.drive:
                 caminho_tmp = f"/tmp/pncp_{cnpj_limpo}.json"
@@ -198,6 +218,7 @@ class AgenteColetorAutonomo:
 
 # ── FUNÇÃO PÚBLICA CHAMADA PELO MAIN.PY (Worker Assíncrono) ──────────────────
 
+@rastrear("auditoria.malha_fina")
 async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cpf_real: str, *args, **kwargs) -> None:
     """
     Ponto de entrada da auditoria offline-first.
@@ -216,6 +237,9 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
         )
 
     logger.info(f"🚀 Iniciando auditoria OFFLINE | ID={id_politico} | Nome={nome_politico}")
+    # O span desta auditoria é filho do span da requisição que a agendou (contextvars seguem o BackgroundTask).
+    rastro = atual()
+    rastro.definir(politico=id_politico)
     
     subgrafo_json = {}
     empresas_detalhadas = []
@@ -240,6 +264,14 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
                 })
 
             logger.info(f"✅ {len(empresas_detalhadas)} conexões extraídas do grafo.")
+            rastro.definir(**{
+                "subgrafo.ativos": len(subgrafo_json.get("ativos_e_empresas", [])),
+                "subgrafo.rede_societaria": len(subgrafo_json.get("rede_societaria", [])),
+                "subgrafo.nepotismo": len(subgrafo_json.get("indicios_nepotismo", [])),
+                "subgrafo.alertas": len(subgrafo_json.get("alertas_fracionamento", [])),
+                "subgrafo.hubs": len(subgrafo_json.get("hubs_resumidos", [])),
+                "subgrafo.bytes": len(json.dumps(subgrafo_json, ensure_ascii=False, default=str)),
+            })
 
         except Exception as neo4j_err:
             logger.error(f"[NEO4J] ❌ Falha ao consultar grafo: {neo4j_err}")
@@ -252,6 +284,7 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
     score_risco = 20
     red_flags = []
     resumo_investigativo = "Auditoria não processada. Motor IA indisponível."
+    proveniencia_ia = None
 
     if AuditorGovernamentalIA:
         try:
@@ -260,6 +293,7 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
             resultado_ia = await motor_ia.analisar_teia_financeira(subgrafo_json)
             score_risco = resultado_ia.get("score_risco", 20)
             resumo_investigativo = resultado_ia.get("resumo_investigativo", "Análise inconclusiva.")
+            proveniencia_ia = resultado_ia.get("proveniencia")
 
             for rf in resultado_ia.get("red_flags", []):
                 motivo = rf.get("motivo") if isinstance(rf, dict) else str(rf)
@@ -271,6 +305,7 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
                 })
 
             logger.info(f"⚖️ Score de Risco: {score_risco}/100 | Red Flags: {len(red_flags)}")
+            rastro.definir(score_risco=score_risco, red_flags=len(red_flags))
 
         except Exception as ia_err:
             logger.error(f"[IA] ❌ Falha no motor cognitivo: {ia_err}")
@@ -282,7 +317,6 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
             }]
 
     # ── PASSO 3: GERAR DOSSIÊ LOCAL ───────────────────────────────────────────
-    os.makedirs("dossies", exist_ok=True)
     dossie = {
         "id_politico":             id_politico,
         "cpf_politico":            cpf_real,
@@ -290,21 +324,26 @@ async def auditar_malha_fina_assincrona(id_politico: int, nome_politico: str, cp
         "score_risco_calculado":   score_risco,
         "pontos_perdidos":         int((score_risco / 100.0) * 1000),
         "resumo_investigativo":    resumo_investigativo,
+        "ia_proveniencia":         proveniencia_ia,
         "redFlags":                red_flags,
         "empresas":                empresas_detalhadas,
         "diagrama_relacional_cru": subgrafo_json,
         "data_auditoria_offline":  datetime.now().isoformat(),
     }
 
-    caminho_arquivo = f"dossies/dossie_{id_politico}.json"
-    with open(caminho_arquivo, "w", encoding="utf-8") as f:
-        json.dump(dossie, f, ensure_ascii=False, indent=4)
-    logger.info(f"📄 Dossiê salvo em: {caminho_arquivo}")
+    with span("dossie.salvar"):
+        get_dossie_store().salvar(dossie)
+    logger.info(f"📄 Dossiê {id_politico} salvo no armazém de dossiês.")
 
     # ── PASSO 4: ARQUIVAR NO DATA LAKE (GOOGLE DRIVE) ─────────────────────────
     if drive_manager:
         try:
-            drive_manager.salvar_dossie_no_drive(nome_politico, caminho_arquivo)
+            # O Drive recebe arquivo: serializa só aqui, num temporário
+            caminho_arquivo = os.path.join(tempfile.gettempdir(), f"dossie_{id_politico}.json")
+            with open(caminho_arquivo, "w", encoding="utf-8") as f:
+                json.dump(dossie, f, ensure_ascii=False, indent=4)
+            with span("drive.upload", bytes=os.path.getsize(caminho_arquivo)):
+                drive_manager.salvar_dossie_no_drive(nome_politico, caminho_arquivo)
             logger.info(f"☁️ Dossiê de {nome_politico} arquivado no Data Lake.")
         except Exception as drive_err:
             logger.error(f"[DRIVE] ⚠️ Dossiê gerado localmente, mas falhou no upload: {drive_err}")
@@ -0,0 +1,328 @@
+"""
+backend/analise_grafo.py
+
+ANÁLISE ESTRUTURAL PRÉ-CALCULADA (componentes, comunidades, centralidade)
+=========================================================================
+Job em lote sobre a rede de influência (:Politico), (:Empresa), (:Socio) e
+(:Contrato), todas as relações entre eles tratadas como não direcionadas.
+Grava em cada nó:
+
+  - componente          componente conexo (WCC);
+  - comunidade          comunidade de Louvain (modularidade);
+  - pagerank            PageRank (amortecimento 0.85);
+  - centralidade_grau   grau dentro da rede analisada;
+  - analise_em          data do cálculo.
+
+Com o plugin Graph Data Science no servidor, tudo roda dentro do Neo4j
+(gds.wcc / louvain / pageRank / degree, modo write). Sem ele, a rede é
+exportada em streaming para uma matriz esparsa (SciPy) e os algoritmos rodam
+aqui mesmo; os resultados voltam em lotes UNWIND por elementId. As
+propriedades têm índices de range: ranking de centralidade e "quem está na
+comunidade deste político" saem do índice, sem algoritmo em tempo real.
+
+Uso:
+    python analise_grafo.py                        # GDS se houver, senão SciPy
+    python analise_grafo.py --motor scipy
+    python analise_grafo.py --ranking pagerank --rotulo Empresa
+    python analise_grafo.py --comunidade 250000612345
+"""
+
+import time
+import logging
+import argparse
+from datetime import date
+
+from database.neo4j_conn import Neo4jConnection
+
+logger = logging.getLogger("AnaliseGrafo")
+
+ROTULOS = ("Politico", "Empresa", "Socio", "Contrato")
+METRICAS = ("pagerank", "centralidade_grau")
+AMORTECIMENTO = 0.85
+PAGERANK_ITERACOES = 50
+PAGERANK_TOLERANCIA = 1e-7
+LOUVAIN_NIVEIS = 10
+LOUVAIN_PASSADAS = 10
+LOTE_ESCRITA = 5000
+LIMITE_RANKING_MAX = 500
+GRAFO_GDS = "rede_influencia"
+
+INDICES = [
+    *(f"CREATE INDEX {r.lower()}_{m}_idx IF NOT EXISTS FOR (n:{r}) ON (n.{m})"
+      for r in ROTULOS for m in ("comunidade", "componente", *METRICAS)),
+]
+
+_FILTRO_ROTULOS = " OR ".join(f"n:{r}" for r in ROTULOS)
+
+Q_EXPORTAR_NOS = f"MATCH (n) WHERE {_FILTRO_ROTULOS} RETURN elementId(n) AS id"
+Q_EXPORTAR_ARESTAS = (f"MATCH (n)-[]->(v) WHERE ({_FILTRO_ROTULOS}) AND ({_FILTRO_ROTULOS.replace('n:', 'v:')}) "
+                      "RETURN elementId(n) AS a, elementId(v) AS b")
+
+Q_GRAVAR = """
+UNWIND $rows AS row
+MATCH (n) WHERE elementId(n) = row.id
+SET n.componente = row.componente,
+    n.comunidade = row.comunidade,
+    n.pagerank = row.pagerank,
+    n.centralidade_grau = row.grau,
+    n.analise_em = date(row.data)
+"""
+
+
+def garantir_indices(neo4j: Neo4jConnection):
+    for cmd in INDICES:
+        try:
+            neo4j.execute_query(cmd)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Índice de análise: {e}")
+
+
+def gds_disponivel(neo4j: Neo4jConnection) -> bool:
+    try:
+        versao = neo4j.execute_query("RETURN gds.version() AS v")[0]["v"]
+        logger.info(f"  🧮 Graph Data Science {versao} disponível no servidor.")
+        return True
+    except Exception:
+        return False
+
+
+# ─── MOTOR GDS (dentro do Neo4j) ──────────────────────────────────────────────
+def _analisar_gds(neo4j: Neo4jConnection) -> int:
+    neo4j.execute_query("CALL gds.graph.drop($nome, false) YIELD graphName", {"nome": GRAFO_GDS})
+    projecao = neo4j.execute_query(
+        "CALL gds.graph.project($nome, $rotulos, {TODAS: {type: '*', orientation: 'UNDIRECTED'}}) "
+        "YIELD nodeCount, relationshipCount", {"nome": GRAFO_GDS, "rotulos": list(ROTULOS)})[0]
+    logger.info(f"  📥 Projeção GDS: {projecao['nodeCount']:,} nós, {projecao['relationshipCount']:,} arestas")
+    try:
+        for nome, chamada in (
+            ("componentes", "CALL gds.wcc.write($nome, {writeProperty: 'componente'})"),
+            ("comunidades", "CALL gds.louvain.write($nome, {writeProperty: 'comunidade'})"),
+            ("pagerank", "CALL gds.pageRank.write($nome, {writeProperty: 'pagerank', "
+                         f"dampingFactor: {AMORTECIMENTO}, maxIterations: {PAGERANK_ITERACOES}}})"),
+            ("grau", "CALL gds.degree.write($nome, {writeProperty: 'centralidade_grau'})"),
+        ):
+            t0 = time.time()
+            neo4j.execute_query(chamada + " YIELD nodePropertiesWritten", {"nome": GRAFO_GDS})
+            logger.info(f"  ✅ GDS {nome} gravado em {time.time() - t0:.1f}s")
+    finally:
+        neo4j.execute_query("CALL gds.graph.drop($nome, false) YIELD graphName", {"nome": GRAFO_GDS})
+    neo4j.execute_query(f"""
+        MATCH (n) WHERE ({_FILTRO_ROTULOS}) AND n.pagerank IS NOT NULL
+        CALL {{ WITH n SET n.analise_em = date() }} IN TRANSACTIONS OF {LOTE_ESCRITA} ROWS
+    """)
+    return projecao["nodeCount"]
+
+
+# ─── MOTOR SCIPY (em processo) ────────────────────────────────────────────────
+def _exportar(neo4j: Neo4jConnection):
+    """Rede como (ids de elemento, matriz de adjacência simétrica com a multiplicidade das arestas)."""
+    import numpy as np
+    from scipy import sparse
+
+    indice, origens, destinos = {}, [], []
+    with neo4j.driver.session() as session:
+        for registro in session.run(Q_EXPORTAR_NOS):
+            indice[registro["id"]] = len(indice)
+        for registro in session.run(Q_EXPORTAR_ARESTAS):
+            origens.append(indice[registro["a"]])
+            destinos.append(indice[registro["b"]])
+    n = len(indice)
+    a = np.array(origens + destinos, dtype=np.int64)
+    b = np.array(destinos + origens, dtype=np.int64)
+    adjacencia = sparse.csr_matrix((np.ones(a.size), (a, b)), shape=(n, n))  # duplicatas somam
+    return list(indice), adjacencia
+
+
+def componentes(adjacencia):
+    from scipy.sparse.csgraph import connected_components
+    return connected_components(adjacencia, directed=False)[1]
+
+
+def pagerank(adjacencia, amortecimento: float = AMORTECIMENTO, iteracoes: int = PAGERANK_ITERACOES,
+             tolerancia: float = PAGERANK_TOLERANCIA):
+    """PageRank por iteração de potência; nós sem aresta redistribuem a massa por igual."""
+    import numpy as np
+
+    n = adjacencia.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    grau = np.asarray(adjacencia.sum(axis=1)).ravel()
+    sem_saida = grau == 0
+    inverso = np.divide(1.0, grau, out=np.zeros(n), where=~sem_saida)
+    x = np.full(n, 1.0 / n)
+    for _ in range(iteracoes):
+        novo = amortecimento * (adjacencia.T @ (x * inverso))
+        novo += (amortecimento * x[sem_saida].sum() + 1.0 - amortecimento) / n
+        convergiu = np.abs(novo - x).sum() < tolerancia
+        x = novo
+        if convergiu:
+            break
+    return x
+
+
+def _mover_nos(grafo, rng, passadas: int):
+    """Fase local do Louvain: cada nó vai para a comunidade vizinha de maior ganho de modularidade."""
+    import numpy as np
+
+    n = grafo.shape[0]
+    grau = np.asarray(grafo.sum(axis=1)).ravel()
+    m2 = grau.sum()
+    comunidade = np.arange(n)
+    total = grau.copy()  # soma dos graus por comunidade
+    indptr, indices, pesos = grafo.indptr, grafo.indices, grafo.data
+    houve_mudanca = False
+    for _ in range(passadas):
+        movidos = 0
+        for i in rng.permutation(n):
+            vizinhos, w = indices[indptr[i]:indptr[i + 1]], pesos[indptr[i]:indptr[i + 1]]
+            fora_do_laco = vizinhos != i
+            if not fora_do_laco.any():
+                continue
+            candidatas, posicao = np.unique(comunidade[vizinhos[fora_do_laco]], return_inverse=True)
+            ligacao = np.bincount(posicao, weights=w[fora_do_laco])
+            atual = comunidade[i]
+            total[atual] -= grau[i]
+            ganho = ligacao - total[candidatas] * grau[i] / m2
+            ganho_atual = ligacao[candidatas == atual].sum() - total[atual] * grau[i] / m2
+            melhor = int(np.argmax(ganho))
+            nova = candidatas[melhor] if ganho[melhor] > ganho_atual + 1e-12 else atual
+            total[nova] += grau[i]
+            if nova != atual:
+                comunidade[i] = nova
+                movidos += 1
+        if not movidos:
+            break
+        houve_mudanca = True
+    return comunidade, houve_mudanca
+
+
+def louvain(adjacencia, niveis: int = LOUVAIN_NIVEIS, passadas: int = LOUVAIN_PASSADAS, semente: int = 42):
+    """Louvain: fase local + agregação das comunidades em super-nós, até não haver ganho."""
+    import numpy as np
+    from scipy import sparse
+
+    rng = np.random.default_rng(semente)
+    rotulos = np.arange(adjacencia.shape[0])
+    grafo = adjacencia.tocsr()
+    if grafo.nnz == 0:
+        return rotulos
+    for _ in range(niveis):
+        comunidade, houve_mudanca = _mover_nos(grafo, rng, passadas)
+        if not houve_mudanca:
+            break
+        _, comunidade = np.unique(comunidade, return_inverse=True)
+        rotulos = comunidade[rotulos]
+        agregacao = sparse.csr_matrix((np.ones(grafo.shape[0]), (np.arange(grafo.shape[0]), comunidade)))
+        grafo = (agregacao.T @ grafo @ agregacao).tocsr()
+    return rotulos
+
+
+def _analisar_scipy(neo4j: Neo4jConnection) -> int:
+    import numpy as np
+
+    t0 = time.time()
+    ids, adjacencia = _exportar(neo4j)
+    logger.info(f"  📥 Exportados {len(ids):,} nós e {adjacencia.nnz // 2:,} pares em {time.time() - t0:.1f}s")
+    etapas = {}
+    for nome, funcao in (("componentes", componentes), ("comunidades", louvain), ("pagerank", pagerank)):
+        t1 = time.time()
+        etapas[nome] = funcao(adjacencia)
+        logger.info(f"  🧮 {nome} em {time.time() - t1:.1f}s")
+    grau = np.asarray(adjacencia.sum(axis=1)).ravel()
+
+    hoje = date.today().isoformat()
+    for inicio in range(0, len(ids), LOTE_ESCRITA):
+        fatia = range(inicio, min(inicio + LOTE_ESCRITA, len(ids)))
+        neo4j.execute_query(Q_GRAVAR, {"rows": [
+            {"id": ids[i], "componente": int(etapas["componentes"][i]), "comunidade": int(etapas["comunidades"][i]),
+             "pagerank": float(etapas["pagerank"][i]), "grau": float(grau[i]), "data": hoje} for i in fatia]})
+    logger.info(f"  ✅ {len(ids):,} nós gravados | {len(set(etapas['comunidades'].tolist())):,} comunidades, "
+                f"{len(set(etapas['componentes'].tolist())):,} componentes")
+    return len(ids)
+
+
+def analisar(neo4j: Neo4jConnection, motor: str = "auto") -> int:
+    """Calcula e grava componentes, comunidades, PageRank e grau. `motor`: auto | gds | scipy."""
+    garantir_indices(neo4j)
+    t0 = time.time()
+    usar_gds = motor == "gds" or (motor == "auto" and gds_disponivel(neo4j))
+    total = _analisar_gds(neo4j) if usar_gds else _analisar_scipy(neo4j)
+    logger.info(f"  ✅ Análise estrutural ({'GDS' if usar_gds else 'SciPy'}): {total:,} nós "
+                f"em {time.time() - t0:.1f}s")
+    return total
+
+
+# ─── CONSULTAS (índice, sem algoritmo em tempo real) ─────────────────────────
+def ranking_centralidade(neo4j: Neo4jConnection, rotulo: str = "Politico", metrica: str = "pagerank",
+                         limite: int = 50) -> list:
+    """Top-N de um rótulo pela centralidade pré-calculada (ordem decrescente)."""
+    if rotulo not in ROTULOS:
+        raise ValueError(f"Rótulo inválido. Use um de: {', '.join(ROTULOS)}.")
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica inválida. Use uma de: {', '.join(METRICAS)}.")
+    limite = max(1, min(int(limite), LIMITE_RANKING_MAX))
+    # Rótulo e métrica vêm das listas acima: interpolar mantém o ORDER BY servido pelo índice.
+    return neo4j.execute_query(
+        f"MATCH (n:{rotulo}) WHERE n.{metrica} IS NOT NULL "
+        "RETURN coalesce(n.id_tse, n.cnpj, n.id) AS id, coalesce(n.nome, n.objeto) AS nome, n.uf AS uf, "
+        "n.pagerank AS pagerank, n.centralidade_grau AS centralidade_grau, n.comunidade AS comunidade, "
+        f"n.componente AS componente ORDER BY n.{metrica} DESC LIMIT $limite", {"limite": limite})
+
+
+Q_COMUNIDADE = """
+MATCH (p:Politico) WHERE p.id_tse = $id OR p.cpf = $id
+WITH p LIMIT 1
+CALL {
+""" + "\n    UNION\n".join(
+    f"    WITH p MATCH (m:{r} {{comunidade: p.comunidade}}) RETURN m" for r in ROTULOS) + """
+}
+WITH p, m ORDER BY m.pagerank DESC
+WITH p, collect(m) AS membros
+RETURN p.nome AS politico, p.id_tse AS id_tse, p.comunidade AS comunidade, p.componente AS componente,
+       p.pagerank AS pagerank, size(membros) AS tamanho,
+       [r IN $rotulos | {tipo: r, n: size([m IN membros WHERE r IN labels(m)])}] AS por_tipo,
+       [m IN membros[..$limite] | {tipo: [l IN labels(m) WHERE l <> 'Hub'][0], id: coalesce(m.id_tse, m.cnpj, m.id),
+                                   nome: coalesce(m.nome, m.objeto), pagerank: m.pagerank}] AS membros
+"""
+
+
+def comunidade_do_politico(neo4j: Neo4jConnection, identificador: str, limite: int = 50) -> dict:
+    """A comunidade do político, com os membros mais centrais primeiro."""
+    existe = neo4j.execute_query(
+        "MATCH (p:Politico) WHERE p.id_tse = $id OR p.cpf = $id RETURN p.comunidade AS c LIMIT 1",
+        {"id": str(identificador)})
+    if not existe:
+        return {"erro": f"Político '{identificador}' não encontrado no grafo."}
+    if existe[0]["c"] is None:
+        return {"erro": "Análise estrutural ainda não calculada para este político (rode analise_grafo.py)."}
+    limite = max(1, min(int(limite), LIMITE_RANKING_MAX))
+    resultado = neo4j.execute_query(Q_COMUNIDADE, {"id": str(identificador), "limite": limite,
+                                                   "rotulos": list(ROTULOS)})[0]
+    resultado["por_tipo"] = {t["tipo"]: t["n"] for t in resultado["por_tipo"] if t["n"]}
+    return resultado
+
+
+if __name__ == "__main__":
+    import json
+    from database.neo4j_conn import get_neo4j_connection
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Componentes, comunidades e centralidade da rede de influência")
+    parser.add_argument("--motor", choices=("auto", "gds", "scipy"), default="auto")
+    parser.add_argument("--ranking", choices=METRICAS, help="Só mostra o ranking (não recalcula)")
+    parser.add_argument("--rotulo", choices=ROTULOS, default="Politico")
+    parser.add_argument("--comunidade", metavar="ID_TSE", help="Só mostra a comunidade do político")
+    parser.add_argument("--limite", type=int, default=20)
+    args = parser.parse_args()
+
+    neo4j = get_neo4j_connection()
+    try:
+        if args.ranking:
+            print(json.dumps(ranking_centralidade(neo4j, args.rotulo, args.ranking, args.limite),
+                             indent=2, ensure_ascii=False))
+        elif args.comunidade:
+            print(json.dumps(comunidade_do_politico(neo4j, args.comunidade, args.limite), indent=2, ensure_ascii=False))
+        else:
+            analisar(neo4j, args.motor)
+    finally:
+        neo4j.close()
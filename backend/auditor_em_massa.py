@@ -1,42 +1,118 @@
-import os
-import json
+"""
+backend/auditor_em_massa.py
+
+Grande Auditoria Nacional — escalonador adaptativo
+==================================================
+Percorre TODOS os (:Politico) do grafo por cursor (p.chave: o id_tse, ou
+"camara:<id>" dos deputados que só vieram da Câmara; em páginas de
+BATCH_SIZE) e audita cada um no motor de IA (o dossiê de deputado é gravado
+pelo id da Câmara, o mesmo da API e do agente), num pipeline de três
+estágios ligados por filas limitadas, cada um com sua concorrência:
+
+    produtor ─► [políticos] ─► leitores Neo4j ─► [teias] ─► workers LLM
+                                     │ (só regras)               │
+                                     └───────► [dossiês] ◄───────┘ ─► gravação
+
+  - leitura: --workers-neo4j extraem os subgrafos (em threads, fora do event
+    loop) para a fila de --prefetch teias, então os slots do LLM nunca esperam
+    pelo banco;
+  - gravação: --workers-gravacao persistem os dossiês em lotes de até
+    LOTE_GRAVACAO por transação; o cursor confirmado só anda depois disso;
+  - profundidade média das filas, fração do tempo cheias/vazias e workers
+    ocupados por estágio saem no relatório, com o gargalo provável;
+  - concorrência AIMD: cada sucesso rápido soma ~1 slot por "rodada"; um 429
+    ou latência acima de 2x o alvo corta os slots pela metade (no máximo um
+    corte por janela) e o 429 ainda pausa as novas chamadas pelo Retry-After;
+  - orçamento de tokens por minuto: cada chamada reserva uma estimativa e
+    acerta com o uso real (laudos servidos do cache devolvem a reserva);
+  - triagem por regras: cada página passa antes pelo motor de regras PF/TCU
+    (motor_regras.py); abaixo do limiar o dossiê sai com o laudo
+    determinístico, sem extrair a teia nem chamar o LLM;
+  - lotes: teias pequenas já prontas na fila vão juntas numa chamada só
+    (AuditorGovernamentalIA.analisar_lote), com um único prompt de sistema;
+  - backends: as chamadas saem pelo roteador de backends_ia.py (IA_BACKENDS),
+    com failover; para teste de carga sem custo, aponte para o servidor
+    simulado (servidor_ia_simulado.py);
+  - prioridade: --pagerank-min restringe a passada aos políticos mais
+    centrais (pagerank pré-calculado por analise_grafo.py); o cursor continua
+    por p.chave, então uma passada completa depois retoma normalmente.
+
+Uso:
+    python auditor_em_massa.py --tpm 1000000 --concorrencia-max 32
+    python auditor_em_massa.py --a-partir-de 250000612345   # retoma pelo cursor
+    python auditor_em_massa.py --pagerank-min 0.0001         # só os atores centrais
+
+O relatório periódico mostra o "cursor confirmado": toda chave até ele já foi
+concluído, então é o valor seguro para --a-partir-de ao retomar uma execução.
+"""
+
+import time
 import asyncio
 import logging
+import argparse
+import contextlib
+from collections import deque
 from datetime import datetime
-from motor_ia_qwen import AuditorGovernamentalIA
-from database.neo4j_conn import Neo4jConnection
+from motor_ia_qwen import (AuditorGovernamentalIA, LimiteDeTaxaIA, IA_LOTE_MAX_ITENS, IA_LOTE_TOKENS_ITEM,
+                           IA_LOTE_TOKENS_RESPOSTA_ITEM, IA_LOTE_MAX_TOKENS_RESPOSTA)
+from compactador_prompt import compactar_teia, estimar_tokens
+from motor_regras import MotorRegras, LIMIAR_LLM, laudo_deterministico, achados_para_ia
+from database.neo4j_conn import Neo4jConnection, chave_politico, garantir_chave_politico
+from database.dossie_store import get_dossie_store
+from telemetria import iniciar_exportador
+from rastreamento import span, atual, rastrear, iniciar_rastreamento
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("AuditorEmMassa")
 
 # Configurações
-BATCH_SIZE = 50  # Processar em lotes para não estourar a API
+BATCH_SIZE = 500            # Página do cursor sobre (:Politico)
+PREFETCH = 64               # Subgrafos prontos aguardando slot do LLM
+WORKERS_NEO4J = 4           # Extrações de subgrafo simultâneas
+CONCORRENCIA_INICIAL = 2
+CONCORRENCIA_MAX = 32
+LATENCIA_ALVO = 30.0        # segundos por laudo considerados "saudáveis"
+JANELA_CORTE = 10.0         # no máximo um corte multiplicativo a cada N segundos
+TOKENS_POR_MINUTO = 1_000_000
+MAX_TENTATIVAS_429 = 5
+MAX_TOKENS_RESPOSTA = 2048  # mesmo max_tokens do motor
+WORKERS_GRAVACAO = 1        # SQLite tem um escritor por vez: mais workers só disputam o lock
+FILA_GRAVACAO = 256         # Dossiês prontos aguardando gravação
+LOTE_GRAVACAO = 50          # Dossiês por transação
+INTERVALO_AMOSTRAGEM = 0.5  # segundos entre amostras da profundidade das filas
 
-async def processar_politico(auditor, neo4j, p):
-    """Gera o dossiê completo para um político e salva na estrutura hierárquica."""
-    # Acesso seguro às propriedades do nó Neo4j
-    id_politico = p.get("id_tse") or p.get("id") or p.get("cpf")
+
+def _dados_politico(p: dict) -> tuple:
+    # Acesso seguro às propriedades do nó Neo4j. Deputado fica no armazém pelo
+    # id da Câmara, o mesmo de /api/politico/detalhes/{id} e do agente coletor.
+    id_camara = p.get("id_camara")
+    id_politico = (str(id_camara) if id_camara is not None else chave_politico(p)) or p.get("id") or p.get("cpf")
     nome = p.get("nome", "Desconhecido")
     uf = (p.get("uf") or "BR").upper()
     cidade = (p.get("municipio") or p.get("cidade") or "OUTROS").upper()
-    
-    if not id_politico:
-        logger.warning(f"Político {nome} sem ID válido. Pulando.")
-        return
+    return id_politico, nome, uf, cidade
 
-    logger.info(f"Auditando: {nome} (ID: {id_politico}) - {cidade}/{uf}")
-    
-    # Busca teia no Neo4j
-    teia = neo4j.extrair_subgrafo_para_ia(id_politico)
+
+def _extrair_teia(neo4j, p: dict) -> dict:
+    id_politico, nome, _, _ = _dados_politico(p)
+    teia = neo4j.extrair_subgrafo_para_ia(chave_politico(p) or id_politico)
     if not teia:
         logger.warning(f"Sem teia para {nome}, gerando dossiê básico.")
         teia = {"politico": p, "empresas": [], "socios": []}
+    return teia
 
-    # Analisa com Auditoria Sênior (Qwen-Max)
-    laudo = await auditor.analisar_teia_financeira(teia)
-    
-    # Monta o dossiê final
-    dossie = {
+
+def _preparar_teia(neo4j, p: dict, regras: dict, top_k: int) -> tuple:
+    """Estágio de leitura (roda em thread): teia + achados das regras + tamanho compactado."""
+    teia = _extrair_teia(neo4j, p)
+    if regras and regras["evidencias"]:
+        teia["achados_regras"] = achados_para_ia(regras)
+    return teia, compactar_teia(teia, top_k)[1]["tokens_depois"]
+
+
+def _montar_dossie(p: dict, teia: dict, laudo: dict, regras: dict = None) -> dict:
+    id_politico, nome, uf, cidade = _dados_politico(p)
+    return {
         "id": id_politico,
         "nome_politico": nome,
         "uf": uf,
@@ -47,51 +123,491 @@ async def processar_politico(auditor, neo4j, p):
         "ativos_e_empresas": teia.get("ativos_e_empresas", []),
         "rede_societaria": teia.get("rede_societaria", []),
         "indicios_nepotismo": teia.get("indicios_nepotismo", []),
+        "regras": regras and {"score": regras["score"], "heuristicas": regras["heuristicas"],
+                              "evidencias": regras["evidencias"]},
         "data_geracao": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
     }
-    
-    # Salva na pasta organizada
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    pasta_destino = os.path.join(base_dir, "dossies", uf, cidade)
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
-        
-    filename = f"dossie_{id_politico}.json"
-    filepath = os.path.join(pasta_destino, filename)
-    
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(dossie, f, ensure_ascii=False, indent=4)
-        
-    logger.info(f"✅ Dossiê salvo: {uf}/{cidade}/{filename}")
-
-async def main():
+
+
+async def processar_politico(auditor, neo4j, p):
+    """Gera o dossiê completo para um político e salva na estrutura hierárquica."""
+    id_politico, nome, uf, cidade = _dados_politico(p)
+    if not id_politico:
+        logger.warning(f"Político {nome} sem ID válido. Pulando.")
+        return
+
+    logger.info(f"Auditando: {nome} (ID: {id_politico}) - {cidade}/{uf}")
+    # Driver do Neo4j e SQLite são síncronos: em thread, para não travar o event loop.
+    teia = await asyncio.to_thread(_extrair_teia, neo4j, p)
+
+    # Analisa com Auditoria Sênior (Qwen-Max)
+    laudo = await auditor.analisar_teia_financeira(teia)
+
+    # Salva no armazém de dossiês (indexado por UF/cidade/score)
+    await asyncio.to_thread(get_dossie_store().salvar, _montar_dossie(p, teia, laudo))
+    logger.info(f"✅ Dossiê salvo: {uf}/{cidade}/{id_politico}")
+
+
+class ControladorAIMD:
+    """Limite de chamadas simultâneas ao LLM com aumento aditivo e corte multiplicativo."""
+
+    def __init__(self, inicial: int, minimo: int = 1, maximo: int = CONCORRENCIA_MAX,
+                 latencia_alvo: float = LATENCIA_ALVO, janela_corte: float = JANELA_CORTE):
+        self.limite = float(inicial)
+        self.minimo, self.maximo = minimo, maximo
+        self.latencia_alvo = latencia_alvo
+        self.janela_corte = janela_corte
+        self.em_voo = 0
+        self.pausa_ate = 0.0
+        self._ultimo_corte = 0.0
+        self._cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.em_voo < int(self.limite))
+            self.em_voo += 1
+        try:
+            espera = self.pausa_ate - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            yield
+        finally:
+            async with self._cond:
+                self.em_voo -= 1
+                self._cond.notify_all()
+
+    def _cortar(self):
+        agora = time.monotonic()
+        if agora - self._ultimo_corte >= self.janela_corte:
+            self.limite = max(float(self.minimo), self.limite / 2)
+            self._ultimo_corte = agora
+            logger.warning(f"📉 Concorrência da IA reduzida para {int(self.limite)}")
+
+    async def registrar_sucesso(self, latencia: float):
+        async with self._cond:
+            if latencia > 2 * self.latencia_alvo:
+                self._cortar()
+            elif latencia <= self.latencia_alvo:
+                self.limite = min(float(self.maximo), self.limite + 1 / self.limite)
+            self._cond.notify_all()
+
+    async def registrar_limite_taxa(self, retry_after: float = None):
+        async with self._cond:
+            self._cortar()
+            self.pausa_ate = max(self.pausa_ate, time.monotonic() + (retry_after or 5.0))
+
+
+class OrcamentoTokens:
+    """Balde de tokens por minuto. Reservas são acertadas com o uso real depois."""
+
+    def __init__(self, por_minuto: int):
+        self.capacidade = float(por_minuto)
+        self.saldo = float(por_minuto)
+        self.taxa = por_minuto / 60.0
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.saldo = min(self.capacidade, self.saldo + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    async def reservar(self, tokens: int) -> int:
+        tokens = min(tokens, int(self.capacidade))
+        async with self._lock:  # fila FIFO: pedidos grandes não passam fome
+            while True:
+                self._repor()
+                if self.saldo >= tokens:
+                    self.saldo -= tokens
+                    return tokens
+                await asyncio.sleep((tokens - self.saldo) / self.taxa)
+
+    def acertar(self, reservado: int, real: int):
+        self._repor()
+        self.saldo = min(self.capacidade, self.saldo + reservado - real)
+
+
+class EstatisticasFila:
+    """Amostras periódicas de uma fila e dos workers do estágio que a consome."""
+
+    def __init__(self, fila: asyncio.Queue, workers: int):
+        self.fila = fila
+        self.workers = workers
+        self.ocupados = 0
+        self.amostras = self.soma = self.cheia = self.vazia = self.soma_ocupados = 0
+
+    def amostrar(self):
+        self.amostras += 1
+        self.soma += self.fila.qsize()
+        self.cheia += self.fila.full()
+        self.vazia += self.fila.empty()
+        self.soma_ocupados += self.ocupados
+
+    def resumo(self) -> dict:
+        n = max(self.amostras, 1)
+        return {"tamanho": self.fila.qsize(), "capacidade": self.fila.maxsize,
+                "media": round(self.soma / n, 1), "cheia": round(self.cheia / n, 3),
+                "vazia": round(self.vazia / n, 3), "workers": self.workers,
+                "ocupacao": round(self.soma_ocupados / n / max(self.workers, 1), 3)}
+
+
+def diagnosticar_gargalo(filas: dict) -> str:
+    """
+    Estágio que limita a vazão, pelas filas: fila cheia = consumidor lento;
+    fila vazia com o consumidor ocioso = produtor lento.
+    """
+    if filas["dossies"]["cheia"] > 0.5:
+        return "gravação dos dossiês"
+    if filas["teias"]["cheia"] > 0.5:
+        return "LLM"
+    if filas["teias"]["vazia"] > 0.5 and filas["politicos"]["vazia"] < 0.5:
+        return "leitura do Neo4j"
+    if filas["politicos"]["vazia"] > 0.5:
+        return "paginação/triagem por regras"
+    return "nenhum (estágios equilibrados)"
+
+
+class EscalonadorAuditoria:
+    def __init__(self, auditor: AuditorGovernamentalIA, neo4j: Neo4jConnection,
+                 tokens_por_minuto: int = TOKENS_POR_MINUTO, concorrencia_max: int = CONCORRENCIA_MAX,
+                 prefetch: int = PREFETCH, workers_neo4j: int = WORKERS_NEO4J,
+                 a_partir_de: str = "", limite_total: int = None, limiar_regras: int = LIMIAR_LLM,
+                 lote_ia: int = IA_LOTE_MAX_ITENS, workers_gravacao: int = WORKERS_GRAVACAO,
+                 pagerank_min: float = None):
+        self.auditor = auditor
+        self.neo4j = neo4j
+        self.motor_regras = MotorRegras(neo4j, limiar_regras)
+        self.controlador = ControladorAIMD(min(CONCORRENCIA_INICIAL, concorrencia_max), maximo=concorrencia_max)
+        self.orcamento = OrcamentoTokens(tokens_por_minuto)
+        self.concorrencia_max = concorrencia_max
+        self.workers_neo4j = workers_neo4j
+        self.workers_gravacao = max(1, workers_gravacao)
+        self.lote_ia = max(1, lote_ia)
+        self.cursor = a_partir_de or ""
+        self.pagerank_min = pagerank_min
+        self.cursor_confirmado = self.cursor
+        self._pendentes: deque = deque()
+        self._concluidos: set = set()
+        self.limite_total = limite_total
+        self.fila_politicos: asyncio.Queue = asyncio.Queue(maxsize=BATCH_SIZE)
+        self.fila_teias: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+        self.fila_dossies: asyncio.Queue = asyncio.Queue(maxsize=FILA_GRAVACAO)
+        # Cada fila com o estágio que a consome.
+        self.filas = {
+            "politicos": EstatisticasFila(self.fila_politicos, workers_neo4j),
+            "teias": EstatisticasFila(self.fila_teias, concorrencia_max),
+            "dossies": EstatisticasFila(self.fila_dossies, self.workers_gravacao),
+        }
+        self._tokens_sistema = estimar_tokens(auditor._system_prompt)
+        self.stats = {"lidos": 0, "auditados": 0, "so_regras": 0, "cache": 0, "fallback": 0,
+                      "lotes": 0, "limites_429": 0, "falhas": 0, "tokens": 0, "gravados": 0}
+
+    # ── PRODUÇÃO ──────────────────────────────────────────────────────────────
+    def _buscar_pagina(self, cursor: str) -> list:
+        filtro = "AND p.pagerank >= $pagerank_min " if self.pagerank_min is not None else ""
+        query = (f"MATCH (p:Politico) WHERE p.chave > $cursor {filtro}"
+                 "RETURN p ORDER BY p.chave LIMIT $lote")
+        with self.neo4j.driver.session() as session:
+            return [dict(record["p"]) for record in session.run(query, cursor=cursor, lote=BATCH_SIZE,
+                                                                  pagerank_min=self.pagerank_min)]
+
+    async def _produtor(self):
+        while self.limite_total is None or self.stats["lidos"] < self.limite_total:
+            pagina = await asyncio.to_thread(self._buscar_pagina, self.cursor)
+            if not pagina:
+                break
+            regras = await asyncio.to_thread(self._triar, [p["chave"] for p in pagina])
+            for p in pagina:
+                if self.limite_total is not None and self.stats["lidos"] >= self.limite_total:
+                    break
+                self._pendentes.append(p["chave"])
+                await self.fila_politicos.put((p, regras.get(p["chave"])))
+                self.stats["lidos"] += 1
+            self.cursor = pagina[-1]["chave"]
+        for _ in range(self.workers_neo4j):
+            await self.fila_politicos.put(None)
+
+    def _triar(self, ids: list) -> dict:
+        """Regras PF/TCU da página inteira; se o motor falhar, todos seguem para o LLM."""
+        try:
+            resultados = self.motor_regras.avaliar_lote(ids)
+            self.motor_regras.gravar_scores(resultados)
+            return resultados
+        except Exception as e:
+            logger.error(f"❌ Motor de regras falhou na página ({len(ids)} ids): {e}")
+            return {}
+
+    def _concluir(self, chave: str):
+        """Avança o cursor confirmado até a maior chave com todas as anteriores concluídas."""
+        self._concluidos.add(chave)
+        while self._pendentes and self._pendentes[0] in self._concluidos:
+            self.cursor_confirmado = self._pendentes.popleft()
+            self._concluidos.discard(self.cursor_confirmado)
+
+    async def _worker_neo4j(self):
+        estagio = self.filas["politicos"]
+        while (item := await self.fila_politicos.get()) is not None:
+            p, regras = item
+            estagio.ocupados += 1
+            try:
+                if regras is not None and not regras["enviar_llm"]:
+                    await self._salvar_so_regras(p, regras)
+                    continue
+                try:
+                    with span("auditoria.preparar_teia", politico=p["chave"]) as s:
+                        teia, tokens_teia = await asyncio.to_thread(
+                            _preparar_teia, self.neo4j, p, regras, self.auditor.top_k)
+                        s.definir(tokens_teia=tokens_teia)
+                except Exception as e:
+                    self.stats["falhas"] += 1
+                    logger.error(f"Falha ao extrair teia de {p.get('nome')}: {e}")
+                    self._concluir(p["chave"])
+                    continue
+            finally:
+                estagio.ocupados -= 1
+            await self.fila_teias.put((p, teia, regras, tokens_teia))
+
+    async def _salvar_so_regras(self, p: dict, regras: dict):
+        """Abaixo do limiar: dossiê com o laudo determinístico, sem teia nem LLM."""
+        try:
+            dossie = _montar_dossie(p, {}, laudo_deterministico(regras), regras)
+        except Exception as e:
+            self.stats["falhas"] += 1
+            logger.error(f"Falha ao montar dossiê por regras de {p.get('nome')}: {e}")
+            self._concluir(p["chave"])
+            return
+        self.stats["so_regras"] += 1
+        await self.fila_dossies.put((p["chave"], dossie))
+
+    # ── CONSUMO (LLM) ─────────────────────────────────────────────────────────
+    def _estimar_tokens(self, itens: list) -> int:
+        resposta = MAX_TOKENS_RESPOSTA if len(itens) == 1 else \
+            min(IA_LOTE_MAX_TOKENS_RESPOSTA, IA_LOTE_TOKENS_RESPOSTA_ITEM * len(itens))
+        return self._tokens_sistema + sum(tokens for *_, tokens in itens) + resposta
+
+    @rastrear("auditoria.ia")
+    async def _auditar(self, itens: list):
+        """Um político, ou um lote de teias pequenas: uma reserva de tokens e um slot do AIMD."""
+        p0 = itens[0][0]
+        rastro = atual()
+        rastro.definir(itens=len(itens), politicos=[p["chave"] for p, *_ in itens])
+        rotulo = p0.get("nome") if len(itens) == 1 else f"lote de {len(itens)} ({p0.get('nome')}, ...)"
+        for tentativa in range(1, MAX_TENTATIVAS_429 + 1):
+            reservado = await self.orcamento.reservar(self._estimar_tokens(itens))
+            async with self.controlador.slot():
+                inicio = time.monotonic()
+                try:
+                    if len(itens) == 1:
+                        laudos = {p0["chave"]: await self.auditor.analisar_teia_financeira(itens[0][1])}
+                    else:
+                        laudos = await self.auditor.analisar_lote({p["chave"]: teia for p, teia, *_ in itens},
+                                                                  max_itens=len(itens))
+                        self.stats["lotes"] += 1
+                except LimiteDeTaxaIA as e:
+                    self.orcamento.acertar(reservado, 0)
+                    self.stats["limites_429"] += 1
+                    await self.controlador.registrar_limite_taxa(e.retry_after)
+                    logger.warning(f"⏳ 429 ao auditar {rotulo} (tentativa {tentativa}/{MAX_TENTATIVAS_429})")
+                    continue
+                latencia = time.monotonic() - inicio
+
+            real, respondeu_llm, dossies = 0, False, []
+            for p, teia, regras, _ in itens:
+                id_politico, _, uf, cidade = _dados_politico(p)
+                laudo = laudos[p["chave"]]
+                proveniencia = laudo.get("proveniencia") or {}
+                origem = proveniencia.get("origem")
+                uso = (proveniencia.get("uso_tokens") or {}).get("total_tokens")
+                if origem != "cache":
+                    real += uso if uso is not None else reservado // len(itens)
+                if origem == "cache":
+                    self.stats["cache"] += 1
+                elif origem == "fallback":
+                    self.stats["fallback"] += 1
+                else:
+                    respondeu_llm = True
+
+                dossies.append((p["chave"], _montar_dossie(p, teia, laudo, regras)))
+                self.stats["auditados"] += 1
+                logger.debug(f"✅ Laudo pronto: {uf}/{cidade}/{id_politico} ({origem}, {latencia:.1f}s)")
+            self.orcamento.acertar(reservado, real)
+            self.stats["tokens"] += real
+            rastro.definir(tentativas=tentativa, tokens=real, latencia_llm=round(latencia, 3))
+            if respondeu_llm:
+                # LATENCIA_ALVO é por laudo: um lote leva mais tempo por trazer vários.
+                await self.controlador.registrar_sucesso(latencia / len(itens))
+            for dossie in dossies:
+                await self.fila_dossies.put(dossie)
+            return
+        self.stats["falhas"] += len(itens)
+        logger.error(f"❌ {rotulo} desistido após {MAX_TENTATIVAS_429} respostas 429.")
+        for p, *_ in itens:
+            self._concluir(p["chave"])
+
+    def _pequena(self, item: tuple) -> bool:
+        return self.lote_ia > 1 and item[3] <= IA_LOTE_TOKENS_ITEM
+
+    def _juntar_lote(self, primeiro: tuple) -> tuple:
+        """
+        Junta ao primeiro item as teias pequenas que já estão prontas na fila
+        (sem esperar por mais); as grandes retiradas no caminho seguem avulsas.
+        """
+        lote, avulsos = [primeiro], []
+        while len(lote) < self.lote_ia and len(avulsos) < self.lote_ia:
+            try:
+                item = self.fila_teias.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is None:
+                self.fila_teias.put_nowait(None)  # sinal de fim volta para o laço do worker
+                break
+            (lote if self._pequena(item) else avulsos).append(item)
+        return lote, avulsos
+
+    async def _worker_ia(self):
+        estagio = self.filas["teias"]
+        while (item := await self.fila_teias.get()) is not None:
+            lote, avulsos = self._juntar_lote(item) if self._pequena(item) else ([item], [])
+            for itens in (lote, *([a] for a in avulsos)):
+                estagio.ocupados += 1
+                try:
+                    await self._auditar(itens)
+                except Exception as e:
+                    self.stats["falhas"] += len(itens)
+                    logger.error(f"Falha ao auditar {itens[0][0].get('nome')} (+{len(itens) - 1}): {e}")
+                    for p, *_ in itens:
+                        self._concluir(p["chave"])
+                finally:
+                    estagio.ocupados -= 1
+
+    # ── GRAVAÇÃO ──────────────────────────────────────────────────────────────
+    async def _worker_gravacao(self):
+        """Junta os dossiês já prontos (até LOTE_GRAVACAO) e grava numa transação só."""
+        estagio = self.filas["dossies"]
+        while (item := await self.fila_dossies.get()) is not None:
+            lote = [item]
+            while len(lote) < LOTE_GRAVACAO:
+                try:
+                    proximo = self.fila_dossies.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if proximo is None:
+                    self.fila_dossies.put_nowait(None)
+                    break
+                lote.append(proximo)
+            estagio.ocupados += 1
+            try:
+                with span("dossie.salvar_lote", dossies=len(lote)):
+                    await asyncio.to_thread(get_dossie_store().salvar_lote, [dossie for _, dossie in lote])
+                self.stats["gravados"] += len(lote)
+            except Exception as e:
+                self.stats["falhas"] += len(lote)
+                logger.error(f"❌ Falha ao gravar {len(lote)} dossiê(s): {e}")
+            finally:
+                estagio.ocupados -= 1
+                for chave, _ in lote:
+                    self._concluir(chave)
+
+    # ── MÉTRICAS ──────────────────────────────────────────────────────────────
+    async def _amostrar_filas(self, intervalo: float = INTERVALO_AMOSTRAGEM):
+        while True:
+            for estagio in self.filas.values():
+                estagio.amostrar()
+            await asyncio.sleep(intervalo)
+
+    def metricas_filas(self) -> dict:
+        filas = {nome: estagio.resumo() for nome, estagio in self.filas.items()}
+        return {**filas, "gargalo": diagnosticar_gargalo(filas)}
+
+    async def _relatorio(self, intervalo: float = 30.0):
+        inicio = time.monotonic()
+        while True:
+            await asyncio.sleep(intervalo)
+            minutos = (time.monotonic() - inicio) / 60
+            logger.info(
+                f"📈 {self.stats['auditados']:,} auditados ({self.stats['auditados'] / minutos:,.0f}/min) | "
+                f"{self.stats['so_regras']:,} só por regras | {self.stats['lotes']:,} lotes | "
+                f"IA: {self.controlador.em_voo}/{int(self.controlador.limite)} slots | "
+                f"prefetch {self.fila_teias.qsize()}/{self.fila_teias.maxsize} | cache {self.stats['cache']:,} | "
+                f"429 {self.stats['limites_429']} | tokens {self.stats['tokens']:,} | "
+                f"cursor confirmado {self.cursor_confirmado!r}")
+            filas = self.metricas_filas()
+            logger.info("🚦 " + " | ".join(
+                f"{nome} {f['tamanho']}/{f['capacidade']} (média {f['media']:g}, cheia {f['cheia']:.0%}, "
+                f"vazia {f['vazia']:.0%}, workers {f['ocupacao']:.0%} ocupados)"
+                for nome, f in filas.items() if nome != "gargalo") + f" — gargalo provável: {filas['gargalo']}")
+            logger.info(f"🧭 Backends: {self.auditor.roteador.resumo()}")
+
+    async def executar(self) -> dict:
+        await asyncio.to_thread(garantir_chave_politico, self.neo4j)
+        relatorio = asyncio.create_task(self._relatorio())
+        amostragem = asyncio.create_task(self._amostrar_filas())
+        ias = [asyncio.create_task(self._worker_ia()) for _ in range(self.concorrencia_max)]
+        gravadores = [asyncio.create_task(self._worker_gravacao()) for _ in range(self.workers_gravacao)]
+        try:
+            await asyncio.gather(self._produtor(), *(self._worker_neo4j() for _ in range(self.workers_neo4j)))
+            for _ in ias:
+                await self.fila_teias.put(None)
+            await asyncio.gather(*ias)
+            for _ in gravadores:
+                await self.fila_dossies.put(None)
+            await asyncio.gather(*gravadores)
+        finally:
+            relatorio.cancel()
+            amostragem.cancel()
+        self.stats["filas"] = self.metricas_filas()
+        return self.stats
+
+
+async def main(usar_cache: bool = True, tokens_por_minuto: int = TOKENS_POR_MINUTO,
+               concorrencia_max: int = CONCORRENCIA_MAX, prefetch: int = PREFETCH,
+               a_partir_de: str = "", limite_total: int = None, limiar_regras: int = LIMIAR_LLM,
+               lote_ia: int = IA_LOTE_MAX_ITENS, workers_neo4j: int = WORKERS_NEO4J,
+               workers_gravacao: int = WORKERS_GRAVACAO, pagerank_min: float = None):
     logger.info("🚀 Iniciando Grande Auditoria Nacional...")
-    auditor = AuditorGovernamentalIA()
+    auditor = AuditorGovernamentalIA(usar_cache=usar_cache, propagar_limite_taxa=True)
     from database.neo4j_conn import get_neo4j_connection
     neo4j = get_neo4j_connection()
-    
-    # 1. Busca todos os políticos do Neo4j (Injetados)
-    # Aqui vamos usar uma query que retorna todos os nós de políticos
-    query = "MATCH (p:Politico) RETURN p LIMIT 500" # Limite inicial para teste massivo
-    with neo4j.driver.session() as session:
-        result = session.run(query)
-        # Converte cada nó em um dicionário Python real para evitar problemas de acesso
-        politicos = [dict(record["p"]) for record in result]
-    
-    logger.info(f"Encontrados {len(politicos)} políticos para auditoria.")
-    
-    # 2. Processamento em paralelo (com limite de concorrência restrito)
-    semaphore = asyncio.Semaphore(2) # 2 por vez para evitar bloqueio da API internacional
-    
-    async def sem_process(p):
-        async with semaphore:
-            try:
-                await processar_politico(auditor, neo4j, p)
-            except Exception as e:
-                logger.error(f"Falha ao auditar {p.get('nome')}: {e}")
 
-    await asyncio.gather(*(sem_process(p) for p in politicos))
-    logger.info("🏁 Auditoria em Massa Concluída!")
+    escalonador = EscalonadorAuditoria(auditor, neo4j, tokens_por_minuto, concorrencia_max, prefetch,
+                                       workers_neo4j=workers_neo4j, workers_gravacao=workers_gravacao,
+                                       a_partir_de=a_partir_de, limite_total=limite_total,
+                                       limiar_regras=limiar_regras, lote_ia=lote_ia,
+                                       pagerank_min=pagerank_min)
+    try:
+        stats = await escalonador.executar()
+    finally:
+        await auditor.aclose()
+    logger.info(f"🏁 Auditoria em Massa Concluída! {stats} | cursor confirmado: {escalonador.cursor_confirmado!r}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Auditoria em massa dos políticos do grafo")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Ignora o cache de laudos e reaudita todos no LLM")
+    parser.add_argument("--tpm", type=int, default=TOKENS_POR_MINUTO, help="Orçamento de tokens por minuto")
+    parser.add_argument("--concorrencia-max", type=int, default=CONCORRENCIA_MAX,
+                        help="Teto de chamadas simultâneas ao LLM (o AIMD ajusta abaixo disso)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH, help="Subgrafos pré-carregados do Neo4j")
+    parser.add_argument("--workers-neo4j", type=int, default=WORKERS_NEO4J,
+                        help="Extrações de subgrafo simultâneas (estágio de leitura)")
+    parser.add_argument("--workers-gravacao", type=int, default=WORKERS_GRAVACAO,
+                        help="Gravadores de dossiês (estágio de escrita)")
+    parser.add_argument("--a-partir-de", default="", help="Retoma a partir desta chave (exclusiva)")
+    parser.add_argument("--limite", type=int, default=None, help="Audita no máximo N políticos")
+    parser.add_argument("--limiar-regras", type=int, default=LIMIAR_LLM,
+                        help="Score mínimo das regras PF/TCU para enviar ao LLM (0 = todos)")
+    parser.add_argument("--lote-ia", type=int, default=IA_LOTE_MAX_ITENS,
+                        help="Máximo de teias pequenas por chamada ao LLM (1 = sem lote)")
+    parser.add_argument("--pagerank-min", type=float, default=None,
+                        help="Só políticos com pagerank >= este valor (analise_grafo.py)")
+    args = parser.parse_args()
+    iniciar_exportador("auditor_em_massa")
+    iniciar_rastreamento("auditor_em_massa")
+    with span("auditor_em_massa"):
+        asyncio.run(main(usar_cache=not args.sem_cache, tokens_por_minuto=args.tpm,
+                         concorrencia_max=args.concorrencia_max, prefetch=args.prefetch,
+                         a_partir_de=args.a_partir_de, limite_total=args.limite,
+                         limiar_regras=args.limiar_regras, lote_ia=args.lote_ia,
+                         workers_neo4j=args.workers_neo4j, workers_gravacao=args.workers_gravacao,
+                         pagerank_min=args.pagerank_min))
@@ -0,0 +1,194 @@
+"""
+backend/backends_ia.py
+
+Backends de LLM (OpenAI-compatíveis) com roteamento ponderado e failover
+========================================================================
+O motor de IA não fala mais com um endpoint fixo: cada laudo passa por um
+RoteadorIA que sorteia os backends pelo peso (entre os disponíveis) e, se um
+falha antes de devolver o laudo, tenta o próximo da ordem.
+
+  - BackendIA: URL de chat/completions, modelo, chave (opcional) e teto de
+    chamadas simultâneas próprio (um semáforo por event loop);
+  - falhas seguidas (erro HTTP, conexão, timeout) suspendem o backend por
+    SUSPENSAO_FALHA segundos; um 429 suspende pelo Retry-After;
+  - sem IA_BACKENDS, vale o backend único de sempre (dashscope/qwen-max com
+    QWEN_API_KEY), então nada muda para quem não configurar nada.
+
+IA_BACKENDS aceita uma lista JSON (ou o caminho de um arquivo com ela):
+
+    [{"nome": "qwen", "url": "https://.../chat/completions", "modelo": "qwen-max",
+      "chave_env": "QWEN_API_KEY", "concorrencia": 8, "peso": 3},
+     {"nome": "simulado", "url": "http://127.0.0.1:8089/v1/chat/completions",
+      "modelo": "simulado", "concorrencia": 64, "peso": 1}]
+
+"chave_env" nomeia a variável com a chave; backend que a declara vazia fica
+de fora. Sem "chave_env", a chamada vai sem Authorization (servidor local).
+O servidor simulado para testes de carga está em servidor_ia_simulado.py.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import weakref
+import threading
+
+logger = logging.getLogger("BackendsIA")
+
+QWEN_URL = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1/chat/completions"
+QWEN_MODELO = "qwen-max"  # Modelo principal — não alterar para modelos legados
+IA_MAX_CONCORRENCIA = int(os.getenv("IA_MAX_CONCORRENCIA", "8"))
+FALHAS_PARA_SUSPENDER = 3
+SUSPENSAO_FALHA = 30.0      # segundos fora da roleta após FALHAS_PARA_SUSPENDER erros seguidos
+SUSPENSAO_429 = 5.0         # quando o 429 não traz Retry-After
+
+
+class BackendIA:
+    """Um endpoint OpenAI-compatível com peso na roleta e concorrência própria."""
+
+    def __init__(self, nome: str, url: str, modelo: str, api_key: str = None,
+                 concorrencia: int = IA_MAX_CONCORRENCIA, peso: float = 1.0):
+        self.nome = nome
+        self.url = url
+        self.modelo = modelo
+        self.api_key = api_key
+        self.concorrencia = max(1, int(concorrencia))
+        self.peso = max(float(peso), 0.001)
+        self.suspenso_ate = 0.0
+        self.falhas_seguidas = 0
+        self.stats = {"chamadas": 0, "sucessos": 0, "falhas": 0, "limites_429": 0}
+        self._semaforos: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    def semaforo(self) -> asyncio.Semaphore:
+        """Semáforo do event loop atual (asyncio.Semaphore fica preso ao loop)."""
+        loop = asyncio.get_running_loop()
+        semaforo = self._semaforos.get(loop)
+        if semaforo is None:
+            semaforo = self._semaforos[loop] = asyncio.Semaphore(self.concorrencia)
+        return semaforo
+
+    @property
+    def disponivel(self) -> bool:
+        return time.monotonic() >= self.suspenso_ate
+
+    def __repr__(self):
+        return f"BackendIA({self.nome!r}, {self.modelo!r}, peso={self.peso:g}, concorrencia={self.concorrencia})"
+
+
+class RoteadorIA:
+    """Ordem de tentativa ponderada entre os backends e registro de saúde de cada um."""
+
+    def __init__(self, backends: list):
+        self.backends = list(backends)
+        self._lock = threading.Lock()  # o mesmo roteador serve loops de várias threads
+
+    @property
+    def modelos(self) -> list:
+        """
+        Modelos na ordem de consulta ao cache (o de maior peso primeiro). O laudo
+        é gravado na chave do modelo que respondeu, então o do servidor simulado
+        nunca é servido no lugar do laudo de um modelo real.
+        """
+        pesos = {}
+        for b in self.backends:
+            pesos[b.modelo] = max(pesos.get(b.modelo, 0.0), b.peso)
+        return sorted(pesos, key=lambda m: (-pesos[m], m)) or [QWEN_MODELO]
+
+    @property
+    def concorrencia_total(self) -> int:
+        return sum(b.concorrencia for b in self.backends)
+
+    def ordem(self) -> list:
+        """Backends disponíveis em ordem sorteada pelo peso (amostragem ponderada sem reposição)."""
+        disponiveis = [b for b in self.backends if b.disponivel]
+        return sorted(disponiveis, key=lambda b: random.random() ** (1.0 / b.peso), reverse=True)
+
+    def espera_limite_taxa(self) -> float:
+        """Segundos até o primeiro backend sair da suspensão."""
+        if not self.backends:
+            return 0.0
+        return max(0.0, min(b.suspenso_ate for b in self.backends) - time.monotonic())
+
+    def registrar_sucesso(self, backend: BackendIA):
+        with self._lock:
+            backend.falhas_seguidas = 0
+            backend.stats["sucessos"] += 1
+
+    def registrar_falha(self, backend: BackendIA, erro: Exception):
+        with self._lock:
+            backend.falhas_seguidas += 1
+            backend.stats["falhas"] += 1
+            if backend.falhas_seguidas >= FALHAS_PARA_SUSPENDER:
+                backend.suspenso_ate = time.monotonic() + SUSPENSAO_FALHA
+                backend.falhas_seguidas = 0
+                logger.warning(f"🔌 Backend {backend.nome} suspenso por {SUSPENSAO_FALHA:.0f}s "
+                               f"após {FALHAS_PARA_SUSPENDER} falhas seguidas ({type(erro).__name__}).")
+
+    def registrar_limite_taxa(self, backend: BackendIA, retry_after: float = None):
+        with self._lock:
+            backend.stats["limites_429"] += 1
+            backend.suspenso_ate = max(backend.suspenso_ate,
+                                       time.monotonic() + (retry_after or SUSPENSAO_429))
+
+    def resumo(self) -> str:
+        return " | ".join(
+            f"{b.nome}: {b.stats['sucessos']:,} ok, {b.stats['falhas']} falhas, 429 {b.stats['limites_429']}"
+            + ("" if b.disponivel else " (suspenso)") for b in self.backends)
+
+
+def _backend_da_config(config: dict) -> BackendIA | None:
+    chave_env = config.get("chave_env")
+    api_key = os.getenv(chave_env) if chave_env else None
+    if chave_env and not api_key:
+        logger.warning(f"⚠️  Backend {config.get('nome')} ignorado: {chave_env} não definida.")
+        return None
+    return BackendIA(
+        nome=config.get("nome") or config["modelo"],
+        url=config["url"],
+        modelo=config["modelo"],
+        api_key=api_key,
+        concorrencia=config.get("concorrencia", IA_MAX_CONCORRENCIA),
+        peso=config.get("peso", 1.0),
+    )
+
+
+def carregar_backends(especificacao: str = None) -> list:
+    """
+    Backends de IA_BACKENDS (JSON ou caminho de arquivo JSON). Sem a variável,
+    o backend padrão qwen-max entra se QWEN_API_KEY estiver definida.
+    """
+    especificacao = os.getenv("IA_BACKENDS", "") if especificacao is None else especificacao
+    if not especificacao.strip():
+        api_key = os.getenv("QWEN_API_KEY")
+        return [BackendIA("qwen", QWEN_URL, QWEN_MODELO, api_key)] if api_key else []
+
+    if not especificacao.lstrip().startswith("["):
+        with open(especificacao, encoding="utf-8") as f:
+            especificacao = f.read()
+    try:
+        configs = json.loads(especificacao)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"IA_BACKENDS inválido: {e}")
+    backends = [b for b in (_backend_da_config(c) for c in configs) if b is not None]
+    nomes = [b.nome for b in backends]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f"IA_BACKENDS com nomes repetidos: {nomes}")
+    return backends
+
+
+_roteador = None
+_lock = threading.Lock()
+
+
+def get_roteador_ia() -> RoteadorIA:
+    global _roteador
+    if _roteador is None:
+        with _lock:
+            if _roteador is None:
+                _roteador = RoteadorIA(carregar_backends())
+                if _roteador.backends:
+                    logger.info(f"🧭 Backends de IA: {', '.join(map(repr, _roteador.backends))}")
+    return _roteador
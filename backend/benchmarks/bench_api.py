@@ -0,0 +1,158 @@
+"""
+backend/benchmarks/bench_api.py
+
+Latência dos endpoints da API sob carga concorrente
+===================================================
+Carga em laço fechado: para cada nível de --concorrencia, N clientes
+disparam GETs em sequência durante --duracao segundos, sorteando a rota e
+preenchendo {uf}, {municipio} e {id_tse} com as amostras do manifesto do
+gerador (dados que o injetor gravou). Mede por nível a vazão (req/s), os
+erros e a latência por rota (p50/p95/p99) e por código de status.
+
+As rotas padrão só tocam o Neo4j e o armazém de dossiês: nenhuma depende da
+API da Câmara, do TSE ou do DuckDuckGo, então o teste roda sem rede. Por
+padrão mira um uvicorn já no ar; com --em-processo, chama o app FastAPI
+direto (ASGI, sem socket), isolando a aplicação do servidor HTTP.
+
+    python -m benchmarks.bench_api --concorrencia 1 8 32 --duracao 20
+    python -m benchmarks.bench_api --em-processo --rota "/api/dossies/arvore?uf={uf}"
+"""
+
+import time
+import random
+import asyncio
+import logging
+import argparse
+from urllib.parse import quote
+
+import httpx
+
+from benchmarks.gerador import PASTA_PADRAO, carregar_manifesto
+from benchmarks.resultados import resumo, ambiente, salvar
+
+logger = logging.getLogger("BenchApi")
+
+URL_PADRAO = "http://localhost:8000"
+ROTAS_PADRAO = (
+    "/api/dashboard/guerra",
+    "/api/dossies/arvore",
+    "/api/dossies/arvore?uf={uf}",
+    "/api/politicos/cidade/{uf}/{municipio}",
+    "/api/politico/{id_tse}/seguir-dinheiro",
+    "/api/grafo/hubs",
+    "/api/politicos/ranking/patrimonial",
+)
+
+
+def _valores(manifesto: dict) -> dict:
+    """Listas de onde cada marcador é sorteado."""
+    municipios = manifesto["amostras"]["municipios"] or []
+    return {
+        "uf": manifesto.get("ufs") or [uf for uf, _ in municipios],
+        "municipio": municipios,
+        "id_tse": manifesto["amostras"]["id_tse"],
+    }
+
+
+def preencher(rota: str, valores: dict, rng: random.Random) -> str:
+    """Troca os marcadores por amostras; {uf} e {municipio} vêm do mesmo par quando aparecem juntos."""
+    if "{municipio}" in rota:
+        uf, municipio = rng.choice(valores["municipio"])
+        rota = rota.replace("{uf}", quote(uf)).replace("{municipio}", quote(municipio))
+    if "{uf}" in rota:
+        rota = rota.replace("{uf}", quote(rng.choice(valores["uf"])))
+    if "{id_tse}" in rota:
+        rota = rota.replace("{id_tse}", quote(str(rng.choice(valores["id_tse"]))))
+    return rota
+
+
+async def _cliente(http: httpx.AsyncClient, rotas: list, valores: dict, fim: float, rng: random.Random,
+                   medidas: list):
+    while time.perf_counter() < fim:
+        rota = rng.choice(rotas)
+        inicio = time.perf_counter()
+        try:
+            resposta = await http.get(preencher(rota, valores, rng))
+            status = str(resposta.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        medidas.append((rota, status, time.perf_counter() - inicio))
+
+
+async def medir_nivel(http: httpx.AsyncClient, concorrencia: int, duracao: float, rotas: list, valores: dict,
+                      semente: int) -> dict:
+    medidas = []
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    await asyncio.gather(*(_cliente(http, rotas, valores, fim, random.Random(semente + i), medidas)
+                           for i in range(concorrencia)))
+    decorrido = time.perf_counter() - inicio
+    por_rota = {}
+    for rota, status, segundos in medidas:
+        dados = por_rota.setdefault(rota, {"latencias": [], "status": {}})
+        dados["latencias"].append(segundos)
+        dados["status"][status] = dados["status"].get(status, 0) + 1
+    erros = sum(1 for _, status, _ in medidas if not status.startswith(("2", "3")))
+    return {
+        "requisicoes": len(medidas),
+        "erros": erros,
+        "req_por_s": round(len(medidas) / decorrido, 1) if decorrido > 0 else 0.0,
+        "geral": resumo([s for _, _, s in medidas]),
+        "rotas": {rota: {**resumo(d["latencias"]), "status": d["status"]} for rota, d in por_rota.items()},
+    }
+
+
+async def _executar(url: str, em_processo: bool, niveis: list, duracao: float, rotas: list, valores: dict,
+                    semente: int, aquecimento: float) -> dict:
+    if em_processo:
+        from main import app
+        transporte = httpx.ASGITransport(app=app)
+        url = "http://benchmark"
+    else:
+        transporte = None
+    limites = httpx.Limits(max_connections=max(niveis), max_keepalive_connections=max(niveis))
+    async with httpx.AsyncClient(base_url=url, transport=transporte, limits=limites, timeout=60) as http:
+        if aquecimento > 0:
+            await medir_nivel(http, min(niveis), aquecimento, rotas, valores, semente)
+        resultados = {}
+        for concorrencia in niveis:
+            resultado = await medir_nivel(http, concorrencia, duracao, rotas, valores, semente)
+            resultados[f"c{concorrencia}"] = resultado
+            logger.info(f"  🚦 {concorrencia:>4} clientes: {resultado['req_por_s']:,.1f} req/s | "
+                        f"p50 {resultado['geral'].get('p50_ms', 0):.1f} ms | "
+                        f"p99 {resultado['geral'].get('p99_ms', 0):.1f} ms | {resultado['erros']} erro(s)")
+        return resultados
+
+
+def executar(url: str = URL_PADRAO, em_processo: bool = False, niveis: list = (1, 8, 32), duracao: float = 20,
+             rotas: list = ROTAS_PADRAO, pasta: str = PASTA_PADRAO, semente: int = 42,
+             aquecimento: float = 3) -> str:
+    valores = _valores(carregar_manifesto(pasta))
+    sem_amostra = [r for r in rotas if any(f"{{{m}}}" in r and not v for m, v in valores.items())]
+    if sem_amostra:
+        logger.warning(f"⚠️ Manifesto sem amostras para {sem_amostra}; rotas ignoradas.")
+        rotas = [r for r in rotas if r not in sem_amostra]
+    resultados = {"niveis": asyncio.run(_executar(url, em_processo, list(niveis), duracao, list(rotas), valores,
+                                                  semente, aquecimento))}
+    parametros = {"url": None if em_processo else url, "em_processo": em_processo, "concorrencia": list(niveis),
+                  "duracao_s": duracao, "rotas": list(rotas), "pasta": pasta, "semente": semente}
+    caminho = salvar("api", parametros, resultados, ambiente())
+    logger.info(f"📄 Resultado: {caminho}")
+    return caminho
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # uma linha por requisição distorceria a medida
+    parser = argparse.ArgumentParser(description="Latência da API sob carga concorrente (laço fechado)")
+    parser.add_argument("--url", default=URL_PADRAO, help=f"API no ar (padrão: {URL_PADRAO})")
+    parser.add_argument("--em-processo", action="store_true", help="Chama o app FastAPI direto, sem servidor HTTP")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 8, 32], help="Níveis de clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=20, help="Segundos por nível")
+    parser.add_argument("--aquecimento", type=float, default=3, help="Segundos de carga descartada antes de medir")
+    parser.add_argument("--rota", action="append", help="Rota com marcadores {uf} {municipio} {id_tse} (repetível)")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="Pasta do gerador (manifesto com as amostras)")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    executar(args.url, args.em_processo, args.concorrencia, args.duracao, args.rota or ROTAS_PADRAO, args.pasta,
+             args.semente, args.aquecimento)
@@ -0,0 +1,191 @@
+"""
+backend/benchmarks/bench_dossies.py
+
+Operações do armazém de dossiês (database/dossie_store.py)
+=========================================================
+Num SQLite temporário (nunca o DOSSIES_DB de produção), grava --dossies
+dossiês sintéticos no formato do auditor em massa e mede cada operação:
+gravação unitária e em lote, regravação (ajuste dos agregados), obter por
+id, árvore UF → cidade, listagem paginada, top de risco e painel (frio,
+logo após uma gravação, e quente, memorizado pela versão). Por fim, leitores
+em threads disputam o arquivo com um gravador em lote (WAL) por --duracao
+segundos.
+
+    python -m benchmarks.bench_dossies
+    python -m benchmarks.bench_dossies --dossies 200000 --leitores 8
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+
+from database.dossie_store import DossieStore
+from benchmarks.gerador import GeradorSintetico, SOBRENOMES, RAMOS
+from benchmarks.resultados import resumo, medir, ambiente, salvar
+
+logger = logging.getLogger("BenchDossies")
+
+GRAVACOES_UNITARIAS = 1000
+LEITURAS = 5000
+
+
+class DossiesSinteticos:
+    """Dossiês no formato de auditor_em_massa._montar_dossie, com municípios do gerador."""
+
+    def __init__(self, semente: int, itens_teia: int):
+        self.rng = random.Random(semente)
+        self.gerador = GeradorSintetico(100000, semente=semente)
+        self.itens_teia = itens_teia
+
+    def dossie(self, indice: int) -> dict:
+        rng = self.rng
+        _, uf, cidade = rng.choice(self.gerador.municipios)
+        score = min(int(rng.betavariate(2, 5) * 100), 100)
+        flags = [{
+            "nivel": rng.choice(("CRÍTICO", "ALTO", "MÉDIO", "BAIXO")),
+            "motivo": f"### 🔴 Contrato com {rng.choice(SOBRENOMES)} {rng.choice(RAMOS)}\n"
+                      f"Fornecedor recorrente.\n\n📎 Evidência: [Portal](https://portaldatransparencia.gov.br/{indice})",
+        } for _ in range(rng.randint(0, 4))]
+        return {
+            "id": f"{250000000000 + indice}",
+            "nome_politico": self.gerador._nome(),
+            "uf": uf,
+            "cidade": cidade,
+            "cargo": "Vereador",
+            "ia_analise": {"score_risco": score, "red_flags": flags, "resumo_investigativo": "Resumo sintético."},
+            "ativos_e_empresas": [{"tipo": "Empresa", "nome": f"{rng.choice(SOBRENOMES)} {rng.choice(RAMOS)}",
+                                   "relacao": "PAGOU_A", "valor": round(rng.lognormvariate(8, 1), 2)}
+                                  for _ in range(rng.randint(0, self.itens_teia))],
+            "data_geracao": "01/01/2025 00:00:00",
+        }
+
+
+def _percorrer_paginas(store: DossieStore, uf: str, cidade: str, limite: int) -> int:
+    total, cursor = 0, None
+    while True:
+        pagina, cursor = store.listar(uf, cidade, "score", limite, cursor)
+        total += len(pagina)
+        if not cursor:
+            return total
+
+
+def _concorrencia(store: DossieStore, sinteticos: DossiesSinteticos, ids: list, leitores: int, duracao: float,
+                  lote: int, proximo_indice: int) -> dict:
+    """Leitores (obter + árvore) em threads contra um gravador em lote, pelo mesmo arquivo."""
+    fim = time.perf_counter() + duracao
+    leituras, escritas = [], []
+
+    def ler(semente):
+        rng = random.Random(semente)
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            if rng.random() < 0.8:
+                store.obter(rng.choice(ids))
+            else:
+                store.listar_pastas(rng.choice(sinteticos.gerador.municipios)[1])
+            leituras.append(time.perf_counter() - inicio)
+
+    def gravar():
+        indice = proximo_indice
+        while time.perf_counter() < fim:
+            dossies = [sinteticos.dossie(indice + i) for i in range(lote)]
+            indice += lote
+            inicio = time.perf_counter()
+            store.salvar_lote(dossies)
+            escritas.append(time.perf_counter() - inicio)
+
+    threads = [threading.Thread(target=ler, args=(i,)) for i in range(leitores)] + [threading.Thread(target=gravar)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "leitores": leitores,
+        "leituras_por_s": round(len(leituras) / duracao, 1),
+        "dossies_gravados_por_s": round(len(escritas) * lote / duracao, 1),
+        "leitura": resumo(leituras),
+        "lote_gravacao": resumo(escritas),
+    }
+
+
+def executar(dossies: int = 20000, lote: int = 100, itens_teia: int = 20, leitores: int = 4,
+             duracao: float = 10, semente: int = 42, caminho: str = None) -> str:
+    sinteticos = DossiesSinteticos(semente, itens_teia)
+    rng = random.Random(semente)
+    with tempfile.TemporaryDirectory() as temporaria:
+        store = DossieStore(caminho or os.path.join(temporaria, "dossies.sqlite3"))
+        resultados = {}
+
+        unitarios = min(GRAVACOES_UNITARIAS, dossies)
+        latencias = []
+        for i in range(unitarios):
+            dossie = sinteticos.dossie(i)
+            latencias += medir(lambda: store.salvar(dossie))[0]
+        resultados["salvar"] = resumo(latencias)
+
+        latencias = []
+        for inicio in range(unitarios, dossies, lote):
+            pacote = [sinteticos.dossie(i) for i in range(inicio, min(inicio + lote, dossies))]
+            latencias += medir(lambda: store.salvar_lote(pacote))[0]
+        resultados["salvar_lote"] = {**resumo(latencias), "tamanho_lote": lote,
+                                     "dossies_por_s": round((dossies - unitarios) / sum(latencias), 1)
+                                     if latencias else 0.0}
+
+        ids = [f"{250000000000 + i}" for i in range(dossies)]
+        latencias = []
+        for _ in range(GRAVACOES_UNITARIAS):
+            dossie = sinteticos.dossie(rng.randrange(dossies))  # mesmo id, nova UF/score: move os agregados
+            latencias += medir(lambda: store.salvar(dossie))[0]
+        resultados["regravar"] = resumo(latencias)
+
+        resultados["obter"] = resumo(medir(lambda: store.obter(rng.choice(ids)), LEITURAS, aquecimento=100)[0])
+        resultados["obter_ausente"] = resumo(medir(lambda: store.obter("inexistente"), LEITURAS)[0])
+        resultados["arvore_ufs"] = resumo(medir(lambda: store.listar_pastas(), 200, aquecimento=5)[0])
+        ufs = [p["nome"] for p in store.listar_pastas(limite=500)[0]]
+        resultados["arvore_cidades"] = resumo(medir(lambda: store.listar_pastas(rng.choice(ufs)), 500)[0])
+
+        cidades = [(uf, p["nome"], p["total"]) for uf in ufs for p in store.listar_pastas(uf, limite=500)[0]]
+        resultados["listar_pagina"] = resumo(
+            medir(lambda: store.listar(*rng.choice(cidades)[:2], "score", 100), 1000)[0])
+        uf, cidade, _ = max(cidades, key=lambda c: c[2])
+        latencias, total = medir(lambda: _percorrer_paginas(store, uf, cidade, 50), 20)
+        resultados["listar_cidade_inteira"] = {**resumo(latencias), "dossies": total}
+        resultados["top_risco_pais"] = resumo(medir(lambda: store.top_risco(limite=10), 500)[0])
+        resultados["top_risco_uf"] = resumo(medir(lambda: store.top_risco(rng.choice(ufs), limite=10), 500)[0])
+
+        frio = []
+        for _ in range(50):
+            store.salvar(sinteticos.dossie(rng.randrange(dossies)))
+            frio += medir(lambda: store.painel())[0]
+        resultados["painel_frio"] = resumo(frio)
+        resultados["painel_quente"] = resumo(medir(lambda: store.painel(), 1000)[0])
+
+        resultados["concorrencia"] = _concorrencia(store, sinteticos, ids, leitores, duracao, lote, dossies)
+        resultados["arquivo_mb"] = round(os.path.getsize(store.caminho) / 2 ** 20, 2)
+
+    for operacao, dados in resultados.items():
+        if isinstance(dados, dict) and "p50_ms" in dados:
+            logger.info(f"  🗄️  {operacao:<22} p50 {dados['p50_ms']:>8.3f} ms | p99 {dados['p99_ms']:>8.3f} ms")
+    parametros = {"dossies": dossies, "lote": lote, "itens_teia": itens_teia, "leitores": leitores,
+                  "duracao_s": duracao, "semente": semente}
+    caminho_resultado = salvar("dossies", parametros, resultados, ambiente())
+    logger.info(f"📄 Resultado: {caminho_resultado}")
+    return caminho_resultado
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark das operações do armazém de dossiês")
+    parser.add_argument("--dossies", type=int, default=20000, help="Dossiês gravados antes das leituras")
+    parser.add_argument("--lote", type=int, default=100, help="Dossiês por salvar_lote")
+    parser.add_argument("--itens-teia", type=int, default=20, help="Máximo de itens de teia por dossiê (tamanho do JSON)")
+    parser.add_argument("--leitores", type=int, default=4, help="Threads leitoras na fase concorrente")
+    parser.add_argument("--duracao", type=float, default=10, help="Segundos da fase concorrente")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--caminho", help="SQLite a usar no lugar de um temporário (é gravado!)")
+    args = parser.parse_args()
+    executar(args.dossies, args.lote, args.itens_teia, args.leitores, args.duracao, args.semente, args.caminho)
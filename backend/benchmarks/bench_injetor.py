@@ -0,0 +1,148 @@
+"""
+backend/benchmarks/bench_injetor.py
+
+Vazão do injetor_neo4j.py sobre os dumps sintéticos
+==================================================
+Roda as etapas do injetor (candidatos, bens, CEIS, CEAP) contra um Neo4j
+local, já com índices e constraints (_setup_grafo), e mede por etapa:
+linhas lidas, linhas gravadas, duração, linhas/s e a latência de cada lote
+UNWIND (p50/p95/p99). A etapa "receita" mede a construção da base local de
+CNPJ/QSA (database/cnpj_local.py) e as consultas nela.
+
+Use um Neo4j descartável (o container do docker-compose): as etapas gravam no
+grafo. Com --limpar, o grafo é esvaziado antes (DETACH DELETE em transações).
+
+    python -m benchmarks.gerador --escala 100000
+    python -m benchmarks.bench_injetor --limpar
+    python -m benchmarks.bench_injetor --etapas ceap receita --pasta /dados/bench
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import injetor_neo4j
+from database.neo4j_conn import get_neo4j_connection
+from database.cnpj_local import construir_base, CnpjLocal
+from benchmarks.gerador import PASTA_PADRAO, carregar_manifesto
+from benchmarks.resultados import resumo, medir, ambiente, salvar
+
+logger = logging.getLogger("BenchInjetor")
+
+ETAPAS = {
+    # etapa: (função do injetor, arquivo do manifesto com as linhas de origem)
+    "candidatos": (injetor_neo4j.injetar_candidatos_tse, "candidatos"),
+    "bens": (injetor_neo4j.injetar_bens_tse, "bens"),
+    "ceis": (injetor_neo4j.injetar_ceis_cgu, "ceis"),
+    "ceap": (injetor_neo4j.injetar_ceap_camara, "ceap"),
+}
+CONSULTAS_RECEITA = 2000
+
+
+class ConexaoCronometrada:
+    """Repassa execute_query para a conexão real e guarda a duração de cada chamada por nome."""
+
+    def __init__(self, conexao):
+        self._conexao = conexao
+        self.latencias = {}
+
+    def execute_query(self, query: str, parameters: dict = None, nome: str = None):
+        inicio = time.perf_counter()
+        try:
+            return self._conexao.execute_query(query, parameters, nome=nome)
+        finally:
+            self.latencias.setdefault(nome or "sem_nome", []).append(time.perf_counter() - inicio)
+
+    def __getattr__(self, atributo):
+        return getattr(self._conexao, atributo)
+
+
+def limpar_grafo(neo4j):
+    logger.warning("🧹 Esvaziando o grafo (DETACH DELETE em lotes)...")
+    neo4j.execute_query("MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS",
+                        nome="benchmarks.limpar")
+
+
+def medir_etapa_injetor(neo4j, etapa: str, ano: int, pasta: Path, linhas_origem: int) -> dict:
+    funcao, _ = ETAPAS[etapa]
+    cronometrada = ConexaoCronometrada(neo4j)
+    inicio = time.perf_counter()
+    gravadas = funcao(cronometrada, ano, pasta)
+    duracao = time.perf_counter() - inicio
+    lotes = {nome.removeprefix("injetor."): resumo(valores) for nome, valores in cronometrada.latencias.items()}
+    resultado = {
+        "linhas_origem": linhas_origem,
+        "linhas_gravadas": gravadas,
+        "duracao_s": round(duracao, 3),
+        "linhas_por_s": round(linhas_origem / duracao, 1) if duracao > 0 else 0.0,
+        "lotes": lotes,
+    }
+    logger.info(f"  ✅ {etapa}: {linhas_origem:,} linhas em {duracao:.1f}s "
+                f"({resultado['linhas_por_s']:,.0f} lin/s, {sum(l['n'] for l in lotes.values())} lotes)")
+    return resultado
+
+
+def medir_receita(pasta: Path, manifesto: dict) -> dict:
+    arquivos = manifesto["arquivos"]["receita"]
+    linhas = sum(a["linhas"] for a in arquivos.values())
+    with tempfile.TemporaryDirectory() as temporaria:
+        destino = os.path.join(temporaria, "cnpj_receita.sqlite3")
+        inicio = time.perf_counter()
+        construir_base(str(pasta / "receita"), destino)
+        duracao = time.perf_counter() - inicio
+        base = CnpjLocal(destino)
+        cnpjs = manifesto["amostras"]["cnpjs"]
+        rng = random.Random(manifesto["semente"])
+        latencias, _ = medir(lambda: base.buscar(rng.choice(cnpjs)), repeticoes=CONSULTAS_RECEITA, aquecimento=10)
+        ausentes, _ = medir(lambda: base.buscar(f"{rng.randrange(10 ** 14):014d}"), repeticoes=CONSULTAS_RECEITA)
+        base._conn().close()
+        return {
+            "linhas_origem": linhas,
+            "construcao_s": round(duracao, 3),
+            "linhas_por_s": round(linhas / duracao, 1) if duracao > 0 else 0.0,
+            "tamanho_mb": round(os.path.getsize(destino) / 2 ** 20, 2),
+            "buscar": resumo(latencias),
+            "buscar_ausente": resumo(ausentes),
+        }
+
+
+def executar(pasta: Path, etapas: list, limpar: bool = False) -> str:
+    manifesto = carregar_manifesto(str(pasta))
+    ano = manifesto["ano"]
+    resultados = {"etapas": {}}
+    neo4j = None
+    if any(e in ETAPAS for e in etapas):
+        neo4j = get_neo4j_connection()
+        if limpar:
+            resultados["limpeza_s"] = round(medir(lambda: limpar_grafo(neo4j))[0][0], 3)
+        resultados["setup_indices_s"] = round(medir(lambda: injetor_neo4j._setup_grafo(neo4j))[0][0], 3)
+    try:
+        for etapa in etapas:
+            logger.info(f"── {etapa} ─────────────────────────────")
+            if etapa == "receita":
+                resultados["etapas"][etapa] = medir_receita(pasta, manifesto)
+            else:
+                linhas = manifesto["arquivos"][ETAPAS[etapa][1]]["linhas"]
+                resultados["etapas"][etapa] = medir_etapa_injetor(neo4j, etapa, ano, pasta, linhas)
+        execucao = ambiente(neo4j)
+    finally:
+        if neo4j is not None:
+            neo4j.close()
+    parametros = {"pasta": str(pasta), "escala": manifesto["escala"], "semente": manifesto["semente"],
+                  "etapas": etapas, "limpar": limpar}
+    caminho = salvar("injetor", parametros, resultados, execucao)
+    logger.info(f"📄 Resultado: {caminho}")
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de vazão do injetor Neo4j com dados sintéticos")
+    parser.add_argument("--pasta", default=PASTA_PADRAO, help="Pasta gerada por benchmarks.gerador")
+    parser.add_argument("--etapas", nargs="+", default=[*ETAPAS, "receita"], choices=[*ETAPAS, "receita"])
+    parser.add_argument("--limpar", action="store_true", help="Esvazia o grafo antes (só em Neo4j descartável!)")
+    args = parser.parse_args()
+    executar(Path(args.pasta), args.etapas, args.limpar)
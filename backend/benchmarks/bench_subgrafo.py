@@ -0,0 +1,114 @@
+"""
+backend/benchmarks/bench_subgrafo.py
+
+Latência do extrair_subgrafo_para_ia por grau do político
+=========================================================
+Agrupa os (:Politico) do grafo em faixas de grau por ordem de grandeza
+(0, 1-9, 10-99, 100-999, ...), sorteia até --por-faixa políticos de cada
+faixa e mede a extração do subgrafo da IA: a primeira chamada (fria) e
+--repeticoes chamadas seguintes (quentes), além do tamanho do subgrafo
+devolvido. Com a cauda longa do gerador sintético, as faixas altas são os
+candidatos com centenas de bens e os deputados ligados a fornecedores hub.
+
+    python -m benchmarks.bench_subgrafo
+    python -m benchmarks.bench_subgrafo --por-faixa 50 --repeticoes 5
+"""
+
+import json
+import random
+import logging
+import argparse
+
+from database.neo4j_conn import get_neo4j_connection
+from benchmarks.resultados import resumo, medir, ambiente, salvar
+
+logger = logging.getLogger("BenchSubgrafo")
+
+AMOSTRA_POR_FAIXA_MAX = 1000
+
+
+def rotulo_faixa(faixa: int) -> str:
+    return "0" if faixa < 0 else f"{10 ** faixa}-{10 ** (faixa + 1) - 1}"
+
+
+def amostrar_por_grau(neo4j, por_faixa: int, semente: int) -> dict:
+    """
+    {faixa: {"total": n, "politicos": [(identificador, grau), ...]}}; o identificador
+    é o que a extração aceita (id_tse, ou o nome dos deputados vindos só da CEAP).
+    """
+    linhas = neo4j.execute_query("""
+        MATCH (p:Politico)
+        WITH p, COUNT { (p)--() } AS grau
+        WITH CASE WHEN grau = 0 THEN -1 ELSE toInteger(floor(log10(grau))) END AS faixa,
+             {identificador: coalesce(p.id_tse, p.nome), grau: grau} AS politico
+        RETURN faixa, count(*) AS total, collect(politico)[..$limite] AS candidatos
+        ORDER BY faixa
+    """, {"limite": AMOSTRA_POR_FAIXA_MAX}, nome="benchmarks.amostrar_por_grau")
+    rng = random.Random(semente)
+    amostras = {}
+    for linha in linhas:
+        candidatos = [c for c in linha["candidatos"] if c["identificador"]]
+        escolhidos = rng.sample(candidatos, min(por_faixa, len(candidatos)))
+        amostras[linha["faixa"]] = {"total": linha["total"],
+                                    "politicos": [(c["identificador"], c["grau"]) for c in escolhidos]}
+    return amostras
+
+
+def executar(por_faixa: int = 20, repeticoes: int = 3, semente: int = 42) -> str:
+    neo4j = get_neo4j_connection()
+    try:
+        amostras = amostrar_por_grau(neo4j, por_faixa, semente)
+        resultados = {"faixas": {}}
+        frias_total, quentes_total = [], []
+        for faixa, amostra in amostras.items():
+            frias, quentes, bytes_, graus, erros = [], [], [], [], 0
+            contagens = {"ativos_e_empresas": 0, "rede_societaria": 0, "indicios_nepotismo": 0,
+                         "hubs_resumidos": 0}
+            for identificador, grau in amostra["politicos"]:
+                fria, subgrafo = medir(lambda: neo4j.extrair_subgrafo_para_ia(str(identificador)))
+                if "erro" in subgrafo:
+                    erros += 1
+                    continue
+                quente, _ = medir(lambda: neo4j.extrair_subgrafo_para_ia(str(identificador)), repeticoes)
+                frias += fria
+                quentes += quente
+                graus.append(grau)
+                bytes_.append(len(json.dumps(subgrafo, ensure_ascii=False, default=str)))
+                for chave in contagens:
+                    contagens[chave] += len(subgrafo.get(chave, []))
+            medidos = len(graus) or 1
+            rotulo = rotulo_faixa(faixa)
+            resultados["faixas"][rotulo] = {
+                "politicos_na_faixa": amostra["total"],
+                "medidos": len(graus),
+                "erros": erros,
+                "grau_medio": round(sum(graus) / medidos, 1),
+                "grau_max": max(graus, default=0),
+                "fria": resumo(frias),
+                "quente": resumo(quentes),
+                "subgrafo_bytes_medio": round(sum(bytes_) / medidos),
+                "itens_medios": {k: round(v / medidos, 1) for k, v in contagens.items()},
+            }
+            frias_total += frias
+            quentes_total += quentes
+            logger.info(f"  📐 grau {rotulo:>11}: {len(graus)} políticos | "
+                        f"p50 quente {resultados['faixas'][rotulo]['quente'].get('p50_ms', 0):.1f} ms | "
+                        f"p99 {resultados['faixas'][rotulo]['quente'].get('p99_ms', 0):.1f} ms")
+        resultados["geral"] = {"fria": resumo(frias_total), "quente": resumo(quentes_total)}
+        execucao = ambiente(neo4j)
+    finally:
+        neo4j.close()
+    caminho = salvar("subgrafo", {"por_faixa": por_faixa, "repeticoes": repeticoes, "semente": semente},
+                     resultados, execucao)
+    logger.info(f"📄 Resultado: {caminho}")
+    return caminho
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Latência de extrair_subgrafo_para_ia por faixa de grau")
+    parser.add_argument("--por-faixa", type=int, default=20, help="Políticos sorteados por faixa de grau")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Chamadas quentes por político")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    executar(args.por_faixa, args.repeticoes, args.semente)
@@ -0,0 +1,351 @@
+"""
+backend/benchmarks/gerador.py
+
+Gerador de dumps governamentais sintéticos (TSE, CGU, Câmara e Receita)
+======================================================================
+Escreve, sem rede, arquivos no mesmo layout que os coletores baixam e que
+injetor_neo4j.py / database/cnpj_local.py leem:
+
+    <saida>/tse_candidatos_<ano>.zip    candidatos (latin-1, ';', tudo entre aspas)
+    <saida>/tse_bens_<ano>.zip          bens declarados (valor "1234,56")
+    <saida>/cgu_ceis_<ano>.zip          CEIS (utf-8, ';')
+    <saida>/ceap_camara_<ano>.csv.zip   Ano-<ano>.csv da cota parlamentar
+    <saida>/receita/                    Empresas/Estabelecimentos/Socios/Municipios*.zip (sem cabeçalho)
+    <saida>/manifesto.json              contagens e amostras (UFs, municípios, ids) para os harnesses
+
+`--escala` é o total aproximado de linhas, repartido como nos dumps reais:
+metade CEAP, um quarto bens, um décimo candidatos, 1% CEIS e o restante
+Receita. Bens e despesas caem em poucos candidatos e fornecedores (cauda
+longa), então o grafo tem de nós de grau 1 a hubs. Mesma semente, mesmos
+arquivos. Tudo é escrito em streaming: 10M de linhas não passam pela memória.
+
+    python -m benchmarks.gerador --escala 100000
+    python -m benchmarks.gerador --escala 10000000 --saida /dados/bench --semente 7
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import random
+import logging
+import zipfile
+import argparse
+from datetime import date, timedelta
+
+logger = logging.getLogger("GeradorSintetico")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_PADRAO = os.path.join(BASE_DIR, "estado", "benchmarks", "dados")
+
+DEPUTADOS_MAX = 513
+AMOSTRAS_MANIFESTO = 200
+
+UFS = ("AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA", "PB", "PE",
+       "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO")
+# Peso aproximado do eleitorado: SP, MG e RJ concentram candidatos, como nos dumps reais.
+PESO_UF = (1, 3, 3, 1, 10, 6, 2, 3, 5, 5, 15, 2, 3, 6, 4, 7, 3, 8, 12, 3, 2, 1, 8, 5, 2, 22, 2)
+PRENOMES = ("JOSE", "MARIA", "ANTONIO", "FRANCISCO", "ANA", "JOAO", "CARLOS", "PAULO", "PEDRO", "LUCAS",
+            "LUIZ", "MARCOS", "GABRIEL", "RAFAEL", "DANIEL", "MARCELO", "BRUNO", "EDUARDO", "FELIPE",
+            "RAIMUNDO", "RODRIGO", "MANOEL", "SEBASTIAO", "FERNANDA", "PATRICIA", "ALINE", "JULIANA",
+            "ADRIANA", "MARCIA", "SANDRA", "CONCEIÇÃO", "LÚCIA", "TÂNIA", "SÉRGIO", "FÁBIO", "MÁRCIO")
+SOBRENOMES = ("SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA",
+              "GOMES", "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES", "SOARES", "FERNANDES",
+              "VIEIRA", "BARBOSA", "ROCHA", "DIAS", "NASCIMENTO", "ANDRADE", "MOREIRA", "NUNES", "MARQUES",
+              "MACHADO", "MENDES", "FREITAS", "CAVALCANTI", "BEZERRA", "ARAÚJO", "CONCEIÇÃO", "GONÇALVES")
+PREFIXOS_MUNICIPIO = ("SÃO", "SANTA", "SANTO", "NOVA", "BOM JESUS DO", "PORTO", "CAMPO", "RIO", "BELA VISTA DO",
+                      "ÁGUA", "SERRA", "LAGOA")
+COMPLEMENTOS_MUNICIPIO = ("DO NORTE", "DO SUL", "DA SERRA", "D'OESTE", "DO LESTE", "VELHO", "NOVO", "DAS FLORES")
+CARGOS = (("VEREADOR", 80), ("PREFEITO", 6), ("VICE-PREFEITO", 6), ("DEPUTADO ESTADUAL", 4),
+          ("DEPUTADO FEDERAL", 3), ("SENADOR", 0.3), ("GOVERNADOR", 0.2))
+PARTIDOS = ("PT", "PL", "UNIÃO", "PP", "MDB", "PSD", "REPUBLICANOS", "PDT", "PSB", "PSDB", "PSOL", "PODE",
+            "AVANTE", "PCdoB", "NOVO", "CIDADANIA", "PV", "SOLIDARIEDADE", "PRD", "REDE")
+TIPOS_BEM = ("Casa", "Apartamento", "Terreno", "Veículo automotor terrestre", "Quotas ou quinhões de capital",
+             "Depósito bancário em conta corrente no País", "Aplicação de renda fixa", "Ações",
+             "Imóvel rural", "Sala ou conjunto")
+SANCOES = ("Inidoneidade - Lei 8.666/1993", "Suspensão - Lei 8.666/1993", "Impedimento - Lei do Pregão",
+           "Proibição - Lei de Improbidade", "Impedimento/proibição de contratar com prazo determinado")
+DESPESAS_CEAP = ("COMBUSTÍVEIS E LUBRIFICANTES.", "DIVULGAÇÃO DA ATIVIDADE PARLAMENTAR.", "PASSAGEM AÉREA - SIGEPA",
+                 "MANUTENÇÃO DE ESCRITÓRIO DE APOIO À ATIVIDADE PARLAMENTAR", "LOCAÇÃO OU FRETAMENTO DE VEÍCULOS AUTOMOTORES",
+                 "SERVIÇOS POSTAIS", "TELEFONIA", "CONSULTORIAS, PESQUISAS E TRABALHOS TÉCNICOS.",
+                 "FORNECIMENTO DE ALIMENTAÇÃO DO PARLAMENTAR", "HOSPEDAGEM ,EXCETO DO PARLAMENTAR NO DISTRITO FEDERAL.")
+RAMOS = ("COMERCIO DE COMBUSTIVEIS", "GRAFICA E EDITORA", "CONSULTORIA", "LOCADORA DE VEICULOS",
+         "CONSTRUTORA", "SERVICOS DE LIMPEZA", "TECNOLOGIA", "ALIMENTOS", "TRANSPORTES", "ENGENHARIA")
+SUFIXOS = ("LTDA", "EIRELI", "S.A.", "ME", "EPP")
+CNAES = ("4731800", "1813001", "7020400", "7711000", "4120400", "8121400", "6201501", "5611201", "4930202",
+         "7112000")
+
+
+def repartir(escala: int) -> dict:
+    """Linhas de cada arquivo para uma escala total."""
+    escala = max(int(escala), 1000)
+    fornecedores = max(escala // 50, 50)
+    return {
+        "candidatos": max(escala // 10, 100),
+        "bens": escala // 4,
+        "ceis": max(escala // 100, 10),
+        "ceap": escala // 2,
+        "deputados": min(DEPUTADOS_MAX, max(escala // 2000, 20)),
+        "fornecedores": fornecedores,
+        "municipios": min(max(escala // 2000, 27), 5570),
+    }
+
+
+def cnpj_com_dv(basico: str, ordem: str = "0001") -> str:
+    """CNPJ de 14 dígitos com os dígitos verificadores corretos."""
+    numeros = [int(c) for c in basico + ordem]
+    for pesos in ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)):
+        resto = sum(n * p for n, p in zip(numeros, pesos)) % 11
+        numeros.append(0 if resto < 2 else 11 - resto)
+    return "".join(map(str, numeros))
+
+
+def cnpj_basico(indice: int) -> str:
+    # 7919 é primo com 10^8: índices distintos dão raízes distintas, espalhadas.
+    return f"{(indice * 7919 + 10000019) % 10 ** 8:08d}"
+
+
+def formatar_cnpj(cnpj: str) -> str:
+    return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+
+
+def _cauda(rng: random.Random, n: int, expoente: float) -> int:
+    """Índice em [0, n) concentrado nos primeiros: quanto maior o expoente, mais pesada a cabeça."""
+    return min(int(n * rng.random() ** expoente), n - 1)
+
+
+def _valor_br(valor: float) -> str:
+    return f"{valor:.2f}".replace(".", ",")
+
+
+class _ArquivoZip:
+    """CSV escrito em streaming dentro de um ZIP (deflate rápido: o gargalo é gerar, não comprimir)."""
+
+    def __init__(self, caminho: str, nome_csv: str, codificacao: str, cabecalho: list = None,
+                 aspas: int = csv.QUOTE_MINIMAL):
+        self.caminho = caminho
+        self._zip = zipfile.ZipFile(caminho, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._bruto = self._zip.open(nome_csv, "w", force_zip64=True)
+        self._texto = io.TextIOWrapper(self._bruto, encoding=codificacao, errors="replace", newline="")
+        self.escritor = csv.writer(self._texto, delimiter=";", quoting=aspas)
+        self.linhas = 0
+        if cabecalho:
+            self.escritor.writerow(cabecalho)
+
+    def escrever(self, linha: list):
+        self.escritor.writerow(linha)
+        self.linhas += 1
+
+    def fechar(self) -> dict:
+        self._texto.close()
+        self._zip.close()
+        return {"linhas": self.linhas, "bytes": os.path.getsize(self.caminho)}
+
+
+class GeradorSintetico:
+    def __init__(self, escala: int, ano: int = 2024, semente: int = 42):
+        self.escala = escala
+        self.ano = ano
+        self.semente = semente
+        self.rng = random.Random(semente)
+        self.n = repartir(escala)
+        self.municipios = self._gerar_municipios()
+        self.fornecedores = [self._fornecedor(i) for i in range(self.n["fornecedores"])]
+        self.deputados = [(204000 + i, self._nome(), self.rng.choices(UFS, PESO_UF)[0], self.rng.choice(PARTIDOS))
+                          for i in range(self.n["deputados"])]
+        self.amostras = {"municipios": [], "id_tse": [], "deputados": [d[1] for d in self.deputados[:20]],
+                         "cnpjs": [f[0] for f in self.fornecedores[:AMOSTRAS_MANIFESTO]]}
+
+    def _nome(self, sobrenome: str = None) -> str:
+        rng = self.rng
+        meio = rng.choice(SOBRENOMES) + " " if rng.random() < 0.6 else ""
+        return f"{rng.choice(PRENOMES)} {meio}{sobrenome or rng.choice(SOBRENOMES)}"
+
+    def _gerar_municipios(self) -> list:
+        """(código IBGE/RFB, UF, nome); os nomes se repetem entre UFs, como na vida real."""
+        municipios, usados = [], set()
+        for i in range(self.n["municipios"]):
+            uf = UFS[i] if i < len(UFS) else self.rng.choices(UFS, PESO_UF)[0]
+            nome = f"{self.rng.choice(PREFIXOS_MUNICIPIO)} {self.rng.choice(SOBRENOMES)}"
+            while (uf, nome) in usados:
+                nome = f"{nome} {self.rng.choice(COMPLEMENTOS_MUNICIPIO)}"
+            usados.add((uf, nome))
+            municipios.append((f"{1000 + i:04d}", uf, nome))
+        return municipios
+
+    def _fornecedor(self, indice: int) -> tuple:
+        basico = cnpj_basico(indice)
+        nome = f"{self.rng.choice(SOBRENOMES)} {self.rng.choice(RAMOS)} {self.rng.choice(SUFIXOS)}"
+        return cnpj_com_dv(basico), nome, self.rng.choice(self.municipios)
+
+    # ── TSE ──────────────────────────────────────────────────────────────────
+    def candidatos(self, pasta: str) -> dict:
+        cabecalho = ["DT_GERACAO", "HH_GERACAO", "ANO_ELEICAO", "SG_UF", "NM_MUNICIPIO", "DS_CARGO",
+                     "SQ_CANDIDATO", "NR_CANDIDATO", "NM_CANDIDATO", "NM_URNA_CANDIDATO", "NR_CPF_CANDIDATO",
+                     "SG_PARTIDO", "DS_SITUACAO_CANDIDATURA"]
+        arquivo = _ArquivoZip(os.path.join(pasta, f"tse_candidatos_{self.ano}.zip"),
+                              f"consulta_cand_{self.ano}_BRASIL.csv", "latin-1", cabecalho, csv.QUOTE_ALL)
+        cargos, pesos = zip(*CARGOS)
+        geracao = date(self.ano, 8, 16).strftime("%d/%m/%Y")
+        for i in range(self.n["candidatos"]):
+            rng = self.rng
+            _, uf, municipio = rng.choice(self.municipios)
+            cargo = rng.choices(cargos, pesos)[0]
+            nome = self._nome()
+            # O TSE mascara o CPF nos dumps públicos; só uma minoria vem completa.
+            cpf = f"{rng.randrange(10 ** 11):011d}" if rng.random() < 0.1 else "-4"
+            sq = f"{250000000000 + i}"
+            arquivo.escrever([geracao, "10:00:00", self.ano, uf, municipio, cargo, sq, rng.randrange(10, 99999),
+                              nome, nome.split()[0] + " " + nome.split()[-1], cpf, rng.choice(PARTIDOS), "APTO"])
+            if len(self.amostras["id_tse"]) < AMOSTRAS_MANIFESTO:
+                self.amostras["id_tse"].append(sq)
+            if len(self.amostras["municipios"]) < AMOSTRAS_MANIFESTO and rng.random() < 0.05:
+                self.amostras["municipios"].append([uf, municipio])
+        return arquivo.fechar()
+
+    def bens(self, pasta: str) -> dict:
+        cabecalho = ["ANO_ELEICAO", "SG_UF", "SQ_CANDIDATO", "NR_ORDEM_BEM_CANDIDATO", "DS_TIPO_BEM_CANDIDATO",
+                     "DS_BEM_CANDIDATO", "VR_BEM_CANDIDATO"]
+        arquivo = _ArquivoZip(os.path.join(pasta, f"tse_bens_{self.ano}.zip"),
+                              f"bem_candidato_{self.ano}_BRASIL.csv", "latin-1", cabecalho, csv.QUOTE_ALL)
+        ordem = {}
+        for _ in range(self.n["bens"]):
+            rng = self.rng
+            # Poucos candidatos declaram muitos bens: é deles o grau alto no grafo.
+            candidato = _cauda(rng, self.n["candidatos"], 3)
+            ordem[candidato] = ordem.get(candidato, 0) + 1
+            tipo = rng.choice(TIPOS_BEM)
+            valor = round(rng.lognormvariate(11, 1.5), 2)
+            arquivo.escrever([self.ano, rng.choice(UFS), f"{250000000000 + candidato}", ordem[candidato], tipo,
+                              f"{tipo.upper()} {ordem[candidato]} - {rng.choice(self.municipios)[2]}",
+                              _valor_br(valor)])
+        return arquivo.fechar()
+
+    # ── CGU ──────────────────────────────────────────────────────────────────
+    def ceis(self, pasta: str) -> dict:
+        cabecalho = ["CADASTRO", "CPF_CNPJ", "RAZAO_SOCIAL", "DESCRICAO_TIPO_SANCAO", "DATA_INICIO_SANCAO",
+                     "ORGAO_SANCIONADOR", "UF_ORGAO_SANCIONADOR", "VALOR_MULTA"]
+        arquivo = _ArquivoZip(os.path.join(pasta, f"cgu_ceis_{self.ano}.zip"), f"{self.ano}0101_CEIS.csv",
+                              "utf-8-sig", cabecalho)
+        for i in range(self.n["ceis"]):
+            rng = self.rng
+            # Um terço das sancionadas também recebe da cota parlamentar.
+            if rng.random() < 0.33:
+                cnpj, nome, _ = self.fornecedores[_cauda(rng, len(self.fornecedores), 1.5)]
+            else:
+                cnpj, nome = cnpj_com_dv(cnpj_basico(self.n["fornecedores"] + i)), \
+                    f"{rng.choice(SOBRENOMES)} {rng.choice(RAMOS)} {rng.choice(SUFIXOS)}"
+            inicio = date(self.ano - 3, 1, 1) + timedelta(days=rng.randrange(1000))
+            multa = _valor_br(round(rng.lognormvariate(10, 1.2), 2)) if rng.random() < 0.3 else ""
+            arquivo.escrever(["CEIS", formatar_cnpj(cnpj), nome, rng.choice(SANCOES), inicio.strftime("%d/%m/%Y"),
+                              f"PREFEITURA MUNICIPAL DE {rng.choice(self.municipios)[2]}", rng.choice(UFS), multa])
+        return arquivo.fechar()
+
+    # ── CÂMARA ───────────────────────────────────────────────────────────────
+    def ceap(self, pasta: str) -> dict:
+        cabecalho = ["txNomeParlamentar", "cpf", "ideCadastro", "nuCarteiraParlamentar", "nuLegislatura", "sgUF",
+                     "sgPartido", "codLegislatura", "numSubCota", "txtDescricao", "txtFornecedor", "txtCNPJCPF",
+                     "txtNumero", "indTipoDocumento", "datEmissao", "vlrDocumento", "vlrGlosa", "vlrLiquido",
+                     "numMes", "numAno", "numParcela", "ideDocumento"]
+        arquivo = _ArquivoZip(os.path.join(pasta, f"ceap_camara_{self.ano}.csv.zip"), f"Ano-{self.ano}.csv",
+                              "utf-8-sig", cabecalho, csv.QUOTE_ALL)
+        for i in range(self.n["ceap"]):
+            rng = self.rng
+            if rng.random() < 0.02:
+                # Lideranças partidárias: sem ideCadastro, o injetor descarta.
+                ide, nome, uf, partido = "", f"LIDERANÇA DO {rng.choice(PARTIDOS)}", "NA", ""
+            else:
+                ide, nome, uf, partido = self.deputados[_cauda(rng, len(self.deputados), 1.5)]
+            if rng.random() < 0.1:
+                documento, fornecedor = f"{rng.randrange(10 ** 11):011d}", self._nome()  # pessoa física
+            else:
+                documento, fornecedor, _ = self.fornecedores[_cauda(rng, len(self.fornecedores), 4)]
+            mes = rng.randint(1, 12)
+            valor = round(rng.lognormvariate(6.5, 1.1), 2)
+            emissao = date(self.ano, mes, rng.randint(1, 28))
+            arquivo.escrever([nome, "", ide, "", 57, uf, partido, 57, rng.randrange(1, 15), rng.choice(DESPESAS_CEAP),
+                              fornecedor, documento, rng.randrange(10 ** 6), 0, f"{emissao.isoformat()}T00:00:00",
+                              f"{valor:.2f}", "0", f"{valor:.2f}", mes, self.ano, 0, 7000000 + i])
+        return arquivo.fechar()
+
+    # ── RECEITA ──────────────────────────────────────────────────────────────
+    def receita(self, pasta: str) -> dict:
+        """Dump da RFB (sem cabeçalho) para os fornecedores da CEAP e as sancionadas do CEIS."""
+        pasta = os.path.join(pasta, "receita")
+        os.makedirs(pasta, exist_ok=True)
+        municipios = _ArquivoZip(os.path.join(pasta, "Municipios.zip"), "F.K03200$Z.D40510.MUNICCSV",
+                                 "latin-1", aspas=csv.QUOTE_ALL)
+        for codigo, _, nome in self.municipios:
+            municipios.escrever([codigo, nome])
+
+        empresas = _ArquivoZip(os.path.join(pasta, "Empresas0.zip"), "K3241.K03200Y0.D40510.EMPRECSV",
+                               "latin-1", aspas=csv.QUOTE_ALL)
+        estabelecimentos = _ArquivoZip(os.path.join(pasta, "Estabelecimentos0.zip"),
+                                       "K3241.K03200Y0.D40510.ESTABELE", "latin-1", aspas=csv.QUOTE_ALL)
+        socios = _ArquivoZip(os.path.join(pasta, "Socios0.zip"), "K3241.K03200Y0.D40510.SOCIOCSV", "latin-1",
+                             aspas=csv.QUOTE_ALL)
+        total = self.n["fornecedores"] + self.n["ceis"]
+        for i in range(total):
+            rng = self.rng
+            basico = cnpj_basico(i)
+            if i < len(self.fornecedores):
+                cnpj, razao, (codigo, uf, _) = self.fornecedores[i]
+            else:
+                cnpj, razao = cnpj_com_dv(basico), f"{rng.choice(SOBRENOMES)} {rng.choice(RAMOS)} {rng.choice(SUFIXOS)}"
+                codigo, uf, _ = rng.choice(self.municipios)
+            capital = round(rng.choice((1000, 10000, 50000, 100000, 1000000)) * rng.uniform(0.5, 3), 2)
+            empresas.escrever([basico, razao, "2062", "49", _valor_br(capital), rng.choice(("01", "03", "05")), ""])
+            abertura = date(self.ano, 1, 1) - timedelta(days=int(rng.expovariate(1 / 2500)))
+            linha = [""] * 30
+            linha[0:3] = [basico, cnpj[8:12], cnpj[12:]]
+            linha[3:6] = ["1", razao.split()[0] if rng.random() < 0.5 else "", "02"]
+            linha[10:12] = [abertura.strftime("%Y%m%d"), rng.choice(CNAES)]
+            linha[13:21] = ["RUA", f"{rng.choice(SOBRENOMES)} {rng.choice(PRENOMES)}", str(rng.randrange(1, 3000)),
+                            "", "CENTRO", f"{rng.randrange(10 ** 8):08d}", uf, codigo]
+            estabelecimentos.escrever(linha)
+            for _ in range(rng.choice((1, 1, 2, 2, 3))):
+                entrada = abertura + timedelta(days=rng.randrange(0, 365))
+                socios.escrever([basico, "2", self._nome(), f"***{rng.randrange(10 ** 6):06d}**", "49",
+                                 entrada.strftime("%Y%m%d"), "", "***000000**", "", "00", str(rng.randint(2, 8))])
+        return {nome: arquivo.fechar() for nome, arquivo in (("municipios", municipios), ("empresas", empresas),
+                                                             ("estabelecimentos", estabelecimentos),
+                                                             ("socios", socios))}
+
+    def gerar(self, pasta: str) -> dict:
+        os.makedirs(pasta, exist_ok=True)
+        inicio = time.perf_counter()
+        arquivos = {}
+        for nome in ("candidatos", "bens", "ceis", "ceap", "receita"):
+            t0 = time.perf_counter()
+            arquivos[nome] = getattr(self, nome)(pasta)
+            logger.info(f"  ✅ {nome}: {time.perf_counter() - t0:.1f}s")
+        manifesto = {
+            "escala": self.escala, "ano": self.ano, "semente": self.semente, "reparticao": self.n,
+            "arquivos": arquivos, "amostras": self.amostras,
+            "ufs": sorted({uf for _, uf, _ in self.municipios}),
+            "duracao_s": round(time.perf_counter() - inicio, 2),
+        }
+        with open(os.path.join(pasta, "manifesto.json"), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        return manifesto
+
+
+def carregar_manifesto(pasta: str) -> dict:
+    with open(os.path.join(pasta, "manifesto.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Gera dumps sintéticos (TSE, CEIS, CEAP, Receita) para benchmarks")
+    parser.add_argument("--escala", type=int, default=100000, help="Total aproximado de linhas (1.000 a 10.000.000)")
+    parser.add_argument("--ano", type=int, default=2024)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=PASTA_PADRAO, help=f"Pasta de saída (padrão: {PASTA_PADRAO})")
+    args = parser.parse_args()
+
+    manifesto = GeradorSintetico(args.escala, args.ano, args.semente).gerar(args.saida)
+    linhas = sum(a["linhas"] for nome, a in manifesto["arquivos"].items() if nome != "receita") + \
+        sum(a["linhas"] for a in manifesto["arquivos"]["receita"].values())
+    logger.info(f"🏁 {linhas:,} linhas em {manifesto['duracao_s']}s → {args.saida}")
@@ -0,0 +1,149 @@
+"""
+backend/benchmarks/resultados.py
+
+Resultados dos benchmarks: resumo de latências e um JSON por execução
+=====================================================================
+Cada harness grava `estado/benchmarks/<nome>-<AAAAMMDD-HHMMSS>.json` com os
+parâmetros, o ambiente (commit, Python, CPUs, versão do Neo4j quando houver)
+e os números. Os resultados são dicts aninhados por nome (etapa, faixa de
+grau, rota...), então duas execuções se comparam folha a folha:
+
+    python -m benchmarks.resultados estado/benchmarks/injetor-A.json estado/benchmarks/injetor-B.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RESULTADOS = os.getenv("BENCHMARKS_RESULTADOS", os.path.join(BASE_DIR, "estado", "benchmarks"))
+
+
+def percentil(ordenados: list, fracao: float) -> float:
+    """Percentil por interpolação linear numa lista já ordenada."""
+    if not ordenados:
+        return 0.0
+    posicao = (len(ordenados) - 1) * fracao
+    abaixo = int(posicao)
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    return ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * (posicao - abaixo)
+
+
+def resumo(segundos: list) -> dict:
+    """Latências (em segundos) resumidas em ms: contagem, média, p50/p90/p95/p99 e máximo."""
+    ordenados = sorted(segundos)
+    if not ordenados:
+        return {"n": 0}
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "n": len(ordenados),
+        "media_ms": ms(sum(ordenados) / len(ordenados)),
+        "p50_ms": ms(percentil(ordenados, 0.50)),
+        "p90_ms": ms(percentil(ordenados, 0.90)),
+        "p95_ms": ms(percentil(ordenados, 0.95)),
+        "p99_ms": ms(percentil(ordenados, 0.99)),
+        "max_ms": ms(ordenados[-1]),
+    }
+
+
+def medir(funcao, repeticoes: int = 1, aquecimento: int = 0) -> tuple[list, object]:
+    """Roda `funcao()` (aquecimento + repetições); devolve (latências em s, último retorno)."""
+    retorno = None
+    for _ in range(aquecimento):
+        retorno = funcao()
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao()
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, retorno
+
+
+def _commit() -> str | None:
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                               text=True, timeout=5)
+        return saida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ambiente(neo4j=None) -> dict:
+    """Onde a execução rodou; com uma conexão Neo4j, inclui versão e edição do servidor."""
+    dados = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    if neo4j is not None:
+        try:
+            componente = neo4j.execute_query(
+                "CALL dbms.components() YIELD name, versions, edition RETURN versions[0] AS versao, edition",
+                nome="benchmarks.versao")[0]
+            dados["neo4j"] = {"versao": componente["versao"], "edicao": componente["edition"]}
+        except Exception as e:
+            dados["neo4j"] = {"erro": str(e)}
+    return dados
+
+
+def salvar(nome: str, parametros: dict, resultados: dict, ambiente_execucao: dict = None,
+           pasta: str = None) -> str:
+    """Grava o JSON da execução e devolve o caminho."""
+    pasta = pasta or PASTA_RESULTADOS
+    os.makedirs(pasta, exist_ok=True)
+    agora = datetime.now()
+    caminho = os.path.join(pasta, f"{nome}-{agora:%Y%m%d-%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({
+            "benchmark": nome,
+            "data": agora.isoformat(timespec="seconds"),
+            "ambiente": ambiente_execucao or ambiente(),
+            "parametros": parametros,
+            "resultados": resultados,
+        }, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def _folhas(dado, prefixo: str = "") -> dict:
+    """Achata os números de um resultado em {"etapa.tse_bens.linhas_por_s": 1234.5, ...}."""
+    if isinstance(dado, dict):
+        folhas = {}
+        for chave, valor in dado.items():
+            folhas.update(_folhas(valor, f"{prefixo}.{chave}" if prefixo else str(chave)))
+        return folhas
+    if isinstance(dado, (int, float)) and not isinstance(dado, bool):
+        return {prefixo: dado}
+    return {}
+
+
+def comparar(base: dict, novo: dict) -> list[tuple[str, float, float, float | None]]:
+    """(métrica, base, novo, variação relativa) para cada número presente nas duas execuções."""
+    a, b = _folhas(base.get("resultados", {})), _folhas(novo.get("resultados", {}))
+    return [(chave, a[chave], b[chave], (b[chave] - a[chave]) / a[chave] if a[chave] else None)
+            for chave in a if chave in b]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara duas execuções de um benchmark")
+    parser.add_argument("base", help="JSON da execução de referência")
+    parser.add_argument("novo", help="JSON da execução a comparar")
+    parser.add_argument("--filtro", default="", help="Só métricas que contêm este texto (ex.: p95_ms)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.novo, encoding="utf-8") as f:
+        novo = json.load(f)
+    if base.get("benchmark") != novo.get("benchmark"):
+        print(f"⚠️ Benchmarks diferentes: {base.get('benchmark')} x {novo.get('benchmark')}", file=sys.stderr)
+    print(f"{'métrica':<60} {'base':>14} {'novo':>14} {'variação':>9}")
+    for chave, antes, depois, variacao in comparar(base, novo):
+        if args.filtro in chave:
+            delta = f"{variacao:+.1%}" if variacao is not None else "—"
+            print(f"{chave:<60} {antes:>14,.3f} {depois:>14,.3f} {delta:>9}")
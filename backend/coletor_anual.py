@@ -23,6 +23,9 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 
+from telemetria import ganchos_httpx, iniciar_exportador, UPSTREAM_BYTES
+from rastreamento import span, iniciar_rastreamento
+
 # ── CONFIGURAÇÃO DE LOGGING OBRIGATÓRIA ──────────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -90,7 +93,8 @@ class MotorExtracaoGoverno:
             headers={
                 "User-Agent": "GovTech-Trasparente/3.0 (Auditoria Cidada; opensource)",
                 "Accept":     "application/json, text/csv, application/zip, */*",
-            }
+            },
+            event_hooks=ganchos_httpx(),
         )
         self.stats = {"ok": 0, "erro": 0, "bytes": 0}
 
@@ -125,6 +129,7 @@ class MotorExtracaoGoverno:
                             ultimo_log = bytes_baixados
 
                 self.stats["bytes"] += bytes_baixados
+                UPSTREAM_BYTES.incrementar(bytes_baixados, fonte=resp.url.host)
                 self.stats["ok"]    += 1
                 logger.info(f"  ✅ CONCLUÍDO: {caminho_destino} ({bytes_baixados/1024/1024:.2f} MB)")
                 return True
@@ -421,5 +426,8 @@ if __name__ == "__main__":
                         help="Após download, injeta os CSVs no Neo4j automaticamente")
     args = parser.parse_args()
 
-    asyncio.run(main(ano=args.ano, fontes=[args.fonte], force=args.force, injetar=args.injetar))
+    iniciar_exportador("coletor_anual")
+    iniciar_rastreamento("coletor_anual")
+    with span("coletor_anual"):
+        asyncio.run(main(ano=args.ano, fontes=[args.fonte], force=args.force, injetar=args.injetar))
 
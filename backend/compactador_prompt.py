@@ -0,0 +1,161 @@
+"""
+backend/compactador_prompt.py
+
+Compactação do subgrafo antes do envio ao LLM
+=============================================
+O subgrafo ia para a mensagem como json.dumps(indent=2): espaço em branco e
+as mesmas chaves repetidas em cada linha. Para políticos com centenas de bens
+ou sócios, isso estoura o orçamento de tokens. Aqui o subgrafo vira:
+
+  - tabelas: cada lista de objetos vira {"colunas": [...], "linhas": [[...]]};
+  - referências: nomes longos repetidos (empresas, sócios) viram "#n", com a
+    legenda uma única vez em "referencias";
+  - top-K por valor: só as K linhas de maior valor monetário vão por extenso;
+  - cauda: o restante é resumido em estatísticas (quantidade, soma, média,
+    máximo e contagem por tipo/relação).
+
+Nada de rede nem de banco: função pura, chamada pelo motor a cada auditoria.
+"""
+
+import os
+import json
+import math
+from collections import Counter
+from typing import Dict, Any
+
+try:
+    import tiktoken
+    _CODIFICADOR = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken é opcional: sem ele, estimativa por caracteres
+    _CODIFICADOR = None
+
+COMPACTACAO_VERSAO = "1"   # Incrementar ao mudar o formato (entra na chave do cache de laudos)
+TOP_K_PADRAO = int(os.getenv("IA_TOP_K", "40"))
+TAMANHO_MIN_REFERENCIA = 12  # nomes menores que isso não compensam virar "#n"
+CAMPOS_CATEGORIA = ("tipo", "relacao", "nivel")
+_CHAVES_ESTRUTURA = {"colunas", "campo"}  # nomes de coluna nunca viram referência
+
+
+def estimar_tokens(texto: str) -> int:
+    if _CODIFICADOR is not None:
+        return len(_CODIFICADOR.encode(texto))
+    return math.ceil(len(texto) / 3.5)  # média observada em JSON em português
+
+
+def _json_compacto(valor) -> str:
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _campo_valor(linhas: list) -> str | None:
+    """Coluna monetária usada no ranking: a primeira chave com 'valor' que tenha números."""
+    for chave in dict.fromkeys(k for linha in linhas for k in linha):
+        if ("valor" in chave.lower() or "contratos" in chave.lower()) and any(
+                isinstance(linha.get(chave), (int, float)) for linha in linhas):
+            return chave
+    return None
+
+
+def _celula(v):
+    return round(v, 2) if isinstance(v, float) else v
+
+
+def _numero(v) -> float:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else 0.0
+
+
+def _resumir_cauda(linhas: list, campo_valor: str | None) -> dict:
+    cauda = {"omitidos": len(linhas)}
+    if campo_valor:
+        valores = [_numero(l.get(campo_valor)) for l in linhas]
+        cauda.update({
+            "campo": campo_valor,
+            "soma": round(sum(valores), 2),
+            "media": round(sum(valores) / len(valores), 2),
+            "max": round(max(valores), 2),
+        })
+    for campo in CAMPOS_CATEGORIA:
+        contagem = Counter(l.get(campo) for l in linhas if l.get(campo) is not None)
+        if contagem:
+            cauda[f"por_{campo}"] = dict(contagem.most_common(10))
+    return cauda
+
+
+def _tabela(linhas: list, top_k: int) -> dict:
+    linhas = [l for l in linhas if any(v not in (None, "", [], {}) for v in l.values())]
+    campo_valor = _campo_valor(linhas)
+    if campo_valor:
+        linhas = sorted(linhas, key=lambda l: _numero(l.get(campo_valor)), reverse=True)
+    topo, resto = linhas[:top_k], linhas[top_k:]
+
+    # Colunas na ordem de aparição, descartando as que são nulas em todo o topo.
+    colunas = [c for c in dict.fromkeys(k for l in topo for k in l)
+               if any(l.get(c) not in (None, "") for l in topo)]
+    tabela = {"colunas": colunas, "linhas": [[_celula(l.get(c)) for c in colunas] for l in topo]}
+    if resto:
+        tabela["cauda"] = _resumir_cauda(resto, campo_valor)
+    return tabela
+
+
+def _referenciar(estrutura, contagem: Counter, refs: dict):
+    """Troca strings longas repetidas por '#n' (legenda em refs)."""
+    if isinstance(estrutura, dict):
+        return {k: v if k in _CHAVES_ESTRUTURA else _referenciar(v, contagem, refs)
+                for k, v in estrutura.items()}
+    if isinstance(estrutura, list):
+        return [_referenciar(v, contagem, refs) for v in estrutura]
+    if isinstance(estrutura, str) and contagem[estrutura] > 1:
+        if estrutura not in refs:
+            refs[estrutura] = f"#{len(refs) + 1}"
+        return refs[estrutura]
+    return estrutura
+
+
+def _contar_strings(estrutura, contagem: Counter):
+    if isinstance(estrutura, dict):
+        for k, v in estrutura.items():
+            if k not in _CHAVES_ESTRUTURA:
+                _contar_strings(v, contagem)
+    elif isinstance(estrutura, list):
+        for v in estrutura:
+            _contar_strings(v, contagem)
+    elif isinstance(estrutura, str) and len(estrutura) >= TAMANHO_MIN_REFERENCIA and " " in estrutura:
+        # Só nomes (com espaço): rótulos como "BemDeclarado" ficam legíveis.
+        contagem[estrutura] += 1
+
+
+def compactar_teia(teia: Dict[str, Any], top_k: int = TOP_K_PADRAO) -> tuple[str, dict]:
+    """
+    Devolve (texto compacto para a mensagem do usuário, medidas) onde medidas
+    traz tokens_antes (indent=2, o formato antigo), tokens_depois e linhas omitidas.
+    """
+    compacta, omitidas = {}, 0
+    for chave, valor in teia.items():
+        if isinstance(valor, list) and valor and all(isinstance(v, dict) for v in valor):
+            tabela = _tabela(valor, top_k)
+            omitidas += tabela.get("cauda", {}).get("omitidos", 0)
+            compacta[chave] = tabela
+        elif valor not in (None, "", [], {}):
+            compacta[chave] = valor
+
+    contagem = Counter()
+    _contar_strings(compacta, contagem)
+    refs: dict = {}
+    compacta = _referenciar(compacta, contagem, refs)
+    if refs:
+        compacta["referencias"] = {ref: texto for texto, ref in refs.items()}
+
+    texto = _json_compacto(compacta)
+    medidas = {
+        "tokens_antes": estimar_tokens(json.dumps(teia, ensure_ascii=False, indent=2, default=str)),
+        "tokens_depois": estimar_tokens(texto),
+        "linhas_omitidas": omitidas,
+        "referencias": len(refs),
+    }
+    return texto, medidas
+
+
+INSTRUCAO_FORMATO = (
+    "Formato dos dados: cada lista vem como tabela {\"colunas\", \"linhas\"}, ordenada do maior "
+    "para o menor valor; \"cauda\" resume as linhas omitidas (menores valores); textos \"#n\" "
+    "são referências expandidas em \"referencias\"."
+)
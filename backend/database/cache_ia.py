@@ -0,0 +1,169 @@
+"""
+backend/database/cache_ia.py
+
+Cache persistente de laudos da IA (endereçado por conteúdo)
+===========================================================
+A chave é o SHA-256 canônico de (modelo, versão do prompt, subgrafo
+normalizado): se a teia de um político não mudou desde a última auditoria,
+o laudo volta do SQLite em milissegundos, sem nova chamada paga ao LLM.
+
+  - TTL: entradas mais velhas que IA_CACHE_TTL_DIAS são ignoradas e removidas;
+  - tamanho: acima de IA_CACHE_MAX_ENTRADAS, as menos usadas recentemente saem;
+  - só laudos reais do LLM são gravados (fallbacks nunca entram no cache).
+
+Manutenção:
+    python -m database.cache_ia --estatisticas
+    python -m database.cache_ia --limpar
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+
+from telemetria import registrar_cache
+
+logger = logging.getLogger("CacheIA")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_IA_DB = os.getenv("CACHE_IA_DB", os.path.join(BASE_DIR, "estado", "cache_ia.sqlite3"))
+CACHE_IA_TTL_DIAS = float(os.getenv("IA_CACHE_TTL_DIAS", "30"))
+CACHE_IA_MAX_ENTRADAS = int(os.getenv("IA_CACHE_MAX_ENTRADAS", "50000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS laudos (
+    chave          TEXT PRIMARY KEY,
+    modelo         TEXT NOT NULL,
+    prompt_versao  TEXT NOT NULL,
+    laudo          TEXT NOT NULL,
+    criado_em      REAL NOT NULL,
+    ultimo_acesso  REAL NOT NULL,
+    acertos        INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS laudos_ultimo_acesso_idx ON laudos (ultimo_acesso);
+"""
+
+
+def _normalizar(valor):
+    """
+    Forma canônica do subgrafo: chaves ordenadas e listas ordenadas pelo
+    próprio conteúdo (o Neo4j não garante a ordem das linhas entre execuções).
+    """
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in sorted(valor.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(valor, (list, tuple, set)):
+        itens = [_normalizar(v) for v in valor]
+        return sorted(itens, key=lambda v: json.dumps(v, sort_keys=True, ensure_ascii=False, default=str))
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def chave_laudo(modelo: str, prompt_versao: str, teia: dict) -> str:
+    canonico = json.dumps(
+        {"modelo": modelo, "prompt_versao": prompt_versao, "teia": _normalizar(teia)},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+class CacheLaudosIA:
+    """Uma conexão por thread (o motor roda requisições em executores)."""
+
+    def __init__(self, caminho: str = CACHE_IA_DB, ttl_dias: float = CACHE_IA_TTL_DIAS,
+                 max_entradas: int = CACHE_IA_MAX_ENTRADAS):
+        self.caminho = caminho
+        self.ttl = ttl_dias * 86400
+        self.max_entradas = max_entradas
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def obter(self, chave: str) -> dict | None:
+        """Laudo + metadados da entrada, ou None se ausente/expirada."""
+        agora = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT laudo, modelo, prompt_versao, criado_em, acertos FROM laudos WHERE chave = ?",
+            (chave,)).fetchone()
+        if row is None:
+            registrar_cache("laudos_ia", "falta")
+            return None
+        laudo, modelo, prompt_versao, criado_em, acertos = row
+        with conn:
+            if agora - criado_em > self.ttl:
+                conn.execute("DELETE FROM laudos WHERE chave = ?", (chave,))
+                registrar_cache("laudos_ia", "expirado")
+                return None
+            conn.execute("UPDATE laudos SET ultimo_acesso = ?, acertos = acertos + 1 WHERE chave = ?",
+                         (agora, chave))
+        registrar_cache("laudos_ia", "acerto")
+        return {"laudo": json.loads(laudo), "modelo": modelo, "prompt_versao": prompt_versao,
+                "criado_em": criado_em, "acertos": acertos + 1}
+
+    def gravar(self, chave: str, modelo: str, prompt_versao: str, laudo: dict):
+        agora = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO laudos (chave, modelo, prompt_versao, laudo, criado_em, ultimo_acesso, acertos) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (chave, modelo, prompt_versao, json.dumps(laudo, ensure_ascii=False, separators=(",", ":")),
+                 agora, agora))
+            excesso = conn.execute("SELECT count(*) FROM laudos").fetchone()[0] - self.max_entradas
+            if excesso > 0:
+                # Remove um pouco além do excesso para não despejar a cada gravação.
+                conn.execute(
+                    "DELETE FROM laudos WHERE chave IN "
+                    "(SELECT chave FROM laudos ORDER BY ultimo_acesso LIMIT ?)",
+                    (excesso + max(1, self.max_entradas // 20),))
+
+    def limpar_expirados(self) -> int:
+        conn = self._conn()
+        with conn:
+            cur = conn.execute("DELETE FROM laudos WHERE criado_em < ?", (time.time() - self.ttl,))
+        return cur.rowcount
+
+    def estatisticas(self) -> dict:
+        total, acertos = self._conn().execute("SELECT count(*), COALESCE(sum(acertos), 0) FROM laudos").fetchone()
+        return {"entradas": total, "acertos_acumulados": acertos, "max_entradas": self.max_entradas,
+                "ttl_dias": self.ttl / 86400, "caminho": self.caminho}
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_cache_ia() -> CacheLaudosIA:
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = CacheLaudosIA()
+    return _cache
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Cache persistente de laudos da IA")
+    parser.add_argument("--estatisticas", action="store_true", help="Mostra tamanho e acertos do cache")
+    parser.add_argument("--limpar", action="store_true", help="Remove as entradas expiradas (TTL)")
+    args = parser.parse_args()
+    if args.limpar:
+        logger.info(f"🧹 {get_cache_ia().limpar_expirados()} laudo(s) expirado(s) removido(s)")
+    if args.estatisticas or not args.limpar:
+        print(json.dumps(get_cache_ia().estatisticas(), indent=2, ensure_ascii=False))
@@ -0,0 +1,318 @@
+"""
+backend/database/cnpj_local.py
+
+Base local (somente leitura) de CNPJ/QSA construída a partir do dump da Receita
+=================================================================================
+O dump público da RFB (Empresas*.zip, Estabelecimentos*.zip, Socios*.zip,
+Municipios*.zip) é convertido UMA vez num SQLite chaveado por CNPJ
+(tabelas WITHOUT ROWID + mmap), e as consultas por CNPJ respondem em
+microssegundos, sem rede.
+
+A BrasilAPI fica apenas como fallback para CNPJs que a base não conhece.
+
+Construção:
+    python -m database.cnpj_local --dump ./dados_receita
+"""
+
+import os
+import io
+import csv
+import glob
+import time
+import sqlite3
+import zipfile
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+
+import requests
+
+from telemetria import ganchos_requests, registrar_cache
+
+logger = logging.getLogger("CnpjLocal")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CNPJ_LOCAL_DB = os.getenv("CNPJ_LOCAL_DB", os.path.join(BASE_DIR, "estado", "cnpj_receita.sqlite3"))
+BRASILAPI_CNPJ = "https://brasilapi.com.br/api/cnpj/v1"
+
+SCHEMA = """
+CREATE TABLE empresas (
+    cnpj_basico TEXT PRIMARY KEY,
+    razao_social TEXT,
+    natureza_juridica TEXT,
+    capital_social REAL,
+    porte TEXT
+) WITHOUT ROWID;
+CREATE TABLE estabelecimentos (
+    cnpj TEXT PRIMARY KEY,
+    nome_fantasia TEXT,
+    situacao_cadastral TEXT,
+    data_inicio_atividade TEXT,
+    cnae_fiscal TEXT,
+    logradouro TEXT,
+    numero TEXT,
+    complemento TEXT,
+    bairro TEXT,
+    cep TEXT,
+    uf TEXT,
+    municipio TEXT
+) WITHOUT ROWID;
+CREATE TABLE socios (
+    cnpj_basico TEXT,
+    nome_socio TEXT,
+    cnpj_cpf_do_socio TEXT,
+    qualificacao_socio TEXT,
+    data_entrada_sociedade TEXT
+);
+"""
+
+
+def _limpar_cnpj(cnpj: str) -> str:
+    return "".join(c for c in str(cnpj or "") if c.isdigit())
+
+
+def _data_iso(aaaammdd: str) -> str | None:
+    """A Receita grava datas como AAAAMMDD ('0' ou vazio quando ausente)."""
+    if not aaaammdd or len(aaaammdd) != 8 or not aaaammdd.isdigit():
+        return None
+    return f"{aaaammdd[:4]}-{aaaammdd[4:6]}-{aaaammdd[6:]}"
+
+
+def _linhas_dump(pasta: str, prefixo: str):
+    """Lê em streaming todos os CSVs de `{prefixo}*.zip` (latin-1, ';', sem cabeçalho)."""
+    for caminho in sorted(glob.glob(os.path.join(pasta, f"{prefixo}*.zip"))):
+        logger.info(f"  📖 {os.path.basename(caminho)}")
+        with zipfile.ZipFile(caminho) as z:
+            for nome in z.namelist():
+                with z.open(nome) as bruto:
+                    f = io.TextIOWrapper(bruto, encoding="latin-1", errors="replace", newline="")
+                    yield from csv.reader(f, delimiter=";")
+
+
+def construir_base(pasta_dump: str, destino: str = CNPJ_LOCAL_DB, lote: int = 50000) -> str:
+    """
+    Converte o dump da Receita no SQLite de consulta. Escreve num arquivo
+    temporário e troca por rename no final: leitores nunca veem base pela metade.
+    """
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp = destino + ".construindo"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF; PRAGMA cache_size=-1000000;")
+    conn.executescript(SCHEMA)
+    t0 = time.time()
+
+    municipios = {r[0]: r[1] for r in _linhas_dump(pasta_dump, "Municipios") if len(r) >= 2}
+
+    def carregar(prefixo, sql, transformar):
+        total, buffer = 0, []
+        for r in _linhas_dump(pasta_dump, prefixo):
+            linha = transformar(r)
+            if linha is None:
+                continue
+            buffer.append(linha)
+            if len(buffer) >= lote:
+                conn.executemany(sql, buffer)
+                total += len(buffer)
+                buffer = []
+                if total % 1000000 == 0:
+                    logger.info(f"  ⏳ {prefixo}: {total:,} linhas | {total / (time.time() - t0):,.0f} lin/s")
+        if buffer:
+            conn.executemany(sql, buffer)
+            total += len(buffer)
+        conn.commit()
+        logger.info(f"  ✅ {prefixo}: {total:,} linhas")
+
+    def empresa(r):
+        if len(r) < 6:
+            return None
+        try:
+            capital = float(r[4].replace(".", "").replace(",", "."))
+        except ValueError:
+            capital = 0.0
+        return (r[0], r[1].strip(), r[2], capital, r[5])
+
+    def estabelecimento(r):
+        if len(r) < 21:
+            return None
+        logradouro = f"{r[13]} {r[14]}".strip()
+        return (r[0] + r[1] + r[2], r[4].strip() or None, r[5], _data_iso(r[10]), r[11],
+                logradouro, r[15], r[16], r[17], r[18], r[19], municipios.get(r[20], r[20]))
+
+    def socio(r):
+        if len(r) < 6:
+            return None
+        return (r[0], r[2].strip().upper(), r[3], r[4], _data_iso(r[5]))
+
+    carregar("Empresas", "INSERT OR REPLACE INTO empresas VALUES (?,?,?,?,?)", empresa)
+    carregar("Estabelecimentos", "INSERT OR REPLACE INTO estabelecimentos VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", estabelecimento)
+    carregar("Socios", "INSERT INTO socios VALUES (?,?,?,?,?)", socio)
+
+    logger.info("  🛠️  Indexando sócios por CNPJ...")
+    conn.execute("CREATE INDEX socios_cnpj_basico_idx ON socios (cnpj_basico)")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    os.replace(tmp, destino)
+    logger.info(f"  🏁 Base CNPJ local pronta em {destino} ({time.time() - t0:.0f}s)")
+    return destino
+
+
+class CnpjLocal:
+    """
+    Leitor da base local. Uma conexão somente-leitura por thread (FastAPI e
+    os workers consultam de threads diferentes) e mmap para servir páginas
+    direto do cache do SO.
+    """
+
+    def __init__(self, caminho: str = CNPJ_LOCAL_DB):
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(caminho)
+        self.caminho = caminho
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.caminho}?mode=ro", uri=True)
+            conn.execute("PRAGMA mmap_size=30000000000")
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+        return conn
+
+    def buscar(self, cnpj: str) -> dict | None:
+        """Dados cadastrais + QSA no formato da BrasilAPI (subconjunto). None se ausente."""
+        cnpj = _limpar_cnpj(cnpj)
+        if len(cnpj) not in (8, 14):
+            return None
+        basico = cnpj[:8]
+        conn = self._conn()
+        emp = conn.execute(
+            "SELECT razao_social, natureza_juridica, capital_social, porte FROM empresas WHERE cnpj_basico = ?",
+            (basico,)).fetchone()
+        if emp is None:
+            return None
+
+        dados = {
+            "cnpj": cnpj, "razao_social": emp[0], "natureza_juridica": emp[1],
+            "capital_social": emp[2], "porte": emp[3], "fonte": "receita_local",
+        }
+        if len(cnpj) == 14:
+            est = conn.execute(
+                "SELECT nome_fantasia, situacao_cadastral, data_inicio_atividade, cnae_fiscal, logradouro, "
+                "numero, complemento, bairro, cep, uf, municipio FROM estabelecimentos WHERE cnpj = ?",
+                (cnpj,)).fetchone()
+            if est:
+                dados.update(zip(("nome_fantasia", "situacao_cadastral", "data_inicio_atividade", "cnae_fiscal",
+                                  "logradouro", "numero", "complemento", "bairro", "cep", "uf", "municipio"), est))
+        dados["qsa"] = [
+            {"nome_socio": s[0], "cnpj_cpf_do_socio": s[1], "qualificacao_socio": s[2], "data_entrada_sociedade": s[3]}
+            for s in conn.execute(
+                "SELECT nome_socio, cnpj_cpf_do_socio, qualificacao_socio, data_entrada_sociedade "
+                "FROM socios WHERE cnpj_basico = ?", (basico,))
+        ]
+        return dados
+
+
+def propriedades_empresa(dados: dict) -> dict:
+    """
+    Extrai, de um registro local ou da BrasilAPI, as propriedades gravadas no
+    nó :Empresa (capital, abertura e endereço alimentam as heurísticas de risco).
+    """
+    endereco = ", ".join(str(dados.get(k)).strip() for k in ("logradouro", "numero", "bairro", "cep")
+                         if dados.get(k))
+    props = {
+        "capital_social": float(dados.get("capital_social") or 0.0),
+        "data_abertura": dados.get("data_inicio_atividade"),
+        "endereco": endereco.upper() or None,
+        "municipio": (dados.get("municipio") or "").upper() or None,
+        "uf": dados.get("uf"),
+        "cnae": str(dados.get("cnae_fiscal") or "") or None,
+    }
+    return {k: v for k, v in props.items() if v is not None}
+
+
+_base_local = None
+_base_carregada = False
+_GANCHOS_BRASILAPI = ganchos_requests("brasilapi")
+_cache_remoto: "OrderedDict[str, dict]" = OrderedDict()
+_CACHE_REMOTO_MAX = 20000
+_lock = threading.Lock()
+
+
+def get_cnpj_local() -> CnpjLocal | None:
+    """Singleton da base local; None (com aviso único) se ela ainda não foi construída."""
+    global _base_local, _base_carregada
+    if not _base_carregada:
+        with _lock:
+            if not _base_carregada:
+                try:
+                    _base_local = CnpjLocal()
+                    logger.info(f"🗄️  Base CNPJ local ativa: {_base_local.caminho}")
+                except FileNotFoundError:
+                    logger.warning(f"⚠️  Base CNPJ local ausente ({CNPJ_LOCAL_DB}). Usando só a BrasilAPI.")
+                _base_carregada = True
+    return _base_local
+
+
+def consultar_cnpj(cnpj: str, remoto: bool = True) -> dict | None:
+    """
+    Consulta o CNPJ na base local; se ela não tiver o registro, cai para a
+    BrasilAPI. O LRU em memória guarda as respostas definitivas (dados ou 404);
+    falhas transitórias (429, 5xx, timeout) não são guardadas e a próxima
+    consulta tenta de novo.
+    """
+    cnpj = _limpar_cnpj(cnpj)
+    base = get_cnpj_local()
+    if base:
+        dados = base.buscar(cnpj)
+        if dados:
+            registrar_cache("cnpj", "base_local")
+            return dados
+    if not remoto:
+        registrar_cache("cnpj", "falta")
+        return None
+
+    with _lock:
+        if cnpj in _cache_remoto:
+            _cache_remoto.move_to_end(cnpj)
+            registrar_cache("cnpj", "lru")
+            return _cache_remoto[cnpj] or None
+    registrar_cache("cnpj", "falta")
+    dados = _buscar_brasilapi(cnpj)
+    if dados is None:
+        return None
+    with _lock:
+        _cache_remoto[cnpj] = dados
+        if len(_cache_remoto) > _CACHE_REMOTO_MAX:
+            _cache_remoto.popitem(last=False)
+    return dados or None
+
+
+def _buscar_brasilapi(cnpj: str) -> dict | None:
+    """Dados do CNPJ; {} se a BrasilAPI responde que ele não existe (404), None se não respondeu."""
+    try:
+        res = requests.get(f"{BRASILAPI_CNPJ}/{cnpj}", timeout=10, hooks=_GANCHOS_BRASILAPI)
+        if res.status_code == 200:
+            dados = res.json()
+            dados["fonte"] = "brasilapi"
+            return dados
+        if res.status_code == 404:
+            return {}
+        logger.warning(f"⚠️ BrasilAPI respondeu HTTP {res.status_code} para o CNPJ {cnpj}")
+        return None
+    except Exception as e:
+        logger.error(f"Erro ao buscar CNPJ {cnpj} na BrasilAPI: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Constrói a base local de CNPJ/QSA a partir do dump da Receita")
+    parser.add_argument("--dump", required=True, help="Pasta com Empresas*.zip, Estabelecimentos*.zip, Socios*.zip, Municipios*.zip")
+    parser.add_argument("--destino", default=CNPJ_LOCAL_DB, help=f"Arquivo SQLite de saída (padrão: {CNPJ_LOCAL_DB})")
+    args = parser.parse_args()
+    construir_base(args.dump, args.destino)
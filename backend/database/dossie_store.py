@@ -0,0 +1,459 @@
+"""
+backend/database/dossie_store.py
+
+Armazém único de dossiês (SQLite com coluna JSON)
+=================================================
+Substitui o "um JSON por político" (dossies/dossie_{id}.json e
+dossies/{UF}/{CIDADE}/dossie_{id}.json) por um único arquivo SQLite:
+  - chave primária em id, índices em (uf, cidade, score) e score;
+  - cada gravação é uma transação (atômica: leitor nunca vê dossiê pela metade);
+  - árvore UF → Cidade → Político vira consulta indexada, sem os.listdir;
+  - contagens, histograma de score e total de alto risco por UF/cidade ficam
+    em tabelas agregadas mantidas a cada gravação (nada é recontado na leitura);
+  - listagens paginadas por cursor (keyset), ordenadas por nome ou score;
+  - painel (top de risco, alertas recentes, distribuição por UF) sai dessas
+    mesmas tabelas, com um contador de versão que muda a cada gravação (ETag).
+
+Migração dos arquivos antigos:
+    python -m database.dossie_store --migrar dossies ../dossies
+"""
+
+import os
+import json
+import base64
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("DossieStore")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIES_DB = os.getenv("DOSSIES_DB", os.path.join(BASE_DIR, "estado", "dossies.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dossies (
+    id            TEXT PRIMARY KEY,
+    nome          TEXT,
+    uf            TEXT NOT NULL,
+    cidade        TEXT NOT NULL,
+    score         INTEGER,
+    atualizado_em TEXT NOT NULL,
+    dados         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dossies_uf_cidade_score_idx ON dossies (uf, cidade, score DESC);
+CREATE INDEX IF NOT EXISTS dossies_score_idx ON dossies (score DESC);
+CREATE INDEX IF NOT EXISTS dossies_pag_score_idx ON dossies (uf, cidade, COALESCE(score, -1) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS dossies_pag_nome_idx ON dossies (uf, cidade, COALESCE(nome, ''), id);
+CREATE INDEX IF NOT EXISTS dossies_uf_score_idx ON dossies (uf, score DESC);
+
+CREATE TABLE IF NOT EXISTS agregados_cidade (
+    uf          TEXT NOT NULL,
+    cidade      TEXT NOT NULL,
+    total       INTEGER NOT NULL,
+    com_score   INTEGER NOT NULL,
+    soma_score  INTEGER NOT NULL,
+    risco_alto  INTEGER NOT NULL,
+    PRIMARY KEY (uf, cidade)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS histograma_cidade (
+    uf      TEXT NOT NULL,
+    cidade  TEXT NOT NULL,
+    faixa   INTEGER NOT NULL,
+    total   INTEGER NOT NULL,
+    PRIMARY KEY (uf, cidade, faixa)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alertas_recentes (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_politico  TEXT NOT NULL,
+    nome         TEXT,
+    uf           TEXT NOT NULL,
+    cidade       TEXT NOT NULL,
+    nivel        TEXT NOT NULL,
+    mensagem     TEXT NOT NULL,
+    criado_em    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alertas_recentes_politico_idx ON alertas_recentes (id_politico);
+CREATE TABLE IF NOT EXISTS metadados (
+    chave  TEXT PRIMARY KEY,
+    valor  INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('versao', 0);
+"""
+
+LIMIAR_RISCO_ALTO = 70   # mesmo corte que o frontend usa para pintar o card de vermelho
+LIMITE_PAGINA_MAX = 500
+ALERTAS_MAX = 200          # alertas_recentes guarda só a cauda mais nova
+NIVEIS_ALERTA = ("CRÍTICO", "ALTO")
+
+# Chave de ordenação de cada listagem: (expressão SQL, direção). O cursor é a
+# chave da última linha entregue; a próxima página começa estritamente depois dela.
+_ORDEM_PASTAS = {
+    "nome": (("nome",), ">"),
+    "score": (("COALESCE(score_medio, -1)", "nome"), "<"),
+    "risco": (("risco_alto", "nome"), "<"),
+}
+_ORDEM_ARQUIVOS = {
+    "nome": (("COALESCE(nome, '')", "id"), ">"),
+    "score": (("COALESCE(score, -1)", "id"), "<"),
+}
+
+
+def _score_risco(dossie: dict):
+    """Score 0-100 nos dois formatos de dossiê (auditor em massa e agente)."""
+    score = (dossie.get("ia_analise") or {}).get("score_risco")
+    if score is None:
+        score = dossie.get("score_risco_calculado")
+    if score is None and dossie.get("pontos_perdidos") is not None:
+        score = int(dossie["pontos_perdidos"]) // 10
+    try:
+        return int(score) if score is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _chaves(dossie: dict) -> dict:
+    id_dossie = dossie.get("id") if dossie.get("id") is not None else dossie.get("id_politico")
+    if id_dossie in (None, ""):
+        raise ValueError("Dossiê sem 'id'/'id_politico'.")
+    return {
+        "id": str(id_dossie),
+        "nome": dossie.get("nome_politico") or dossie.get("nome"),
+        "uf": (dossie.get("uf") or "").upper().strip() or None,
+        "cidade": (dossie.get("cidade") or "").upper().strip().replace("/", "-").replace("\\", "-") or None,
+        "score": _score_risco(dossie),
+    }
+
+
+def _alertas(dossie: dict) -> list[tuple[str, str]]:
+    """(nivel, mensagem) das red_flags graves do laudo; mensagem = título sem Markdown."""
+    alertas = []
+    for flag in (dossie.get("ia_analise") or {}).get("red_flags") or []:
+        nivel = str(flag.get("nivel") or "").upper()
+        if nivel not in NIVEIS_ALERTA:
+            continue
+        linhas = [l.strip("# ").strip() for l in str(flag.get("motivo") or "").splitlines() if l.strip()]
+        if linhas:
+            alertas.append((nivel, linhas[0][:200]))
+    return alertas
+
+
+def _faixa(score) -> int:
+    """Faixa do histograma: 0 = 0-9, ..., 9 = 90-100; -1 = sem score."""
+    return -1 if score is None else min(max(int(score), 0) // 10, 9)
+
+
+def _rotulo_faixa(faixa: int) -> str:
+    return "sem_score" if faixa < 0 else f"{faixa * 10}-{faixa * 10 + 9 if faixa < 9 else 100}"
+
+
+def _codificar_cursor(chave: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(chave, ensure_ascii=False).encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Cursor inválido.")
+
+
+def _paginar(conn, sql_base: str, params: list, ordem: tuple, limite: int, cursor: str = None):
+    """
+    Paginação keyset sobre `sql_base` (subconsulta com as colunas usadas em `ordem`).
+    Devolve (linhas como dict, próximo cursor ou None).
+    """
+    expressoes, comparador = ordem
+    chave_sql, n_chave = ", ".join(expressoes), len(expressoes)
+    direcao = " DESC" if comparador == "<" else ""
+    order_by = ", ".join(e + direcao for e in expressoes)
+    limite = max(1, min(int(limite), LIMITE_PAGINA_MAX))
+    where, args = "", list(params)
+    if cursor:
+        chave = _decodificar_cursor(cursor)
+        if not isinstance(chave, list) or len(chave) != n_chave:
+            raise ValueError("Cursor inválido.")
+        where = f"WHERE ({chave_sql}) {comparador} ({', '.join('?' * n_chave)})"
+        args += chave
+    cur = conn.execute(f"SELECT *, {chave_sql} FROM ({sql_base}) {where} ORDER BY {order_by} LIMIT ?",
+                       args + [limite + 1])
+    colunas = [c[0] for c in cur.description][:-n_chave]
+    rows = cur.fetchall()
+    linhas = [dict(zip(colunas, r)) for r in rows[:limite]]
+    proximo = _codificar_cursor(list(rows[limite - 1][-n_chave:])) if len(rows) > limite else None
+    return linhas, proximo
+
+
+class DossieStore:
+    """Acesso ao armazém. Uma conexão por thread; WAL permite leitura durante gravação."""
+
+    def __init__(self, caminho: str = DOSSIES_DB):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+        self._painel_cache = (None, None)
+        conn = self._conn()
+        if (conn.execute("SELECT 1 FROM dossies LIMIT 1").fetchone()
+                and not conn.execute("SELECT 1 FROM agregados_cidade LIMIT 1").fetchone()):
+            self.reconstruir_agregados()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ── ESCRITA ───────────────────────────────────────────────────────────────
+    def salvar(self, dossie: dict, atualizado_em: str = None) -> str:
+        """
+        Grava (ou substitui) o dossiê numa única transação. Devolve o id.
+        Dossiês sem UF/cidade (os do agente) herdam a localização já gravada.
+        """
+        return self.salvar_lote([dossie], atualizado_em)[0]
+
+    def salvar_lote(self, dossies: list, atualizado_em: str = None) -> list:
+        """Vários dossiês numa transação só (estágio de gravação da auditoria em massa)."""
+        conn = self._conn()
+        with conn:
+            # IMMEDIATE: a leitura da versão anterior e o ajuste dos agregados
+            # ficam na mesma transação de escrita (sem contagem dupla entre threads).
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [self._gravar(conn, dossie, atualizado_em) for dossie in dossies]
+            conn.execute("UPDATE metadados SET valor = valor + 1 WHERE chave = 'versao'")
+        return ids
+
+    def _gravar(self, conn, dossie: dict, atualizado_em: str = None) -> str:
+        k = _chaves(dossie)
+        sql_chave = "SELECT uf, cidade, score FROM dossies WHERE id = ?"
+        anterior = conn.execute(sql_chave, (k["id"],)).fetchone()
+        conn.execute(
+            "INSERT INTO dossies (id, nome, uf, cidade, score, atualizado_em, dados) "
+            "VALUES (:id, :nome, COALESCE(:uf, 'BR'), COALESCE(:cidade, 'OUTROS'), :score, :atualizado_em, :dados) "
+            "ON CONFLICT(id) DO UPDATE SET nome = COALESCE(excluded.nome, dossies.nome), "
+            "uf = COALESCE(:uf, dossies.uf), cidade = COALESCE(:cidade, dossies.cidade), "
+            "score = excluded.score, atualizado_em = excluded.atualizado_em, dados = excluded.dados",
+            {**k, "atualizado_em": atualizado_em or datetime.now().isoformat(),
+             "dados": json.dumps(dossie, ensure_ascii=False, separators=(",", ":"))},
+        )
+        atual = conn.execute(sql_chave, (k["id"],)).fetchone()
+        if atual != anterior:
+            if anterior:
+                self._ajustar_agregados(conn, *anterior, -1)
+            self._ajustar_agregados(conn, *atual, +1)
+        self._registrar_alertas(conn, k, atual, dossie)
+        return k["id"]
+
+    @staticmethod
+    def _registrar_alertas(conn, k: dict, local: tuple, dossie: dict):
+        """Substitui os alertas do político pelos do laudo atual e poda a cauda antiga."""
+        conn.execute("DELETE FROM alertas_recentes WHERE id_politico = ?", (k["id"],))
+        alertas = _alertas(dossie)
+        if not alertas:
+            return
+        agora = datetime.now().isoformat(timespec="seconds")
+        conn.executemany(
+            "INSERT INTO alertas_recentes (id_politico, nome, uf, cidade, nivel, mensagem, criado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(k["id"], k["nome"], local[0], local[1], nivel, mensagem, agora) for nivel, mensagem in alertas])
+        conn.execute("DELETE FROM alertas_recentes WHERE seq <= (SELECT max(seq) FROM alertas_recentes) - ?",
+                     (ALERTAS_MAX,))
+
+    @staticmethod
+    def _ajustar_agregados(conn, uf: str, cidade: str, score, delta: int):
+        conn.execute(
+            "INSERT INTO agregados_cidade (uf, cidade, total, com_score, soma_score, risco_alto) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(uf, cidade) DO UPDATE SET "
+            "total = total + excluded.total, com_score = com_score + excluded.com_score, "
+            "soma_score = soma_score + excluded.soma_score, risco_alto = risco_alto + excluded.risco_alto",
+            (uf, cidade, delta, delta if score is not None else 0, delta * (score or 0),
+             delta if (score or 0) > LIMIAR_RISCO_ALTO else 0))
+        conn.execute(
+            "INSERT INTO histograma_cidade (uf, cidade, faixa, total) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(uf, cidade, faixa) DO UPDATE SET total = total + excluded.total",
+            (uf, cidade, _faixa(score), delta))
+        if delta < 0:
+            conn.execute("DELETE FROM agregados_cidade WHERE uf = ? AND cidade = ? AND total <= 0", (uf, cidade))
+            conn.execute("DELETE FROM histograma_cidade WHERE uf = ? AND cidade = ? AND total <= 0", (uf, cidade))
+
+    def reconstruir_agregados(self):
+        """Recalcula as tabelas agregadas do zero (bases criadas antes delas ou reparo)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM agregados_cidade")
+            conn.execute("DELETE FROM histograma_cidade")
+            conn.execute(
+                "INSERT INTO agregados_cidade (uf, cidade, total, com_score, soma_score, risco_alto) "
+                "SELECT uf, cidade, count(*), count(score), COALESCE(sum(score), 0), "
+                f"sum(COALESCE(score, 0) > {LIMIAR_RISCO_ALTO}) FROM dossies GROUP BY uf, cidade")
+            conn.execute(
+                "INSERT INTO histograma_cidade (uf, cidade, faixa, total) "
+                "SELECT uf, cidade, CASE WHEN score IS NULL THEN -1 ELSE min(max(score, 0) / 10, 9) END AS f, "
+                "count(*) FROM dossies GROUP BY uf, cidade, f")
+            conn.execute("UPDATE metadados SET valor = valor + 1 WHERE chave = 'versao'")
+        logger.info("📊 Agregados de dossiês reconstruídos.")
+
+    # ── LEITURA ───────────────────────────────────────────────────────────────
+    def obter(self, id_dossie) -> dict | None:
+        row = self._conn().execute("SELECT dados FROM dossies WHERE id = ?", (str(id_dossie),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def scores(self, ids) -> dict[str, int | None]:
+        """Score 0-100 gravado de cada dossiê existente, sem decodificar o JSON ({id: score})."""
+        ids = [str(i) for i in ids]
+        if not ids:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT id, score FROM dossies WHERE id IN ({', '.join('?' * len(ids))})", ids).fetchall()
+        return dict(rows)
+
+    def listar_pastas(self, uf: str = None, ordenar: str = "nome", limite: int = 100,
+                      cursor: str = None) -> tuple[list[dict], str | None]:
+        """
+        Pastas da árvore (UFs, ou cidades de uma UF) servidas das tabelas
+        agregadas: total, score médio, alto risco e histograma por faixa.
+        """
+        if ordenar not in _ORDEM_PASTAS:
+            raise ValueError(f"Ordenação inválida: {ordenar}")
+        nivel, filtro, params = ("uf", "", []) if not uf else ("cidade", "WHERE uf = ?", [uf.upper()])
+        sql = (f"SELECT {nivel} AS nome, sum(total) AS total, sum(risco_alto) AS risco_alto, "
+               "round(CAST(sum(soma_score) AS REAL) / NULLIF(sum(com_score), 0), 1) AS score_medio "
+               f"FROM agregados_cidade {filtro} GROUP BY {nivel}")
+        conn = self._conn()
+        pastas, proximo = _paginar(conn, sql, params, _ORDEM_PASTAS[ordenar], limite, cursor)
+        if pastas:
+            hist = {p["nome"]: {} for p in pastas}
+            marcadores = ", ".join("?" * len(pastas))
+            for nome, faixa, total in conn.execute(
+                    f"SELECT {nivel}, faixa, sum(total) FROM histograma_cidade {filtro or 'WHERE 1'} "
+                    f"AND {nivel} IN ({marcadores}) GROUP BY {nivel}, faixa", params + list(hist)):
+                hist[nome][_rotulo_faixa(faixa)] = total
+            for p in pastas:
+                p["histograma"] = hist[p["nome"]]
+        return pastas, proximo
+
+    def listar(self, uf: str, cidade: str, ordenar: str = "nome", limite: int = 100,
+               cursor: str = None) -> tuple[list[dict], str | None]:
+        """Dossiês de uma cidade, paginados pelo índice (uf, cidade, chave de ordenação)."""
+        if ordenar not in _ORDEM_ARQUIVOS:
+            raise ValueError(f"Ordenação inválida: {ordenar}")
+        sql = "SELECT id, nome, score FROM dossies WHERE uf = ? AND cidade = ?"
+        return _paginar(self._conn(), sql, [uf.upper(), cidade.upper()], _ORDEM_ARQUIVOS[ordenar], limite, cursor)
+
+    def top_risco(self, uf: str = None, cidade: str = None, limite: int = 10) -> list[dict]:
+        """Maiores scores do escopo (país, UF ou cidade), direto do índice por score."""
+        filtros, params = ["score IS NOT NULL"], []
+        if uf:
+            filtros.append("uf = ?")
+            params.append(uf.upper())
+        if uf and cidade:
+            filtros.append("cidade = ?")
+            params.append(cidade.upper())
+        rows = self._conn().execute(
+            f"SELECT id, nome, uf, cidade, score FROM dossies WHERE {' AND '.join(filtros)} "
+            "ORDER BY score DESC LIMIT ?", params + [max(1, min(int(limite), 100))]).fetchall()
+        return [{"id": i, "nome": n, "uf": u, "cidade": c, "score": sc} for i, n, u, c, sc in rows]
+
+    def versao(self) -> int:
+        """Contador incrementado a cada gravação (também por outros processos): base do ETag."""
+        return self._conn().execute("SELECT valor FROM metadados WHERE chave = 'versao'").fetchone()[0]
+
+    def alertas_recentes(self, limite: int = 20) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT id_politico, nome, uf, cidade, nivel, mensagem, criado_em FROM alertas_recentes "
+            "ORDER BY seq DESC LIMIT ?", (max(1, min(int(limite), ALERTAS_MAX)),)).fetchall()
+        return [{"id": i, "nome": n, "uf": u, "cidade": c, "nivel": nv, "mensagem": m, "criado_em": t}
+                for i, n, u, c, nv, m, t in rows]
+
+    def painel(self, limite_top: int = 10, limite_alertas: int = 20) -> dict:
+        """
+        Top de risco, alertas recentes e distribuição por UF, tudo das tabelas
+        mantidas na gravação. Memorizado por versão: entre duas gravações, a
+        mesma resposta é devolvida sem tocar nas tabelas.
+        """
+        versao = self.versao()
+        chave = (versao, limite_top, limite_alertas)
+        cache_chave, cache_painel = self._painel_cache
+        if cache_chave == chave:
+            return cache_painel
+        distribuicao, cursor = [], None
+        while True:
+            pagina, cursor = self.listar_pastas(None, "nome", LIMITE_PAGINA_MAX, cursor)
+            distribuicao.extend(pagina)
+            if not cursor:
+                break
+        painel = {
+            "versao": versao,
+            "top_risco": self.top_risco(limite=limite_top),
+            "alertas_recentes": self.alertas_recentes(limite_alertas),
+            "distribuicao_uf": distribuicao,
+        }
+        self._painel_cache = (chave, painel)
+        return painel
+
+    # ── MIGRAÇÃO ──────────────────────────────────────────────────────────────
+    def migrar_arquivos(self, *pastas: str) -> int:
+        """
+        Importa todos os dossie_*.json (layout plano e UF/CIDADE). Os arquivos
+        são processados do mais antigo ao mais novo, então a versão mais
+        recente de um mesmo id prevalece.
+        """
+        arquivos = []
+        for pasta in pastas:
+            for raiz, _, nomes in os.walk(pasta):
+                for n in nomes:
+                    if n.startswith("dossie_") and n.endswith(".json"):
+                        caminho = os.path.join(raiz, n)
+                        arquivos.append((caminho, os.path.relpath(caminho, pasta).split(os.sep)))
+        arquivos.sort(key=lambda a: os.path.getmtime(a[0]))
+
+        total = 0
+        for caminho, partes in arquivos:
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    dossie = json.load(f)
+                if not (dossie.get("id") or dossie.get("id_politico")):
+                    dossie["id"] = os.path.basename(caminho)[len("dossie_"):-len(".json")]
+                if len(partes) == 3:  # UF/CIDADE/dossie_x.json
+                    dossie.setdefault("uf", partes[0])
+                    dossie.setdefault("cidade", partes[1])
+                self.salvar(dossie, datetime.fromtimestamp(os.path.getmtime(caminho)).isoformat())
+                total += 1
+            except Exception as e:
+                logger.error(f"❌ Falha ao migrar {caminho}: {e}")
+        logger.info(f"✅ {total} dossiê(s) migrados para {self.caminho}")
+        return total
+
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_dossie_store() -> DossieStore:
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = DossieStore()
+    return _store
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Armazém SQLite de dossiês")
+    parser.add_argument("--migrar", nargs="+", metavar="PASTA",
+                        help="Importa dossie_*.json destas pastas (layout plano e UF/CIDADE)")
+    parser.add_argument("--reindexar", action="store_true", help="Recalcula as tabelas agregadas")
+    args = parser.parse_args()
+    if args.migrar:
+        get_dossie_store().migrar_arquivos(*args.migrar)
+    elif args.reindexar:
+        get_dossie_store().reconstruir_agregados()
+    else:
+        parser.print_help()
@@ -1,21 +1,154 @@
 import os
+import re
 import json
+import time
 import logging
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+from database.perfil_cypher import get_perfil_cypher, nome_chamador
+from rastreamento import span, CLIENTE
+
 load_dotenv()
 
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "govtech_password")
 
+# Hub: nó de grau alto (grande fornecedora, banco, nome de sócio muito comum).
+# Extração e travessia não expandem a vizinhança dele: resumem (hubs_grafo.py
+# mantém o grau e o registro :Hub).
+GRAU_HUB = int(os.getenv("GRAU_HUB", "2000"))
+EXTRACAO_AMOSTRA = 10           # sócios / contratos por empresa no subgrafo da IA
+EXTRACAO_AMOSTRA_HUB = 3        # contratos de amostra (sem ordenar) por hub
+
+# Sócio que é o próprio político: mesmo nome e, quando os dois lados têm o
+# documento, o mesmo miolo de CPF (dígitos 4 a 9, os que o QSA publica).
+# Espera `s` (:Socio) e `p` (:Politico) no escopo.
+_FRAGMENTO_CPF_POLITICO = "CASE WHEN size(coalesce(p.cpf, '')) = 11 THEN substring(p.cpf, 3, 6) ELSE '' END"
+SOCIO_DO_POLITICO = (f"s.nome = p.nome AND (s.doc_fragmento = '' "
+                     f"OR {_FRAGMENTO_CPF_POLITICO} IN ['', s.doc_fragmento])")
+
+# Chave que todo (:Politico) tem: o id_tse dos candidatos do TSE ou
+# "camara:<id>" dos deputados que só vieram da Câmara (CEAP,
+# extrator_camara_total), sem id_tse. Gravada em p.chave nos MERGE, com
+# índice de range: é por ela que auditoria, regras e métricas paginam e
+# fazem UNWIND. Espera `p` (:Politico) no escopo.
+CHAVE_POLITICO = "coalesce(p.id_tse, 'camara:' + toString(p.id_camara))"
+INDICES_CHAVE_POLITICO = ["CREATE INDEX politico_chave_idx IF NOT EXISTS FOR (p:Politico) ON (p.chave)"]
+
+# Soma de um ano de CEAP na aresta :PAGOU_A `r`, a partir de `row` (ano, valor, qtd).
+# O arquivo anual da Câmara (injetor_neo4j.py --fonte ceap) é a fonte oficial:
+# o ano carregado dele entra em r.ceap_anos e não é somado de novo. O
+# extrator_camara_total (API, ano corrente) só grava anos fora de ceap_anos e
+# guarda a sua parcela por ano em r.api_anos/api_valores/api_qtds; quem grava
+# aquele ano depois (a própria API ou o arquivo) desconta essa parcela antes.
+# Espera `r` e `row` no escopo; o chamador registra o ano na lista dele.
+SUBSTITUIR_ANO_PAGOU_A = """
+WITH r, row, coalesce(r.api_anos, []) AS anos, coalesce(r.api_valores, []) AS valores,
+     coalesce(r.api_qtds, []) AS qtds
+WHERE NOT row.ano IN coalesce(r.ceap_anos, [])
+WITH r, row, anos, valores, qtds, [i IN range(0, size(anos) - 1) WHERE anos[i] = row.ano] AS do_ano
+SET r.valor_total    = coalesce(r.valor_total, 0.0) + row.valor - reduce(s = 0.0, i IN do_ano | s + valores[i]),
+    r.qtd_transacoes = coalesce(r.qtd_transacoes, 0) + row.qtd - reduce(s = 0, i IN do_ano | s + qtds[i]),
+    r.api_anos       = [i IN range(0, size(anos) - 1) WHERE NOT i IN do_ano | anos[i]],
+    r.api_valores    = [i IN range(0, size(anos) - 1) WHERE NOT i IN do_ano | valores[i]],
+    r.api_qtds       = [i IN range(0, size(anos) - 1) WHERE NOT i IN do_ano | qtds[i]],
+    r.atualizado_em  = date()
+"""
+
+# "Siga o dinheiro" (seguir_dinheiro): limites padrão da expansão em profundidade.
+TRAVESSIA_PROFUNDIDADE = 4
+TRAVESSIA_PROFUNDIDADE_MAX = 6
+TRAVESSIA_FANOUT = 20           # vizinhos por nó e por salto, os de maior valor primeiro
+TRAVESSIA_FRONTEIRA = 200       # nós expandidos por salto (os de maior valor acumulado)
+TRAVESSIA_GRAU_HUB = GRAU_HUB   # acima disso o nó entra no resultado, mas não é expandido
+TRAVESSIA_TEMPO = 5.0           # segundos de orçamento para a travessia inteira
+TRAVESSIA_CAMINHOS = 15
+# GastoMensal é agregado de CEAP por mês: só ruído na trilha do dinheiro.
+TRAVESSIA_IGNORAR = ["GASTOU_NO_MES"]
+
+# Uma consulta por salto: expande a fronteira inteira (UNWIND) e corta o
+# fan-out por nó dentro do CALL. O grau (COUNT {}) vem do contador do nó,
+# sem percorrer as arestas, e decide quem é hub no salto seguinte.
+Q_EXPANDIR_FRONTEIRA = """
+UNWIND $fronteira AS origem_id
+MATCH (o) WHERE elementId(o) = origem_id
+CALL {
+    WITH o
+    MATCH (o)-[r]-(v)
+    WHERE NOT type(r) IN $ignorar AND NOT elementId(v) IN $visitados
+    WITH r, v, toFloat(coalesce(r.valor_total, r.valor, v.valor, v.soma, v.capital_social, 0)) AS peso
+    ORDER BY peso DESC
+    LIMIT $fanout
+    RETURN r, v, peso
+}
+RETURN origem_id, elementId(v) AS id, [l IN labels(v) WHERE l <> 'Hub'][0] AS tipo,
+       coalesce(v.nome, v.razao_social, v.descricao, v.objeto, v.cnpj, v.id_contratacao) AS nome,
+       type(r) AS relacao, startNode(r) = o AS saida, peso, COUNT { (v)--() } AS grau,
+       v.grau_por_tipo AS grau_por_tipo
+"""
+
 logger = logging.getLogger("Neo4jMotor")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+
+def fragmento_documento(documento) -> str:
+    """
+    Parte do CPF/CNPJ do sócio que entra na chave do (:Socio) junto com o nome.
+    O QSA público mascara o CPF (***123456**): ficam os 6 dígitos do meio, os
+    mesmos tirados de um CPF completo. Sócio pessoa jurídica fica com o CNPJ.
+    Sem documento aproveitável, "" (o sócio é identificado só pelo nome).
+    """
+    texto = str(documento or "")
+    digitos = re.sub(r"\D", "", texto)
+    if len(digitos) == 14:
+        return digitos
+    if len(digitos) == 11:
+        return digitos[3:9]
+    if len(digitos) == 6 and "*" in texto:
+        return digitos
+    return ""
+
+
+def grau_por_tipo(valor) -> dict:
+    """Lê a propriedade grau_por_tipo dos hubs (lista "TIPO:n") como {tipo: n}."""
+    resultado = {}
+    for item in valor or []:
+        tipo, _, n = str(item).rpartition(":")
+        if tipo and n.isdigit():
+            resultado[tipo] = int(n)
+    return resultado
+
+
+def chave_politico(p: dict) -> str | None:
+    """CHAVE_POLITICO a partir das propriedades de um nó já lido."""
+    if p.get("chave"):
+        return p["chave"]
+    if p.get("id_tse"):
+        return str(p["id_tse"])
+    if p.get("id_camara") is not None:
+        return f"camara:{p['id_camara']}"
+    return None
+
+
+def garantir_chave_politico(neo4j) -> None:
+    """Cria o índice de p.chave e preenche a chave dos nós gravados antes dela (idempotente)."""
+    for cmd in INDICES_CHAVE_POLITICO:
+        try:
+            neo4j.execute_query(cmd, nome="indice_chave_politico")
+        except Exception as e:
+            logger.warning(f"  ⚠️  Índice de p.chave: {e}")
+    neo4j.execute_query(f"""
+        MATCH (p:Politico) WHERE p.chave IS NULL AND (p.id_tse IS NOT NULL OR p.id_camara IS NOT NULL)
+        CALL {{ WITH p SET p.chave = {CHAVE_POLITICO} }} IN TRANSACTIONS OF 10000 ROWS
+    """, nome="preencher_chave_politico")
+
+
 class Neo4jConnection:
     def __init__(self, uri, user, password):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.perfil = get_perfil_cypher()
         try:
             self.driver.verify_connectivity()
             logger.info("🌐 [GRAFO] Conexão ao Neo4j estabelecida com sucesso.")
@@ -37,14 +170,47 @@ class Neo4jConnection:
             try:
                 session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Politico) REQUIRE p.cpf IS UNIQUE")
                 session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (e:Empresa) REQUIRE e.cnpj IS UNIQUE")
-                session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (s:Socio) REQUIRE s.nome IS UNIQUE")
+                self._migrar_chave_socio(session)
+                session.run("CREATE CONSTRAINT socio_nome_doc IF NOT EXISTS "
+                            "FOR (s:Socio) REQUIRE (s.nome, s.doc_fragmento) IS UNIQUE")
+                session.run("CREATE INDEX socio_nome_idx IF NOT EXISTS FOR (s:Socio) ON (s.nome)")
             except Exception as e:
                 logger.warning(f"Aviso ao criar índices (talvez já existam): {e}")
 
-    def execute_query(self, query: str, parameters: dict = None):
+    @staticmethod
+    def _migrar_chave_socio(session):
+        """
+        (:Socio) era único só pelo nome: todo "JOSE DA SILVA" virava um nó só.
+        A chave agora é (nome, doc_fragmento). Roda uma vez: derruba a
+        constraint antiga e dá doc_fragmento "" aos sócios já gravados (os nós
+        fundidos no passado só se separam quando o QSA for recarregado).
+        """
+        antigas = session.run(
+            "SHOW CONSTRAINTS YIELD name, labelsOrTypes, properties "
+            "WHERE labelsOrTypes = ['Socio'] AND properties = ['nome'] RETURN name").data()
+        if not antigas:
+            return
+        for c in antigas:
+            session.run(f"DROP CONSTRAINT `{c['name']}` IF EXISTS")
+        session.run("""
+            MATCH (s:Socio) WHERE s.doc_fragmento IS NULL
+            CALL { WITH s SET s.doc_fragmento = '' } IN TRANSACTIONS OF 10000 ROWS
+        """)
+        logger.info("🔑 [GRAFO] Chave de (:Socio) migrada para (nome, doc_fragmento).")
+
+    def _consultar(self, nome: str, query: str, parametros: dict = None, timeout: float = None) -> list:
+        """Roda a consulta pelo perfil Cypher (database/perfil_cypher.py) sob um nome estável, num span próprio."""
+        with span(f"neo4j {nome}", CLIENTE, **{"db.system": "neo4j", "db.operation.name": nome}) as s, \
+                self.driver.session() as session:
+            linhas = self.perfil.executar(session, nome, query, parametros, timeout)
+            s.definir(linhas=len(linhas))
+            return linhas
+
+    def execute_query(self, query: str, parameters: dict = None, nome: str = None):
         """Utilitário para rodar queries genéricas (usado pelo Worker do PNCP)"""
-        with self.driver.session() as session:
-            return session.run(query, parameters).data()
+        if nome is None and self.perfil.ativo:
+            nome = nome_chamador()
+        return self._consultar(nome, query, parameters)
 
     # ---------------------------------------------------------
     # FASE 2: AS 3 FUNÇÕES OBRIGATÓRIAS DE INGESTÃO (Workers)
@@ -60,14 +226,13 @@ class Neo4jConnection:
         ON MATCH SET 
             p.nome = $nome, p.cargo = $cargo, p.partido = $partido,
             p.cpf = CASE WHEN $cpf IS NOT NULL THEN $cpf ELSE p.cpf END
-        """
-        with self.driver.session() as session:
-            session.run(query, 
-                        id_tse=str(dados.get("id_tse", "")),
-                        cpf=dados.get("cpf"), 
-                        nome=dados.get("nome", "Desconhecido"), 
-                        cargo=dados.get("cargo", ""), 
-                        partido=dados.get("partido", ""))
+        SET p.chave = """ + CHAVE_POLITICO
+        self._consultar("merge_politico", query, {
+            "id_tse": str(dados.get("id_tse", "")),
+            "cpf": dados.get("cpf"),
+            "nome": dados.get("nome", "Desconhecido"),
+            "cargo": dados.get("cargo", ""),
+            "partido": dados.get("partido", "")})
 
     def merge_empresa(self, dados: dict):
         """Cria ou atualiza o nó (:Empresa)"""
@@ -76,9 +241,9 @@ class Neo4jConnection:
         ON CREATE SET e.nome = $nome, e.capital_social = $capital, e.uf = $uf
         ON MATCH SET e.nome = $nome
         """
-        with self.driver.session() as session:
-            session.run(query, cnpj=dados.get("cnpj", ""), nome=dados.get("nome", ""), 
-                        capital=dados.get("capital_social", 0.0), uf=dados.get("uf", ""))
+        self._consultar("merge_empresa", query, {
+            "cnpj": dados.get("cnpj", ""), "nome": dados.get("nome", ""),
+            "capital": dados.get("capital_social", 0.0), "uf": dados.get("uf", "")})
 
     def merge_relacao_financeira(self, cpf_politico: str, cnpj_empresa: str, valor: float, tipo: str):
         """
@@ -91,8 +256,7 @@ class Neo4jConnection:
         ON CREATE SET r.valor_total = $valor, r.atualizado_em = date()
         ON MATCH SET r.valor_total = r.valor_total + $valor, r.atualizado_em = date()
         """
-        with self.driver.session() as session:
-            session.run(query, cpf=cpf_politico, cnpj=cnpj_empresa, valor=valor)
+        self._consultar("merge_relacao_financeira", query, {"cpf": cpf_politico, "cnpj": cnpj_empresa, "valor": valor})
 
     # ---------------------------------------------------------
     # A FUNÇÃO CRUCIAL PARA A IA (Extração de Subgrafo)
@@ -104,10 +268,16 @@ class Neo4jConnection:
         2. Sócios das empresas (Rede OSINT).
         3. Licitações/Contratos ganhos (:Contrato).
         4. Nepotismo (Cruzamento de sobrenomes no mesmo Estado).
+        5. Alertas de fracionamento já detectados (detector_fracionamento.py).
+
+        Hubs (grau > GRAU_HUB: grandes fornecedoras, bancos) não são expandidos:
+        entram em "hubs_resumidos" com o grau por tipo de relação e uma amostra
+        de contratos. Nas demais empresas, sócios e contratos vêm limitados a
+        EXTRACAO_AMOSTRA (os contratos de maior valor).
         """
         query = """
         MATCH (p:Politico)
-        WHERE p.id_tse = $id OR p.cpf = $id OR p.nome = $id
+        WHERE p.chave = $id OR p.id_tse = $id OR p.id_camara = toInteger($id) OR p.cpf = $id OR p.nome = $id
         
         WITH p, split(p.nome, ' ') AS nomes
         // Pega o último sobrenome para cruzamento de nepotismo
@@ -116,65 +286,229 @@ class Neo4jConnection:
         // 1. Conexões Diretas (Bens, Empresas, Emendas)
         OPTIONAL MATCH (p)-[rel_dir]->(alvo)
         WHERE NOT alvo:Politico
+        WITH p, sobrenome_alvo, rel_dir, alvo, COUNT { (alvo)--() } AS grau_alvo
+        WITH p, sobrenome_alvo, rel_dir, alvo, grau_alvo, grau_alvo > $grau_hub AS hub
         
-        // 2. Quadro Societário e Redes de Influência
-        OPTIONAL MATCH (alvo)<-[:E_SOCIO_DE]-(socio:Socio)
+        // 2. Quadro Societário e 3. Contratos Públicos (Dinheiro Grosso), só fora dos hubs
+        WITH p, sobrenome_alvo, rel_dir, alvo, grau_alvo, hub,
+             CASE WHEN hub THEN [] ELSE COLLECT {
+                 MATCH (alvo)<-[:E_SOCIO_DE]-(socio:Socio) RETURN socio.nome LIMIT $amostra
+             } END AS socios,
+             CASE WHEN hub THEN [] ELSE COLLECT {
+                 MATCH (alvo)-[:GANHOU_LICITACAO]->(c:Contrato)
+                 RETURN c.valor ORDER BY c.valor DESC LIMIT $amostra
+             } END AS contratos
         
-        // 3. Contratos Públicos (Dinheiro Grosso)
-        OPTIONAL MATCH (alvo)-[:GANHOU_LICITACAO]->(contrato:Contrato)
-        
-        // 4. Radar de Nepotismo (Cruzamento por Sobrenome e UF)
-        // Busca sócios que ganharam licitações no mesmo estado e têm o mesmo sobrenome do político
-        OPTIONAL MATCH (socio_nep:Socio)-[:E_SOCIO_DE]->(emp_nep:Empresa)-[:GANHOU_LICITACAO]->(con_nep:Contrato)
-        WHERE p.uf IS NOT NULL AND emp_nep.uf = p.uf 
-              AND socio_nep.nome ENDS WITH sobrenome_alvo
-              AND socio_nep.nome <> p.nome
-        
-        RETURN 
-            p.nome AS politico, 
-            p.cpf AS cpf,
-            p.id_tse AS id_tse,
-            p.uf AS uf,
+        WITH p, sobrenome_alvo,
             collect(DISTINCT {
-                tipo: labels(alvo)[0],
+                tipo: [l IN labels(alvo) WHERE l <> 'Hub'][0],
                 nome: COALESCE(alvo.nome, alvo.descricao),
                 relacao: type(rel_dir),
                 valor: rel_dir.valor_total
             }) AS ativos_e_empresas,
-            collect(DISTINCT {
-                socio: socio.nome,
+            collect([s IN socios | {
+                socio: s,
                 empresa: alvo.nome,
-                contratos_ganhos: contrato.valor
-            }) AS rede_societaria_e_contratos,
-            collect(DISTINCT {
+                contratos_ganhos: contratos
+            }]) AS rede_por_alvo,
+            collect(CASE WHEN hub THEN {
+                nome: COALESCE(alvo.nome, alvo.descricao),
+                tipo: [l IN labels(alvo) WHERE l <> 'Hub'][0],
+                relacao: type(rel_dir),
+                valor: rel_dir.valor_total,
+                grau: grau_alvo,
+                grau_por_tipo: alvo.grau_por_tipo,
+                amostra_contratos: COLLECT {
+                    MATCH (alvo)-[:GANHOU_LICITACAO]->(c:Contrato) RETURN c.valor LIMIT $amostra_hub
+                }
+            } END) AS hubs_resumidos
+        
+        // 4. Radar de Nepotismo (Cruzamento por Sobrenome e UF)
+        // Busca sócios que ganharam licitações no mesmo estado e têm o mesmo sobrenome do político
+        CALL {
+            WITH p, sobrenome_alvo
+            OPTIONAL MATCH (socio_nep:Socio)-[:E_SOCIO_DE]->(emp_nep:Empresa)
+            WHERE p.uf IS NOT NULL AND emp_nep.uf = p.uf 
+                  AND socio_nep.nome ENDS WITH sobrenome_alvo
+                  AND socio_nep.nome <> p.nome
+                  AND EXISTS { (emp_nep)-[:GANHOU_LICITACAO]->(:Contrato) }
+            WITH socio_nep, emp_nep, CASE WHEN emp_nep:Hub
+                THEN COLLECT { MATCH (emp_nep)-[:GANHOU_LICITACAO]->(c:Contrato) RETURN c LIMIT $amostra_hub }
+                ELSE COLLECT { MATCH (emp_nep)-[:GANHOU_LICITACAO]->(c:Contrato)
+                               RETURN c ORDER BY c.valor DESC LIMIT $amostra }
+            END AS contratos_nep
+            UNWIND CASE WHEN contratos_nep = [] THEN [null] ELSE contratos_nep END AS con_nep
+            RETURN collect(DISTINCT {
                 possivel_parente: socio_nep.nome,
                 empresa_beneficiada: emp_nep.nome,
                 valor_contracto: con_nep.valor,
                 objeto: con_nep.objeto
             }) AS indicios_nepotismo
+        }
+        
+        RETURN 
+            p.nome AS politico, 
+            p.cpf AS cpf,
+            p.id_tse AS id_tse,
+            p.chave AS chave,
+            p.uf AS uf,
+            ativos_e_empresas,
+            reduce(acc = [], linhas IN rede_por_alvo | acc + linhas) AS rede_societaria_e_contratos,
+            indicios_nepotismo,
+            hubs_resumidos
         """
         
+        query_alertas = """
+        MATCH (p:Politico {chave: $chave})
+        OPTIONAL MATCH (p)-[]->(e:Empresa)<-[:FORNECEDOR]-(a1:AlertaFracionamento {fonte: 'PNCP'})
+        OPTIONAL MATCH (p)<-[:PAGADOR]-(a2:AlertaFracionamento)
+        WITH collect(DISTINCT a1) + collect(DISTINCT a2) AS alertas
+        UNWIND alertas AS a
+        RETURN DISTINCT a.fonte AS fonte, a.fornecedor AS fornecedor, a.fornecedor_cnpj AS cnpj,
+               a.pagador_nome AS pagador, toString(a.inicio) AS inicio, toString(a.fim) AS fim,
+               a.qtd AS qtd, a.soma AS valor_total, a.limite AS limite_dispensa
+        """
+
         try:
-            with self.driver.session() as session:
-                resultado = session.run(query, id=str(identificador)).single()
-                
-                if not resultado:
-                    return {"erro": f"Político '{identificador}' não encontrado no grafo."}
-                
-                # Processamento final para garantir JSON limpo
-                return {
-                    "politico": resultado["politico"],
-                    "cpf": resultado["cpf"],
-                    "id_tse": resultado["id_tse"],
-                    "uf": resultado["uf"],
-                    "ativos_e_empresas": [a for a in resultado["ativos_e_empresas"] if a.get('nome')],
-                    "rede_societaria": [s for s in resultado["rede_societaria_e_contratos"] if s.get('socio')],
-                    "indicios_nepotismo": [n for n in resultado["indicios_nepotismo"] if n.get('possivel_parente')]
-                }
+            linhas = self._consultar("extrair_subgrafo_para_ia", query, {
+                "id": str(identificador), "grau_hub": GRAU_HUB,
+                "amostra": EXTRACAO_AMOSTRA, "amostra_hub": EXTRACAO_AMOSTRA_HUB})
+
+            if not linhas:
+                return {"erro": f"Político '{identificador}' não encontrado no grafo."}
+            resultado = linhas[0]
+
+            alertas = (self._consultar("extrair_subgrafo_para_ia.alertas", query_alertas,
+                                       {"chave": resultado["chave"]}) if resultado["chave"] else [])
+
+            # Processamento final para garantir JSON limpo
+            return {
+                "politico": resultado["politico"],
+                "cpf": resultado["cpf"],
+                "id_tse": resultado["id_tse"],
+                "chave": resultado["chave"],
+                "uf": resultado["uf"],
+                "ativos_e_empresas": [a for a in resultado["ativos_e_empresas"] if a.get('nome')],
+                "rede_societaria": [s for s in resultado["rede_societaria_e_contratos"] if s.get('socio')],
+                "indicios_nepotismo": [n for n in resultado["indicios_nepotismo"] if n.get('possivel_parente')],
+                "alertas_fracionamento": alertas,
+                "hubs_resumidos": [{**h, "grau_por_tipo": grau_por_tipo(h.get("grau_por_tipo"))}
+                                   for h in resultado["hubs_resumidos"]],
+            }
         except Exception as e:
             logger.error(f"Erro ao extrair subgrafo para IA: {e}")
             return {"erro": str(e)}
 
+    def seguir_dinheiro(self, identificador: str, profundidade: int = TRAVESSIA_PROFUNDIDADE,
+                        fanout: int = TRAVESSIA_FANOUT, tempo_max: float = TRAVESSIA_TEMPO,
+                        max_fronteira: int = TRAVESSIA_FRONTEIRA, grau_hub: int = TRAVESSIA_GRAU_HUB,
+                        max_caminhos: int = TRAVESSIA_CAMINHOS) -> dict:
+        """
+        Travessia "siga o dinheiro" em vários saltos (político → sócio → empresa
+        → contrato → ...), por fronteiras sucessivas, uma consulta por salto:
+
+          - cada nó traz no máximo `fanout` vizinhos, os de maior valor;
+          - só os `max_fronteira` nós de maior valor acumulado seguem para o
+            próximo salto;
+          - hubs (grau > `grau_hub`, ex.: grandes fornecedoras) aparecem no
+            resultado mas não são expandidos;
+          - `tempo_max` segundos para tudo: cada consulta leva o tempo restante
+            como timeout da transação; estourou, devolve o que já tinha.
+
+        Os sócios que são o próprio político (SOCIO_DO_POLITICO: mesmo nome e,
+        havendo, mesmo miolo de CPF) entram como ponto de partida, como no
+        motor de regras. Devolve um resumo compacto: as trilhas de maior valor
+        acumulado até as folhas, contagens e o que foi cortado (os hubs, com o
+        grau por tipo de relação quando já estão no registro).
+        """
+        inicio = time.monotonic()
+        profundidade = max(1, min(int(profundidade), TRAVESSIA_PROFUNDIDADE_MAX))
+        raiz = self.execute_query(
+            "MATCH (p:Politico) WHERE p.chave = $id OR p.id_tse = $id OR p.cpf = $id "
+            f"OPTIONAL MATCH (s:Socio) WHERE {SOCIO_DO_POLITICO} "
+            "RETURN elementId(p) AS id, p.nome AS nome, p.id_tse AS id_tse, "
+            "collect(CASE WHEN s IS NOT NULL THEN {id: elementId(s), grau: COUNT { (s)--() }, "
+            "grau_por_tipo: s.grau_por_tipo} END) AS socios "
+            "LIMIT 1", {"id": str(identificador)}, nome="seguir_dinheiro.raiz")
+        if not raiz:
+            return {"erro": f"Político '{identificador}' não encontrado no grafo."}
+        raiz = raiz[0]
+
+        # nó -> {tipo, nome, pai, relacao, saida, peso, valor (acumulado), salto}
+        nos = {raiz["id"]: {"tipo": "Politico", "nome": raiz["nome"], "pai": None, "valor": 0.0, "salto": 0}}
+        hubs, cortados_fanout, cortados_fronteira, tempo_esgotado, salto = [], 0, 0, False, 0
+        fronteira = [raiz["id"]]
+        for socio in raiz["socios"]:
+            nos[socio["id"]] = {"tipo": "Socio", "nome": raiz["nome"], "pai": raiz["id"], "relacao": "MESMO_NOME",
+                                "saida": True, "peso": 0.0, "valor": 0.0, "salto": 0, "grau": socio["grau"]}
+            if socio["grau"] > grau_hub:  # homônimo fundido (nome comum sem documento): não expande
+                hubs.append(_resumo_hub(nos[socio["id"]], socio["grau_por_tipo"]))
+            else:
+                fronteira.append(socio["id"])
+
+        while fronteira and salto < profundidade:
+            restante = tempo_max - (time.monotonic() - inicio)
+            if restante <= 0.05:
+                tempo_esgotado = True
+                break
+            try:
+                linhas = self._consultar("seguir_dinheiro.expandir", Q_EXPANDIR_FRONTEIRA, {
+                    "fronteira": fronteira, "visitados": list(nos), "fanout": int(fanout),
+                    "ignorar": TRAVESSIA_IGNORAR}, timeout=restante)
+            except Exception as e:
+                # Timeout da transação (ou falha): fica com o que os saltos anteriores acharam.
+                logger.warning(f"⏱️ Travessia interrompida no salto {salto + 1}: {e}")
+                tempo_esgotado = True
+                break
+            salto += 1
+
+            por_origem, novos = {}, []
+            for linha in linhas:
+                por_origem[linha["origem_id"]] = por_origem.get(linha["origem_id"], 0) + 1
+                if linha["id"] in nos:  # alcançado por duas origens no mesmo salto: fica o de maior valor
+                    atual = nos[linha["id"]]
+                    valor = nos[linha["origem_id"]]["valor"] + linha["peso"]
+                    if atual["salto"] == salto and valor > atual["valor"]:
+                        atual.update(pai=linha["origem_id"], relacao=linha["relacao"], saida=linha["saida"],
+                                     peso=linha["peso"], valor=valor)
+                    continue
+                nos[linha["id"]] = {
+                    "tipo": linha["tipo"], "nome": linha["nome"], "pai": linha["origem_id"],
+                    "relacao": linha["relacao"], "saida": linha["saida"], "peso": linha["peso"],
+                    "valor": nos[linha["origem_id"]]["valor"] + linha["peso"], "salto": salto,
+                    "grau": linha["grau"], "grau_por_tipo": linha["grau_por_tipo"],
+                }
+                novos.append(linha["id"])
+            cortados_fanout += sum(1 for n in por_origem.values() if n >= fanout)
+
+            expandiveis = []
+            for id_no in novos:
+                if nos[id_no]["grau"] > grau_hub:
+                    hubs.append(_resumo_hub(nos[id_no], nos[id_no].get("grau_por_tipo")))
+                elif nos[id_no]["grau"] > 1:  # grau 1 = só a aresta por onde chegou
+                    expandiveis.append(id_no)
+            expandiveis.sort(key=lambda i: nos[i]["valor"], reverse=True)
+            cortados_fronteira += max(0, len(expandiveis) - max_fronteira)
+            fronteira = expandiveis[:max_fronteira]
+
+        return {
+            "politico": raiz["nome"],
+            "id_tse": raiz["id_tse"],
+            "saltos": salto,
+            "nos": len(nos),
+            "por_tipo": _contar_tipos(nos),
+            "caminhos": _caminhos_de_maior_valor(nos, max_caminhos),
+            "cortes": {
+                "tempo_esgotado": tempo_esgotado,
+                "nos_no_limite_de_fanout": cortados_fanout,
+                "fora_da_fronteira": cortados_fronteira,
+                "hubs_nao_expandidos": sorted(hubs, key=lambda h: -h["grau"])[:20],
+            },
+            "parametros": {"profundidade": profundidade, "fanout": fanout, "max_fronteira": max_fronteira,
+                           "grau_hub": grau_hub, "tempo_max": tempo_max},
+            "duracao_ms": round((time.monotonic() - inicio) * 1000, 1),
+        }
+
     def buscar_por_cidade(self, uf: str, municipio: str) -> list:
         """Busca políticos no Neo4j filtrando por UF e Município."""
         query = """
@@ -185,8 +519,7 @@ class Neo4jConnection:
         LIMIT 100
         """
         try:
-            with self.driver.session() as session:
-                return session.run(query, uf=uf.upper(), municipio=municipio.upper()).data()
+            return self._consultar("buscar_por_cidade", query, {"uf": uf.upper(), "municipio": municipio.upper()})
         except Exception as e:
             logger.error(f"Erro ao buscar políticos por cidade no Neo4j: {e}")
             return []
@@ -201,8 +534,7 @@ class Neo4jConnection:
         LIMIT 500
         """
         try:
-            with self.driver.session() as session:
-                return session.run(query, uf=uf.upper()).data()
+            return self._consultar("buscar_por_estado", query, {"uf": uf.upper()})
         except Exception as e:
             logger.error(f"Erro ao buscar políticos por estado no Neo4j: {e}")
             return []
@@ -217,8 +549,7 @@ class Neo4jConnection:
         LIMIT 50
         """
         try:
-            with self.driver.session() as session:
-                return session.run(query, termo=termo).data()
+            return self._consultar("buscar_por_termo", query, {"termo": termo})
         except Exception as e:
             logger.error(f"Erro ao pesquisar políticos no Neo4j: {e}")
             return []
@@ -262,17 +593,60 @@ class Neo4jConnection:
 
             self.merge_relacao_financeira(cpf, emp_cnpj, valor_float, tipo_rel)
             
-            # Sócios
+            # Sócios (nome solto ou registro do QSA com cnpj_cpf_do_socio)
             for socio in emp.get("socios", []):
-                with self.driver.session() as session:
-                    session.run("""
-                    MATCH (e:Empresa {cnpj: $cnpj})
-                    MERGE (s:Socio {nome: $nome_socio})
-                    MERGE (s)-[:E_SOCIO_DE]->(e)
-                    """, cnpj=emp_cnpj, nome_socio=socio)
+                if isinstance(socio, dict):
+                    nome_socio = socio.get("nome_socio") or socio.get("nome") or ""
+                    doc = fragmento_documento(socio.get("cnpj_cpf_do_socio") or socio.get("documento"))
+                else:
+                    nome_socio, doc = str(socio), ""
+                if not nome_socio:
+                    continue
+                self._consultar("registrar_dossie.socio", """
+                MATCH (e:Empresa {cnpj: $cnpj})
+                MERGE (s:Socio {nome: $nome_socio, doc_fragmento: $doc})
+                MERGE (s)-[:E_SOCIO_DE]->(e)
+                SET s.grau = COUNT { (s)--() }, e.grau = COUNT { (e)--() }
+                """, {"cnpj": emp_cnpj, "nome_socio": nome_socio, "doc": doc})
                     
         logger.info(f"🕸️ [GRAFO] Atualizada teia do dossiê CPF: {cpf}")
 
+def _resumo_hub(no: dict, por_tipo) -> dict:
+    resumo = {"nome": no["nome"], "tipo": no["tipo"], "grau": no["grau"]}
+    if por_tipo:
+        resumo["grau_por_tipo"] = grau_por_tipo(por_tipo)
+    return resumo
+
+
+def _contar_tipos(nos: dict) -> dict:
+    contagem = {}
+    for no in nos.values():
+        contagem[no["tipo"]] = contagem.get(no["tipo"], 0) + 1
+    return contagem
+
+
+def _caminhos_de_maior_valor(nos: dict, limite: int) -> list:
+    """Trilhas da raiz até as folhas da árvore de travessia, pelo valor acumulado."""
+    pais = {no["pai"] for no in nos.values() if no["pai"]}
+    folhas = sorted((i for i, no in nos.items() if i not in pais and no["pai"]),
+                    key=lambda i: nos[i]["valor"], reverse=True)[:limite]
+    caminhos = []
+    for folha in folhas:
+        trilha, atual = [], folha
+        while nos[atual]["pai"]:
+            no = nos[atual]
+            seta = f"—{no['relacao']}→" if no["saida"] else f"←{no['relacao']}—"
+            trilha.append(f"{seta} {no['nome']} ({no['tipo']})")
+            atual = no["pai"]
+        trilha.append(str(nos[atual]["nome"]))
+        caminhos.append({
+            "valor_acumulado": round(nos[folha]["valor"], 2),
+            "saltos": len(trilha) - 1,
+            "trilha": " ".join(reversed(trilha)),
+        })
+    return caminhos
+
+
 def get_neo4j_connection():
     conn = Neo4jConnection(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
     conn.criar_indice_unico()
@@ -0,0 +1,307 @@
+"""
+backend/database/perfil_cypher.py
+
+Perfil das consultas Cypher (latência, linhas, db hits, log de lentas)
+=====================================================================
+Instrumentação opcional do Neo4jConnection (NEO4J_PERFIL=1). Cada consulta
+tem um nome: o do método (extrair_subgrafo_para_ia, seguir_dinheiro.expandir,
+...) ou, nas chamadas a execute_query, "módulo.função@linha" de quem chamou.
+Por nome, acumula:
+
+  - histograma de latência (cliente, do run ao último registro) e o tempo
+    que o servidor declarou (result_available_after + result_consumed_after);
+  - linhas devolvidas e erros;
+  - db hits: uma fração NEO4J_PERFIL_AMOSTRA das execuções roda com PROFILE
+    na frente e soma os dbHits da árvore do plano;
+  - consultas acima de NEO4J_LENTA_MS vão para o log (WARNING) e para um
+    buffer das últimas lentas, com os parâmetros reduzidos a tipo e tamanho
+    (CPF, nomes e listas de linhas não vazam).
+
+Saídas: texto Prometheus (GET /metrics/cypher), JSON (GET /api/metricas/cypher)
+e o relatório de linha de comando. Processos em lote (injetor, auditor)
+acumulam em NEO4J_PERFIL_ARQUIVO ao terminar.
+
+Relatório:
+    python -m database.perfil_cypher                          # arquivo acumulado
+    python -m database.perfil_cypher --url http://localhost:8000 --ordenar p95
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import atexit
+import logging
+import argparse
+import threading
+from collections import deque
+from datetime import datetime
+
+from neo4j import Query
+
+logger = logging.getLogger("PerfilCypher")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NEO4J_PERFIL = os.getenv("NEO4J_PERFIL", "0") == "1"
+NEO4J_PERFIL_AMOSTRA = float(os.getenv("NEO4J_PERFIL_AMOSTRA", "0.01"))
+NEO4J_LENTA_MS = float(os.getenv("NEO4J_LENTA_MS", "1000"))
+NEO4J_PERFIL_ARQUIVO = os.getenv("NEO4J_PERFIL_ARQUIVO", os.path.join(BASE_DIR, "estado", "perfil_cypher.json"))
+
+LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+MAX_LENTAS = 50
+# PROFILE não se aplica a comandos de schema nem a CALL {} IN TRANSACTIONS.
+_SEM_PROFILE = re.compile(r"^\s*(CREATE|DROP|SHOW|PROFILE|EXPLAIN|CALL\s+db\.)|IN\s+TRANSACTIONS", re.I)
+
+
+def redigir(valor):
+    """Parâmetros reduzidos a tipo e tamanho, para log."""
+    if isinstance(valor, dict):
+        return {k: redigir(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return f"<lista[{len(valor)}]>"
+    if isinstance(valor, str):
+        return f"<str[{len(valor)}]>"
+    if valor is None or isinstance(valor, bool):
+        return valor
+    return f"<{type(valor).__name__}>"
+
+
+def _somar_db_hits(plano) -> int:
+    if not plano:
+        return 0
+    return int(plano.get("dbHits", 0) or 0) + sum(_somar_db_hits(f) for f in plano.get("children", []))
+
+
+def _texto_curto(query: str, limite: int = 300) -> str:
+    return " ".join(query.split())[:limite]
+
+
+def nome_chamador(profundidade: int = 2) -> str:
+    """ "módulo.função@linha" de quem chamou execute_query."""
+    frame = sys._getframe(profundidade)
+    modulo = frame.f_globals.get("__name__", "?").rsplit(".", 1)[-1]
+    return f"{modulo}.{frame.f_code.co_name}@{frame.f_lineno}"
+
+
+class _Estatistica:
+    __slots__ = ("contagem", "erros", "soma_ms", "max_ms", "servidor_ms", "linhas", "perfiladas", "db_hits",
+                 "baldes")
+
+    def __init__(self):
+        self.contagem = self.erros = self.linhas = self.perfiladas = self.db_hits = 0
+        self.soma_ms = self.max_ms = self.servidor_ms = 0.0
+        self.baldes = [0] * (len(LIMITES_MS) + 1)  # o último é +Inf
+
+    def registrar(self, ms: float, linhas: int, servidor_ms: float, db_hits: int | None, erro: bool):
+        self.contagem += 1
+        self.erros += erro
+        self.soma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.servidor_ms += servidor_ms
+        self.linhas += linhas
+        if db_hits is not None:
+            self.perfiladas += 1
+            self.db_hits += db_hits
+        self.baldes[next((i for i, limite in enumerate(LIMITES_MS) if ms <= limite), len(LIMITES_MS))] += 1
+
+    def como_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def somar(self, outro: dict):
+        for k in self.__slots__:
+            if k == "baldes":
+                self.baldes = [a + b for a, b in zip(self.baldes, outro.get("baldes", []))] or self.baldes
+            elif k == "max_ms":
+                self.max_ms = max(self.max_ms, outro.get(k, 0.0))
+            else:
+                setattr(self, k, getattr(self, k) + outro.get(k, 0))
+
+
+def percentil(baldes: list, fracao: float) -> float | None:
+    """Limite superior (ms) do balde onde cai o percentil; None se cair em +Inf ou não houver dados."""
+    total = sum(baldes)
+    if not total:
+        return None
+    acumulado = 0
+    for i, n in enumerate(baldes):
+        acumulado += n
+        if acumulado >= fracao * total:
+            return float(LIMITES_MS[i]) if i < len(LIMITES_MS) else None
+    return None
+
+
+class PerfilCypher:
+    def __init__(self, ativo: bool = NEO4J_PERFIL, amostra: float = NEO4J_PERFIL_AMOSTRA,
+                 lenta_ms: float = NEO4J_LENTA_MS):
+        self.ativo = ativo
+        self.amostra = amostra
+        self.lenta_ms = lenta_ms
+        self.desde = datetime.now().isoformat(timespec="seconds")
+        self._stats: dict[str, _Estatistica] = {}
+        self._lentas: deque = deque(maxlen=MAX_LENTAS)
+        self._lock = threading.Lock()
+
+    def executar(self, sessao, nome: str, query: str, parametros: dict = None, timeout: float = None) -> list:
+        """session.run(...).data(), medido quando o perfil está ativo."""
+        if not self.ativo:
+            return sessao.run(Query(query, timeout=timeout) if timeout else query, parametros).data()
+
+        perfilar = self.amostra > 0 and random.random() < self.amostra and not _SEM_PROFILE.search(query)
+        texto = f"PROFILE {query}" if perfilar else query
+        inicio = time.perf_counter()
+        linhas, servidor_ms, db_hits, erro = [], 0.0, None, True
+        try:
+            resultado = sessao.run(Query(texto, timeout=timeout) if timeout else texto, parametros)
+            linhas = resultado.data()
+            resumo = resultado.consume()
+            servidor_ms = float((resumo.result_available_after or 0) + (resumo.result_consumed_after or 0))
+            if perfilar:
+                db_hits = _somar_db_hits(resumo.profile)
+            erro = False
+            return linhas
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            self.registrar(nome, ms, len(linhas), servidor_ms, db_hits, erro)
+            if ms >= self.lenta_ms:
+                self._registrar_lenta(nome, ms, len(linhas), query, parametros, erro)
+
+    def registrar(self, nome: str, ms: float, linhas: int = 0, servidor_ms: float = 0.0,
+                  db_hits: int = None, erro: bool = False):
+        with self._lock:
+            self._stats.setdefault(nome, _Estatistica()).registrar(ms, linhas, servidor_ms, db_hits, erro)
+
+    def _registrar_lenta(self, nome, ms, linhas, query, parametros, erro):
+        redigidos = redigir(parametros or {})
+        self._lentas.append({"nome": nome, "ms": round(ms, 1), "linhas": linhas, "erro": erro,
+                             "parametros": redigidos, "consulta": _texto_curto(query),
+                             "quando": datetime.now().isoformat(timespec="seconds")})
+        logger.warning(f"🐢 Consulta lenta {nome}: {ms:,.0f} ms, {linhas} linhas | parâmetros {redigidos}")
+
+    # ── saídas ────────────────────────────────────────────────────────────────
+    def instantaneo(self) -> dict:
+        with self._lock:
+            return {"desde": self.desde, "consultas": {n: e.como_dict() for n, e in self._stats.items()},
+                    "lentas": list(self._lentas)}
+
+    def texto_prometheus(self) -> str:
+        consultas = self.instantaneo()["consultas"]
+        linhas = [
+            "# HELP neo4j_consulta_duracao_segundos Latência das consultas Cypher por nome (cliente).",
+            "# TYPE neo4j_consulta_duracao_segundos histogram",
+        ]
+        for nome, e in sorted(consultas.items()):
+            rotulo = nome.replace("\\", "\\\\").replace('"', '\\"')
+            acumulado = 0
+            for limite, n in zip((*LIMITES_MS, None), e["baldes"]):
+                acumulado += n
+                le = "+Inf" if limite is None else f"{limite / 1000:g}"
+                linhas.append(f'neo4j_consulta_duracao_segundos_bucket{{consulta="{rotulo}",le="{le}"}} {acumulado}')
+            linhas.append(f'neo4j_consulta_duracao_segundos_sum{{consulta="{rotulo}"}} {e["soma_ms"] / 1000:.6f}')
+            linhas.append(f'neo4j_consulta_duracao_segundos_count{{consulta="{rotulo}"}} {e["contagem"]}')
+        for metrica, campo, ajuda in (
+            ("neo4j_consulta_servidor_segundos_total", "servidor_ms", "Tempo declarado pelo servidor."),
+            ("neo4j_consulta_linhas_total", "linhas", "Linhas devolvidas."),
+            ("neo4j_consulta_erros_total", "erros", "Execuções com erro."),
+            ("neo4j_consulta_perfiladas_total", "perfiladas", "Execuções amostradas com PROFILE."),
+            ("neo4j_consulta_db_hits_total", "db_hits", "db hits somados nas execuções com PROFILE."),
+        ):
+            linhas += [f"# HELP {metrica} {ajuda}", f"# TYPE {metrica} counter"]
+            for nome, e in sorted(consultas.items()):
+                valor = e[campo] / 1000 if campo == "servidor_ms" else e[campo]
+                rotulo = nome.replace("\\", "\\\\").replace('"', '\\"')
+                linhas.append(f'{metrica}{{consulta="{rotulo}"}} {valor:.6f}' if campo == "servidor_ms"
+                              else f'{metrica}{{consulta="{rotulo}"}} {valor}')
+        return "\n".join(linhas) + "\n"
+
+    def acumular_em_arquivo(self, caminho: str = NEO4J_PERFIL_ARQUIVO):
+        """Soma o perfil deste processo ao arquivo (execuções em lote se acumulam)."""
+        atual = self.instantaneo()
+        if not atual["consultas"]:
+            return
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        base = carregar_arquivo(caminho)
+        for nome, dados in atual["consultas"].items():
+            estatistica = _Estatistica()
+            estatistica.somar(base["consultas"].get(nome, {}))
+            estatistica.somar(dados)
+            base["consultas"][nome] = estatistica.como_dict()
+        base["lentas"] = (base.get("lentas", []) + atual["lentas"])[-MAX_LENTAS:]
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(base, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+
+def carregar_arquivo(caminho: str) -> dict:
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"desde": datetime.now().isoformat(timespec="seconds"), "consultas": {}, "lentas": []}
+
+
+def relatorio(dados: dict, ordenar: str = "total", limite: int = 30) -> str:
+    """Tabela por consulta: execuções, total, média, p50/p95/máx, servidor, linhas, db hits médios."""
+    linhas = []
+    for nome, e in dados.get("consultas", {}).items():
+        n = e["contagem"] or 1
+        linhas.append({
+            "nome": nome, "n": e["contagem"], "erros": e["erros"], "total": e["soma_ms"] / 1000,
+            "media": e["soma_ms"] / n, "p50": percentil(e["baldes"], 0.5), "p95": percentil(e["baldes"], 0.95),
+            "max": e["max_ms"], "servidor": e["servidor_ms"] / n, "linhas": e["linhas"] / n,
+            "db_hits": e["db_hits"] / e["perfiladas"] if e["perfiladas"] else None,
+        })
+    chave = {"total": "total", "media": "media", "p95": "p95", "max": "max", "db_hits": "db_hits"}[ordenar]
+    linhas.sort(key=lambda l: l[chave] if l[chave] is not None else float("inf"), reverse=True)
+    fmt = lambda v, f="{:,.0f}": "—" if v is None else f.format(v)
+    saida = [f"Perfil Cypher desde {dados.get('desde', '?')} (ordenado por {ordenar})",
+             f"{'consulta':<48} {'n':>7} {'err':>4} {'total s':>9} {'média':>8} {'p50':>7} {'p95':>7} "
+             f"{'máx':>8} {'servidor':>8} {'linhas':>8} {'db hits':>10}"]
+    for l in linhas[:limite]:
+        saida.append(f"{l['nome'][:48]:<48} {l['n']:>7,} {l['erros']:>4} {l['total']:>9,.1f} {fmt(l['media']):>8} "
+                     f"{fmt(l['p50']):>7} {fmt(l['p95']):>7} {fmt(l['max']):>8} {fmt(l['servidor']):>8} "
+                     f"{fmt(l['linhas'], '{:,.1f}'):>8} {fmt(l['db_hits']):>10}")
+    if dados.get("lentas"):
+        saida.append("")
+        saida.append("Últimas consultas lentas:")
+        for lenta in dados["lentas"][-10:]:
+            saida.append(f"  {lenta['quando']} {lenta['nome']} {lenta['ms']:,.0f} ms {lenta['parametros']}")
+    return "\n".join(saida)
+
+
+_perfil = None
+_lock = threading.Lock()
+
+
+def get_perfil_cypher() -> PerfilCypher:
+    global _perfil
+    if _perfil is None:
+        with _lock:
+            if _perfil is None:
+                _perfil = PerfilCypher()
+                if _perfil.ativo:
+                    atexit.register(_perfil.acumular_em_arquivo)
+                    logger.info(f"⏱️ Perfil Cypher ativo (PROFILE em {_perfil.amostra:.0%}, "
+                                f"lentas ≥ {_perfil.lenta_ms:,.0f} ms).")
+    return _perfil
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório do perfil das consultas Cypher")
+    parser.add_argument("--arquivo", default=NEO4J_PERFIL_ARQUIVO, help="Perfil acumulado pelos processos em lote")
+    parser.add_argument("--url", help="API em execução (lê GET /api/metricas/cypher)")
+    parser.add_argument("--ordenar", choices=("total", "media", "p95", "max", "db_hits"), default="total")
+    parser.add_argument("--limite", type=int, default=30)
+    parser.add_argument("--zerar", action="store_true", help="Apaga o arquivo acumulado depois do relatório")
+    args = parser.parse_args()
+
+    if args.url:
+        import httpx
+        dados = httpx.get(f"{args.url.rstrip('/')}/api/metricas/cypher", timeout=10).json()
+    else:
+        dados = carregar_arquivo(args.arquivo)
+    print(relatorio(dados, args.ordenar, args.limite))
+    if args.zerar and not args.url and os.path.exists(args.arquivo):
+        os.remove(args.arquivo)
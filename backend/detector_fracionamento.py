@@ -0,0 +1,265 @@
+"""
+backend/detector_fracionamento.py
+
+DETECTOR DE FRACIONAMENTO DE DESPESA (grafo inteiro, uma passada)
+=================================================================
+Heurística 3 do auditor: vários contratos do MESMO pagador com o MESMO
+fornecedor, cada um colado abaixo de um limite de Dispensa, em poucos dias —
+juntos passariam do limite e exigiriam licitação.
+
+  - PNCP: lê uma vez todos os (:Empresa)-[:GANHOU_LICITACAO]->(:Contrato) na
+    faixa de Dispensa e agrupa por (órgão, fornecedor);
+  - CEAP: a aresta :PAGOU_A é agregada por ano (sem datas), então as despesas
+    vêm do próprio arquivo da Câmara em streaming, agrupadas por (deputado, fornecedor).
+
+Em cada grupo, uma janela deslizante de FRACIONAMENTO_JANELA_DIAS encontra
+os aglomerados com ao menos FRACIONAMENTO_MIN_CONTRATOS itens cuja soma passa
+do limite. Cada aglomerado vira um nó (:AlertaFracionamento) indexado:
+
+    (a:AlertaFracionamento)-[:FORNECEDOR]->(:Empresa)
+    (a)-[:INCLUI]->(:Contrato)          # PNCP
+    (a)-[:PAGADOR]->(:Politico)         # CEAP
+
+O motor de regras e o extrator de subgrafo só leem esses nós. Alertas de uma
+rodada anterior que não se repetiram são removidos ao final.
+
+Uso:
+    python detector_fracionamento.py --fonte pncp
+    python detector_fracionamento.py --fonte ceap --ano 2024
+"""
+
+import time
+import logging
+import argparse
+from pathlib import Path
+from datetime import date, datetime
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from database.neo4j_conn import Neo4jConnection
+
+logger = logging.getLogger("DetectorFracionamento")
+
+# Limites de Dispensa: Lei 8.666 (17,6k/33k), Lei 14.133 original (50k/100k) e
+# atualizações por decreto (2022: 57.208,33/114.416,65; 2023: 59.906,02/119.812,02).
+LIMITES_DISPENSA = (17_600.00, 33_000.00, 50_000.00, 57_208.33, 59_906.02, 100_000.00, 114_416.65, 119_812.02)
+FRACIONAMENTO_FAIXA = 0.80          # "colado no limite" = entre 80% e 100% dele
+FRACIONAMENTO_JANELA_DIAS = 90
+FRACIONAMENTO_MIN_CONTRATOS = 3
+MAX_ITENS_POR_ALERTA = 50
+LOTE_GRAVACAO = 1000
+
+INDICES = [
+    "CREATE CONSTRAINT alerta_fracionamento_id IF NOT EXISTS FOR (a:AlertaFracionamento) REQUIRE a.id IS UNIQUE",
+    "CREATE INDEX alerta_fracionamento_fornecedor_idx IF NOT EXISTS FOR (a:AlertaFracionamento) ON (a.fornecedor_cnpj)",
+    "CREATE INDEX alerta_fracionamento_pagador_idx IF NOT EXISTS FOR (a:AlertaFracionamento) ON (a.pagador)",
+    "CREATE INDEX alerta_fracionamento_rodada_idx IF NOT EXISTS FOR (a:AlertaFracionamento) ON (a.fonte, a.rodada)",
+]
+
+Q_CONTRATOS_NA_FAIXA = """
+MATCH (e:Empresa)-[:GANHOU_LICITACAO]->(c:Contrato)
+WHERE c.valor >= $valor_min AND c.valor <= $valor_max
+  AND c.data_assinatura IS NOT NULL AND c.orgao_cnpj IS NOT NULL
+RETURN c.orgao_cnpj AS pagador, c.orgao AS pagador_nome, e.cnpj AS cnpj, e.nome AS fornecedor,
+       c.id AS id, c.valor AS valor, left(toString(c.data_assinatura), 10) AS data
+"""
+
+Q_GRAVAR_ALERTAS = """
+UNWIND $rows AS row
+MERGE (a:AlertaFracionamento {id: row.id})
+SET a.fonte = row.fonte, a.ano = row.ano, a.pagador = row.pagador, a.pagador_nome = row.pagador_nome,
+    a.fornecedor_cnpj = row.cnpj, a.fornecedor = row.fornecedor,
+    a.inicio = date(row.inicio), a.fim = date(row.fim), a.qtd = row.qtd, a.soma = row.soma,
+    a.limite = row.limite, a.itens = row.itens, a.rodada = $rodada, a.detectado_em = date()
+MERGE (e:Empresa {cnpj: row.cnpj})
+ON CREATE SET e.nome = row.fornecedor
+MERGE (a)-[:FORNECEDOR]->(e)
+WITH a, row
+CALL {
+    WITH a, row
+    UNWIND CASE WHEN row.fonte = 'PNCP' THEN row.itens ELSE [] END AS id_contrato
+    MATCH (c:Contrato {id: id_contrato})
+    MERGE (a)-[:INCLUI]->(c)
+}
+CALL {
+    WITH a, row
+    OPTIONAL MATCH (p:Politico {id_camara: row.id_camara})
+    FOREACH (_ IN CASE WHEN p IS NULL THEN [] ELSE [1] END | MERGE (a)-[:PAGADOR]->(p))
+}
+"""
+
+Q_REMOVER_ANTIGOS = """
+MATCH (a:AlertaFracionamento {fonte: $fonte})
+WHERE a.rodada <> $rodada AND ($ano IS NULL OR a.ano = $ano)
+WITH a LIMIT 10000
+DETACH DELETE a
+RETURN count(*) AS removidos
+"""
+
+
+def limite_dispensa(valor: float) -> float | None:
+    """Limite de Dispensa do qual o valor está 'colado' (faixa de 80–100%), ou None."""
+    for limite in LIMITES_DISPENSA:
+        if valor <= limite:
+            return limite if valor >= FRACIONAMENTO_FAIXA * limite else None
+    return None
+
+
+def agrupar_fracionamento(itens: list) -> list:
+    """
+    itens: [{"id", "valor", "data" (YYYY-MM-DD)}] de UM par (pagador, fornecedor).
+    Devolve os aglomerados suspeitos: janelas de até FRACIONAMENTO_JANELA_DIAS com
+    ao menos FRACIONAMENTO_MIN_CONTRATOS itens na faixa de Dispensa, com janelas
+    sobrepostas fundidas e soma acima do limite de referência.
+    """
+    na_faixa = []
+    for item in itens:
+        limite = limite_dispensa(float(item.get("valor") or 0))
+        if limite and item.get("data"):
+            try:
+                na_faixa.append((date.fromisoformat(item["data"][:10]), limite, item))
+            except ValueError:
+                continue
+    na_faixa.sort(key=lambda t: (t[0], str(t[2].get("id"))))
+
+    # Janela deslizante: marca [inicio, fim] sempre que a janela terminada em `fim` basta.
+    aglomerados, inicio = [], 0
+    for fim in range(len(na_faixa)):
+        while (na_faixa[fim][0] - na_faixa[inicio][0]).days > FRACIONAMENTO_JANELA_DIAS:
+            inicio += 1
+        if fim - inicio + 1 < FRACIONAMENTO_MIN_CONTRATOS:
+            continue
+        if aglomerados and inicio <= aglomerados[-1][1]:
+            aglomerados[-1][1] = fim
+        else:
+            aglomerados.append([inicio, fim])
+
+    resultado = []
+    for i, f in aglomerados:
+        grupo = na_faixa[i:f + 1]
+        limite = Counter(lim for _, lim, _ in grupo).most_common(1)[0][0]
+        soma = sum(float(item["valor"]) for _, _, item in grupo)
+        if soma <= limite:
+            continue
+        resultado.append({
+            "inicio": grupo[0][0].isoformat(),
+            "fim": grupo[-1][0].isoformat(),
+            "qtd": len(grupo),
+            "soma": round(soma, 2),
+            "limite": limite,
+            "itens": [str(item["id"]) for _, _, item in grupo][:MAX_ITENS_POR_ALERTA],
+        })
+    return resultado
+
+
+class DetectorFracionamento:
+    def __init__(self, neo4j: Neo4jConnection):
+        self.neo4j = neo4j
+        self.rodada = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    def garantir_indices(self):
+        for cmd in INDICES:
+            try:
+                self.neo4j.execute_query(cmd)
+            except Exception as e:
+                logger.warning(f"  ⚠️  Índice de alertas: {e}")
+
+    def _detectar(self, grupos: dict, meta: dict, fonte: str, ano: int = None) -> int:
+        """Janela deslizante em cada grupo e gravação em lote dos alertas."""
+        rows, total = [], 0
+        for (pagador, cnpj), itens in grupos.items():
+            if len(itens) < FRACIONAMENTO_MIN_CONTRATOS:
+                continue
+            pagador_nome, fornecedor = meta[(pagador, cnpj)]
+            for ag in agrupar_fracionamento(itens):
+                rows.append({
+                    **ag, "id": f"{fonte}:{pagador}:{cnpj}:{ag['inicio']}", "fonte": fonte, "ano": ano,
+                    "pagador": str(pagador), "pagador_nome": pagador_nome, "cnpj": cnpj, "fornecedor": fornecedor,
+                    "id_camara": pagador if fonte == "CEAP" else None,
+                })
+                if len(rows) >= LOTE_GRAVACAO:
+                    self.neo4j.execute_query(Q_GRAVAR_ALERTAS, {"rows": rows, "rodada": self.rodada})
+                    total += len(rows)
+                    rows = []
+        if rows:
+            self.neo4j.execute_query(Q_GRAVAR_ALERTAS, {"rows": rows, "rodada": self.rodada})
+            total += len(rows)
+
+        removidos = 0
+        while True:
+            n = self.neo4j.execute_query(Q_REMOVER_ANTIGOS, {"fonte": fonte, "rodada": self.rodada, "ano": ano})
+            n = n[0]["removidos"] if n else 0
+            removidos += n
+            if not n:
+                break
+        logger.info(f"  ✂️  {fonte}: {total:,} alertas de fracionamento gravados, {removidos:,} antigos removidos")
+        return total
+
+    def detectar_pncp(self) -> int:
+        """Uma leitura de todos os contratos nacionais na faixa de Dispensa."""
+        t0 = time.time()
+        grupos, meta, lidos = defaultdict(list), {}, 0
+        with self.neo4j.driver.session() as session:
+            resultado = session.run(Q_CONTRATOS_NA_FAIXA,
+                                    valor_min=FRACIONAMENTO_FAIXA * min(LIMITES_DISPENSA),
+                                    valor_max=max(LIMITES_DISPENSA))
+            for r in resultado:
+                chave = (r["pagador"], r["cnpj"])
+                grupos[chave].append({"id": r["id"], "valor": r["valor"], "data": r["data"]})
+                meta.setdefault(chave, (r["pagador_nome"], r["fornecedor"]))
+                lidos += 1
+        logger.info(f"  📖 PNCP: {lidos:,} contratos na faixa de Dispensa em {len(grupos):,} pares "
+                    f"(órgão, fornecedor) — {time.time() - t0:.1f}s")
+        return self._detectar(grupos, meta, "PNCP")
+
+    def detectar_ceap(self, despesas: Iterable[dict], ano: int) -> int:
+        """Despesas no formato de injetor_neo4j._ler_ceap (uma passada pelo arquivo)."""
+        grupos, meta, lidas = defaultdict(list), {}, 0
+        for d in despesas:
+            if limite_dispensa(d["valor"]) is None:
+                continue
+            chave = (d["id_camara"], d["cnpj"])
+            grupos[chave].append({"id": f"{d['data']}:{d['valor']:.2f}", "valor": d["valor"], "data": d["data"]})
+            meta.setdefault(chave, (d["nome"], d["fornecedor"]))
+            lidas += 1
+        logger.info(f"  📖 CEAP {ano}: {lidas:,} despesas na faixa de Dispensa em {len(grupos):,} pares "
+                    f"(deputado, fornecedor)")
+        return self._detectar(grupos, meta, "CEAP", ano)
+
+
+def detectar_fracionamento(neo4j: Neo4jConnection, fontes=("pncp", "ceap"), ano: int = None,
+                           pasta_dados: Path = None, ler_ceap=None) -> int:
+    """
+    Roda as fontes pedidas; CEAP só se o arquivo do ano estiver em pasta_dados.
+    `ler_ceap` é o leitor em streaming do injetor (passado por ele para evitar import circular).
+    """
+    if ler_ceap is None:
+        from injetor_neo4j import _ler_ceap as ler_ceap
+
+    detector = DetectorFracionamento(neo4j)
+    detector.garantir_indices()
+    total = detector.detectar_pncp() if "pncp" in fontes else 0
+    if "ceap" in fontes and ano:
+        zip_path = Path(pasta_dados or f"./dados_brutos_{ano}") / f"ceap_camara_{ano}.csv.zip"
+        if zip_path.exists():
+            total += detector.detectar_ceap(ler_ceap(zip_path), ano)
+        else:
+            logger.warning(f"  ⚠️  CEAP não encontrado: {zip_path}. Fracionamento da CEAP não analisado.")
+    return total
+
+
+if __name__ == "__main__":
+    from database.neo4j_conn import get_neo4j_connection
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Detector de fracionamento de despesa (PNCP + CEAP)")
+    parser.add_argument("--fonte", choices=["pncp", "ceap", "todos"], default="todos")
+    parser.add_argument("--ano", type=int, default=2024, help="Ano do arquivo CEAP")
+    args = parser.parse_args()
+
+    neo4j = get_neo4j_connection()
+    try:
+        fontes = ("pncp", "ceap") if args.fonte == "todos" else (args.fonte,)
+        detectar_fracionamento(neo4j, fontes, args.ano)
+    finally:
+        neo4j.close()
@@ -0,0 +1,142 @@
+"""
+backend/hubs_grafo.py
+
+GRAU DOS NÓS E REGISTRO DE HUBS
+===============================
+Grandes fornecedoras (companhias aéreas na CEAP, empreiteiras no PNCP) e
+sócios homônimos acumulam milhares de arestas; qualquer subgrafo que encosta
+neles explode. Aqui:
+
+  - `grau` de (:Empresa), (:Socio) e (:Politico): as ingestões incrementais
+    (PNCP, QSA) já gravam o grau dos nós que tocam; recalcular_graus() refaz
+    tudo depois das cargas em massa do injetor, em transações de LOTE nós;
+  - registro de hubs: nó com grau > GRAU_HUB ganha o rótulo :Hub, hub_desde
+    e grau_por_tipo (lista "TIPO:n", contada pelo grupo de relações do nó,
+    sem percorrer as arestas); quem cai abaixo do limite sai do registro;
+  - extrair_subgrafo_para_ia e seguir_dinheiro (neo4j_conn.py) resumem hubs
+    em vez de expandi-los.
+
+Uso:
+    python hubs_grafo.py                     # recalcula graus e o registro
+    python hubs_grafo.py --listar --rotulo Empresa --limite 20
+"""
+
+import time
+import logging
+import argparse
+
+from database.neo4j_conn import Neo4jConnection, GRAU_HUB, grau_por_tipo
+
+logger = logging.getLogger("HubsGrafo")
+
+LOTE = 10000
+ROTULOS = ("Empresa", "Socio", "Politico")
+LIMITE_LISTAGEM_MAX = 500
+
+INDICES = [f"CREATE INDEX {r.lower()}_grau_idx IF NOT EXISTS FOR (n:{r}) ON (n.grau)" for r in ROTULOS]
+
+# COUNT { (n)--() } sai do contador do nó (grupo de relações), não das arestas.
+Q_RECALCULAR_GRAUS = """
+MATCH (n:{rotulo})
+CALL {{
+    WITH n
+    SET n.grau = COUNT {{ (n)--() }}
+}} IN TRANSACTIONS OF {lote} ROWS
+"""
+
+Q_SAIR_DO_REGISTRO = """
+MATCH (h:Hub) WHERE coalesce(h.grau, 0) <= $limite
+REMOVE h:Hub, h.hub_desde, h.grau_por_tipo
+RETURN count(h) AS n
+"""
+
+Q_ENTRAR_NO_REGISTRO = """
+MATCH (n:{rotulo}) WHERE n.grau > $limite AND NOT n:Hub
+SET n:Hub, n.hub_desde = date()
+RETURN count(n) AS n
+"""
+
+
+def garantir_indices(neo4j: Neo4jConnection):
+    for cmd in INDICES:
+        try:
+            neo4j.execute_query(cmd)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Índice de grau: {e}")
+
+
+def recalcular_graus(neo4j: Neo4jConnection, lote: int = LOTE) -> None:
+    """Regrava `grau` em todos os nós dos ROTULOS (depois de cargas que não o mantêm)."""
+    garantir_indices(neo4j)
+    for rotulo in ROTULOS:
+        t0 = time.time()
+        try:
+            neo4j.execute_query(Q_RECALCULAR_GRAUS.format(rotulo=rotulo, lote=int(lote)))
+            logger.info(f"  🔢 Grau de :{rotulo} recalculado em {time.time() - t0:.1f}s")
+        except Exception as e:
+            logger.error(f"  ❌ Erro ao recalcular o grau de :{rotulo}: {e}")
+
+
+def _q_grau_por_tipo(tipos: list) -> str:
+    # Um COUNT por tipo de relação do banco (nome vem de db.relationshipTypes()).
+    contagens = ", ".join(f"['{t}', COUNT {{ (h)-[:`{t}`]-() }}]" for t in tipos)
+    return f"""
+    MATCH (h:Hub)
+    SET h.grau_por_tipo = [c IN [{contagens}] WHERE c[1] > 0 | c[0] + ':' + toString(c[1])]
+    RETURN count(h) AS n
+    """
+
+
+def atualizar_registro(neo4j: Neo4jConnection, limite: int = GRAU_HUB) -> dict:
+    """Marca/desmarca :Hub pelo `grau` já gravado e refaz grau_por_tipo dos hubs."""
+    saiu = neo4j.execute_query(Q_SAIR_DO_REGISTRO, {"limite": limite})[0]["n"]
+    entrou = sum(neo4j.execute_query(Q_ENTRAR_NO_REGISTRO.format(rotulo=r), {"limite": limite})[0]["n"]
+                 for r in ROTULOS)
+    tipos = [r["tipo"] for r in neo4j.execute_query(
+        "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType AS tipo")]
+    total = neo4j.execute_query(_q_grau_por_tipo(tipos))[0]["n"] if tipos else 0
+    logger.info(f"  🕳️  Registro de hubs (grau > {limite:,}): {total:,} hubs | +{entrou} / -{saiu}")
+    return {"hubs": total, "entraram": entrou, "sairam": saiu}
+
+
+def recalcular_hubs(neo4j: Neo4jConnection, limite: int = GRAU_HUB, lote: int = LOTE) -> dict:
+    recalcular_graus(neo4j, lote)
+    return atualizar_registro(neo4j, limite)
+
+
+def listar_hubs(neo4j: Neo4jConnection, rotulo: str = None, limite: int = 50) -> list:
+    """Hubs registrados, do maior grau para o menor, opcionalmente de um rótulo só."""
+    if rotulo is not None and rotulo not in ROTULOS:
+        raise ValueError(f"Rótulo inválido. Use um de: {', '.join(ROTULOS)}.")
+    limite = max(1, min(int(limite), LIMITE_LISTAGEM_MAX))
+    linhas = neo4j.execute_query(
+        "MATCH (h:Hub) WHERE $rotulo IS NULL OR $rotulo IN labels(h) "
+        "RETURN [l IN labels(h) WHERE l <> 'Hub'][0] AS tipo, "
+        "coalesce(h.nome, h.razao_social, h.cnpj, h.id_tse) AS nome, h.cnpj AS cnpj, "
+        "h.doc_fragmento AS doc_fragmento, h.grau AS grau, h.grau_por_tipo AS grau_por_tipo, "
+        "toString(h.hub_desde) AS hub_desde ORDER BY h.grau DESC LIMIT $limite",
+        {"rotulo": rotulo, "limite": limite})
+    return [{**h, "grau_por_tipo": grau_por_tipo(h["grau_por_tipo"])} for h in linhas]
+
+
+if __name__ == "__main__":
+    import json
+    from database.neo4j_conn import get_neo4j_connection
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Grau dos nós e registro de hubs do grafo")
+    parser.add_argument("--listar", action="store_true", help="Só lista o registro (não recalcula)")
+    parser.add_argument("--rotulo", choices=ROTULOS, help="Filtra a listagem por rótulo")
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--grau-hub", type=int, default=GRAU_HUB)
+    parser.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+
+    neo4j = get_neo4j_connection()
+    try:
+        if args.listar:
+            print(json.dumps(listar_hubs(neo4j, args.rotulo, args.limite), indent=2, ensure_ascii=False))
+        else:
+            recalcular_hubs(neo4j, args.grau_hub, args.lote)
+    finally:
+        neo4j.close()
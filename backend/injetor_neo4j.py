@@ -10,9 +10,15 @@ A propriedade `valor_total` nas arestas é sempre gravada corretamente.
 Uso:
     python injetor_neo4j.py --ano 2024 --fonte tse
     python injetor_neo4j.py --ano 2024 --fonte cgu
+    python injetor_neo4j.py --ano 2024 --fonte ceap
+    python injetor_neo4j.py --ano 2024 --fonte fracionamento
+    python injetor_neo4j.py --ano 2024 --fonte metricas
+    python injetor_neo4j.py --ano 2024 --fonte hubs
+    python injetor_neo4j.py --ano 2024 --fonte analise
     python injetor_neo4j.py --ano 2024 --fonte todos
 """
 
+import io
 import os
 import sys
 import csv
@@ -32,13 +38,22 @@ logger = logging.getLogger("InjectorNeo4j")
 
 # ─── CONEXÃO NEO4J ────────────────────────────────────────────────────────────
 try:
-    from database.neo4j_conn import get_neo4j_connection, Neo4jConnection
+    from database.neo4j_conn import (get_neo4j_connection, Neo4jConnection, CHAVE_POLITICO,
+                                     INDICES_CHAVE_POLITICO, garantir_chave_politico,
+                                     SUBSTITUIR_ANO_PAGOU_A)
     logger.info("✅ Módulo neo4j_conn importado.")
 except ImportError as e:
     logger.critical(f"❌ Falha ao importar neo4j_conn: {e}")
     logger.critical("   Certifique-se de rodar este script de dentro da pasta backend/")
     sys.exit(1)
 
+from detector_fracionamento import detectar_fracionamento, INDICES as INDICES_FRACIONAMENTO
+from metricas_patrimoniais import calcular_metricas, INDICES as INDICES_METRICAS
+from hubs_grafo import recalcular_hubs, INDICES as INDICES_HUBS
+from analise_grafo import analisar as analisar_estrutura, INDICES as INDICES_ANALISE
+from telemetria import registrar_lote, medir_etapa, iniciar_exportador
+from rastreamento import span, iniciar_rastreamento
+
 # ─── MAPEAMENTO DE CARGOS TSE → JURISDIÇÃO ───────────────────────────────────
 CARGOS_MUNICIPAIS = {"PREFEITO", "VICE-PREFEITO", "VEREADOR"}
 CARGOS_ESTADUAIS  = {"DEPUTADO ESTADUAL", "DEPUTADO DISTRITAL", "GOVERNADOR", "VICE-GOVERNADOR", "SENADOR"}
@@ -186,12 +201,13 @@ def _batch_merge_politicos(neo4j: Neo4jConnection, batch: list[dict]) -> int:
         p.uf            = row.uf,
         p.municipio     = row.municipio,
         p.atualizado_em = date()
+    SET p.chave = """ + CHAVE_POLITICO + """
     // CPF: só grava quando não-nulo (evita sobrescrever com dado mascarado)
     WITH p, row WHERE row.cpf IS NOT NULL
     SET p.cpf = row.cpf
     """
     try:
-        neo4j.execute_query(query, {"rows": batch})
+        _gravar_lote(neo4j, "tse_candidatos", query, {"rows": batch})
         return len(batch)
     except Exception as e:
         logger.error(f"  ❌ Erro no batch MERGE de políticos: {e}")
@@ -200,6 +216,13 @@ def _batch_merge_politicos(neo4j: Neo4jConnection, batch: list[dict]) -> int:
 
 import time as _time
 
+
+def _gravar_lote(neo4j: Neo4jConnection, fonte: str, query: str, parametros: dict):
+    """execute_query do lote com linhas e duração publicadas em ingestao_* (telemetria.py)."""
+    inicio = _time.perf_counter()
+    neo4j.execute_query(query, parametros, nome=f"injetor.{fonte}")
+    registrar_lote(fonte, len(parametros["rows"]), _time.perf_counter() - inicio)
+
 # ─── HELPER: conta linhas de um arquivo sem carregar tudo na memória ───────────
 def _contar_linhas(caminho: Path) -> int:
     """Conta linhas do arquivo de forma eficiente (para calcular ETA)."""
@@ -323,7 +346,7 @@ def _batch_merge_bens(neo4j: Neo4jConnection, batch: list[dict]):
     ON MATCH  SET r.valor_total = r.valor_total + row.valor, r.atualizado_em = date()
     """
     try:
-        neo4j.execute_query(query, {"rows": batch})
+        _gravar_lote(neo4j, "tse_bens", query, {"rows": batch})
     except Exception as e:
         logger.error(f"  ❌ Erro no batch MERGE de bens: {e}")
 
@@ -400,11 +423,196 @@ def _batch_merge_empresas_ceis(neo4j: Neo4jConnection, batch: list[dict]):
         e.atualizado_em = date()
     """
     try:
-        neo4j.execute_query(query, {"rows": batch})
+        _gravar_lote(neo4j, "cgu_ceis", query, {"rows": batch})
     except Exception as e:
         logger.error(f"  ❌ Erro no batch MERGE CEIS: {e}")
 
 
+# ─── INJETOR CÂMARA: CEAP (Cota Parlamentar) ─────────────────────────────────
+def _parse_valor_ceap(v: str) -> float:
+    """
+    O CSV da CEAP usa ponto decimal ("1234.56"); arquivos antigos vêm no
+    formato brasileiro ("1.234,56"). Aceita os dois.
+    """
+    if not v:
+        return 0.0
+    if "," in v:
+        return _parse_valor(v)
+    try:
+        return float(v.strip())
+    except ValueError:
+        return 0.0
+
+
+def _ler_ceap(zip_path: Path):
+    """
+    Lê o `Ano-{ano}.csv.zip` da Câmara em streaming, direto de dentro do ZIP
+    (sem extrair centenas de MB para o disco), e devolve uma despesa por vez.
+    Só retorna despesas de deputados identificados pagas a CNPJ (14 dígitos).
+    """
+    with zipfile.ZipFile(zip_path, "r") as z:
+        for nome in z.namelist():
+            if not nome.endswith(".csv"):
+                continue
+            logger.info(f"  📖 CEAP: {nome} (streaming)")
+            with z.open(nome) as bruto:
+                f = io.TextIOWrapper(bruto, encoding="utf-8-sig", errors="replace", newline="")
+                reader = csv.DictReader(f, delimiter=";")
+                for row in reader:
+                    ide  = (row.get("ideCadastro") or "").strip()
+                    cnpj = (row.get("txtCNPJCPF") or "").replace(".", "").replace("/", "").replace("-", "").strip()
+                    if not ide.isdigit() or len(cnpj) != 14:
+                        continue  # Lideranças partidárias não têm ideCadastro; CPFs não viram :Empresa
+                    try:
+                        ano = int(row.get("numAno") or 0)
+                        mes = int(row.get("numMes") or 0)
+                    except ValueError:
+                        continue
+                    yield {
+                        "id_camara":  int(ide),
+                        "nome":       (row.get("txNomeParlamentar") or "").strip().upper(),
+                        "uf":         (row.get("sgUF") or "").strip().upper(),
+                        "partido":    (row.get("sgPartido") or "").strip(),
+                        "cnpj":       cnpj,
+                        "fornecedor": (row.get("txtFornecedor") or "DESCONHECIDO").strip().upper(),
+                        "valor":      _parse_valor_ceap(row.get("vlrLiquido") or row.get("vlrDocumento")),
+                        "ano":        ano,
+                        "mes":        mes,
+                        "data":       (row.get("datEmissao") or "")[:10],
+                    }
+
+
+def injetar_ceap_camara(neo4j: Neo4jConnection, ano: int, pasta_dados: Path):
+    """
+    Ingere o arquivo anual da CEAP baixado por `coletor_anual.baixar_ceap_camara`.
+    Uma única leitura do arquivo agrega, em memória:
+      - PAGOU_A por (deputado, CNPJ do fornecedor): valor_total e qtd_transacoes;
+      - :GastoMensal por (deputado, ano, mês) para consultas temporais.
+    Os agregados são gravados em lote com UNWIND. A aresta guarda `ceap_anos`,
+    então rodar o mesmo ano duas vezes não duplica valores; o arquivo é a fonte
+    oficial e substitui o que o extrator_camara_total já tiver somado no ano.
+    """
+    zip_path = pasta_dados / f"ceap_camara_{ano}.csv.zip"
+    if not zip_path.exists():
+        logger.warning(f"  ⚠️  CEAP não encontrado: {zip_path}. Pulando.")
+        logger.warning(f"     Execute: python coletor_anual.py --ano {ano} --fonte cgu")
+        return 0
+
+    deputados   = {}
+    por_fornec  = {}
+    por_mes     = {}
+    linhas      = 0
+    t_inicio    = _time.time()
+
+    try:
+        for d in _ler_ceap(zip_path):
+            linhas += 1
+            deputados.setdefault(d["id_camara"], {
+                "id_camara": d["id_camara"], "nome": d["nome"],
+                "uf": d["uf"], "partido": d["partido"],
+            })
+
+            chave = (d["id_camara"], d["cnpj"])
+            agg = por_fornec.get(chave)
+            if agg is None:
+                agg = por_fornec[chave] = {"id_camara": d["id_camara"], "cnpj": d["cnpj"], "ano": ano,
+                                           "fornecedor": d["fornecedor"], "valor": 0.0, "qtd": 0}
+            agg["valor"] += d["valor"]
+            agg["qtd"]   += 1
+
+            if 1 <= d["mes"] <= 12 and d["ano"]:
+                chave_mes = (d["id_camara"], d["ano"], d["mes"])
+                m = por_mes.get(chave_mes)
+                if m is None:
+                    m = por_mes[chave_mes] = {"id_camara": d["id_camara"], "ano": d["ano"],
+                                              "mes": d["mes"], "valor": 0.0, "qtd": 0}
+                m["valor"] += d["valor"]
+                m["qtd"]   += 1
+
+            if linhas % 100000 == 0:
+                decorrido = _time.time() - t_inicio
+                logger.info(f"  ⏳ {linhas:,} despesas lidas | {linhas / decorrido if decorrido else 0:,.0f} lin/s")
+    except zipfile.BadZipFile:
+        logger.error(f"  ❌ Arquivo ZIP corrompido: {zip_path}")
+        return 0
+
+    logger.info(
+        f"  📊 CEAP {ano}: {linhas:,} despesas → {len(deputados):,} deputados | "
+        f"{len(por_fornec):,} pares deputado×fornecedor | {len(por_mes):,} meses"
+    )
+
+    _em_lotes(neo4j, _batch_merge_deputados_ceap, list(deputados.values()))
+    _em_lotes(neo4j, _batch_merge_pagou_a_ceap, list(por_fornec.values()))
+    _em_lotes(neo4j, _batch_merge_gasto_mensal, list(por_mes.values()))
+
+    t_total = _time.time() - t_inicio
+    logger.info(f"  ✅ CEAP: {len(por_fornec):,} arestas :PAGOU_A e {len(por_mes):,} nós :GastoMensal em {t_total:.1f}s")
+    return len(por_fornec)
+
+
+def _em_lotes(neo4j: Neo4jConnection, funcao, rows: list[dict], tamanho: int = 1000, **kwargs):
+    """Fatia a lista e chama o MERGE em lote correspondente."""
+    for i in range(0, len(rows), tamanho):
+        funcao(neo4j, rows[i:i + tamanho], **kwargs)
+
+
+def _batch_merge_deputados_ceap(neo4j: Neo4jConnection, batch: list[dict]):
+    """
+    Garante um :Politico por deputado, ancorado em `id_camara` (mesma chave do
+    extrator_camara_total). A UF fica sempre em `p.uf`, inclusive nos nós antigos
+    do extrator, que a gravava em `p.estado`.
+    """
+    query = """
+    UNWIND $rows AS row
+    MERGE (p:Politico {id_camara: row.id_camara})
+    ON CREATE SET
+        p.nome      = row.nome,
+        p.partido   = row.partido,
+        p.cargo     = "Deputado Federal",
+        p.criado_em = date()
+    SET p.uf    = coalesce(p.uf, p.estado, row.uf),
+        p.chave = """ + CHAVE_POLITICO
+    try:
+        _gravar_lote(neo4j, "ceap_deputados", query, {"rows": batch})
+    except Exception as e:
+        logger.error(f"  ❌ Erro no batch MERGE de deputados CEAP: {e}")
+
+
+def _batch_merge_pagou_a_ceap(neo4j: Neo4jConnection, batch: list[dict]):
+    """Soma os agregados do ano em :PAGOU_A, uma única vez por ano (controle em `ceap_anos`)."""
+    query = """
+    UNWIND $rows AS row
+    MATCH (p:Politico {id_camara: row.id_camara})
+    MERGE (e:Empresa {cnpj: row.cnpj})
+    ON CREATE SET e.nome = row.fornecedor, e.criado_em = date()
+    MERGE (p)-[r:PAGOU_A]->(e)
+    """ + SUBSTITUIR_ANO_PAGOU_A + """
+    SET r.ceap_anos = coalesce(r.ceap_anos, []) + row.ano
+    """
+    try:
+        _gravar_lote(neo4j, "ceap_pagou_a", query, {"rows": batch})
+    except Exception as e:
+        logger.error(f"  ❌ Erro no batch MERGE de PAGOU_A (CEAP): {e}")
+
+
+def _batch_merge_gasto_mensal(neo4j: Neo4jConnection, batch: list[dict]):
+    """Cria/atualiza nós :GastoMensal (deputado × competência) ligados por :GASTOU_NO_MES."""
+    query = """
+    UNWIND $rows AS row
+    MATCH (p:Politico {id_camara: row.id_camara})
+    MERGE (g:GastoMensal {id_camara: row.id_camara, ano: row.ano, mes: row.mes})
+    SET g.valor_total    = row.valor,
+        g.qtd_transacoes = row.qtd,
+        g.competencia    = date({year: row.ano, month: row.mes, day: 1}),
+        g.atualizado_em  = date()
+    MERGE (p)-[:GASTOU_NO_MES]->(g)
+    """
+    try:
+        _gravar_lote(neo4j, "ceap_gasto_mensal", query, {"rows": batch})
+    except Exception as e:
+        logger.error(f"  ❌ Erro no batch MERGE de GastoMensal: {e}")
+
+
 # ─── RELATÓRIO FINAL DO GRAFO ─────────────────────────────────────────────────
 def imprimir_stats_grafo(neo4j: Neo4jConnection):
     """Conta nós e arestas no grafo após a injeção."""
@@ -417,6 +625,9 @@ def imprimir_stats_grafo(neo4j: Neo4jConnection):
         ("Nós :Empresa",        "MATCH (e:Empresa) RETURN count(e) AS n"),
         ("Nós :BemDeclarado",   "MATCH (b:BemDeclarado) RETURN count(b) AS n"),
         ("Arestas :DECLARA_BEM","MATCH ()-[r:DECLARA_BEM]->() RETURN count(r) AS n"),
+        ("Arestas :PAGOU_A",    "MATCH ()-[r:PAGOU_A]->() RETURN count(r) AS n"),
+        ("Nós :GastoMensal",    "MATCH (g:GastoMensal) RETURN count(g) AS n"),
+        ("Nós :AlertaFracionamento", "MATCH (a:AlertaFracionamento) RETURN count(a) AS n"),
         ("Arestas com valor_total",
          "MATCH ()-[r]->() WHERE r.valor_total IS NOT NULL RETURN count(r) AS n"),
     ]
@@ -438,13 +649,29 @@ def _setup_grafo(neo4j: Neo4jConnection):
         # Constraints de Unicidade (Chaves Primárias)
         "CREATE CONSTRAINT politico_id_tse IF NOT EXISTS FOR (p:Politico) REQUIRE p.id_tse IS UNIQUE",
         "CREATE CONSTRAINT empresa_cnpj IF NOT EXISTS FOR (e:Empresa) REQUIRE e.cnpj IS UNIQUE",
-        "CREATE CONSTRAINT socio_nome IF NOT EXISTS FOR (s:Socio) REQUIRE s.nome IS UNIQUE",
+        "CREATE CONSTRAINT socio_nome_doc IF NOT EXISTS FOR (s:Socio) REQUIRE (s.nome, s.doc_fragmento) IS UNIQUE",
         
         # Índices de Busca (Performance de MATCH)
         "CREATE INDEX politico_id_tse_idx IF NOT EXISTS FOR (p:Politico) ON (p.id_tse)",
         "CREATE INDEX politico_nome_idx IF NOT EXISTS FOR (p:Politico) ON (p.nome)",
         "CREATE INDEX bem_id_tse_idx IF NOT EXISTS FOR (b:BemDeclarado) ON (b.id_tse)",
-        "CREATE INDEX empresa_nome_idx IF NOT EXISTS FOR (e:Empresa) ON (e.nome)"
+        "CREATE INDEX empresa_nome_idx IF NOT EXISTS FOR (e:Empresa) ON (e.nome)",
+        "CREATE INDEX politico_id_camara_idx IF NOT EXISTS FOR (p:Politico) ON (p.id_camara)",
+        # Chave universal do político (TSE ou Câmara): paginação da auditoria, regras e métricas
+        *INDICES_CHAVE_POLITICO,
+        "CREATE INDEX gasto_mensal_chave_idx IF NOT EXISTS FOR (g:GastoMensal) ON (g.id_camara, g.ano, g.mes)",
+        "CREATE INDEX gasto_mensal_competencia_idx IF NOT EXISTS FOR (g:GastoMensal) ON (g.competencia)",
+        # Motor de regras (monopólio por município, endereço compartilhado)
+        "CREATE INDEX contrato_uf_municipio_idx IF NOT EXISTS FOR (c:Contrato) ON (c.uf, c.municipio)",
+        "CREATE INDEX empresa_endereco_idx IF NOT EXISTS FOR (e:Empresa) ON (e.endereco)",
+        # Alertas de fracionamento (detector_fracionamento.py)
+        *INDICES_FRACIONAMENTO,
+        # Métricas patrimoniais (metricas_patrimoniais.py)
+        *INDICES_METRICAS,
+        # Grau dos nós / registro de hubs (hubs_grafo.py)
+        *INDICES_HUBS,
+        # Componentes, comunidades e centralidade (analise_grafo.py)
+        *INDICES_ANALISE,
     ]
     
     for cmd in commands:
@@ -462,6 +689,12 @@ def _setup_grafo(neo4j: Neo4jConnection):
     except Exception as e:
         logger.warning(f"  ⚠️  Timeout ou erro ao aguardar índices: {e}")
 
+    # Nós gravados antes de existir p.chave
+    try:
+        garantir_chave_politico(neo4j)
+    except Exception as e:
+        logger.warning(f"  ⚠️  Erro ao preencher p.chave: {e}")
+
 
 # ─── MAIN ─────────────────────────────────────────────────────────────────────
 def main(ano: int, fontes: list):
@@ -492,16 +725,49 @@ def main(ano: int, fontes: list):
         if "tse" in fontes or "todos" in fontes:
             logger.info("")
             logger.info("── FASE 1: Candidatos TSE ─────────────────────────────────")
-            injetar_candidatos_tse(neo4j, ano, pasta_dados)
+            with medir_etapa("tse_candidatos") as etapa:
+                etapa["linhas"] = injetar_candidatos_tse(neo4j, ano, pasta_dados)
 
             logger.info("")
             logger.info("── FASE 2: Bens Declarados TSE ────────────────────────────")
-            injetar_bens_tse(neo4j, ano, pasta_dados)
+            with medir_etapa("tse_bens") as etapa:
+                etapa["linhas"] = injetar_bens_tse(neo4j, ano, pasta_dados)
 
         if "cgu" in fontes or "todos" in fontes:
             logger.info("")
             logger.info("── FASE 3: CEIS (Empresas Inidôneas) ──────────────────────")
-            injetar_ceis_cgu(neo4j, ano, pasta_dados)
+            with medir_etapa("cgu_ceis") as etapa:
+                etapa["linhas"] = injetar_ceis_cgu(neo4j, ano, pasta_dados)
+
+        if "ceap" in fontes or "cgu" in fontes or "todos" in fontes:
+            logger.info("")
+            logger.info("── FASE 4: CEAP Câmara (Cota Parlamentar) ─────────────────")
+            with medir_etapa("ceap_pagou_a") as etapa:
+                etapa["linhas"] = injetar_ceap_camara(neo4j, ano, pasta_dados)
+
+        if "fracionamento" in fontes or "todos" in fontes:
+            logger.info("")
+            logger.info("── FASE 5: Detector de Fracionamento (PNCP + CEAP) ────────")
+            with medir_etapa("fracionamento"):
+                detectar_fracionamento(neo4j, ano=ano, pasta_dados=pasta_dados, ler_ceap=_ler_ceap)
+
+        if "metricas" in fontes or "todos" in fontes:
+            logger.info("")
+            logger.info("── FASE 6: Métricas Patrimoniais (TSE x Receita x PNCP) ───")
+            with medir_etapa("metricas"):
+                calcular_metricas(neo4j)
+
+        if "hubs" in fontes or "todos" in fontes:
+            logger.info("")
+            logger.info("── FASE 7: Grau dos Nós e Registro de Hubs ────────────────")
+            with medir_etapa("hubs"):
+                recalcular_hubs(neo4j)
+
+        if "analise" in fontes or "todos" in fontes:
+            logger.info("")
+            logger.info("── FASE 8: Comunidades e Centralidade (GDS ou SciPy) ──────")
+            with medir_etapa("analise"):
+                analisar_estrutura(neo4j)
 
         imprimir_stats_grafo(neo4j)
 
@@ -519,7 +785,10 @@ if __name__ == "__main__":
                         choices=[2018, 2020, 2022, 2024, 2025],
                         help="Ano dos dumps (padrão: 2024)")
     parser.add_argument("--fonte", type=str, default="todos",
-                        choices=["tse", "cgu", "todos"],
+                        choices=["tse", "cgu", "ceap", "fracionamento", "metricas", "hubs", "analise", "todos"],
                         help="Qual conjunto de CSVs injetar (padrão: todos)")
     args = parser.parse_args()
-    main(ano=args.ano, fontes=[args.fonte])
+    iniciar_exportador("injetor_neo4j")
+    iniciar_rastreamento("injetor_neo4j")
+    with span("injetor_neo4j"):
+        main(ano=args.ano, fontes=[args.fonte])
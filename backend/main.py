@@ -1,10 +1,9 @@
+import time
 import requests
 import uvicorn
 import asyncio
 import os
-import json
 import logging
-from datetime import datetime
 from dotenv import load_dotenv
 
 # Logging principal do backend
@@ -19,15 +18,26 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 dotenv_path = os.path.join(BASE_DIR, '.env')
 load_dotenv(dotenv_path)
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from duckduckgo_search import DDGS
 
 from agente_coletor_autonomo import auditar_malha_fina_assincrona
+from motor_ia_qwen import AuditorGovernamentalIA
 from database.neo4j_conn import get_neo4j_connection
+from database.cnpj_local import consultar_cnpj
+from database.dossie_store import get_dossie_store
+from database.perfil_cypher import get_perfil_cypher
+from telemetria import (get_registro, ganchos_requests, registrar_cache, HTTP_DURACAO, HTTP_REQUISICOES)
+from rastreamento import span, continuar, atual, SERVIDOR
+from metricas_patrimoniais import ranking as ranking_patrimonial
+from hubs_grafo import listar_hubs
+from analise_grafo import ranking_centralidade, comunidade_do_politico
 
 app = FastAPI(title="GovTech Transparência API")
 neo4j_conn = get_neo4j_connection()
+dossies = get_dossie_store()
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,48 +47,95 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def medir_requisicao(request: Request, call_next):
+    """
+    Latência e status por rota (o molde da rota, não a URL, para não explodir os rótulos).
+    Abre também o span raiz da requisição (ou continua o `traceparent` recebido) e o devolve na resposta.
+    """
+    inicio = time.perf_counter()
+    status = 500
+    with continuar(request.headers.get("traceparent")), span(f"{request.method}", SERVIDOR) as raiz:
+        try:
+            resposta = await call_next(request)
+            status = resposta.status_code
+            if raiz.gravando:
+                resposta.headers["traceparent"] = raiz.traceparent()
+            return resposta
+        finally:
+            rota = getattr(request.scope.get("route"), "path", "desconhecida")
+            HTTP_DURACAO.observar(time.perf_counter() - inicio, metodo=request.method, rota=rota)
+            HTTP_REQUISICOES.incrementar(metodo=request.method, rota=rota, status=f"{status // 100}xx")
+            raiz.renomear(f"{request.method} {rota}")
+            raiz.definir(**{"http.method": request.method, "http.route": rota, "http.status_code": status})
+
 CAMARA_API = "https://dadosabertos.camara.leg.br/api/v2/deputados"
+GANCHOS_CAMARA = ganchos_requests("camara")
+GANCHOS_TSE = ganchos_requests("tse")
 CACHE_DOSSIES = {}
 
 def obter_score_dossie(id_politico):
-    caminho = f"dossies/dossie_{id_politico}.json"
-    if os.path.exists(caminho):
-        try:
-            with open(caminho, "r", encoding="utf-8") as f:
-                return max(0, 1000 - json.load(f).get("pontos_perdidos", 0))
-        except: pass
+    """
+    Nota 0-1000 (1000 = sem achados) a partir do score de risco 0-100 gravado
+    pelo armazém, que lê os dois formatos de dossiê (auditor em massa e agente).
+    """
+    try:
+        score = dossies.scores([id_politico]).get(str(id_politico))
+        if score is not None:
+            return max(0, 1000 - 10 * score)
+    except: pass
     return "Pendente"
 
 # ==========================================
 # ROTAS DO DASHBOARD E FEED DE GUERRA
 # ==========================================
+URGENCIA_NIVEL = {"CRÍTICO": "CRÍTICA", "ALTO": "ALTA"}
+
 @app.get("/api/dashboard/guerra")
-def dashboard_guerra():
-    return {
+def dashboard_guerra(request: Request, limite: int = 10):
+    """
+    Painel servido dos agregados do armazém de dossiês (mantidos a cada
+    auditoria concluída). ETag = versão do armazém: o polling do frontend
+    recebe 304 sem corpo enquanto nenhuma auditoria nova tiver terminado.
+    """
+    etag = f'W/"painel-{dossies.versao()}-{limite}"'
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        registrar_cache("painel_etag", "acerto")
+        return Response(status_code=304, headers=cabecalhos)
+    registrar_cache("painel_etag", "falta")
+
+    painel = dossies.painel(limite_top=limite)
+    return JSONResponse(headers=cabecalhos, content={
         "status": "sucesso",
-        "top_risco": [
-            {"nome": "Bolsonaro", "partido": "PL", "estado": "RJ", "score": 850, "foto": "https://www.camara.leg.br/internet/deputado/bandep/74847.jpg"},
-            {"nome": "Lula", "partido": "PT", "estado": "SP", "score": 820, "foto": "https://upload.wikimedia.org/wikipedia/commons/thumb/e/ed/Presidente_Luiz_In%C3%A1cio_Lula_da_Silva_em_2023.jpg/800px-Presidente_Luiz_In%C3%A1cio_Lula_da_Silva_em_2023.jpg"},
-            {"nome": "Flávio Dino", "partido": "STF", "estado": "MA", "score": 790, "foto": "https://upload.wikimedia.org/wikipedia/commons/b/b8/Fl%C3%A1vio_Dino_em_2023.jpg"}
-        ],
-        "alertas_recentes": [
-            {"alvo": "Eduardo Bolsonaro", "mensagem": "Gastou R$ 45.000 em Dubai sem agenda oficial.", "urgencia": "MÉDIA", "fonte": "CGU", "tempo": "10 min atrás"},
-            {"alvo": "Gleisi Hoffmann", "mensagem": "Omitiu R$ 1.2M do patrimônio do TSE.", "urgencia": "ALTA", "fonte": "TSE", "tempo": "1h atrás"},
-            {"alvo": "Tarcísio Gomes", "mensagem": "Rede ligada ao PCC venceu licitação da CPTM.", "urgencia": "CRÍTICA", "fonte": "TCE-SP", "tempo": "2h atrás"}
-        ]
-    }
+        "versao": painel["versao"],
+        "top_risco": [{**p, "estado": p["uf"]} for p in painel["top_risco"]],
+        "alertas_recentes": [{
+            "alvo": a["nome"] or f"ID {a['id']}",
+            "id": a["id"],
+            "mensagem": a["mensagem"],
+            "urgencia": URGENCIA_NIVEL.get(a["nivel"], a["nivel"]),
+            "fonte": f"{a['cidade']}/{a['uf']}",
+            "criado_em": a["criado_em"],
+        } for a in painel["alertas_recentes"]],
+        "distribuicao_uf": painel["distribuicao_uf"],
+    })
+
+PRESIDENCIAVEIS = [
+    {"id": "900002", "nome": "Jair Messias Bolsonaro", "cargo": "Candidato à Presidência", "partido": "PL", "estado": "RJ", "urlFoto": "https://www.camara.leg.br/internet/deputado/bandep/74847.jpg"},
+    {"id": "900001", "nome": "Luiz Inácio Lula da Silva", "cargo": "Presidente da República", "partido": "PT", "estado": "SP", "urlFoto": "https://upload.wikimedia.org/wikipedia/commons/thumb/e/ed/Presidente_Luiz_In%C3%A1cio_Lula_da_Silva_em_2023.jpg/800px-Presidente_Luiz_In%C3%A1cio_Lula_da_Silva_em_2023.jpg"},
+    {"id": "900003", "nome": "Pablo Marçal", "cargo": "Candidato à Presidência", "partido": "PRTB", "estado": "SP", "urlFoto": "https://upload.wikimedia.org/wikipedia/commons/thumb/f/fa/Pablo_Mar%C3%A7al_-_2022.jpg/640px-Pablo_Mar%C3%A7al_-_2022.jpg"},
+    {"id": "900004", "nome": "Tarcísio de Freitas", "cargo": "Governador de SP", "partido": "REPUBLICANOS", "estado": "SP", "urlFoto": "https://upload.wikimedia.org/wikipedia/commons/thumb/5/52/Tarc%C3%ADsio_de_Freitas_em_maio_de_2023_%28recorte%29.jpg/640px-Tarc%C3%ADsio_de_Freitas_em_maio_de_2023_%28recorte%29.jpg"},
+]
 
 @app.get("/api/politicos/presidenciais")
 def obter_presidenciais():
-    return {
-        "status": "sucesso",
-        "dados": [
-            {"id": "900002", "nome": "Jair Messias Bolsonaro", "cargo": "Candidato à Presidência", "partido": "PL", "estado": "RJ", "score": "Pendente", "urlFoto": "https://www.camara.leg.br/internet/deputado/bandep/74847.jpg"},
-            {"id": "900001", "nome": "Luiz Inácio Lula da Silva", "cargo": "Presidente da República", "partido": "PT", "estado": "SP", "score": "Pendente", "urlFoto": "https://upload.wikimedia.org/wikipedia/commons/thumb/e/ed/Presidente_Luiz_In%C3%A1cio_Lula_da_Silva_em_2023.jpg/800px-Presidente_Luiz_In%C3%A1cio_Lula_da_Silva_em_2023.jpg"},
-            {"id": "900003", "nome": "Pablo Marçal", "cargo": "Candidato à Presidência", "partido": "PRTB", "estado": "SP", "score": "Pendente", "urlFoto": "https://upload.wikimedia.org/wikipedia/commons/thumb/f/fa/Pablo_Mar%C3%A7al_-_2022.jpg/640px-Pablo_Mar%C3%A7al_-_2022.jpg"},
-            {"id": "900004", "nome": "Tarcísio de Freitas", "cargo": "Governador de SP", "partido": "REPUBLICANOS", "estado": "SP", "score": "Pendente", "urlFoto": "https://upload.wikimedia.org/wikipedia/commons/thumb/5/52/Tarc%C3%ADsio_de_Freitas_em_maio_de_2023_%28recorte%29.jpg/640px-Tarc%C3%ADsio_de_Freitas_em_maio_de_2023_%28recorte%29.jpg"},
-        ]
-    }
+    """
+    Cards fixos: presidenciáveis não estão na Câmara nem têm uma marcação
+    própria no grafo. O score vem do dossiê já auditado (ou 'Pendente').
+    """
+    return {"status": "sucesso",
+            "dados": [{**p, "score": obter_score_dossie(p["id"])} for p in PRESIDENCIAVEIS]}
 
 def adicionar_nivel_boss(dado):
     cargo = dado.get("cargo", "").lower()
@@ -89,7 +146,7 @@ def adicionar_nivel_boss(dado):
 @app.get("/api/politicos/buscar")
 def buscar_politico(nome: str):
     try:
-        res = requests.get(CAMARA_API, params={"nome": nome})
+        res = requests.get(CAMARA_API, params={"nome": nome}, hooks=GANCHOS_CAMARA)
         dados = res.json().get("dados", [])
         if not dados: return {"status": "vazio", "mensagem": "Político não encontrado."}
         for d in dados:
@@ -102,7 +159,8 @@ def buscar_politico(nome: str):
 @app.get("/api/politicos/estado/{uf}")
 def buscar_politicos_estado(uf: str):
     try:
-        res = requests.get(CAMARA_API, params={"siglaUf": uf.upper(), "itens": 50, "ordem": "ASC", "ordenarPor": "nome"})
+        res = requests.get(CAMARA_API, params={"siglaUf": uf.upper(), "itens": 50, "ordem": "ASC", "ordenarPor": "nome"},
+                           hooks=GANCHOS_CAMARA)
         dados = res.json().get("dados", [])
         if not dados: return {"status": "vazio", "mensagem": "Nenhum político encontrado neste estado."}
         
@@ -161,7 +219,7 @@ def buscar_politicos_cidade(uf: str, municipio: str, ano: int = 2024):
             f'AND ("DS_CARGO" ILIKE \'PREFEITO%\' OR "DS_CARGO" ILIKE \'VEREADOR%\') '
             f'LIMIT 30'
         )
-        res = requests.get(tse_url, params={"sql": sql}, timeout=8)
+        res = requests.get(tse_url, params={"sql": sql}, timeout=8, hooks=GANCHOS_TSE)
         if res.status_code == 200:
             registros = res.json().get("result", {}).get("records", [])
             if registros:
@@ -222,7 +280,7 @@ def pesquisar_politicos_global(q: str):
     
     # 2. Busca na Câmara (Deputados Federais Síncronos)
     try:
-        res_camara = requests.get(CAMARA_API, params={"nome": termo})
+        res_camara = requests.get(CAMARA_API, params={"nome": termo}, hooks=GANCHOS_CAMARA)
         if res_camara.status_code == 200:
             for d in res_camara.json().get("dados", []):
                 if not any(r['id'] == str(d['id']) for r in resultados):
@@ -239,80 +297,153 @@ def pesquisar_politicos_global(q: str):
     
     return {"status": "sucesso", "dados": resultados}
 
-@app.get("/api/dossies/arvore")
-def listar_arvore_dossies(uf: str = None, cidade: str = None):
+@app.get("/api/politicos/ranking/patrimonial")
+def listar_ranking_patrimonial(metrica: str = "razao_capital_patrimonio", uf: str = None,
+                               minimo: float = None, limite: int = 50):
     """
-    Lista a estrutura de pastas e arquivos de forma hierárquica.
-    Brasil -> UF -> Cidade -> Político
+    Ranking pelas métricas patrimoniais pré-calculadas no grafo (índice, sem LLM).
+    `metrica`: razao_capital_patrimonio | razao_contratos_patrimonio |
+    patrimonio_declarado | capital_vinculado | contratos_recebidos.
     """
-    base_path = os.path.join(os.path.dirname(__file__), "dossies")
-    if not os.path.exists(base_path): os.makedirs(base_path)
+    try:
+        dados = ranking_patrimonial(neo4j_conn, metrica, uf, minimo, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro no ranking patrimonial: {e}")
+        return {"status": "erro", "mensagem": str(e), "dados": []}
+    return {"status": "sucesso" if dados else "vazio", "metrica": metrica, "dados": dados}
 
+@app.get("/api/politico/{id}/seguir-dinheiro")
+def seguir_dinheiro(id: str, profundidade: int = 4, fanout: int = 20, tempo: float = 5.0):
+    """
+    Trilha do dinheiro em vários saltos a partir do político (sócios, empresas,
+    contratos, alertas), com fan-out por nó, hubs não expandidos e orçamento de
+    tempo. Devolve as trilhas de maior valor acumulado e o que foi cortado.
+    """
+    resultado = neo4j_conn.seguir_dinheiro(id, profundidade=profundidade,
+                                           fanout=max(1, min(fanout, 100)),
+                                           tempo_max=max(0.5, min(tempo, 30.0)))
+    if "erro" in resultado:
+        raise HTTPException(status_code=404, detail=resultado["erro"])
+    return {"status": "sucesso", "dados": resultado}
+
+@app.get("/api/grafo/centralidade")
+def listar_centralidade(rotulo: str = "Politico", metrica: str = "pagerank", limite: int = 50):
+    """
+    Atores mais centrais da rede de influência (pré-calculado por analise_grafo.py).
+    `rotulo`: Politico | Empresa | Socio | Contrato; `metrica`: pagerank | centralidade_grau.
+    """
     try:
-        if not uf:
-            # Lista as UFs (pastas no nível raiz de dossies)
-            ufs = [d for d in os.listdir(base_path) if os.path.isdir(os.path.join(base_path, d))]
-            items = []
-            for u in sorted(ufs):
-                path_uf = os.path.join(base_path, u)
-                cidades = [c for c in os.listdir(path_uf) if os.path.isdir(os.path.join(path_uf, c))]
-                total = 0
-                for c in cidades:
-                    path_cid = os.path.join(path_uf, c)
-                    total += len([f for f in os.listdir(path_cid) if f.endswith(".json")])
-                items.append({"nome": u, "tipo": "pasta", "total": total})
-            return {"status": "sucesso", "items": items}
-        
-        if uf and not cidade:
-            # Lista as Cidades dentro da UF
-            path_uf = os.path.join(base_path, uf.upper())
-            if not os.path.exists(path_uf): return {"status": "vazio", "items": []}
-            cidades = [c for c in os.listdir(path_uf) if os.path.isdir(os.path.join(path_uf, c))]
-            items = []
-            for c in sorted(cidades):
-                path_cid = os.path.join(path_uf, c)
-                total = len([f for f in os.listdir(path_cid) if f.endswith(".json")])
-                items.append({"nome": c, "tipo": "pasta", "total": total})
-            return {"status": "sucesso", "items": items}
+        dados = ranking_centralidade(neo4j_conn, rotulo, metrica, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro no ranking de centralidade: {e}")
+        return {"status": "erro", "mensagem": str(e), "dados": []}
+    return {"status": "sucesso" if dados else "vazio", "metrica": metrica, "dados": dados}
+
+@app.get("/api/politico/{id}/comunidade")
+def obter_comunidade(id: str, limite: int = 50):
+    """Comunidade (Louvain) do político, com os membros mais centrais primeiro."""
+    resultado = comunidade_do_politico(neo4j_conn, id, limite)
+    if "erro" in resultado:
+        raise HTTPException(status_code=404, detail=resultado["erro"])
+    return {"status": "sucesso", "dados": resultado}
+
+@app.get("/api/grafo/hubs")
+def listar_registro_hubs(rotulo: str = None, limite: int = 50):
+    """
+    Registro de hubs (nós de grau alto que a extração e a travessia resumem em
+    vez de expandir), do maior grau para o menor. `rotulo`: Empresa | Socio | Politico.
+    """
+    try:
+        dados = listar_hubs(neo4j_conn, rotulo, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao listar hubs: {e}")
+        return {"status": "erro", "mensagem": str(e), "dados": []}
+    return {"status": "sucesso" if dados else "vazio", "dados": dados}
+
+@app.get("/metrics")
+def metricas_prometheus():
+    """Todas as métricas do processo (rotas, APIs externas, caches, LLM e, com NEO4J_PERFIL=1, Cypher)."""
+    return Response(content=get_registro().texto_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/cypher")
+def metricas_cypher_prometheus():
+    """Latência, linhas, erros e db hits por consulta Cypher, no formato texto do Prometheus."""
+    return Response(content=get_perfil_cypher().texto_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metricas/cypher")
+def metricas_cypher():
+    """Perfil Cypher acumulado neste processo (NEO4J_PERFIL=1) e as últimas consultas lentas."""
+    perfil = get_perfil_cypher()
+    return {"status": "sucesso" if perfil.ativo else "inativo", **perfil.instantaneo()}
+
+@app.get("/api/empresa/{cnpj}")
+def obter_empresa(cnpj: str):
+    """Dados cadastrais e QSA: base local da Receita, com BrasilAPI como fallback."""
+    dados = consultar_cnpj(cnpj)
+    if not dados:
+        raise HTTPException(status_code=404, detail="CNPJ não encontrado.")
+    return {"status": "sucesso", "dados": dados}
 
+@app.get("/api/dossies/arvore")
+def listar_arvore_dossies(uf: str = None, cidade: str = None, ordenar: str = "nome",
+                          limite: int = 60, cursor: str = None):
+    """
+    Lista a estrutura hierárquica a partir do armazém indexado de dossiês.
+    Brasil -> UF -> Cidade -> Político
+
+    Pastas vêm das tabelas agregadas (total, score médio, alto risco, histograma);
+    arquivos vêm paginados do índice. `ordenar`: nome | score (| risco nas pastas).
+    `proximo_cursor` devolve a página seguinte; na primeira página das pastas
+    vai junto o top de risco do escopo.
+    """
+    try:
         if uf and cidade:
-            # Lista os Políticos dentro da Cidade
-            path_cid = os.path.join(base_path, uf.upper(), cidade.upper())
-            if not os.path.exists(path_cid): return {"status": "vazio", "items": []}
-            arquivos = [f for f in os.listdir(path_cid) if f.endswith(".json")]
-            items = []
-            for f in sorted(arquivos):
-                try:
-                    with open(os.path.join(path_cid, f), "r", encoding="utf-8") as file:
-                        dados = json.load(file)
-                        items.append({
-                            "nome": dados.get("nome_politico") or dados.get("nome", f"ID {f}"),
-                            "tipo": "arquivo",
-                            "score": dados.get("ia_analise", {}).get("score_risco", 0),
-                            "uf": uf.upper(),
-                            "cidade": cidade.upper(),
-                            "path": f"{uf.upper()}/{cidade.upper()}/{f}"
-                        })
-                except: continue
-            return {"status": "sucesso", "items": items}
+            uf_up, cidade_up = uf.upper(), cidade.upper()
+            pagina, proximo = dossies.listar(uf_up, cidade_up, ordenar, limite, cursor)
+            items = [{
+                "nome": d["nome"] or f"ID {d['id']}",
+                "tipo": "arquivo",
+                "score": d["score"] or 0,
+                "uf": uf_up,
+                "cidade": cidade_up,
+                "path": f"{uf_up}/{cidade_up}/dossie_{d['id']}.json"
+            } for d in pagina]
+        else:
+            pagina, proximo = dossies.listar_pastas(uf, ordenar, limite, cursor)
+            items = [{**p, "tipo": "pasta"} for p in pagina]
+
+        if not items: return {"status": "vazio", "items": [], "proximo_cursor": None}
+        resposta = {"status": "sucesso", "items": items, "proximo_cursor": proximo}
+        if not cursor and not cidade:
+            resposta["top_risco"] = dossies.top_risco(uf, limite=5)
+        return resposta
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro na árvore de dossiês: {e}")
         return {"status": "erro", "mensagem": str(e), "items": []}
 
 @app.get("/api/politico/detalhes/arquivo")
 def obter_detalhes_por_arquivo(path: str):
-    """Retorna o JSON completo de um dossiê específico pelo caminho relativo."""
-    try:
-        full_path = os.path.join(os.path.dirname(__file__), "dossies", path)
-        if not os.path.exists(full_path):
-            raise HTTPException(status_code=404, detail="Dossiê não encontrado.")
-        
-        with open(full_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Erro ao ler arquivo {path}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    """
+    Retorna o JSON completo de um dossiê. Aceita o caminho legado
+    (UF/CIDADE/dossie_{id}.json) ou só o id.
+    """
+    id_dossie = os.path.basename(path)
+    if id_dossie.startswith("dossie_"): id_dossie = id_dossie[len("dossie_"):]
+    if id_dossie.endswith(".json"): id_dossie = id_dossie[:-len(".json")]
+
+    dossie = dossies.obter(id_dossie)
+    if dossie is None:
+        raise HTTPException(status_code=404, detail="Dossiê não encontrado.")
+    return dossie
 
 # Mantém rota legada para compatibilidade com frontend antigo
 @app.get("/api/politicos/cidade/{municipio}")
@@ -335,6 +466,8 @@ def disparar_worker_assincrono(id_politico: int, nome_politico: str, cpf: str):
         print(f"Erro Worker: {e}")
     finally:
         try:
+            # O cliente HTTP da IA é por loop: fecha antes de descartar o loop.
+            loop.run_until_complete(AuditorGovernamentalIA.aclose())
             loop.close()
         except:
             pass
@@ -351,19 +484,19 @@ nome_presidenciais_dict = {
 def buscar_politico_detalhes(id: int, background_tasks: BackgroundTasks):
     # 1. Tentar Cache em Memória
     if id in CACHE_DOSSIES: 
+        registrar_cache("dossies", "memoria")
         return {"status": "sucesso", "dados": CACHE_DOSSIES[id], "cached": True}
 
-    # 2. Tentar Disco (Pasta dossies)
-    pasta = os.path.join(os.getcwd(), "dossies")
-    caminho_arquivo = os.path.join(pasta, f"dossie_{id}.json")
-    if os.path.exists(caminho_arquivo):
-        try:
-            with open(caminho_arquivo, "r", encoding="utf-8") as f:
-                dados_disco = json.load(f)
-                CACHE_DOSSIES[id] = dados_disco # Alimenta o cache
-                return {"status": "sucesso", "dados": dados_disco, "cached": False, "fonte": "disco"}
-        except Exception as e:
-            print(f"Erro ao ler dossiê do disco ID {id}: {e}")
+    # 2. Tentar o armazém de dossiês
+    try:
+        dados_disco = dossies.obter(id)
+        if dados_disco is not None:
+            CACHE_DOSSIES[id] = dados_disco # Alimenta o cache
+            registrar_cache("dossies", "disco")
+            return {"status": "sucesso", "dados": dados_disco, "cached": False, "fonte": "disco"}
+    except Exception as e:
+        print(f"Erro ao ler dossiê do armazém ID {id}: {e}")
+    registrar_cache("dossies", "falta")
 
     id_pol = str(id)
     if id_pol in nome_presidenciais_dict:
@@ -394,7 +527,7 @@ def buscar_politico_detalhes(id: int, background_tasks: BackgroundTasks):
         }
 
     try:
-        res_basico = requests.get(f"{CAMARA_API}/{id}")
+        res_basico = requests.get(f"{CAMARA_API}/{id}", hooks=GANCHOS_CAMARA)
         if res_basico.status_code != 200:
             # Fallback for IDs not found in CAMARA_API but potentially in nome_presidenciais_dict (though handled above)
             # This block might be redundant if all VIPs are handled by the new 'if id_pol in nome_presidenciais_dict'
@@ -418,7 +551,7 @@ def buscar_politico_detalhes(id: int, background_tasks: BackgroundTasks):
             # TAREFA 1: Buscando Projetos de Lei Reais para Deputados via API /proposicoes
             projetos_data = [] # Initialize projetos_data here
             try:
-                res_proj = requests.get(f"https://dadosabertos.camara.leg.br/api/v2/proposicoes", params={"idDeputadoAutor": id, "itens": 10, "ordem": "DESC", "ordenarPor": "id"})
+                res_proj = requests.get(f"https://dadosabertos.camara.leg.br/api/v2/proposicoes", params={"idDeputadoAutor": id, "itens": 10, "ordem": "DESC", "ordenarPor": "id"}, hooks=GANCHOS_CAMARA)
                 projetos_api = res_proj.json().get("dados", [])
                 
                 for p in projetos_api:
@@ -433,7 +566,7 @@ def buscar_politico_detalhes(id: int, background_tasks: BackgroundTasks):
                 print(f"Erro buscando proposições reais: {e}")
                 projetos_data = []
             while True:
-                res_despesas = requests.get(f"{CAMARA_API}/{id}/despesas", params={"itens": 100, "pagina": pagina, "ordem": "DESC", "ordenarPor": "dataDocumento"})
+                res_despesas = requests.get(f"{CAMARA_API}/{id}/despesas", params={"itens": 100, "pagina": pagina, "ordem": "DESC", "ordenarPor": "dataDocumento"}, hooks=GANCHOS_CAMARA)
                 if res_despesas.status_code == 200:
                     dados_pagina = res_despesas.json().get("dados", [])
                     if not dados_pagina: break
@@ -449,21 +582,16 @@ def buscar_politico_detalhes(id: int, background_tasks: BackgroundTasks):
 
 
 
-    caminho_dossie = f"dossies/dossie_{id}.json"
     historico_redflags, empresas_geradas, score_base, pontos_perdidos, motivos_detalhados = [], [], 1000, 0, []
     
-    if os.path.exists(caminho_dossie):
-        try:
-            with open(caminho_dossie, "r", encoding="utf-8") as f:
-                dossie_cache = json.load(f)
-                historico_redflags, pontos_perdidos, empresas_geradas = dossie_cache.get("redFlags", []), dossie_cache.get("pontos_perdidos", 0), dossie_cache.get("empresas", [])
-        except: pass
+    dossie_cache = dossies.obter(id)
+    if dossie_cache is not None:
+        historico_redflags, pontos_perdidos, empresas_geradas = dossie_cache.get("redFlags", []), dossie_cache.get("pontos_perdidos", 0), dossie_cache.get("empresas", [])
     else:
-        # Mock para manter a tela renderizando até o Background Task da IA (Auditoria Offline) concluir
+        # Mock para manter a tela renderizando até o Background Task da IA (Auditoria Offline) concluir.
+        # Só vale para esta resposta: gravado no armazém, entraria nos agregados do painel
+        # (em BR/OUTROS) e o laudo real do agente herdaria essa localização.
         pontos_perdidos, historico_redflags, motivos_detalhados = 150, [], []
-        os.makedirs("dossies", exist_ok=True)
-        with open(caminho_dossie, "w", encoding="utf-8") as file:
-            json.dump({"id_politico": id, "redFlags": historico_redflags, "pontos_perdidos": pontos_perdidos, "data_auditoria": datetime.now().isoformat()}, file, ensure_ascii=False, indent=4)
 
     score_base -= pontos_perdidos
     empresas_reais = list(empresas_geradas) if empresas_geradas else []
@@ -500,10 +628,12 @@ def buscar_politico_detalhes(id: int, background_tasks: BackgroundTasks):
 
     noticias_limpas = []
     try:
-        with DDGS() as ddgs:
+        with span("ddgs.noticias") as s, DDGS() as ddgs:
             for n in list(ddgs.news(keywords=nome_completo, region="br-pt", max_results=5)):
                 noticias_limpas.append({"titulo": n.get("title", ""), "fonte": n.get("source", "Outros"), "linha_editorial": "Independente", "data": n.get("date", "Recente"), "url": n.get("url", "#")})
+            s.definir(resultados=len(noticias_limpas))
     except: pass
+    atual().definir(politico=id, despesas=len(despesas_data), fornecedores=len(cnpjs_fornecedores))
 
     dado_completo = {
         "id": id, "nome": nome_completo, "cargo": cargo, "partido": partido, "uf": uf, "foto": foto,
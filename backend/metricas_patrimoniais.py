@@ -0,0 +1,159 @@
+"""
+backend/metricas_patrimoniais.py
+
+MÉTRICAS PATRIMONIAIS PRÉ-CALCULADAS (Heurística 4, sem LLM)
+============================================================
+Roda depois das cargas do TSE (bens), Receita/CEIS e CEAP. Para cada
+(:Politico) — candidatos do TSE e deputados só da Câmara, em páginas de
+p.chave com UNWIND — grava no próprio nó:
+
+  - patrimonio_declarado      soma de DECLARA_BEM.valor_total;
+  - capital_vinculado         capital social das empresas em que é sócio;
+  - contratos_recebidos       valor dos contratos ganhos por essas empresas;
+  - qtd_empresas_socio / qtd_contratos;
+  - razao_capital_patrimonio  capital_vinculado / patrimônio;
+  - razao_contratos_patrimonio contratos_recebidos / patrimônio;
+  - metricas_em               data do cálculo.
+
+Razões usam max(patrimônio, R$ 1): quem declarou zero e é sócio de empresa
+milionária fica no topo, como deve. As propriedades têm índices de range,
+então ranking e filtros por razão saem do índice, sem varrer o grafo.
+
+Uso:
+    python metricas_patrimoniais.py                 # recalcula todos
+    python metricas_patrimoniais.py --ranking razao_capital_patrimonio --uf SP
+"""
+
+import time
+import logging
+import argparse
+
+from database.neo4j_conn import Neo4jConnection, SOCIO_DO_POLITICO, garantir_chave_politico
+
+logger = logging.getLogger("MetricasPatrimoniais")
+
+LOTE = 1000
+METRICAS = (
+    "razao_capital_patrimonio",
+    "razao_contratos_patrimonio",
+    "patrimonio_declarado",
+    "capital_vinculado",
+    "contratos_recebidos",
+)
+LIMITE_RANKING_MAX = 500
+
+INDICES = [
+    *(f"CREATE INDEX politico_{m}_idx IF NOT EXISTS FOR (p:Politico) ON (p.{m})" for m in METRICAS),
+    "CREATE INDEX politico_uf_razao_capital_idx IF NOT EXISTS FOR (p:Politico) ON (p.uf, p.razao_capital_patrimonio)",
+    "CREATE INDEX politico_uf_razao_contratos_idx IF NOT EXISTS FOR (p:Politico) ON (p.uf, p.razao_contratos_patrimonio)",
+]
+
+# Vínculo por sociedade: só empresas das quais o político é dono entram no
+# confronto com o patrimônio (fornecedores pagos via CEAP não são bens dele).
+Q_CALCULAR = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+CALL {
+    WITH p
+    OPTIONAL MATCH (p)-[b:DECLARA_BEM]->(:BemDeclarado)
+    RETURN sum(coalesce(b.valor_total, 0.0)) AS patrimonio
+}
+CALL {
+    WITH p
+    OPTIONAL MATCH (s:Socio)-[:E_SOCIO_DE]->(e:Empresa)
+    WHERE """ + SOCIO_DO_POLITICO + """
+    RETURN collect(DISTINCT e) AS empresas
+}
+CALL {
+    WITH empresas
+    UNWIND empresas AS e
+    OPTIONAL MATCH (e)-[:GANHOU_LICITACAO]->(c:Contrato)
+    RETURN sum(coalesce(c.valor, 0.0)) AS contratos, count(c) AS qtd_contratos
+}
+WITH p, patrimonio, empresas, contratos, qtd_contratos,
+     reduce(s = 0.0, e IN empresas | s + coalesce(e.capital_social, 0.0)) AS capital,
+     CASE WHEN patrimonio < 1 THEN 1.0 ELSE patrimonio END AS base
+SET p.patrimonio_declarado = patrimonio,
+    p.capital_vinculado = capital,
+    p.contratos_recebidos = contratos,
+    p.qtd_empresas_socio = size(empresas),
+    p.qtd_contratos = qtd_contratos,
+    p.razao_capital_patrimonio = capital / base,
+    p.razao_contratos_patrimonio = contratos / base,
+    p.metricas_em = date()
+RETURN count(p) AS n
+"""
+
+
+def garantir_indices(neo4j: Neo4jConnection):
+    for cmd in INDICES:
+        try:
+            neo4j.execute_query(cmd)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Índice de métricas: {e}")
+
+
+def calcular_metricas(neo4j: Neo4jConnection, lote: int = LOTE) -> int:
+    """Percorre todos os (:Politico) por cursor de p.chave e grava as métricas."""
+    garantir_indices(neo4j)
+    garantir_chave_politico(neo4j)
+    t0, cursor, total, paginas = time.time(), "", 0, 0
+    while True:
+        ids = [r["id"] for r in neo4j.execute_query(
+            "MATCH (p:Politico) WHERE p.chave > $cursor RETURN p.chave AS id ORDER BY id LIMIT $lote",
+            {"cursor": cursor, "lote": lote})]
+        if not ids:
+            break
+        try:
+            resultado = neo4j.execute_query(Q_CALCULAR, {"ids": ids})
+            total += resultado[0]["n"] if resultado else 0
+        except Exception as e:
+            logger.error(f"  ❌ Erro nas métricas do lote após {cursor!r}: {e}")
+        cursor, paginas = ids[-1], paginas + 1
+        if paginas % 20 == 0:
+            logger.info(f"  💰 {total:,} políticos com métricas ({time.time() - t0:.0f}s)")
+    logger.info(f"  ✅ Métricas patrimoniais: {total:,} políticos em {time.time() - t0:.1f}s")
+    return total
+
+
+def ranking(neo4j: Neo4jConnection, metrica: str = "razao_capital_patrimonio", uf: str = None,
+            minimo: float = None, limite: int = 50) -> list:
+    """Top-N pela métrica (ordem decrescente), opcionalmente por UF e acima de um mínimo."""
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica inválida. Use uma de: {', '.join(METRICAS)}.")
+    limite = max(1, min(int(limite), LIMITE_RANKING_MAX))
+    filtro_uf = "AND p.uf = $uf " if uf else ""
+    # Nome da métrica vem da lista acima: interpolar mantém o ORDER BY servido pelo índice.
+    query = (
+        f"MATCH (p:Politico) WHERE p.{metrica} IS NOT NULL AND p.{metrica} >= $minimo {filtro_uf}"
+        "RETURN p.chave AS id, p.nome AS nome, p.cargo AS cargo, p.partido AS partido, p.uf AS uf, "
+        "p.municipio AS municipio, p.patrimonio_declarado AS patrimonio_declarado, "
+        "p.capital_vinculado AS capital_vinculado, p.contratos_recebidos AS contratos_recebidos, "
+        "p.razao_capital_patrimonio AS razao_capital_patrimonio, "
+        "p.razao_contratos_patrimonio AS razao_contratos_patrimonio, "
+        f"toString(p.metricas_em) AS metricas_em ORDER BY p.{metrica} DESC LIMIT $limite"
+    )
+    return neo4j.execute_query(query, {"uf": uf.upper() if uf else None,
+                                       "minimo": float(minimo or 0), "limite": limite})
+
+
+if __name__ == "__main__":
+    import json
+    from database.neo4j_conn import get_neo4j_connection
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Métricas patrimoniais pré-calculadas por político")
+    parser.add_argument("--ranking", choices=METRICAS, help="Só mostra o ranking (não recalcula)")
+    parser.add_argument("--uf", help="Filtra o ranking por UF")
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+
+    neo4j = get_neo4j_connection()
+    try:
+        if args.ranking:
+            print(json.dumps(ranking(neo4j, args.ranking, args.uf, limite=args.limite), indent=2, ensure_ascii=False))
+        else:
+            calcular_metricas(neo4j, args.lote)
+    finally:
+        neo4j.close()
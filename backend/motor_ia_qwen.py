@@ -5,20 +5,75 @@ FASE 3 — MOTOR DE IA AUDITORA (Arquitetura Offline-First)
 =========================================================
 Não faz web scraping. Recebe o JSON do Neo4j e analisa anomalias.
 Regra Inquebrável: toda divergência DEVE ter um link Markdown oficial.
-Validação automática: resposta rejeitada se não houver link https://.
+Validação automática: o laudo é pedido em modo JSON e lido incrementalmente
+(parser_laudo.py); cada red_flag sem link https:// derruba a resposta no meio
+do stream, sem esperar o restante.
+Transporte: um httpx.AsyncClient de longa duração por event loop (keep-alive,
+HTTP/2 quando o pacote h2 está instalado) e respostas em streaming (SSE).
+Cancelar a tarefa que aguarda o laudo encerra o stream na hora.
+Backends: os endpoints OpenAI-compatíveis vêm de backends_ia.py (IA_BACKENDS),
+com roteamento ponderado, concorrência por backend e failover; sem configuração,
+segue o qwen-max de sempre.
+Lote: analisar_lote() junta várias teias pequenas numa só chamada (o prompt de
+sistema vai uma vez) e separa a resposta por id; item inválido é refeito sozinho.
+Cache: laudos do LLM ficam num cache persistente endereçado pelo conteúdo
+(modelo + versão do prompt + subgrafo normalizado); teia inalterada = zero custo.
 """
 
 import os
-import re
 import json
+import time
+import asyncio
+import hashlib
 import logging
+import weakref
+from datetime import datetime
 from typing import Dict, Any
 
 logger = logging.getLogger("AuditorGovernamentalIA")
 
-import requests
+import httpx
 _HTTPX_OK = True # Mantemos a flag para compatibilidade estrutural
 
+try:
+    import h2  # noqa: F401  (habilita HTTP/2 no httpx)
+    _HTTP2_OK = True
+except ImportError:
+    _HTTP2_OK = False
+
+# response_format pedido ao provedor: json_object | json_schema | nenhum
+IA_FORMATO_RESPOSTA = os.getenv("IA_FORMATO_RESPOSTA", "json_object")
+# Modo lote: teias compactadas até IA_LOTE_TOKENS_ITEM tokens dividem uma chamada.
+IA_LOTE_MAX_ITENS = int(os.getenv("IA_LOTE_MAX_ITENS", "8"))
+IA_LOTE_TOKENS_ITEM = int(os.getenv("IA_LOTE_TOKENS_ITEM", "800"))
+IA_LOTE_TOKENS_RESPOSTA_ITEM = 1024
+IA_LOTE_MAX_TOKENS_RESPOSTA = 8192
+
+# Um cliente por event loop: o httpx.AsyncClient fica preso ao loop em que foi
+# criado, e o agente roda auditorias em loops de threads próprias. Os semáforos
+# de concorrência ficam em cada BackendIA.
+_clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+
+from database.cache_ia import get_cache_ia, chave_laudo
+from compactador_prompt import compactar_teia, COMPACTACAO_VERSAO, TOP_K_PADRAO, INSTRUCAO_FORMATO
+from parser_laudo import ParserLaudoIncremental, LaudoInvalido, SCHEMA_LAUDO, SCHEMA_LOTE, separar_lote
+from backends_ia import get_roteador_ia, RoteadorIA, BackendIA, QWEN_URL, QWEN_MODELO
+from telemetria import LLM_DURACAO, LLM_PRIMEIRO_TOKEN, LLM_CHAMADAS, LLM_TOKENS
+from rastreamento import rastrear, registrar_span, atual
+
+
+class LimiteDeTaxaIA(Exception):
+    """
+    HTTP 429 do provedor. Um 429 só suspende aquele backend e passa ao próximo;
+    com todos suspensos, é lançada para fora apenas com propagar_limite_taxa=True
+    (o escalonador da auditoria em massa reduz a concorrência e reenfileira);
+    nos demais chamadores vira fallback.
+    """
+
+    def __init__(self, retry_after: float = None):
+        super().__init__(f"Limite de taxa da IA atingido (Retry-After: {retry_after})")
+        self.retry_after = retry_after
+
 
 class AuditorGovernamentalIA:
     """
@@ -29,13 +84,121 @@ class AuditorGovernamentalIA:
     """
 
     # ── ENDPOINT E MODELO ─────────────────────────────────────────────────────
-    BASE_URL = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1/chat/completions"
-    MODELO   = "qwen-max"  # Modelo principal — não alterar para modelos legados
+    BASE_URL = QWEN_URL     # Backend padrão (sem IA_BACKENDS)
+    MODELO   = QWEN_MODELO
+    PROMPT_VERSAO = "2"    # Incrementar ao mudar as regras do laudo (invalida o cache)
+
+    def __init__(self, usar_cache: bool = None, propagar_limite_taxa: bool = False, top_k: int = None,
+                 roteador: RoteadorIA = None):
+        self.roteador = roteador or get_roteador_ia()
+        if not self.roteador.backends:
+            logger.warning("⚠️  Nenhum backend de IA (QWEN_API_KEY/IA_BACKENDS). Modo FALLBACK ativo.")
+        # Modelos consultados no cache, em ordem; o laudo novo vai para a chave de quem respondeu.
+        self.modelos = self.roteador.modelos
+        # IA_CACHE_ATIVO=0 desliga o cache de laudos para todo o processo.
+        self.usar_cache = os.getenv("IA_CACHE_ATIVO", "1") != "0" if usar_cache is None else usar_cache
+        self.propagar_limite_taxa = propagar_limite_taxa
+        # Linhas por tabela enviadas por extenso ao LLM (o resto vai resumido).
+        self.top_k = top_k or TOP_K_PADRAO
 
-    def __init__(self):
-        self.api_key = os.getenv("QWEN_API_KEY")
-        if not self.api_key:
-            logger.warning("⚠️  QWEN_API_KEY não definida. Modo FALLBACK ativo.")
+    @property
+    def versao_prompt(self) -> str:
+        """
+        Versão declarada + hash do texto (editar o prompt sem incrementar também
+        invalida) + formato de compactação e top-K, que mudam o que o LLM vê.
+        """
+        return (f"{self.PROMPT_VERSAO}-{hashlib.sha256(self._system_prompt.encode()).hexdigest()[:12]}"
+                f"-c{COMPACTACAO_VERSAO}k{self.top_k}")
+
+    # ── TRANSPORTE HTTP ───────────────────────────────────────────────────────
+    def _cliente(self) -> httpx.AsyncClient:
+        """Cliente do event loop atual, criado na primeira chamada."""
+        loop = asyncio.get_running_loop()
+        cliente = _clientes.get(loop)
+        if cliente is None or cliente.is_closed:
+            if not _HTTP2_OK:
+                logger.info("ℹ️  Pacote h2 ausente: cliente da IA em HTTP/1.1 com keep-alive.")
+            conexoes = max(1, self.roteador.concorrencia_total)
+            cliente = httpx.AsyncClient(
+                http2=_HTTP2_OK,
+                timeout=httpx.Timeout(connect=10.0, read=90.0, write=30.0, pool=None),
+                limits=httpx.Limits(max_connections=conexoes,
+                                    max_keepalive_connections=conexoes,
+                                    keepalive_expiry=120.0),
+            )
+            _clientes[loop] = cliente
+        return cliente
+
+    @staticmethod
+    async def aclose():
+        """Fecha o cliente HTTP do event loop atual (chamar antes de encerrar o loop)."""
+        cliente = _clientes.pop(asyncio.get_running_loop(), None)
+        if cliente:
+            await cliente.aclose()
+
+    async def _completar(self, payload: Dict[str, Any], backend: BackendIA, ao_receber=None) -> tuple:
+        """
+        Envia o chat completion ao backend em modo stream e devolve (texto do
+        assistente, uso de tokens), acumulando os deltas SSE à medida que chegam.
+        Se o servidor ignorar o stream e responder JSON comum, lê o corpo inteiro.
+        `ao_receber(delta)` vê cada pedaço; uma exceção dele fecha o stream na hora.
+        """
+        headers = {
+            "Content-Type":   "application/json",
+            "Accept":         "text/event-stream",
+        }
+        if backend.api_key:
+            headers["Authorization"] = f"Bearer {backend.api_key}"
+        cliente = self._cliente()
+        async with backend.semaforo():
+            backend.stats["chamadas"] += 1
+            inicio = time.perf_counter()
+            async with cliente.stream("POST", backend.url, headers=headers,
+                                      json={**payload, "model": backend.modelo, "stream": True,
+                                            "stream_options": {"include_usage": True}}) as resp:
+                if resp.status_code == 429:
+                    try:
+                        retry_after = float(resp.headers.get("retry-after", ""))
+                    except ValueError:
+                        retry_after = None
+                    raise LimiteDeTaxaIA(retry_after)
+                if resp.status_code >= 400:
+                    corpo = (await resp.aread()).decode("utf-8", errors="replace")
+                    raise httpx.HTTPStatusError(f"HTTP {resp.status_code}: {corpo[:300]}",
+                                                request=resp.request, response=resp)
+
+                if "text/event-stream" not in resp.headers.get("content-type", ""):
+                    full_json = json.loads(await resp.aread())
+                    if "choices" not in full_json or not full_json["choices"]:
+                        raise ValueError(f"Resposta da IA sem choices: {str(full_json)[:300]}")
+                    texto = full_json["choices"][0]["message"]["content"] or ""
+                    if ao_receber:
+                        ao_receber(texto)
+                    return texto, full_json.get("usage")
+
+                partes, uso = [], None
+                async for linha in resp.aiter_lines():
+                    if not linha.startswith("data:"):
+                        continue
+                    dado = linha[5:].strip()
+                    if dado == "[DONE]":
+                        break
+                    try:
+                        evento = json.loads(dado)
+                    except json.JSONDecodeError:
+                        continue
+                    uso = evento.get("usage") or uso
+                    escolhas = evento.get("choices") or []
+                    delta = (escolhas[0].get("delta") or {}).get("content") if escolhas else None
+                    if delta:
+                        if not partes:
+                            primeiro = time.perf_counter() - inicio
+                            LLM_PRIMEIRO_TOKEN.observar(primeiro, backend=backend.nome)
+                            logger.info(f"⏱️  Primeiro token da IA ({backend.nome}) em {primeiro:.2f}s")
+                        partes.append(delta)
+                        if ao_receber:
+                            ao_receber(delta)
+                return "".join(partes), uso
 
     # ── SYSTEM PROMPT INQUEBRÁVEL ─────────────────────────────────────────────
     @property
@@ -74,6 +237,7 @@ REGRAS DE SAÍDA — FORMATO OBRIGATÓRIO
 - Não use termos jurídicos definitivos (use "Anomalia Grave", "Vínculo Suspeito", "Padrão de Risco").
 - Score de Risco: 0 a 100 baseado na densidade de falhas.
 - Link Markdown OBRIGATÓRIO para cada evidência.
+- Responda SOMENTE com o objeto JSON abaixo, sem texto antes ou depois e sem cercas de código.
 
 {
     "score_risco": <inteiro>,
@@ -88,107 +252,307 @@ REGRAS DE SAÍDA — FORMATO OBRIGATÓRIO
 """
 
     # ── MÉTODO PRINCIPAL ──────────────────────────────────────────────────────
-    async def analisar_teia_financeira(self, json_do_neo4j: Dict[str, Any]) -> Dict[str, Any]:
+    @rastrear("ia.analisar_teia")
+    async def analisar_teia_financeira(self, json_do_neo4j: Dict[str, Any], usar_cache: bool = None) -> Dict[str, Any]:
         """
         Recebe o subgrafo do Neo4j e retorna o laudo de risco com links oficiais.
-        Usa requests de forma síncrona em um executor para máxima estabilidade.
+        Consulta antes o cache de laudos. usar_cache=False força nova análise
+        no LLM (o laudo novo substitui o do cache, salvo com IA_CACHE_ATIVO=0).
+        O laudo sai com "proveniencia": origem llm | cache | fallback.
         """
-        logger.info("🧠 [IA AUDITORA] Inspecionando subgrafo em busca de anomalias...")
+        usar_cache = self.usar_cache if usar_cache is None else usar_cache
+        inicio = time.perf_counter()
 
-        if not self.api_key:
-            logger.warning("API Key ausente. Ativando fallback simulado.")
-            return self._fallback_simulado(json_do_neo4j)
+        if usar_cache:
+            laudo = self._do_cache(json_do_neo4j, inicio)
+            if laudo:
+                return laudo
 
-        headers = {
-            "Authorization":  f"Bearer {self.api_key}",
-            "Content-Type":   "application/json",
+        laudo = await self._analisar_no_llm(json_do_neo4j)
+        return self._finalizar(laudo, json_do_neo4j, inicio)
+
+    def _proveniencia_base(self, json_do_neo4j: Dict[str, Any], modelo: str) -> tuple:
+        versao = self.versao_prompt
+        chave = chave_laudo(modelo, versao, json_do_neo4j)
+        return chave, {"modelo": modelo, "prompt_versao": versao, "chave_cache": chave}
+
+    def _do_cache(self, json_do_neo4j: Dict[str, Any], inicio: float) -> Dict[str, Any] | None:
+        """Primeiro laudo em cache da teia entre os modelos do roteador (na ordem de self.modelos)."""
+        try:
+            for modelo in self.modelos:
+                chave, proveniencia = self._proveniencia_base(json_do_neo4j, modelo)
+                entrada = get_cache_ia().obter(chave)
+                if entrada:
+                    break
+            else:
+                return None
+        except Exception as e:
+            logger.warning(f"⚠️ Cache de laudos indisponível: {e}")
+            return None
+        laudo = entrada["laudo"]
+        laudo["proveniencia"] = {
+            **proveniencia, "origem": "cache",
+            "gerado_em": datetime.fromtimestamp(entrada["criado_em"]).isoformat(timespec="seconds"),
+            "acertos": entrada["acertos"],
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1),
         }
+        logger.info(f"♻️ [IA AUDITORA] Teia inalterada — laudo servido do cache ({chave[:12]}).")
+        atual().definir(**{"ia.origem": "cache"})
+        return laudo
+
+    def _finalizar(self, laudo: dict, json_do_neo4j: Dict[str, Any], inicio: float) -> Dict[str, Any]:
+        """Completa a proveniência e grava no cache, na chave do modelo que respondeu, os laudos do LLM."""
+        origem = (laudo.get("proveniencia") or {}).get("origem", "llm")
+        modelo = (laudo.get("proveniencia") or {}).get("modelo") or self.modelos[0]
+        chave, proveniencia = self._proveniencia_base(json_do_neo4j, modelo)
+        atual().definir(**{"ia.origem": origem})
+        laudo["proveniencia"] = {
+            **proveniencia, **laudo.get("proveniencia", {}),
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        }
+        if origem == "llm" and self.usar_cache:
+            try:
+                get_cache_ia().gravar(chave, modelo, proveniencia["prompt_versao"],
+                                      {k: v for k, v in laudo.items() if k != "proveniencia"})
+            except Exception as e:
+                logger.warning(f"⚠️ Falha ao gravar laudo no cache: {e}")
+        return laudo
+
+    def _compactar(self, json_do_neo4j: Dict[str, Any]) -> tuple:
+        teia_compacta, medidas = compactar_teia(json_do_neo4j, self.top_k)
+        logger.info(
+            f"🗜️  Subgrafo compactado: {medidas['tokens_antes']:,} → {medidas['tokens_depois']:,} tokens "
+            f"({medidas['linhas_omitidas']} linhas na cauda, {medidas['referencias']} referências)")
+        return teia_compacta, medidas
+
+    @staticmethod
+    def _formato_resposta(payload: dict, schema: dict):
+        if IA_FORMATO_RESPOSTA == "json_schema":
+            payload["response_format"] = {"type": "json_schema", "json_schema": schema}
+        elif IA_FORMATO_RESPOSTA == "json_object":
+            payload["response_format"] = {"type": "json_object"}
+
+    async def _enviar(self, payload: Dict[str, Any], ler) -> tuple:
+        """
+        Tenta os backends na ordem sorteada pelo roteador e devolve (ler(parser),
+        uso, backend) do primeiro que responder. Erro de transporte ou 429 passa
+        ao próximo; LaudoInvalido (problema de conteúdo) propaga sem repetir em
+        outro. Ninguém respondeu: (None, None, None), ou LimiteDeTaxaIA se houve
+        429/suspensão e propagar_limite_taxa=True.
+        """
+        ordem = self.roteador.ordem()
+        # Todos suspensos (429 ou falhas seguidas): quem propaga espera e tenta de novo.
+        limitado = not ordem
+        for backend in ordem:
+            parser = ParserLaudoIncremental()
+            inicio = time.perf_counter()
+            try:
+                _, uso = await self._completar(payload, backend, parser.alimentar)
+                conteudo = ler(parser)
+                self.roteador.registrar_sucesso(backend)
+                self._medir_chamada(backend, inicio, "ok", uso)
+                return conteudo, uso, backend
+
+            except LaudoInvalido as e:
+                self.roteador.registrar_sucesso(backend)
+                self._medir_chamada(backend, inicio, "invalido")
+                etapa = "concluída" if parser.concluido else "abortada no stream"
+                logger.warning(f"⚠️ Laudo da IA rejeitado ({backend.nome}, {etapa}): {e}")
+                raise
+
+            except LimiteDeTaxaIA as e:
+                limitado = True
+                self._medir_chamada(backend, inicio, "limite_taxa")
+                self.roteador.registrar_limite_taxa(backend, e.retry_after)
+                logger.warning(f"⏳ 429 no backend {backend.nome}; tentando o próximo.")
+
+            except (httpx.HTTPError, ValueError) as re_err:
+                self.roteador.registrar_falha(backend, re_err)
+                self._medir_chamada(backend, inicio, "erro")
+                logger.error(f"❌ Falha no backend {backend.nome} ({type(re_err).__name__}): {str(re_err)}")
+
+            except Exception as e:
+                self.roteador.registrar_falha(backend, e)
+                self._medir_chamada(backend, inicio, "erro")
+                logger.error(f"❌ Erro não esperado no motor IA ({backend.nome}): {str(e)}")
+
+        if limitado and self.propagar_limite_taxa:
+            raise LimiteDeTaxaIA(self.roteador.espera_limite_taxa() or None)
+        logger.error("❌ Nenhum backend de IA respondeu.")
+        return None, None, None
+
+    @staticmethod
+    def _medir_chamada(backend: BackendIA, inicio: float, resultado: str, uso: dict = None):
+        duracao = time.perf_counter() - inicio
+        LLM_DURACAO.observar(duracao, backend=backend.nome)
+        LLM_CHAMADAS.incrementar(backend=backend.nome, resultado=resultado)
+        for tipo in ("prompt_tokens", "completion_tokens"):
+            if uso and isinstance(uso.get(tipo), (int, float)):
+                LLM_TOKENS.incrementar(uso[tipo], backend=backend.nome, tipo=tipo.removesuffix("_tokens"))
+        # Uma tentativa por backend vira um span (convenções gen_ai.* do OpenTelemetry).
+        uso = uso or {}
+        registrar_span(f"llm {backend.nome}", duracao, erro=None if resultado == "ok" else resultado, **{
+            "gen_ai.system": backend.nome, "gen_ai.request.model": backend.modelo,
+            "gen_ai.usage.input_tokens": uso.get("prompt_tokens"),
+            "gen_ai.usage.output_tokens": uso.get("completion_tokens"), "ia.resultado": resultado})
+
+    async def _analisar_no_llm(self, json_do_neo4j: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Chamada real ao LLM pelo cliente assíncrono compartilhado, com failover
+        entre backends. Laudo fora do contrato ou nenhum backend disponível
+        devolvem o fallback simulado. Cancelamento propaga.
+        """
+        logger.info("🧠 [IA AUDITORA] Inspecionando subgrafo em busca de anomalias...")
+
+        if not self.roteador.backends:
+            logger.warning("Nenhum backend de IA configurado. Ativando fallback simulado.")
+            return self._fallback_simulado(json_do_neo4j)
 
+        teia_compacta, _ = self._compactar(json_do_neo4j)
         payload = {
-            "model": self.MODELO,
             "messages": [
                 {"role": "system", "content": self._system_prompt},
                 {
                     "role": "user",
                     "content": (
                         "Faça a auditoria investigativa da seguinte teia de relações extraída do "
-                        "banco de grafos Neo4j:\n\n"
-                        + json.dumps(json_do_neo4j, ensure_ascii=False, indent=2)
+                        "banco de grafos Neo4j.\n" + INSTRUCAO_FORMATO + "\n\n"
+                        + teia_compacta
                     ),
                 },
             ],
             "temperature": 0.05,
             "max_tokens":  2048,
         }
+        self._formato_resposta(payload, SCHEMA_LAUDO)
 
         try:
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
-            # Executa a requisição bloqueante em uma thread separada
-            def fazer_request():
-                return requests.post(self.BASE_URL, headers=headers, json=payload, timeout=90)
-
-            resp = await loop.run_in_executor(None, fazer_request)
-            resp.raise_for_status()
-            
-            decode_text = resp.text
-            
-            try:
-                full_json = resp.json()
-            except Exception:
-                logger.error(f"❌ Resposta da API não é um JSON válido: {decode_text[:500]}")
-                return self._fallback_simulado(json_do_neo4j)
-
-            if "choices" not in full_json or not full_json["choices"]:
-                logger.error(f"❌ Resposta da IA sem choices: {full_json}")
-                return self._fallback_simulado(json_do_neo4j)
-            
-            raw = full_json["choices"][0]["message"]["content"].strip()
-
-            if not raw:
-                logger.error("❌ Conteúdo da resposta da IA vazio.")
-                return self._fallback_simulado(json_do_neo4j)
-
-            # ── Limpeza de formatação suja ────────────────────────────────
-            raw_clean = re.sub(r"^```json\s*", "", raw)
-            raw_clean = re.sub(r"^```\s*",     "", raw_clean)
-            raw_clean = re.sub(r"\s*```$",      "", raw_clean)
-            raw_clean = raw_clean.strip()
-
-            try:
-                resultado = json.loads(raw_clean, strict=False)
-            except json.JSONDecodeError:
-                match = re.search(r"(\{.*\})", raw_clean, re.DOTALL)
-                if match:
-                    try:
-                        resultado = json.loads(match.group(1), strict=False)
-                    except Exception as e:
-                        logger.error(f"❌ Falha crítica ao extrair JSON: {str(e)} | Conteúdo: {raw_clean[:200]}")
-                        return self._fallback_simulado(json_do_neo4j)
-                else:
-                    logger.error(f"❌ Conteúdo não contém JSON válido: {raw_clean[:300]}")
-                    return self._fallback_simulado(json_do_neo4j)
-
-            # ── VALIDAÇÃO: deve existir ao menos um link Markdown
-            texto_completo = json.dumps(resultado, ensure_ascii=False)
-            tem_link = re.search(r"\[.+?\]\(https?://.+?\)", texto_completo)
-            
-            if not tem_link:
-                logger.warning("⚠️ IA gerou laudo SEM link oficial. Resposta original: " + raw_clean[:500])
-                return self._fallback_simulado(json_do_neo4j)
-
-            logger.info(f"⚖️ Score de Risco: {resultado.get('score_risco', 0)}/100 | Red Flags: {len(resultado.get('red_flags', []))}")
-            return resultado
-
-        except requests.exceptions.RequestException as re_err:
-            logger.error(f"❌ Falha na API Qwen (RequestException): {str(re_err)}")
+            resultado, uso, backend = await self._enviar(payload, ParserLaudoIncremental.resultado)
+        except LaudoInvalido:
             return self._fallback_simulado(json_do_neo4j)
-
-        except Exception as e:
-            logger.error(f"❌ Erro não esperado no motor IA: {str(e)}")
+        if resultado is None:
             return self._fallback_simulado(json_do_neo4j)
 
+        logger.info(f"⚖️ Score de Risco: {resultado['score_risco']}/100 | "
+                    f"Red Flags: {len(resultado['red_flags'])} ({backend.nome})")
+        resultado["proveniencia"] = {"origem": "llm", "uso_tokens": uso,
+                                     "backend": backend.nome, "modelo": backend.modelo}
+        return resultado
+
+    # ── MODO LOTE (vários políticos por chamada) ──────────────────────────────
+    @property
+    def _system_prompt_lote(self) -> str:
+        return self._system_prompt + """
+══════════════════════════════════════════════════════════════════════
+MODO LOTE
+══════════════════════════════════════════════════════════════════════
+A mensagem traz vários investigados em "itens", cada um com "id" e "teia".
+Audite cada item isoladamente: nunca use dados de um item no laudo de outro.
+Em vez do objeto acima, responda SOMENTE com:
+
+{"laudos": [{"id": "<id do item>", "score_risco": <inteiro>, "red_flags": [...], "resumo_investigativo": "..."}]}
+
+com exatamente um laudo por item, na mesma ordem, cada um no formato obrigatório acima.
+"""
+
+    async def analisar_lote(self, teias: Dict[str, Dict[str, Any]], usar_cache: bool = None,
+                            max_itens: int = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Audita várias teias e devolve {id: laudo}, no mesmo contrato de
+        analisar_teia_financeira. Teias pequenas (até IA_LOTE_TOKENS_ITEM tokens
+        compactadas) vão juntas, até max_itens por chamada, com um único prompt
+        de sistema; as grandes seguem uma a uma. Item do lote que volta fora do
+        contrato (ou não volta) é refeito sozinho; os demais são aproveitados.
+        Os laudos usam a mesma chave de cache da auditoria individual.
+        """
+        usar_cache = self.usar_cache if usar_cache is None else usar_cache
+        max_itens = max_itens or IA_LOTE_MAX_ITENS
+        inicio = time.perf_counter()
+        laudos, pendentes = {}, {}
+        for id_item, teia in teias.items():
+            laudo = self._do_cache(teia, inicio) if usar_cache else None
+            if laudo:
+                laudos[id_item] = laudo
+            else:
+                pendentes[id_item] = teia
+
+        # Teia pequena: o prompt de sistema dominaria o custo de uma chamada só dela.
+        compactas = {i: compactar_teia(t, self.top_k) for i, t in pendentes.items()} \
+            if self.roteador.backends else {}
+        pequenas = [i for i, (_, medidas) in compactas.items() if medidas["tokens_depois"] <= IA_LOTE_TOKENS_ITEM]
+        grupos = [list(pequenas)[k:k + max_itens] for k in range(0, len(pequenas), max_itens)]
+        individuais = [i for i in pendentes if i not in pequenas]
+        # Lote de um item só não economiza nada: vai pelo caminho normal.
+        individuais += [g[0] for g in grupos if len(g) == 1]
+        grupos = [g for g in grupos if len(g) > 1]
+
+        resultados = await asyncio.gather(
+            *(self._auditar_grupo({i: pendentes[i] for i in grupo}, compactas) for grupo in grupos),
+            *(self.analisar_teia_financeira(pendentes[i], usar_cache=False) for i in individuais))
+        for resultado in resultados[:len(grupos)]:
+            laudos.update(resultado)
+        laudos.update(zip(individuais, resultados[len(grupos):]))
+        return {i: laudos[i] for i in teias}
+
+    async def _auditar_grupo(self, teias: Dict[str, Dict[str, Any]], compactas: dict) -> Dict[str, Dict[str, Any]]:
+        """Uma chamada para o grupo; o que falhar volta para a auditoria individual."""
+        inicio = time.perf_counter()
+        ids = list(teias)
+        apelidos = {f"P{n}": id_item for n, id_item in enumerate(ids, start=1)}
+        itens, pesos = [], {}
+        for apelido, id_item in apelidos.items():
+            teia_compacta, medidas = compactas[id_item]
+            itens.append(f'{{"id":{json.dumps(apelido)},"teia":{teia_compacta}}}')
+            pesos[apelido] = max(medidas["tokens_depois"], 1)
+        logger.info(f"📦 [IA AUDITORA] Lote de {len(ids)} teias ({sum(pesos.values()):,} tokens) numa chamada.")
+
+        payload = {
+            "messages": [
+                {"role": "system", "content": self._system_prompt_lote},
+                {
+                    "role": "user",
+                    "content": (
+                        "Faça a auditoria investigativa de cada teia de relações abaixo, extraídas do "
+                        "banco de grafos Neo4j.\n" + INSTRUCAO_FORMATO + "\n\n"
+                        + '{"itens":[' + ",".join(itens) + "]}"
+                    ),
+                },
+            ],
+            "temperature": 0.05,
+            "max_tokens":  min(IA_LOTE_MAX_TOKENS_RESPOSTA, IA_LOTE_TOKENS_RESPOSTA_ITEM * len(ids)),
+        }
+        self._formato_resposta(payload, SCHEMA_LOTE)
+
+        validos, falhas = {}, {a: "lote sem resposta" for a in apelidos}
+        try:
+            resposta, uso, backend = await self._enviar(payload, ParserLaudoIncremental.objeto)
+            if resposta is not None:
+                validos, falhas = separar_lote(resposta, list(apelidos))
+        except LaudoInvalido:
+            pass
+
+        laudos = {}
+        total_pesos = sum(pesos.values())
+        for apelido, resultado in validos.items():
+            id_item = apelidos[apelido]
+            fracao = pesos[apelido] / total_pesos
+            resultado["proveniencia"] = {
+                "origem": "llm", "backend": backend.nome, "modelo": backend.modelo,
+                "lote": {"itens": len(ids), "fracao": round(fracao, 3)},
+                # Uso da chamada rateado pelo tamanho de cada teia (acerto do orçamento de tokens).
+                "uso_tokens": uso and {k: round(v * fracao) for k, v in uso.items() if isinstance(v, (int, float))},
+            }
+            laudos[id_item] = self._finalizar(resultado, teias[id_item], inicio)
+
+        if falhas:
+            logger.warning(f"🔁 {len(falhas)}/{len(ids)} item(ns) do lote refeitos individualmente: "
+                           f"{'; '.join(sorted(set(falhas.values())))[:300]}")
+            refeitos = await asyncio.gather(*(self.analisar_teia_financeira(teias[apelidos[a]], usar_cache=False)
+                                              for a in falhas))
+            laudos.update(zip((apelidos[a] for a in falhas), refeitos))
+        return laudos
+
     # ── FALLBACK SIMULADO (quando API cai) ────────────────────────────────────
     def _fallback_simulado(self, json_do_neo4j: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -199,6 +563,11 @@ REGRAS DE SAÍDA — FORMATO OBRIGATÓRIO
         score_risco = 20
         red_flags   = []
 
+        # Achados do motor de regras já trazem nível e link oficial: valem mais que a heurística abaixo.
+        for achado in json_do_neo4j.get("achados_regras", []):
+            score_risco += 40 if achado.get("nivel") == "CRÍTICO" else 20
+            red_flags.append({"nivel": achado.get("nivel"), "motivo": achado.get("motivo")})
+
         empresas   = json_do_neo4j.get("empresas",              [])
         familiares = json_do_neo4j.get("familiares_mapeados",   [])
         contratos  = json_do_neo4j.get("contratos_suspeitos",   [])
@@ -228,6 +597,7 @@ REGRAS DE SAÍDA — FORMATO OBRIGATÓRIO
             })
 
         return {
+            "proveniencia":         {"origem": "fallback"},
             "score_risco":          min(score_risco, 100),
             "red_flags":            red_flags,
             "resumo_investigativo": (
@@ -0,0 +1,408 @@
+"""
+backend/motor_regras.py
+
+MOTOR DE REGRAS DETERMINÍSTICO (antes do LLM)
+=============================================
+As seis heurísticas PF/TCU do system prompt do motor de IA, avaliadas
+diretamente no grafo para LOTES de políticos (UNWIND $ids sobre p.chave, que
+também cobre os deputados só da Câmara; uma consulta por heurística por lote):
+
+  1. Empresa Bebê Milionária  — contratos ≥ R$ 1 mi nos primeiros 6 meses da empresa;
+  2. Nepotismo Oculto         — sócio de empresa ligada ao político com o mesmo sobrenome;
+  3. Fracionamento            — lê os (:AlertaFracionamento) de detector_fracionamento.py;
+  4. Inconsistência Patrimonial — capital das empresas em que é sócio ≫ patrimônio declarado;
+  5. Monopólio Geográfico     — empresa ligada leva > 70% do valor contratado no município;
+  6. Georreferenciação Fantasma — empresas ligadas dividem endereço com outras fornecedoras.
+
+Cada achado sai no formato das red_flags da IA (nivel + motivo em Markdown com
+link oficial) e soma pontos (CRÍTICO 40, ALTO 20, máximo 100). Só quem cruza
+REGRAS_LIMIAR_LLM segue para o LLM escrever a narrativa; o resto recebe um
+laudo determinístico sem custo de API.
+
+"Empresas ligadas" = destino de qualquer aresta saindo do (:Politico) (CEAP,
+emendas, contratos) + empresas em que um (:Socio) homônimo do político é sócio.
+
+Uso:
+    python motor_regras.py --id 250000612345
+    python motor_regras.py --id camara:204554   # deputado sem id_tse
+    python motor_regras.py --todos          # grava p.score_regras em todos
+"""
+
+import os
+import re
+import logging
+import argparse
+from datetime import datetime
+from collections import defaultdict
+
+from database.neo4j_conn import Neo4jConnection, SOCIO_DO_POLITICO, garantir_chave_politico
+from detector_fracionamento import FRACIONAMENTO_FAIXA, FRACIONAMENTO_MIN_CONTRATOS
+
+logger = logging.getLogger("MotorRegras")
+
+LIMIAR_LLM = int(os.getenv("REGRAS_LIMIAR_LLM", "40"))
+PONTOS = {"CRÍTICO": 40, "ALTO": 20}
+MAX_EVIDENCIAS_POR_HEURISTICA = 10
+
+BEBE_DIAS = 180
+BEBE_VALOR_MIN = 1_000_000.0
+PATRIMONIO_FATOR = 100
+PATRIMONIO_CAPITAL_MIN = 1_000_000.0
+MONOPOLIO_FATIA = 0.70
+MONOPOLIO_MIN_CONTRATOS = 5
+# Sobrenomes frequentes demais para indicar parentesco sozinhos.
+SOBRENOMES_COMUNS = [
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "SOUSA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA",
+    "LIMA", "GOMES", "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES", "SOARES",
+    "FERNANDES", "VIEIRA", "BARBOSA", "ROCHA", "DIAS", "NASCIMENTO", "ANDRADE", "MOREIRA", "NUNES",
+    "MARQUES", "MACHADO", "MENDES", "FREITAS", "CARDOSO", "RAMOS", "GONCALVES", "GONÇALVES",
+    "SANTANA", "TEIXEIRA", "JUNIOR", "JÚNIOR", "FILHO", "NETO", "SOBRINHO",
+]
+
+LINK_RECEITA = "https://solucoes.receita.fazenda.gov.br/Servicos/cnpjreva/Cnpjreva_Solicitacao.asp?cnpj={cnpj}"
+LINK_TRANSPARENCIA = "https://portaldatransparencia.gov.br/pessoa-juridica/{cnpj}"
+LINK_TSE = "https://divulgacandcontas.tse.jus.br/divulga/"
+LINK_PNCP_BUSCA = "https://pncp.gov.br/app/contratos?q={q}"
+
+# Empresas ligadas ao político `p` (precisa de `p` no escopo).
+_EMPRESAS_LIGADAS = """
+    CALL {
+        WITH p
+        MATCH (p)-[r]->(e:Empresa)
+        RETURN e, type(r) AS via, r.valor_total AS valor_via
+        UNION
+        WITH p
+        MATCH (s:Socio)-[:E_SOCIO_DE]->(e:Empresa)
+        WHERE """ + SOCIO_DO_POLITICO + """
+        RETURN e, 'SOCIO' AS via, null AS valor_via
+    }
+"""
+
+Q_BEBE_MILIONARIA = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+""" + _EMPRESAS_LIGADAS + """
+WITH DISTINCT id, e, via
+WHERE e.data_abertura IS NOT NULL
+MATCH (e)-[:GANHOU_LICITACAO]->(c:Contrato)
+WHERE c.data_assinatura IS NOT NULL
+WITH id, e, via, c, date(left(toString(e.data_abertura), 10)) AS abertura
+WHERE date(left(toString(c.data_assinatura), 10)) < abertura + duration({days: $dias})
+WITH id, e, via, abertura, sum(c.valor) AS valor, count(c) AS qtd, collect(c.id)[..5] AS contratos
+WHERE valor >= $valor_min
+RETURN id, e.cnpj AS cnpj, e.nome AS nome, via, toString(abertura) AS abertura, valor, qtd, contratos
+"""
+
+Q_NEPOTISMO = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+WITH id, p, split(trim(p.nome), ' ') AS nomes
+WITH id, p, nomes[size(nomes) - 1] AS sobrenome
+WHERE size(sobrenome) >= 3 AND NOT sobrenome IN $sobrenomes_comuns
+""" + _EMPRESAS_LIGADAS + """
+WITH DISTINCT id, p, sobrenome, e, via, valor_via
+MATCH (s:Socio)-[:E_SOCIO_DE]->(e)
+WHERE s.nome <> p.nome AND s.nome ENDS WITH (' ' + sobrenome)
+RETURN id, sobrenome, s.nome AS socio, e.cnpj AS cnpj, e.nome AS nome, via, valor_via
+"""
+
+# Alertas pré-calculados: de empresas ligadas (PNCP) ou pagos pelo próprio deputado (CEAP).
+Q_FRACIONAMENTO = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+""" + _EMPRESAS_LIGADAS + """
+WITH DISTINCT id, p, e
+OPTIONAL MATCH (a:AlertaFracionamento {fornecedor_cnpj: e.cnpj, fonte: 'PNCP'})
+WITH id, p, collect(a) AS pncp
+OPTIONAL MATCH (c:AlertaFracionamento)-[:PAGADOR]->(p)
+WITH id, pncp + collect(c) AS alertas
+UNWIND alertas AS a
+RETURN DISTINCT id, a.fonte AS fonte, a.fornecedor_cnpj AS cnpj, a.fornecedor AS nome,
+       a.pagador AS pagador, a.pagador_nome AS pagador_nome, toString(a.inicio) AS inicio,
+       toString(a.fim) AS fim, a.qtd AS qtd, a.soma AS soma, a.limite AS limite, a.itens AS itens
+"""
+
+Q_PATRIMONIO = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+OPTIONAL MATCH (p)-[b:DECLARA_BEM]->(:BemDeclarado)
+WITH id, p, sum(coalesce(b.valor_total, 0.0)) AS patrimonio
+MATCH (s:Socio)-[:E_SOCIO_DE]->(e:Empresa)
+WHERE """ + SOCIO_DO_POLITICO + """ AND e.capital_social > 0
+WITH id, patrimonio, sum(e.capital_social) AS capital_total,
+     collect({cnpj: e.cnpj, nome: e.nome, capital: e.capital_social}) AS empresas
+WHERE capital_total >= $capital_min AND capital_total >= $fator * CASE WHEN patrimonio < 1 THEN 1 ELSE patrimonio END
+RETURN id, patrimonio, capital_total, empresas
+"""
+
+Q_MONOPOLIO = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+WHERE p.uf IS NOT NULL AND p.municipio IS NOT NULL AND p.municipio <> ''
+MATCH (c:Contrato {uf: p.uf, municipio: p.municipio})
+WITH id, p, sum(c.valor) AS total_municipio, count(c) AS qtd_municipio
+WHERE qtd_municipio >= $min_contratos AND total_municipio > 0
+""" + _EMPRESAS_LIGADAS + """
+WITH DISTINCT id, p, total_municipio, qtd_municipio, e, via
+MATCH (e)-[:GANHOU_LICITACAO]->(c2:Contrato {uf: p.uf, municipio: p.municipio})
+WITH id, p, total_municipio, qtd_municipio, e, via, sum(c2.valor) AS valor_empresa, count(c2) AS qtd_empresa
+WHERE valor_empresa > $fatia * total_municipio
+RETURN id, p.municipio AS municipio, p.uf AS uf, e.cnpj AS cnpj, e.nome AS nome, via,
+       valor_empresa, qtd_empresa, total_municipio, qtd_municipio
+"""
+
+Q_ENDERECO_FANTASMA = """
+UNWIND $ids AS id
+MATCH (p:Politico {chave: id})
+""" + _EMPRESAS_LIGADAS + """
+WITH DISTINCT id, e, via
+WHERE e.endereco IS NOT NULL AND e.endereco <> ''
+MATCH (outra:Empresa {endereco: e.endereco})-[:GANHOU_LICITACAO]->(:Contrato)
+WHERE left(outra.cnpj, 8) <> left(e.cnpj, 8)
+WITH id, e, via, collect(DISTINCT {cnpj: outra.cnpj, nome: outra.nome}) AS vizinhas
+RETURN id, e.cnpj AS cnpj, e.nome AS nome, e.endereco AS endereco, via, vizinhas
+"""
+
+
+def _brl(valor) -> str:
+    return f"R$ {float(valor or 0):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _so_digitos(cnpj) -> str:
+    return re.sub(r"\D", "", str(cnpj or ""))
+
+
+def _link_contrato(id_pncp: str) -> str:
+    """numeroControlePNCP '{cnpj}-2-{seq}/{ano}' → página do contrato no PNCP."""
+    m = re.match(r"^(\d{14})-\d+-(\d+)/(\d{4})$", str(id_pncp or ""))
+    if m:
+        return f"https://pncp.gov.br/app/contratos/{m.group(1)}/{m.group(3)}/{int(m.group(2))}"
+    return LINK_PNCP_BUSCA.format(q=id_pncp)
+
+
+def _evidencia(heuristica: str, nivel: str, titulo: str, descricao: str, link_rotulo: str,
+               link: str, dados: dict) -> dict:
+    return {
+        "heuristica": heuristica,
+        "nivel": nivel,
+        "pontos": PONTOS[nivel],
+        "motivo": f"### {titulo}\n{descricao}\n\n📎 Evidência: [{link_rotulo}]({link})",
+        "dados": dados,
+    }
+
+
+# ── AVALIAÇÃO DE CADA HEURÍSTICA (uma linha do Cypher → evidências) ──────────
+def _avaliar_bebe(row: dict) -> list:
+    cnpj = _so_digitos(row["cnpj"])
+    nivel = "CRÍTICO"
+    return [_evidencia(
+        "EMPRESA_BEBE_MILIONARIA", nivel, "🍼 Empresa Bebê Milionária",
+        f"{row['nome']} (CNPJ {cnpj}), aberta em {row['abertura']}, somou {_brl(row['valor'])} "
+        f"em {row['qtd']} contrato(s) nos primeiros {BEBE_DIAS} dias. Vínculo com o político: {row['via']}.",
+        "Contratos no PNCP", _link_contrato(row["contratos"][0]) if row["contratos"] else LINK_PNCP_BUSCA.format(q=cnpj),
+        {"cnpj": cnpj, "abertura": row["abertura"], "valor": row["valor"], "contratos": row["contratos"]},
+    )]
+
+
+def _avaliar_nepotismo(row: dict) -> list:
+    cnpj = _so_digitos(row["cnpj"])
+    # Dinheiro do político indo para a empresa do parente é mais grave que só sociedade.
+    nivel = "CRÍTICO" if row["via"] != "SOCIO" else "ALTO"
+    return [_evidencia(
+        "NEPOTISMO_OCULTO", nivel, "👪 Vínculo Suspeito (Sobrenome Compartilhado)",
+        f"{row['socio']} compartilha o sobrenome {row['sobrenome']} com o político e é sócio de "
+        f"{row['nome']} (CNPJ {cnpj}), ligada a ele via {row['via']}"
+        + (f" ({_brl(row['valor_via'])})." if row.get("valor_via") else "."),
+        "Quadro societário — Receita Federal", LINK_RECEITA.format(cnpj=cnpj),
+        {"socio": row["socio"], "cnpj": cnpj, "via": row["via"]},
+    )]
+
+
+def _avaliar_fracionamento(row: dict) -> list:
+    """Um (:AlertaFracionamento) já detectado → evidência."""
+    qtd, cnpj = row["qtd"], _so_digitos(row["cnpj"])
+    nivel = "CRÍTICO" if qtd >= 2 * FRACIONAMENTO_MIN_CONTRATOS else "ALTO"
+    if row["fonte"] == "PNCP":
+        itens, pagador = "contratos", row["pagador_nome"] or row["pagador"]
+        link_rotulo, link = "Contrato no PNCP", _link_contrato((row["itens"] or [""])[0])
+    else:
+        itens, pagador = "despesas da cota parlamentar", row["pagador_nome"] or row["pagador"]
+        link_rotulo, link = "Gastos no Portal da Transparência", LINK_TRANSPARENCIA.format(cnpj=cnpj)
+    return [_evidencia(
+        "FRACIONAMENTO", nivel, "✂️ Padrão de Risco: Fracionamento de Despesa",
+        f"{qtd} {itens} de {row['nome']} (CNPJ {cnpj}) pagos por {pagador} entre {row['inicio']} e "
+        f"{row['fim']}, cada um a até {round((1 - FRACIONAMENTO_FAIXA) * 100)}% abaixo do limite de "
+        f"Dispensa de {_brl(row['limite'])}; soma {_brl(row['soma'])}.",
+        link_rotulo, link,
+        {"cnpj": cnpj, "fonte": row["fonte"], "pagador": row["pagador"], "qtd": qtd, "soma": row["soma"],
+         "itens": (row["itens"] or [])[:10]},
+    )]
+
+
+def _avaliar_patrimonio(row: dict) -> list:
+    patrimonio = float(row["patrimonio"] or 0)
+    razao = row["capital_total"] / max(patrimonio, 1.0)
+    nivel = "CRÍTICO" if razao >= 10 * PATRIMONIO_FATOR else "ALTO"
+    maior = max(row["empresas"], key=lambda e: e["capital"] or 0)
+    cnpj = _so_digitos(maior["cnpj"])
+    return [_evidencia(
+        "INCONSISTENCIA_PATRIMONIAL", nivel, "💰 Anomalia Grave: Inconsistência Patrimonial",
+        f"Patrimônio declarado ao TSE de {_brl(patrimonio)}, mas sócio de {len(row['empresas'])} empresa(s) "
+        f"com capital social somado de {_brl(row['capital_total'])} ({razao:,.0f}x). Maior: "
+        f"{maior['nome']} (CNPJ {cnpj}).",
+        "Capital social — Receita Federal", LINK_RECEITA.format(cnpj=cnpj),
+        {"patrimonio": patrimonio, "capital_total": row["capital_total"], "razao": round(razao, 1),
+         "empresas": [_so_digitos(e["cnpj"]) for e in row["empresas"]][:10]},
+    )]
+
+
+def _avaliar_monopolio(row: dict) -> list:
+    fatia = row["valor_empresa"] / row["total_municipio"]
+    cnpj = _so_digitos(row["cnpj"])
+    nivel = "CRÍTICO" if fatia >= 0.9 else "ALTO"
+    return [_evidencia(
+        "MONOPOLIO_GEOGRAFICO", nivel, "🗺️ Padrão de Risco: Monopólio Geográfico",
+        f"{row['nome']} (CNPJ {cnpj}), ligada ao político via {row['via']}, levou {fatia:.0%} do valor "
+        f"contratado em {row['municipio']}/{row['uf']} ({_brl(row['valor_empresa'])} de "
+        f"{_brl(row['total_municipio'])}; {row['qtd_empresa']} de {row['qtd_municipio']} contratos).",
+        "Recebimentos no Portal da Transparência", LINK_TRANSPARENCIA.format(cnpj=cnpj),
+        {"cnpj": cnpj, "fatia": round(fatia, 3), "municipio": row["municipio"], "uf": row["uf"]},
+    )]
+
+
+def _avaliar_endereco(row: dict) -> list:
+    cnpj = _so_digitos(row["cnpj"])
+    vizinhas = row["vizinhas"]
+    nivel = "CRÍTICO" if len(vizinhas) >= 2 else "ALTO"
+    return [_evidencia(
+        "ENDERECO_FANTASMA", nivel, "👻 Georreferenciação Fantasma",
+        f"{row['nome']} (CNPJ {cnpj}) divide o endereço {row['endereco']} com {len(vizinhas)} outra(s) "
+        f"fornecedora(s) do poder público: " + ", ".join(v["nome"] or v["cnpj"] for v in vizinhas[:5]) + ".",
+        "Endereço — Receita Federal", LINK_RECEITA.format(cnpj=cnpj),
+        {"cnpj": cnpj, "endereco": row["endereco"], "vizinhas": [_so_digitos(v["cnpj"]) for v in vizinhas][:10]},
+    )]
+
+
+class MotorRegras:
+    """Avalia as seis heurísticas em lote. Sem estado além da conexão."""
+
+    def __init__(self, neo4j: Neo4jConnection, limiar: int = LIMIAR_LLM):
+        self.neo4j = neo4j
+        self.limiar = limiar
+        self._regras = [
+            ("EMPRESA_BEBE_MILIONARIA", Q_BEBE_MILIONARIA, {"dias": BEBE_DIAS, "valor_min": BEBE_VALOR_MIN}, _avaliar_bebe),
+            ("NEPOTISMO_OCULTO", Q_NEPOTISMO, {"sobrenomes_comuns": SOBRENOMES_COMUNS}, _avaliar_nepotismo),
+            ("FRACIONAMENTO", Q_FRACIONAMENTO, {}, _avaliar_fracionamento),
+            ("INCONSISTENCIA_PATRIMONIAL", Q_PATRIMONIO, {"capital_min": PATRIMONIO_CAPITAL_MIN,
+                                                          "fator": PATRIMONIO_FATOR}, _avaliar_patrimonio),
+            ("MONOPOLIO_GEOGRAFICO", Q_MONOPOLIO, {"fatia": MONOPOLIO_FATIA,
+                                                   "min_contratos": MONOPOLIO_MIN_CONTRATOS}, _avaliar_monopolio),
+            ("ENDERECO_FANTASMA", Q_ENDERECO_FANTASMA, {}, _avaliar_endereco),
+        ]
+
+    def avaliar_lote(self, ids: list) -> dict:
+        """
+        {chave: {"score", "evidencias", "heuristicas", "enviar_llm", ...}} para cada chave (p.chave).
+        Pontua cada heurística uma vez (pelo achado mais grave); score máximo 100.
+        """
+        ids = [str(i) for i in ids]
+        achados = defaultdict(lambda: defaultdict(list))
+        falhas = []
+        for nome, query, params, avaliar in self._regras:
+            try:
+                linhas = self.neo4j.execute_query(query, {"ids": ids, **params})
+            except Exception as e:
+                logger.error(f"❌ Regra {nome} falhou no lote ({len(ids)} ids): {e}")
+                falhas.append(nome)
+                continue
+            for linha in linhas:
+                achados[linha["id"]][nome].extend(avaliar(linha))
+
+        resultados = {}
+        for chave in ids:
+            evidencias, score = [], 0
+            for nome, lista in achados.get(chave, {}).items():
+                lista.sort(key=lambda ev: ev["pontos"], reverse=True)
+                score += lista[0]["pontos"]
+                evidencias.extend(lista[:MAX_EVIDENCIAS_POR_HEURISTICA])
+            score = min(score, 100)
+            resultados[chave] = {
+                "score": score,
+                "heuristicas": sorted(achados.get(chave, {}).keys()),
+                "evidencias": evidencias,
+                # Triagem incompleta não pode poupar ninguém do LLM.
+                "enviar_llm": score >= self.limiar or bool(falhas),
+                "regras_com_falha": falhas,
+                "avaliado_em": datetime.now().isoformat(timespec="seconds"),
+            }
+        return resultados
+
+    def avaliar(self, chave) -> dict:
+        return self.avaliar_lote([chave])[str(chave)]
+
+    def gravar_scores(self, resultados: dict):
+        """Grava p.score_regras / p.heuristicas no grafo (painéis e filtros sem recalcular)."""
+        self.neo4j.execute_query("""
+            UNWIND $rows AS row
+            MATCH (p:Politico {chave: row.id})
+            SET p.score_regras = row.score, p.heuristicas = row.heuristicas, p.regras_avaliadas_em = date()
+        """, {"rows": [{"id": i, "score": r["score"], "heuristicas": r["heuristicas"]}
+                       for i, r in resultados.items() if not r.get("regras_com_falha")]})
+
+
+def laudo_deterministico(resultado: dict) -> dict:
+    """Laudo no formato do motor de IA para quem não precisou ir ao LLM."""
+    evidencias = resultado["evidencias"]
+    if evidencias:
+        resumo = (f"**[TRIAGEM POR REGRAS]** {len(resultado['heuristicas'])} heurística(s) PF/TCU com achados "
+                  f"({', '.join(resultado['heuristicas'])}), abaixo do limiar para análise narrativa. "
+                  "Cada evidência acima traz o link da fonte oficial.")
+    else:
+        resumo = ("**[TRIAGEM POR REGRAS]** Nenhuma das seis heurísticas PF/TCU encontrou achados nos "
+                  "dados do grafo para este político.")
+    return {
+        "score_risco": resultado["score"],
+        "red_flags": [{"nivel": ev["nivel"], "motivo": ev["motivo"]} for ev in evidencias],
+        "resumo_investigativo": resumo,
+        "proveniencia": {"origem": "regras", "gerado_em": resultado["avaliado_em"]},
+    }
+
+
+def achados_para_ia(resultado: dict) -> list:
+    """Evidências enxutas anexadas à teia enviada ao LLM (ele redige; as regras já provaram)."""
+    return [{"heuristica": ev["heuristica"], "nivel": ev["nivel"], "motivo": ev["motivo"]}
+            for ev in resultado["evidencias"]]
+
+
+if __name__ == "__main__":
+    import json
+    from database.neo4j_conn import get_neo4j_connection
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Motor de regras PF/TCU sobre o grafo")
+    parser.add_argument("--id", help="Avalia um político (p.chave: id_tse ou camara:<id>) e imprime as evidências")
+    parser.add_argument("--todos", action="store_true", help="Avalia todos e grava p.score_regras")
+    parser.add_argument("--lote", type=int, default=500)
+    args = parser.parse_args()
+
+    neo4j = get_neo4j_connection()
+    motor = MotorRegras(neo4j)
+    if args.id:
+        print(json.dumps(motor.avaliar(args.id), indent=2, ensure_ascii=False))
+    elif args.todos:
+        garantir_chave_politico(neo4j)
+        cursor, total, acima = "", 0, 0
+        while True:
+            ids = [r["id"] for r in neo4j.execute_query(
+                "MATCH (p:Politico) WHERE p.chave > $cursor RETURN p.chave AS id ORDER BY id LIMIT $lote",
+                {"cursor": cursor, "lote": args.lote})]
+            if not ids:
+                break
+            resultados = motor.avaliar_lote(ids)
+            motor.gravar_scores(resultados)
+            total += len(ids)
+            acima += sum(r["enviar_llm"] for r in resultados.values())
+            cursor = ids[-1]
+            logger.info(f"⚖️  {total:,} avaliados | {acima:,} acima do limiar ({motor.limiar}) | cursor {cursor!r}")
+    else:
+        parser.print_help()
@@ -1,42 +1,25 @@
 import os
-import json
-import shutil
 import logging
 
+from database.dossie_store import get_dossie_store
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("OrganizadorDossies")
 
 def organizar():
+    """
+    Migra os dossiês em arquivo (layout plano dossie_{id}.json e UF/CIDADE/)
+    para o armazém SQLite. Os arquivos originais não são apagados.
+    """
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    dossies_dir = os.path.join(base_dir, "dossies")
-    
-    if not os.path.exists(dossies_dir):
+    pastas = [p for p in (os.path.join(base_dir, "dossies"), os.path.join(os.path.dirname(base_dir), "dossies"))
+              if os.path.exists(p)]
+
+    if not pastas:
         logger.error("Pasta 'dossies' não encontrada.")
         return
 
-    arquivos = [f for f in os.listdir(dossies_dir) if f.endswith(".json")]
-    
-    for arq in arquivos:
-        caminho_antigo = os.path.join(dossies_dir, arq)
-        try:
-            with open(caminho_antigo, "r", encoding="utf-8") as f:
-                dados = json.load(f)
-            
-            uf = (dados.get("uf") or "BR").upper().strip()
-            cidade = (dados.get("cidade") or "OUTROS").upper().strip()
-            
-            # Sanitizar nomes de pastas
-            cidade = cidade.replace("/", "-").replace("\\", "-")
-            
-            nova_pasta = os.path.join(dossies_dir, uf, cidade)
-            if not os.path.exists(nova_pasta):
-                os.makedirs(nova_pasta)
-            
-            caminho_novo = os.path.join(nova_pasta, arq)
-            shutil.move(caminho_antigo, caminho_novo)
-            logger.info(f"Movido: {arq} -> {uf}/{cidade}/")
-        except Exception as e:
-            logger.error(f"Erro ao organizar {arq}: {e}")
+    get_dossie_store().migrar_arquivos(*pastas)
 
 if __name__ == "__main__":
     organizar()
@@ -0,0 +1,224 @@
+"""
+backend/parser_laudo.py
+
+Leitura e validação do laudo JSON do LLM, incremental
+=====================================================
+O laudo chega em deltas SSE. Em vez de juntar tudo, tirar cercas de código
+com regex, tentar json.loads, cair num regex guloso e ainda re-serializar o
+resultado só para procurar um link, o parser aqui:
+
+  - consome cada delta uma única vez, ignorando texto/cercas antes do "{" e
+    depois do "}" de fechamento do objeto;
+  - acompanha strings, escapes e aninhamento; assim que um item de
+    "red_flags" fecha, só aquele trecho é lido e validado (link Markdown
+    oficial obrigatório). Item inválido levanta LaudoInvalido no meio do
+    stream, e o chamador aborta a requisição sem esperar o resto;
+  - no fim, faz um único json.loads do objeto já delimitado.
+
+SCHEMA_LAUDO é o mesmo contrato em JSON Schema, para provedores que aceitam
+response_format do tipo json_schema. No modo lote ({"laudos": [...]}, um laudo
+por item com o "id" do item), SCHEMA_LOTE e separar_lote fazem o mesmo papel,
+item a item: um laudo inválido não derruba os outros.
+"""
+
+import re
+import json
+
+NIVEIS = ("ALTO", "CRÍTICO")
+_LINK_OFICIAL = re.compile(r"\[[^\]\n]+\]\(https?://[^\s)]+\)")
+
+SCHEMA_LAUDO = {
+    "name": "laudo_auditoria",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "score_risco": {"type": "integer", "minimum": 0, "maximum": 100},
+            "red_flags": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "nivel": {"type": "string", "enum": list(NIVEIS)},
+                        "motivo": {"type": "string"},
+                    },
+                    "required": ["nivel", "motivo"],
+                    "additionalProperties": False,
+                },
+            },
+            "resumo_investigativo": {"type": "string"},
+        },
+        "required": ["score_risco", "red_flags", "resumo_investigativo"],
+        "additionalProperties": False,
+    },
+}
+
+SCHEMA_LOTE = {
+    "name": "laudos_auditoria",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "laudos": {
+                "type": "array",
+                "items": {
+                    **SCHEMA_LAUDO["schema"],
+                    "properties": {"id": {"type": "string"}, **SCHEMA_LAUDO["schema"]["properties"]},
+                    "required": ["id", *SCHEMA_LAUDO["schema"]["required"]],
+                },
+            },
+        },
+        "required": ["laudos"],
+        "additionalProperties": False,
+    },
+}
+
+
+class LaudoInvalido(ValueError):
+    """Resposta do LLM fora do contrato (JSON quebrado ou red_flag sem link oficial)."""
+
+
+def validar_red_flag(flag) -> str | None:
+    """Motivo do erro, ou None se a red_flag está no formato e traz link oficial."""
+    if not isinstance(flag, dict):
+        return "red_flag não é um objeto"
+    motivo = flag.get("motivo")
+    if not isinstance(motivo, str) or not _LINK_OFICIAL.search(motivo):
+        return "red_flag sem link Markdown oficial"
+    return None
+
+
+def separar_lote(resposta, ids) -> tuple[dict, dict]:
+    """
+    Divide a resposta do modo lote em ({id: laudo válido}, {id: motivo da falha}).
+    Item ausente, repetido ou fora do contrato entra nas falhas (o chamador refaz só ele).
+    """
+    laudos = resposta.get("laudos") if isinstance(resposta, dict) else None
+    if not isinstance(laudos, list):
+        raise LaudoInvalido("Resposta do lote sem a lista \"laudos\".")
+    esperados, validos, falhas = set(ids), {}, {}
+    for laudo in laudos:
+        id_item = str(laudo.get("id")) if isinstance(laudo, dict) else None
+        if id_item not in esperados or id_item in validos or id_item in falhas:
+            continue
+        laudo = {k: v for k, v in laudo.items() if k != "id"}
+        try:
+            validos[id_item] = validar_laudo(laudo)
+        except LaudoInvalido as e:
+            falhas[id_item] = str(e)
+    for id_item in ids:
+        if id_item not in validos and id_item not in falhas:
+            falhas[id_item] = "item ausente na resposta"
+    return validos, falhas
+
+
+def validar_laudo(laudo, flags_ja_validadas: int = 0) -> dict:
+    """
+    Confere o laudo completo e normaliza score_risco para inteiro 0-100.
+    As primeiras `flags_ja_validadas` red_flags (checadas durante o stream) são puladas.
+    """
+    if not isinstance(laudo, dict):
+        raise LaudoInvalido("Laudo não é um objeto JSON.")
+    try:
+        laudo["score_risco"] = min(max(int(laudo.get("score_risco", 0)), 0), 100)
+    except (TypeError, ValueError):
+        raise LaudoInvalido(f"score_risco inválido: {laudo.get('score_risco')!r}")
+    flags = laudo.setdefault("red_flags", [])
+    if not isinstance(flags, list):
+        raise LaudoInvalido("red_flags não é uma lista.")
+    for i, flag in enumerate(flags[flags_ja_validadas:], start=flags_ja_validadas):
+        erro = validar_red_flag(flag)
+        if erro:
+            raise LaudoInvalido(f"{erro} (item {i}).")
+    return laudo
+
+
+class ParserLaudoIncremental:
+    """
+    parser.alimentar(delta) a cada pedaço do stream; parser.resultado() no fim.
+    Uma instância por resposta.
+    """
+
+    def __init__(self):
+        self._objeto: list[str] = []     # caracteres do objeto raiz, do "{" ao "}"
+        self._pilha: list[str] = []      # "{", "[" ou "R" (o array red_flags)
+        self._na_string = False
+        self._escape = False
+        self._string: list[str] = []     # string corrente no nível raiz (candidata a chave)
+        self._ultima_string = None
+        self._chave = None               # última chave lida no nível raiz
+        self._flag: list[str] | None = None
+        self.flags_validadas = 0
+        self.concluido = False
+
+    def alimentar(self, delta: str):
+        for c in delta:
+            if self.concluido:
+                return
+            if not self._pilha:
+                if c != "{":
+                    continue  # preâmbulo: texto solto ou ```json
+                self._pilha.append("{")
+                self._objeto.append(c)
+                continue
+
+            self._objeto.append(c)
+            if self._flag is not None:
+                self._flag.append(c)
+
+            if self._na_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._na_string = False
+                    if len(self._pilha) == 1:
+                        self._ultima_string = "".join(self._string)
+                elif len(self._pilha) == 1 and len(self._string) < 64:
+                    self._string.append(c)
+                continue
+
+            if c == '"':
+                self._na_string = True
+                self._string = []
+            elif c == ":" and len(self._pilha) == 1:
+                self._chave = self._ultima_string
+            elif c == "[":
+                raiz_red_flags = len(self._pilha) == 1 and self._chave == "red_flags"
+                self._pilha.append("R" if raiz_red_flags else "[")
+            elif c == "{":
+                if self._pilha[-1] == "R":
+                    self._flag = ["{"]
+                self._pilha.append("{")
+            elif c in "]}":
+                self._pilha.pop()
+                if c == "}" and self._flag is not None and self._pilha and self._pilha[-1] == "R":
+                    self._fechar_flag()
+                if not self._pilha:
+                    self.concluido = True
+
+    def _fechar_flag(self):
+        texto, self._flag = "".join(self._flag), None
+        try:
+            flag = json.loads(texto, strict=False)
+        except json.JSONDecodeError as e:
+            raise LaudoInvalido(f"red_flag {self.flags_validadas} com JSON inválido: {e}")
+        erro = validar_red_flag(flag)
+        if erro:
+            raise LaudoInvalido(f"{erro} (item {self.flags_validadas}).")
+        self.flags_validadas += 1
+
+    def objeto(self):
+        """Objeto JSON completo, sem validar o contrato (o modo lote valida item a item)."""
+        if not self.concluido:
+            raise LaudoInvalido("Resposta terminou antes de fechar o objeto JSON."
+                                if self._objeto else "Resposta não contém objeto JSON.")
+        try:
+            return json.loads("".join(self._objeto), strict=False)
+        except json.JSONDecodeError as e:
+            raise LaudoInvalido(f"JSON do laudo inválido: {e}")
+
+    def resultado(self) -> dict:
+        """Objeto completo, já validado (as red_flags vistas no stream não são relidas)."""
+        return validar_laudo(self.objeto(), self.flags_validadas)
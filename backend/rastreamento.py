@@ -0,0 +1,436 @@
+"""
+backend/rastreamento.py
+
+RASTREAMENTO DISTRIBUÍDO (spans no formato OTLP/JSON do OpenTelemetry)
+=====================================================================
+Uma chamada a /api/politico/detalhes/{id} passa pela API da Câmara, pelo
+DuckDuckGo, pela auditoria em segundo plano, pelo Neo4j, pelo LLM e às vezes
+pelo Drive. Cada etapa vira um span (trace_id/span_id do W3C Trace Context),
+com atributos como tamanho do subgrafo e tokens, e o relatório abaixo mostra
+onde o tempo de cada requisição foi gasto.
+
+Ligado com RASTREAMENTO=1. Exporta em lotes, numa thread:
+  - RASTREAMENTO_ARQUIVO (padrão estado/rastros.jsonl): uma linha por lote,
+    no formato OTLP/JSON (ExportTraceServiceRequest), o mesmo do file
+    exporter do OpenTelemetry Collector;
+  - RASTREAMENTO_OTLP: URL OTLP/HTTP de um coletor (…:4318/v1/traces).
+
+Contexto: contextvars, então segue sozinho para tarefas asyncio, para o
+threadpool do FastAPI e para o BackgroundTask (que ainda herda o contexto da
+requisição). Entre processos, pelo cabeçalho `traceparent` (entrada da API,
+devolvido na resposta) ou pela variável TRACEPARENT dos workers de linha de
+comando. RASTREAMENTO_AMOSTRA decide, na raiz, a fração de traces gravados;
+RASTREAMENTO_MAX_SPANS limita os spans de um trace (cargas em lote).
+
+Relatório:
+    python rastreamento.py                        # traces mais lentos, com a divisão por etapa
+    python rastreamento.py --trace 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import atexit
+import inspect
+import logging
+import argparse
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger("Rastreamento")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RASTREAMENTO = os.getenv("RASTREAMENTO", "0") == "1"
+RASTREAMENTO_ARQUIVO = os.getenv("RASTREAMENTO_ARQUIVO", os.path.join(BASE_DIR, "estado", "rastros.jsonl"))
+RASTREAMENTO_OTLP = os.getenv("RASTREAMENTO_OTLP", "")
+RASTREAMENTO_AMOSTRA = float(os.getenv("RASTREAMENTO_AMOSTRA", "1.0"))
+RASTREAMENTO_MAX_SPANS = int(os.getenv("RASTREAMENTO_MAX_SPANS", "2000"))
+RASTREAMENTO_SERVICO = os.getenv("RASTREAMENTO_SERVICO", "govtech-backend")
+INTERVALO_EXPORTACAO = 2.0
+LOTE_EXPORTACAO = 512
+
+# SpanKind do OTLP
+INTERNO, SERVIDOR, CLIENTE = 1, 2, 3
+STATUS_OK, STATUS_ERRO = 1, 2
+
+
+class _Trace:
+    """Estado compartilhado pelos spans de um trace neste processo."""
+    __slots__ = ("trace_id", "amostrado", "spans", "descartados")
+
+    def __init__(self, trace_id: str, amostrado: bool):
+        self.trace_id = trace_id
+        self.amostrado = amostrado
+        self.spans = 0
+        self.descartados = 0
+
+
+class Span:
+    __slots__ = ("nome", "trace", "span_id", "pai_id", "tipo", "inicio_ns", "fim_ns", "atributos", "status",
+                 "mensagem", "remoto")
+
+    def __init__(self, nome: str, trace: _Trace, pai_id: str = "", tipo: int = INTERNO, atributos: dict = None,
+                 span_id: str = None, remoto: bool = False):
+        self.nome = nome
+        self.trace = trace
+        self.span_id = span_id or f"{random.getrandbits(64):016x}"
+        self.pai_id = pai_id
+        self.tipo = tipo
+        self.inicio_ns = time.time_ns()
+        self.fim_ns = 0
+        self.atributos = dict(atributos or {})
+        self.status = 0
+        self.mensagem = ""
+        self.remoto = remoto
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def gravando(self) -> bool:
+        return True
+
+    def definir(self, **atributos):
+        self.atributos.update(atributos)
+
+    def renomear(self, nome: str):
+        self.nome = nome
+
+    def erro(self, excecao: BaseException):
+        self.status, self.mensagem = STATUS_ERRO, f"{type(excecao).__name__}: {excecao}"[:300]
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.trace.amostrado else '00'}"
+
+
+class _SpanNulo:
+    """Devolvido com o rastreamento desligado, fora da amostra ou acima de RASTREAMENTO_MAX_SPANS."""
+    gravando = False
+    trace_id = span_id = ""
+
+    def definir(self, **atributos):
+        pass
+
+    def renomear(self, nome):
+        pass
+
+    def erro(self, excecao):
+        pass
+
+
+_NULO = _SpanNulo()
+_atual: ContextVar = ContextVar("rastreamento_span_atual", default=None)
+
+
+def _ler_traceparent(valor: str) -> Span | None:
+    """Contexto remoto a partir de um cabeçalho W3C `traceparent`; None se inválido."""
+    partes = (valor or "").strip().split("-")
+    if len(partes) != 4 or len(partes[1]) != 32 or len(partes[2]) != 16 or set(partes[1]) == {"0"}:
+        return None
+    try:
+        int(partes[1], 16), int(partes[2], 16)
+        amostrado = bool(int(partes[3], 16) & 1)
+    except ValueError:
+        return None
+    return Span("remoto", _Trace(partes[1], amostrado), span_id=partes[2], remoto=True)
+
+
+_PAI_AMBIENTE = _ler_traceparent(os.getenv("TRACEPARENT", ""))
+
+
+def _novo_span(nome: str, tipo: int, atributos: dict, pai: Span = None) -> Span | None:
+    pai = pai or _atual.get() or _PAI_AMBIENTE
+    if pai is None:
+        trace = _Trace(f"{random.getrandbits(128):032x}", random.random() < RASTREAMENTO_AMOSTRA)
+        pai_id = ""
+    else:
+        trace, pai_id = pai.trace, pai.span_id
+    if not trace.amostrado:
+        return None
+    if trace.spans >= RASTREAMENTO_MAX_SPANS:
+        trace.descartados += 1
+        return None
+    trace.spans += 1
+    return Span(nome, trace, pai_id, tipo, atributos)
+
+
+@contextmanager
+def span(nome: str, tipo: int = INTERNO, **atributos):
+    """
+    `with span("neo4j.extrair_subgrafo", politico=id) as s: ...; s.definir(nos=n)`.
+    Exceção que atravessa o bloco marca o span com erro e segue adiante.
+    """
+    if not RASTREAMENTO:
+        yield _NULO
+        return
+    novo = _novo_span(nome, tipo, atributos)
+    if novo is None:
+        yield _NULO
+        return
+    token = _atual.set(novo)
+    try:
+        yield novo
+    except BaseException as e:
+        novo.erro(e)
+        raise
+    finally:
+        _atual.reset(token)
+        _finalizar(novo)
+
+
+@contextmanager
+def continuar(traceparent: str = None):
+    """Adota o contexto remoto de um `traceparent` (cabeçalho HTTP, TRACEPARENT) no bloco."""
+    remoto = _ler_traceparent(traceparent) if RASTREAMENTO and traceparent else None
+    if remoto is None:
+        yield
+        return
+    token = _atual.set(remoto)
+    try:
+        yield
+    finally:
+        _atual.reset(token)
+
+
+def rastrear(nome: str = None, tipo: int = INTERNO):
+    """Decorador: a função inteira (síncrona ou corrotina) vira um span."""
+    def decorar(funcao):
+        rotulo = nome or f"{funcao.__module__}.{funcao.__qualname__}"
+        if inspect.iscoroutinefunction(funcao):
+            @functools.wraps(funcao)
+            async def envolver(*args, **kwargs):
+                with span(rotulo, tipo):
+                    return await funcao(*args, **kwargs)
+        else:
+            @functools.wraps(funcao)
+            def envolver(*args, **kwargs):
+                with span(rotulo, tipo):
+                    return funcao(*args, **kwargs)
+        return envolver
+    return decorar
+
+
+def registrar_span(nome: str, duracao: float, tipo: int = CLIENTE, erro: str = None, **atributos):
+    """Span já terminado (agora), com `duracao` segundos: para ganchos que só veem a resposta."""
+    if not RASTREAMENTO:
+        return
+    novo = _novo_span(nome, tipo, atributos)
+    if novo is None:
+        return
+    novo.inicio_ns = time.time_ns() - int(duracao * 1e9)
+    if erro:
+        novo.status, novo.mensagem = STATUS_ERRO, erro
+    _finalizar(novo)
+
+
+def atual():
+    """Span ativo (ou o nulo): para anexar atributos sem abrir outro span."""
+    ativo = _atual.get() if RASTREAMENTO else None
+    return ativo if ativo is not None and not ativo.remoto else _NULO
+
+
+def traceparent() -> str | None:
+    ativo = atual()
+    return ativo.traceparent() if ativo.gravando else None
+
+
+# ─── EXPORTAÇÃO ───────────────────────────────────────────────────────────────
+def _valor_otlp(valor) -> dict:
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    if isinstance(valor, (list, tuple)):
+        return {"arrayValue": {"values": [_valor_otlp(v) for v in valor]}}
+    return {"stringValue": str(valor)}
+
+
+def _span_otlp(s: Span) -> dict:
+    atributos = dict(s.atributos)
+    if not s.pai_id and s.trace.descartados:
+        atributos["rastreamento.spans_descartados"] = s.trace.descartados
+    dado = {
+        "traceId": s.trace_id, "spanId": s.span_id, "name": s.nome, "kind": s.tipo,
+        "startTimeUnixNano": str(s.inicio_ns), "endTimeUnixNano": str(s.fim_ns),
+        "attributes": [{"key": k, "value": _valor_otlp(v)} for k, v in atributos.items() if v is not None],
+        "status": {"code": s.status or STATUS_OK, **({"message": s.mensagem} if s.mensagem else {})},
+    }
+    if s.pai_id:
+        dado["parentSpanId"] = s.pai_id
+    return dado
+
+
+def _requisicao_otlp(spans: list) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": RASTREAMENTO_SERVICO}},
+                                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+        "scopeSpans": [{"scope": {"name": "govtech.rastreamento"}, "spans": [_span_otlp(s) for s in spans]}],
+    }]}
+
+
+class _Exportador:
+    def __init__(self):
+        self.fila: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enviar(self, s: Span):
+        self.fila.put(s)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._laco, name="rastreamento", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.descarregar)
+
+    def _laco(self):
+        while True:
+            time.sleep(INTERVALO_EXPORTACAO)
+            self.descarregar()
+
+    def descarregar(self):
+        with self._lock:
+            spans = []
+            while True:
+                try:
+                    spans.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            for i in range(0, len(spans), LOTE_EXPORTACAO):
+                self._gravar(_requisicao_otlp(spans[i:i + LOTE_EXPORTACAO]))
+
+    @staticmethod
+    def _gravar(requisicao: dict):
+        if RASTREAMENTO_ARQUIVO:
+            try:
+                os.makedirs(os.path.dirname(RASTREAMENTO_ARQUIVO), exist_ok=True)
+                with open(RASTREAMENTO_ARQUIVO, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(requisicao, ensure_ascii=False, separators=(",", ":")) + "\n")
+            except OSError as e:
+                logger.warning(f"⚠️ Falha ao gravar spans em {RASTREAMENTO_ARQUIVO}: {e}")
+        if RASTREAMENTO_OTLP:
+            import httpx
+            try:
+                httpx.post(RASTREAMENTO_OTLP, json=requisicao, timeout=5).raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning(f"⚠️ Coletor OTLP indisponível ({RASTREAMENTO_OTLP}): {e}")
+
+
+_exportador = _Exportador()
+
+
+def _finalizar(s: Span):
+    s.fim_ns = time.time_ns()
+    _exportador.enviar(s)
+
+
+def iniciar_rastreamento(servico: str):
+    """Nome do serviço nos spans deste processo (workers de linha de comando)."""
+    global RASTREAMENTO_SERVICO
+    RASTREAMENTO_SERVICO = servico
+    if RASTREAMENTO:
+        origem = f" (continua o trace {_PAI_AMBIENTE.trace_id})" if _PAI_AMBIENTE else ""
+        logger.info(f"🧵 Rastreamento ativo para {servico}{origem}.")
+
+
+def descarregar():
+    _exportador.descarregar()
+
+
+# ─── RELATÓRIO ────────────────────────────────────────────────────────────────
+def carregar_spans(caminho: str) -> list:
+    """Spans de um arquivo OTLP/JSON por linha, achatados em dicts simples."""
+    spans = []
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            for recurso in json.loads(linha).get("resourceSpans", []):
+                servico = next((a["value"].get("stringValue") for a in recurso.get("resource", {}).get("attributes", [])
+                                if a["key"] == "service.name"), "?")
+                for escopo in recurso.get("scopeSpans", []):
+                    for s in escopo.get("spans", []):
+                        spans.append({
+                            "trace": s["traceId"], "id": s["spanId"], "pai": s.get("parentSpanId", ""),
+                            "nome": s["name"], "servico": servico,
+                            "inicio": int(s["startTimeUnixNano"]), "fim": int(s["endTimeUnixNano"]),
+                            "erro": s.get("status", {}).get("code") == STATUS_ERRO,
+                            "atributos": {a["key"]: next(iter(a["value"].values())) for a in s.get("attributes", [])},
+                        })
+    return spans
+
+
+def arvore(spans: list) -> str:
+    """Um trace como árvore: deslocamento desde o início, duração, tempo próprio e atributos."""
+    por_id = {s["id"]: s for s in spans}
+    filhos = {}
+    for s in spans:
+        filhos.setdefault(s["pai"] if s["pai"] in por_id else None, []).append(s)
+    inicio = min(s["inicio"] for s in spans)
+    linhas = []
+
+    def visitar(s, nivel):
+        duracao = (s["fim"] - s["inicio"]) / 1e6
+        # Tempo próprio: duração menos a união dos intervalos dos filhos (filhos paralelos não somam duas vezes).
+        proprio, cursor = s["fim"] - s["inicio"], s["inicio"]
+        for f in sorted(filhos.get(s["id"], []), key=lambda f: f["inicio"]):
+            a, b = max(f["inicio"], cursor, s["inicio"]), min(f["fim"], s["fim"])
+            if b > a:
+                proprio -= b - a
+                cursor = b
+        atributos = " ".join(f"{k}={v}" for k, v in s["atributos"].items())
+        linhas.append(f"{(s['inicio'] - inicio) / 1e6:>9.1f} ms {duracao:>9.1f} ms {max(proprio, 0) / 1e6:>9.1f} ms  "
+                      f"{'  ' * nivel}{'❌ ' if s['erro'] else ''}{s['nome']} [{s['servico']}] {atributos}")
+        for f in sorted(filhos.get(s["id"], []), key=lambda f: f["inicio"]):
+            visitar(f, nivel + 1)
+
+    linhas.append(f"{'início':>12} {'duração':>12} {'próprio':>12}  span")
+    for raiz in sorted(filhos.get(None, []), key=lambda s: s["inicio"]):
+        visitar(raiz, 0)
+    return "\n".join(linhas)
+
+
+def divisao_por_etapa(spans: list) -> dict:
+    """Soma das durações por nome de span, sem a raiz: onde o tempo do trace foi parar."""
+    ids = {s["id"] for s in spans}
+    etapas = {}
+    for s in spans:
+        if s["pai"] in ids:
+            etapas[s["nome"]] = etapas.get(s["nome"], 0.0) + (s["fim"] - s["inicio"]) / 1e6
+    return dict(sorted(etapas.items(), key=lambda kv: kv[1], reverse=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório dos traces gravados em arquivo")
+    parser.add_argument("--arquivo", default=RASTREAMENTO_ARQUIVO)
+    parser.add_argument("--trace", help="Mostra a árvore de um trace")
+    parser.add_argument("--lentos", type=int, default=10, help="Quantos traces mais lentos listar")
+    parser.add_argument("--nome", help="Só raízes com este nome (ex.: 'GET /api/politico/detalhes/{id}')")
+    args = parser.parse_args()
+
+    todos = carregar_spans(args.arquivo)
+    traces = {}
+    for s in todos:
+        traces.setdefault(s["trace"], []).append(s)
+    if args.trace:
+        print(arvore(traces.get(args.trace, [])) if args.trace in traces else f"Trace {args.trace} não encontrado.")
+    else:
+        resumos = []
+        for trace_id, spans in traces.items():
+            ids = {s["id"] for s in spans}
+            raizes = [s for s in spans if s["pai"] not in ids]
+            raiz = min(raizes, key=lambda s: s["inicio"])
+            if args.nome and raiz["nome"] != args.nome:
+                continue
+            resumos.append((max(s["fim"] for s in spans) - min(s["inicio"] for s in spans), trace_id, raiz, spans))
+        for total, trace_id, raiz, spans in sorted(resumos, key=lambda r: r[0], reverse=True)[:args.lentos]:
+            print(f"{trace_id}  {total / 1e6:,.1f} ms  {raiz['nome']} ({len(spans)} spans)")
+            for nome, ms in list(divisao_por_etapa(spans).items())[:8]:
+                print(f"    {ms:>10,.1f} ms  {nome}")
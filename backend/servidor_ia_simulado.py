@@ -0,0 +1,224 @@
+"""
+backend/servidor_ia_simulado.py
+
+Servidor LLM simulado (OpenAI-compatível) para testes de carga offline
+======================================================================
+Responde POST /v1/chat/completions como o provedor real, em SSE ou JSON
+comum, sem gastar chamadas pagas. Serve para medir a vazão da auditoria em
+massa e da API sob latências realistas:
+
+  - latência até o primeiro token: log-normal com média e desvio configuráveis;
+  - depois, o laudo sai em pedaços a --tokens-por-segundo;
+  - taxas configuráveis de HTTP 500, HTTP 429 (com Retry-After) e laudos
+    fora do contrato (red_flag sem link, para exercitar o aborto no stream);
+  - laudos fixos (--laudos arquivo.json com uma lista) ou gerados por regra a
+    partir da teia recebida: cada achado do motor de regras vira red_flag e o
+    score cresce com os achados e o volume de linhas;
+  - modo lote ({"itens": [...]} na mensagem): um laudo por item, com o id.
+
+Uso:
+    python servidor_ia_simulado.py --porta 8089 --latencia-media 6 --latencia-desvio 3 --taxa-429 0.02
+    IA_BACKENDS='[{"nome": "simulado", "url": "http://127.0.0.1:8089/v1/chat/completions",
+                   "modelo": "simulado", "concorrencia": 64}]' \\
+        python auditor_em_massa.py --limite 5000 --sem-cache
+
+GET /estatisticas devolve os contadores (requisições, erros injetados, em voo).
+"""
+
+import json
+import math
+import random
+import asyncio
+import logging
+import argparse
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from compactador_prompt import estimar_tokens
+
+logger = logging.getLogger("ServidorIASimulado")
+
+CONFIG_PADRAO = {
+    "latencia_media": 4.0,      # segundos até o primeiro token
+    "latencia_desvio": 2.0,
+    "tokens_por_segundo": 60.0,
+    "taxa_erro": 0.0,           # fração de respostas HTTP 500
+    "taxa_429": 0.0,            # fração de respostas HTTP 429
+    "retry_after": 2.0,
+    "taxa_invalido": 0.0,       # fração de laudos com red_flag sem link
+    "laudos": None,             # lista de laudos fixos; None = gerados por regra
+    "semente": None,
+}
+CARACTERES_POR_TOKEN = 3.5      # mesma média do estimador do compactador
+_LINK_PADRAO = "[Portal Nacional de Contratações Públicas](https://pncp.gov.br)"
+
+
+def _sortear_latencia(rng: random.Random, media: float, desvio: float) -> float:
+    """Log-normal com a média e o desvio pedidos (cauda longa, como no provedor real)."""
+    if media <= 0:
+        return 0.0
+    if desvio <= 0:
+        return media
+    sigma2 = math.log(1 + (desvio / media) ** 2)
+    return rng.lognormvariate(math.log(media) - sigma2 / 2, math.sqrt(sigma2))
+
+
+def _teia_da_mensagem(mensagens: list) -> dict:
+    """A teia compacta é o último bloco JSON da mensagem do usuário."""
+    conteudo = next((m.get("content") or "" for m in reversed(mensagens) if m.get("role") == "user"), "")
+    inicio = conteudo.find("\n\n{")
+    try:
+        return json.loads(conteudo[inicio + 2:]) if inicio >= 0 else {}
+    except json.JSONDecodeError:
+        return {}
+
+
+def _linhas(tabela, referencias: dict) -> list:
+    """Linhas de uma tabela compacta como dicts, com as referências "#n" expandidas."""
+    if not isinstance(tabela, dict) or "colunas" not in tabela:
+        return []
+    expandir = lambda v: referencias.get(v, v) if isinstance(v, str) else v
+    return [dict(zip(tabela["colunas"], map(expandir, linha))) for linha in tabela.get("linhas", [])]
+
+
+def gerar_laudo(teia: dict) -> dict:
+    """Laudo determinístico a partir da teia: achados das regras + volume de dados."""
+    referencias = teia.get("referencias") or {}
+    achados = _linhas(teia.get("achados_regras"), referencias)
+    red_flags = [{"nivel": a.get("nivel") if a.get("nivel") in ("ALTO", "CRÍTICO") else "ALTO",
+                  "motivo": a.get("motivo") or ""} for a in achados if "](http" in (a.get("motivo") or "")]
+    volume = sum(len(v.get("linhas", [])) for v in teia.values() if isinstance(v, dict))
+    score = 10 + sum(30 if f["nivel"] == "CRÍTICO" else 15 for f in red_flags) + min(volume // 10, 20)
+    if not red_flags and volume >= 50:
+        red_flags.append({"nivel": "ALTO", "motivo": (
+            "### Padrão de Risco — Volume Atípico de Vínculos\n"
+            f"{volume} registros ligados ao investigado no grafo.\n\n📎 Evidência: {_LINK_PADRAO}")})
+    return {
+        "score_risco": min(score, 100),
+        "red_flags": red_flags,
+        "resumo_investigativo": (
+            f"[SIMULADO] {len(achados)} achado(s) das regras e {volume} registro(s) na teia. "
+            "Laudo gerado pelo servidor de testes de carga, sem valor investigativo."),
+    }
+
+
+def _laudo_invalido() -> dict:
+    return {"score_risco": 70, "red_flags": [{"nivel": "ALTO", "motivo": "Anomalia sem fonte citada."}],
+            "resumo_investigativo": "[SIMULADO] Laudo propositalmente fora do contrato."}
+
+
+def criar_app(**config) -> FastAPI:
+    config = {**CONFIG_PADRAO, **config}
+    rng = random.Random(config["semente"])
+    stats = {"requisicoes": 0, "em_voo": 0, "erros_500": 0, "limites_429": 0, "invalidos": 0, "concluidas": 0}
+    app = FastAPI(title="LLM simulado (OpenAI-compatível)")
+
+    def _escolher_laudo(teia: dict) -> dict:
+        if rng.random() < config["taxa_invalido"]:
+            stats["invalidos"] += 1
+            return _laudo_invalido()
+        if config["laudos"]:
+            return rng.choice(config["laudos"])
+        return gerar_laudo(teia)
+
+    @app.get("/estatisticas")
+    def estatisticas():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def completar(request: Request):
+        stats["requisicoes"] += 1
+        corpo = await request.json()
+        sorteio = rng.random()
+        if sorteio < config["taxa_429"]:
+            stats["limites_429"] += 1
+            return JSONResponse({"error": {"message": "Rate limit (simulado)", "type": "rate_limit"}},
+                                status_code=429, headers={"Retry-After": f"{config['retry_after']:g}"})
+        if sorteio < config["taxa_429"] + config["taxa_erro"]:
+            stats["erros_500"] += 1
+            return JSONResponse({"error": {"message": "Falha interna (simulada)"}}, status_code=500)
+
+        mensagens = corpo.get("messages") or []
+        teia = _teia_da_mensagem(mensagens)
+        if isinstance(teia.get("itens"), list):  # modo lote: um laudo por item, com o id
+            resposta = {"laudos": [{"id": item.get("id"), **_escolher_laudo(item.get("teia") or {})}
+                                   for item in teia["itens"]]}
+        else:
+            resposta = _escolher_laudo(teia)
+        texto = json.dumps(resposta, ensure_ascii=False)
+        tokens_entrada = sum(estimar_tokens(m.get("content") or "") for m in mensagens)
+        tokens_saida = estimar_tokens(texto)
+        uso = {"prompt_tokens": tokens_entrada, "completion_tokens": tokens_saida,
+               "total_tokens": tokens_entrada + tokens_saida}
+        espera = _sortear_latencia(rng, config["latencia_media"], config["latencia_desvio"])
+        modelo = corpo.get("model") or "simulado"
+        id_resposta = f"chatcmpl-sim-{stats['requisicoes']}"
+
+        if not corpo.get("stream"):
+            stats["em_voo"] += 1
+            try:
+                await asyncio.sleep(espera + tokens_saida / config["tokens_por_segundo"])
+            finally:
+                stats["em_voo"] -= 1
+            stats["concluidas"] += 1
+            return {"id": id_resposta, "object": "chat.completion", "model": modelo, "usage": uso,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": texto}}]}
+
+        async def eventos():
+            stats["em_voo"] += 1
+            try:
+                await asyncio.sleep(espera)
+                tamanho = max(1, int(CARACTERES_POR_TOKEN * 4))  # ~4 tokens por evento
+                pausa = 4 / config["tokens_por_segundo"]
+                for i in range(0, len(texto), tamanho):
+                    evento = {"id": id_resposta, "object": "chat.completion.chunk", "model": modelo,
+                              "choices": [{"index": 0, "delta": {"content": texto[i:i + tamanho]}}]}
+                    yield f"data: {json.dumps(evento, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(pausa)
+                final = {"id": id_resposta, "object": "chat.completion.chunk", "model": modelo,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                if (corpo.get("stream_options") or {}).get("include_usage"):
+                    final["usage"] = uso
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+                stats["concluidas"] += 1
+            finally:
+                stats["em_voo"] -= 1
+
+        return StreamingResponse(eventos(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Servidor LLM simulado para testes de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--latencia-media", type=float, default=CONFIG_PADRAO["latencia_media"],
+                        help="Média (s) da latência até o primeiro token")
+    parser.add_argument("--latencia-desvio", type=float, default=CONFIG_PADRAO["latencia_desvio"])
+    parser.add_argument("--tokens-por-segundo", type=float, default=CONFIG_PADRAO["tokens_por_segundo"])
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas HTTP 500")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="Fração de respostas HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=CONFIG_PADRAO["retry_after"])
+    parser.add_argument("--taxa-invalido", type=float, default=0.0,
+                        help="Fração de laudos com red_flag sem link oficial")
+    parser.add_argument("--laudos", help="Arquivo JSON com uma lista de laudos fixos")
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args()
+
+    laudos = None
+    if args.laudos:
+        with open(args.laudos, encoding="utf-8") as f:
+            laudos = json.load(f)
+    app = criar_app(latencia_media=args.latencia_media, latencia_desvio=args.latencia_desvio,
+                    tokens_por_segundo=args.tokens_por_segundo, taxa_erro=args.taxa_erro,
+                    taxa_429=args.taxa_429, retry_after=args.retry_after,
+                    taxa_invalido=args.taxa_invalido, laudos=laudos, semente=args.semente)
+    logger.info(f"🧪 LLM simulado em http://{args.host}:{args.porta}/v1/chat/completions")
+    uvicorn.run(app, host=args.host, port=args.porta, log_level="warning")
@@ -0,0 +1,368 @@
+"""
+backend/snapshot_csr.py
+
+SNAPSHOT DO GRAFO EM CSR (NumPy, memória mapeada)
+=================================================
+Análises ad hoc (hubs, vizinhança em k saltos, somas de valor por nó) não
+precisam de uma ida ao Cypher por pergunta. exportar() lê o grafo do Neo4j
+em streaming, uma vez, e grava numa pasta de arrays .npy:
+
+  - offsets_saida / destinos_saida / valores_saida / tipos_saida:
+    arestas de saída em CSR (compressed sparse row), ordenadas por origem;
+  - offsets_entrada / origens_entrada / valores_entrada / tipos_entrada:
+    o mesmo para as arestas de entrada (vizinhança nos dois sentidos);
+  - rotulos: código do rótulo de cada nó; chaves e nomes como textos
+    concatenados (UTF-8) + offsets, e chaves_ordem para busca binária;
+  - meta.json: rótulos, tipos de relação, contagens, data da exportação.
+
+SnapshotCSR.carregar() abre tudo com np.load(mmap_mode="r"): nada é lido até
+ser usado, e vários processos que abrem o mesmo snapshot dividem as mesmas
+páginas do cache do sistema (zero cópia). A troca de snapshot é atômica
+(pasta nova + rename); quem já tinha o antigo aberto continua lendo o antigo.
+
+A chave de um nó é "Rótulo:identificador natural" (Politico:chave, isto é,
+o id_tse ou "camara:<id>"; Empresa:cnpj, Contrato:id, Socio:nome|doc_fragmento;
+os demais, elementId).
+O valor de uma aresta é coalesce(valor_total, valor, 0).
+
+Uso:
+    python snapshot_csr.py --exportar
+    python snapshot_csr.py --info
+    python snapshot_csr.py --k-saltos Politico:250000612345 --k 2
+    python snapshot_csr.py --k-saltos Politico:camara:204554 --k 1
+"""
+
+import os
+import json
+import time
+import shutil
+import bisect
+import logging
+import argparse
+from array import array
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+from database.neo4j_conn import Neo4jConnection, garantir_chave_politico
+
+logger = logging.getLogger("SnapshotCSR")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PASTA_SNAPSHOT = Path(os.getenv("SNAPSHOT_CSR_DIR", os.path.join(BASE_DIR, "estado", "snapshot_csr")))
+TAMANHO_NOME = 120          # nomes/objetos truncados: o snapshot é para análise, não para exibição
+LOG_A_CADA = 1_000_000
+DIRECOES = ("saida", "entrada", "ambas")
+
+Q_NOS = """
+MATCH (n)
+RETURN elementId(n) AS eid, [l IN labels(n) WHERE l <> 'Hub'][0] AS rotulo,
+       CASE
+           WHEN n:Politico THEN n.chave
+           WHEN n:Empresa THEN n.cnpj
+           WHEN n:Contrato THEN n.id
+           WHEN n:Socio THEN n.nome + '|' + coalesce(n.doc_fragmento, '')
+       END AS chave,
+       coalesce(n.nome, n.descricao, n.objeto, n.razao_social) AS nome
+"""
+
+Q_ARESTAS = """
+MATCH (a)-[r]->(b)
+RETURN elementId(a) AS a, elementId(b) AS b, type(r) AS tipo,
+       toFloat(coalesce(r.valor_total, r.valor, 0)) AS valor
+"""
+
+
+# ─── EXPORTAÇÃO ───────────────────────────────────────────────────────────────
+class _Textos:
+    """Lista de textos como um blob UTF-8 + offsets (grava sem largura fixa)."""
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets = array("q", [0])
+
+    def adicionar(self, texto: str):
+        self.blob += texto.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def salvar(self, pasta: Path, nome: str):
+        np.save(pasta / f"{nome}_blob.npy", np.frombuffer(bytes(self.blob), dtype=np.uint8))
+        np.save(pasta / f"{nome}_offsets.npy", np.frombuffer(self.offsets, dtype=np.int64))
+
+
+def _csr(origem, destino, valor, tipo, n: int, dtype_indice):
+    ordem = np.argsort(origem, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(origem, minlength=n), out=offsets[1:])
+    return offsets, destino[ordem].astype(dtype_indice), valor[ordem], tipo[ordem]
+
+
+def exportar(neo4j: Neo4jConnection, pasta: Path = PASTA_SNAPSHOT) -> dict:
+    """Lê nós e arestas em streaming e grava o snapshot CSR em `pasta` (troca atômica)."""
+    pasta = Path(pasta)
+    t0 = time.time()
+    indice, rotulos, tipos = {}, {}, {}
+    rotulo_no = array("h")
+    chaves, nomes = _Textos(), _Textos()
+    origem, destino, tipo, valor = array("q"), array("q"), array("h"), array("d")
+
+    with neo4j.driver.session() as session:
+        for r in session.run(Q_NOS):
+            rotulo = r["rotulo"] or ""
+            indice[r["eid"]] = len(indice)
+            rotulo_no.append(rotulos.setdefault(rotulo, len(rotulos)))
+            chaves.adicionar(f"{rotulo}:{r['chave'] if r['chave'] is not None else r['eid']}")
+            nomes.adicionar(str(r["nome"] or "")[:TAMANHO_NOME])
+            if len(indice) % LOG_A_CADA == 0:
+                logger.info(f"  📥 {len(indice):,} nós lidos ({time.time() - t0:.0f}s)")
+        for r in session.run(Q_ARESTAS):
+            origem.append(indice[r["a"]])
+            destino.append(indice[r["b"]])
+            tipo.append(tipos.setdefault(r["tipo"], len(tipos)))
+            valor.append(r["valor"] or 0.0)
+            if len(origem) % LOG_A_CADA == 0:
+                logger.info(f"  📥 {len(origem):,} arestas lidas ({time.time() - t0:.0f}s)")
+
+    n = len(indice)
+    dtype_indice = np.int32 if n < 2 ** 31 else np.int64
+    origem = np.frombuffer(origem, dtype=np.int64)
+    destino = np.frombuffer(destino, dtype=np.int64)
+    tipo = np.frombuffer(tipo, dtype=np.int16)
+    valor = np.frombuffer(valor, dtype=np.float64)
+
+    temporaria = pasta.with_name(pasta.name + ".nova")
+    shutil.rmtree(temporaria, ignore_errors=True)
+    temporaria.mkdir(parents=True)
+    for sentido, (de, para) in (("saida", (origem, destino)), ("entrada", (destino, origem))):
+        offsets, alvos, valores, codigos = _csr(de, para, valor, tipo, n, dtype_indice)
+        np.save(temporaria / f"offsets_{sentido}.npy", offsets)
+        np.save(temporaria / f"{'destinos' if sentido == 'saida' else 'origens'}_{sentido}.npy", alvos)
+        np.save(temporaria / f"valores_{sentido}.npy", valores)
+        np.save(temporaria / f"tipos_{sentido}.npy", codigos)
+    np.save(temporaria / "rotulos.npy", np.frombuffer(rotulo_no, dtype=np.int16))
+    chaves.salvar(temporaria, "chaves")
+    nomes.salvar(temporaria, "nomes")
+    tabela = _TabelaTextos(np.frombuffer(bytes(chaves.blob), dtype=np.uint8),
+                           np.frombuffer(chaves.offsets, dtype=np.int64))
+    np.save(temporaria / "chaves_ordem.npy", np.array(sorted(range(n), key=tabela.bytes_de), dtype=dtype_indice))
+
+    meta = {"nos": n, "arestas": int(origem.size), "rotulos": list(rotulos), "tipos": list(tipos),
+            "exportado_em": datetime.now().isoformat(timespec="seconds")}
+    (temporaria / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    antiga = pasta.with_name(pasta.name + ".antiga")
+    shutil.rmtree(antiga, ignore_errors=True)
+    if pasta.exists():
+        os.replace(pasta, antiga)
+    os.replace(temporaria, pasta)
+    shutil.rmtree(antiga, ignore_errors=True)  # mapeamentos já abertos seguem válidos
+    logger.info(f"  ✅ Snapshot CSR: {n:,} nós, {origem.size:,} arestas em {time.time() - t0:.1f}s → {pasta}")
+    return meta
+
+
+# ─── LEITURA E CONSULTAS ──────────────────────────────────────────────────────
+class _TabelaTextos:
+    def __init__(self, blob, offsets):
+        self.blob, self.offsets = blob, offsets
+
+    def bytes_de(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i: int) -> str:
+        return self.bytes_de(i).decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class _ChavesOrdenadas:
+    """Visão ordenada das chaves para bisect (sem montar dict em memória)."""
+
+    def __init__(self, chaves: _TabelaTextos, ordem):
+        self.chaves, self.ordem = chaves, ordem
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.chaves.bytes_de(int(self.ordem[i]))
+
+    def __len__(self):
+        return len(self.ordem)
+
+
+class SnapshotCSR:
+    """Grafo exportado em CSR, mapeado do disco. Nós são inteiros 0..n-1."""
+
+    def __init__(self, pasta: Path, arrays: dict, meta: dict):
+        self.pasta = pasta
+        self.meta = meta
+        self.n = meta["nos"]
+        self.rotulos = meta["rotulos"]
+        self.tipos = meta["tipos"]
+        self.rotulo_no = arrays["rotulos"]
+        self._csr = {
+            "saida": (arrays["offsets_saida"], arrays["destinos_saida"], arrays["valores_saida"], arrays["tipos_saida"]),
+            "entrada": (arrays["offsets_entrada"], arrays["origens_entrada"], arrays["valores_entrada"],
+                        arrays["tipos_entrada"]),
+        }
+        self._chaves = _TabelaTextos(arrays["chaves_blob"], arrays["chaves_offsets"])
+        self._nomes = _TabelaTextos(arrays["nomes_blob"], arrays["nomes_offsets"])
+        self._ordem = _ChavesOrdenadas(self._chaves, arrays["chaves_ordem"])
+
+    @classmethod
+    def carregar(cls, pasta: Path = PASTA_SNAPSHOT, mmap: bool = True) -> "SnapshotCSR":
+        pasta = Path(pasta)
+        meta = json.loads((pasta / "meta.json").read_text(encoding="utf-8"))
+        arrays = {arquivo.stem: np.load(arquivo, mmap_mode="r" if mmap else None)
+                  for arquivo in pasta.glob("*.npy")}
+        return cls(pasta, arrays, meta)
+
+    # ── identidade ────────────────────────────────────────────────────────────
+    def no(self, chave) -> int:
+        """Índice do nó a partir da chave ("Empresa:123...") ou do próprio índice."""
+        if isinstance(chave, (int, np.integer)):
+            return int(chave)
+        alvo = chave.encode("utf-8")
+        i = bisect.bisect_left(self._ordem, alvo)
+        if i == len(self._ordem) or self._ordem[i] != alvo:
+            raise KeyError(chave)
+        return int(self._ordem.ordem[i])
+
+    def descrever(self, i: int) -> dict:
+        return {"no": int(i), "chave": self._chaves[i], "nome": self._nomes[i],
+                "rotulo": self.rotulos[self.rotulo_no[i]]}
+
+    def _codigos(self, tipos) -> np.ndarray | None:
+        if tipos is None:
+            return None
+        return np.array([self.tipos.index(t) for t in tipos if t in self.tipos], dtype=np.int16)
+
+    # ── vizinhança ────────────────────────────────────────────────────────────
+    def _arestas(self, nos: np.ndarray, sentido: str, codigos) -> tuple:
+        """(origem, vizinho, valor, tipo) das arestas de `nos` num sentido, sem laço Python."""
+        offsets, alvos, valores, tipos = self._csr[sentido]
+        inicio, fim = offsets[nos], offsets[nos + 1]
+        tamanhos = fim - inicio
+        total = int(tamanhos.sum())
+        if total == 0:
+            vazio = np.zeros(0, dtype=np.int64)
+            return vazio, vazio, np.zeros(0), np.zeros(0, dtype=np.int16)
+        deslocamento = np.repeat(inicio - np.cumsum(tamanhos) + tamanhos, tamanhos)
+        posicoes = deslocamento + np.arange(total)
+        origem = np.repeat(nos, tamanhos)
+        vizinho, valor, tipo = alvos[posicoes], valores[posicoes], tipos[posicoes]
+        if codigos is not None:
+            filtro = np.isin(tipo, codigos)
+            origem, vizinho, valor, tipo = origem[filtro], vizinho[filtro], valor[filtro], tipo[filtro]
+        return origem, vizinho, valor, tipo
+
+    def _arestas_direcao(self, nos: np.ndarray, direcao: str, codigos) -> tuple:
+        if direcao not in DIRECOES:
+            raise ValueError(f"Direção inválida. Use uma de: {', '.join(DIRECOES)}.")
+        sentidos = ("saida", "entrada") if direcao == "ambas" else (direcao,)
+        partes = [self._arestas(nos, s, codigos) for s in sentidos]
+        return tuple(np.concatenate(coluna) for coluna in zip(*partes))
+
+    def vizinhos(self, no, direcao: str = "ambas", tipos: list = None) -> list:
+        """Vizinhos diretos de um nó: [{no, chave, nome, rotulo, relacao, valor}], maior valor primeiro."""
+        i = self.no(no)
+        _, vizinho, valor, tipo = self._arestas_direcao(np.array([i]), direcao, self._codigos(tipos))
+        ordem = np.argsort(-valor, kind="stable")
+        return [{**self.descrever(int(vizinho[j])), "relacao": self.tipos[tipo[j]], "valor": float(valor[j])}
+                for j in ordem]
+
+    def k_saltos(self, no, k: int = 2, direcao: str = "ambas", tipos: list = None,
+                 max_nos: int = None, grau_hub: int = None) -> dict:
+        """
+        Vizinhança em até `k` saltos (BFS por fronteiras vetorizadas).
+        Hubs (grau > `grau_hub`) entram no resultado mas não são expandidos;
+        `max_nos` corta a busca quando a vizinhança passa desse tamanho.
+        Devolve {no: distância} como arrays (nos, distancias).
+        """
+        origem = self.no(no)
+        codigos = self._codigos(tipos)
+        distancia = np.full(self.n, -1, dtype=np.int16)
+        distancia[origem] = 0
+        fronteira = np.array([origem], dtype=np.int64)
+        graus = self.grau(direcao) if grau_hub is not None else None
+        for salto in range(1, k + 1):
+            if grau_hub is not None and salto > 1:  # a origem sempre é expandida
+                fronteira = fronteira[graus[fronteira] <= grau_hub]
+            _, vizinho, _, _ = self._arestas_direcao(fronteira, direcao, codigos)
+            novos = np.unique(vizinho[distancia[vizinho] < 0])
+            if novos.size == 0:
+                break
+            distancia[novos] = salto
+            fronteira = novos
+            if max_nos is not None and np.count_nonzero(distancia >= 0) >= max_nos:
+                break
+        nos = np.flatnonzero(distancia >= 0)
+        return {"nos": nos, "distancias": distancia[nos]}
+
+    # ── agregados (todos os nós de uma vez) ───────────────────────────────────
+    def grau(self, direcao: str = "ambas", tipos: list = None) -> np.ndarray:
+        """Grau de cada nó (contagem de arestas), opcionalmente só de alguns tipos."""
+        return self._por_no(direcao, tipos, pesos=False)
+
+    def soma_ponderada(self, direcao: str = "saida", tipos: list = None) -> np.ndarray:
+        """Soma dos valores das arestas de cada nó (ex.: total recebido em contratos)."""
+        return self._por_no(direcao, tipos, pesos=True)
+
+    def _por_no(self, direcao: str, tipos, pesos: bool) -> np.ndarray:
+        if direcao not in DIRECOES:
+            raise ValueError(f"Direção inválida. Use uma de: {', '.join(DIRECOES)}.")
+        codigos = self._codigos(tipos)
+        total = np.zeros(self.n)
+        for sentido in (("saida", "entrada") if direcao == "ambas" else (direcao,)):
+            offsets, _, valores, tipos_aresta = self._csr[sentido]
+            if codigos is None and not pesos:
+                total += np.diff(offsets)
+                continue
+            dono = np.repeat(np.arange(self.n), np.diff(offsets))
+            peso = np.asarray(valores) if pesos else np.ones(dono.size)
+            if codigos is not None:
+                peso = peso * np.isin(tipos_aresta, codigos)
+            total += np.bincount(dono, weights=peso, minlength=self.n)
+        return total
+
+    def hubs(self, grau_minimo: int, direcao: str = "ambas", limite: int = 50) -> list:
+        grau = self.grau(direcao)
+        candidatos = np.flatnonzero(grau > grau_minimo)
+        candidatos = candidatos[np.argsort(-grau[candidatos], kind="stable")][:limite]
+        return [{**self.descrever(int(i)), "grau": int(grau[i])} for i in candidatos]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Snapshot do grafo em CSR (NumPy, memória mapeada)")
+    parser.add_argument("--pasta", default=str(PASTA_SNAPSHOT))
+    parser.add_argument("--exportar", action="store_true", help="Lê o Neo4j e grava um snapshot novo")
+    parser.add_argument("--info", action="store_true", help="Mostra o meta.json do snapshot")
+    parser.add_argument("--vizinhos", metavar="CHAVE")
+    parser.add_argument("--k-saltos", metavar="CHAVE")
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--hubs", type=int, metavar="GRAU_MIN")
+    parser.add_argument("--limite", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.exportar:
+        from database.neo4j_conn import get_neo4j_connection
+        neo4j = get_neo4j_connection()
+        try:
+            garantir_chave_politico(neo4j)
+            exportar(neo4j, Path(args.pasta))
+        finally:
+            neo4j.close()
+    snapshot = SnapshotCSR.carregar(Path(args.pasta))
+    if args.info:
+        print(json.dumps(snapshot.meta, indent=2, ensure_ascii=False))
+    if args.vizinhos:
+        print(json.dumps(snapshot.vizinhos(args.vizinhos)[:args.limite], indent=2, ensure_ascii=False))
+    if args.k_saltos:
+        t0 = time.perf_counter()
+        resultado = snapshot.k_saltos(args.k_saltos, args.k)
+        por_salto = np.bincount(resultado["distancias"])
+        print(f"{resultado['nos'].size:,} nós em até {args.k} saltos "
+              f"({', '.join(f'{s}: {n:,}' for s, n in enumerate(por_salto))}) "
+              f"em {(time.perf_counter() - t0) * 1000:.1f} ms")
+    if args.hubs is not None:
+        print(json.dumps(snapshot.hubs(args.hubs, limite=args.limite), indent=2, ensure_ascii=False))
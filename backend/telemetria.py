@@ -0,0 +1,350 @@
+"""
+backend/telemetria.py
+
+MÉTRICAS NO FORMATO DO PROMETHEUS (API, workers e ingestão)
+===========================================================
+Contadores, medidores e histogramas em memória, com rótulos, renderizados no
+formato texto do Prometheus. Sem dependência nova: o mesmo formato que o
+perfil Cypher (database/perfil_cypher.py) já produz.
+
+  - API: GET /metrics (main.py) devolve tudo, inclusive as famílias do perfil
+    Cypher quando NEO4J_PERFIL=1;
+  - processos de linha de comando (injetor, coletor, PNCP, auditoria em massa):
+    iniciar_exportador("job") grava METRICAS_TEXTFILE_DIR/job.prom a cada
+    METRICAS_INTERVALO segundos e na saída (textfile collector do
+    node_exporter) e/ou empurra para METRICAS_PUSHGATEWAY. Sem nenhuma das
+    duas variáveis, não faz nada.
+
+As famílias ficam todas declaradas aqui embaixo, para o catálogo caber numa
+tela; os módulos importam a que usam. Taxas (linhas/s, razão de acerto de
+cache) saem no PromQL: rate(ingestao_linhas_total[5m]),
+sum by (cache) (rate(cache_consultas_total{resultado!="falta"}[5m])) / ...
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from rastreamento import span, registrar_span
+
+logger = logging.getLogger("Telemetria")
+
+METRICAS_TEXTFILE_DIR = os.getenv("METRICAS_TEXTFILE_DIR", "")
+METRICAS_PUSHGATEWAY = os.getenv("METRICAS_PUSHGATEWAY", "")
+METRICAS_INTERVALO = float(os.getenv("METRICAS_INTERVALO", "15"))
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LIMITES_LOTE = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor) -> str:
+    # :g corta em 6 dígitos significativos (contadores de bytes e de linhas passam disso).
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Familia:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._series: dict = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: dict) -> tuple:
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"{self.nome}: rótulos esperados {self.rotulos}, recebidos {tuple(rotulos)}")
+        return tuple(str(rotulos[r]) for r in self.rotulos)
+
+    def texto(self) -> list:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for chave, valor in series:
+            linhas += self._amostras(chave, valor)
+        return linhas
+
+    def _amostras(self, chave: tuple, valor) -> list:
+        return [f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}"]
+
+
+class Contador(_Familia):
+    tipo = "counter"
+
+    def incrementar(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+
+class Medidor(_Familia):
+    tipo = "gauge"
+
+    def definir(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = valor
+
+
+class Histograma(_Familia):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), limites: tuple = LIMITES_SEGUNDOS):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(limites)
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        indice = next((i for i, limite in enumerate(self.limites) if valor <= limite), len(self.limites))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                # baldes (o último é +Inf), soma, contagem
+                serie = self._series[chave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def _amostras(self, chave: tuple, serie) -> list:
+        baldes, soma, contagem = serie
+        linhas, acumulado = [], 0
+        for limite, n in zip((*self.limites, None), baldes):
+            acumulado += n
+            le = 'le="+Inf"' if limite is None else f'le="{limite:g}"'
+            linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, le)} {acumulado}")
+        linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {soma:.6f}")
+        linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {contagem}")
+        return linhas
+
+
+class Registro:
+    """Famílias do processo e coletores extras (funções que devolvem texto pronto)."""
+
+    def __init__(self):
+        self.familias: dict[str, _Familia] = {}
+        self.coletores: list = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, familia: _Familia) -> _Familia:
+        with self._lock:
+            existente = self.familias.get(familia.nome)
+            if existente is not None:
+                if type(existente) is not type(familia) or existente.rotulos != familia.rotulos:
+                    raise ValueError(f"Métrica {familia.nome} já registrada com outro tipo ou rótulos.")
+                return existente
+            self.familias[familia.nome] = familia
+        return familia
+
+    def contador(self, nome: str, ajuda: str, rotulos: tuple = ()) -> Contador:
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def medidor(self, nome: str, ajuda: str, rotulos: tuple = ()) -> Medidor:
+        return self._registrar(Medidor(nome, ajuda, rotulos))
+
+    def histograma(self, nome: str, ajuda: str, rotulos: tuple = (), limites: tuple = LIMITES_SEGUNDOS) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, rotulos, limites))
+
+    def texto_prometheus(self) -> str:
+        linhas = []
+        for familia in list(self.familias.values()):
+            linhas += familia.texto()
+        texto = "\n".join(linhas) + "\n"
+        for coletor in self.coletores:
+            try:
+                texto += coletor()
+            except Exception as e:
+                logger.warning(f"⚠️ Coletor de métricas falhou: {e}")
+        return texto
+
+
+_registro = Registro()
+
+
+def get_registro() -> Registro:
+    return _registro
+
+
+def _coletor_cypher() -> str:
+    from database.perfil_cypher import get_perfil_cypher
+    perfil = get_perfil_cypher()
+    return perfil.texto_prometheus() if perfil.ativo else ""
+
+
+_registro.coletores.append(_coletor_cypher)
+
+# ─── CATÁLOGO ─────────────────────────────────────────────────────────────────
+HTTP_DURACAO = _registro.histograma(
+    "http_requisicao_duracao_segundos", "Latência das rotas da API (do recebimento ao fim da resposta).",
+    ("metodo", "rota"))
+HTTP_REQUISICOES = _registro.contador(
+    "http_requisicoes_total", "Requisições atendidas pela API por classe de status.", ("metodo", "rota", "status"))
+
+UPSTREAM_DURACAO = _registro.histograma(
+    "upstream_duracao_segundos", "Latência das APIs externas até os cabeçalhos da resposta.", ("fonte",))
+UPSTREAM_RESPOSTAS = _registro.contador(
+    "upstream_respostas_total", "Respostas das APIs externas por classe de status (erro = sem resposta).",
+    ("fonte", "status"))
+UPSTREAM_BYTES = _registro.contador(
+    "upstream_bytes_total", "Bytes baixados das fontes externas (dumps do coletor anual).", ("fonte",))
+
+CACHE_CONSULTAS = _registro.contador(
+    "cache_consultas_total", "Consultas aos caches por resultado (acerto, falta ou a camada que respondeu).",
+    ("cache", "resultado"))
+
+LLM_DURACAO = _registro.histograma(
+    "llm_duracao_segundos", "Duração das chamadas ao LLM (stream completo).", ("backend",))
+LLM_PRIMEIRO_TOKEN = _registro.histograma(
+    "llm_primeiro_token_segundos", "Tempo até o primeiro token do LLM.", ("backend",))
+LLM_CHAMADAS = _registro.contador(
+    "llm_chamadas_total", "Chamadas ao LLM por resultado (ok, invalido, limite_taxa, erro).", ("backend", "resultado"))
+LLM_TOKENS = _registro.contador(
+    "llm_tokens_total", "Tokens declarados pelo provedor (prompt, completion).", ("backend", "tipo"))
+
+INGESTAO_LINHAS = _registro.contador(
+    "ingestao_linhas_total", "Linhas gravadas no grafo pelas cargas.", ("fonte",))
+INGESTAO_LOTE_DURACAO = _registro.histograma(
+    "ingestao_lote_duracao_segundos", "Duração de cada lote gravado no grafo.", ("fonte",), LIMITES_LOTE)
+INGESTAO_VAZAO = _registro.medidor(
+    "ingestao_linhas_por_segundo", "Vazão da última etapa de carga concluída.", ("fonte",))
+INGESTAO_DURACAO = _registro.medidor(
+    "ingestao_etapa_duracao_segundos", "Duração da última etapa de carga concluída.", ("fonte",))
+
+
+# ─── ATALHOS ──────────────────────────────────────────────────────────────────
+def _classe_status(status: int) -> str:
+    return f"{status // 100}xx"
+
+
+def _fonte_da_url(url) -> str:
+    return urlsplit(str(url)).hostname or "desconhecida"
+
+
+def registrar_upstream(fonte: str, segundos: float, status: int = None):
+    """Uma resposta (ou falha, status=None) de API externa; vira também um span filho do span ativo."""
+    UPSTREAM_DURACAO.observar(segundos, fonte=fonte)
+    UPSTREAM_RESPOSTAS.incrementar(fonte=fonte, status=_classe_status(status) if status else "erro")
+    registrar_span(f"http {fonte}", segundos, erro=None if status and status < 500 else f"status {status}",
+                   **{"http.status_code": status, "upstream.fonte": fonte})
+
+
+def ganchos_requests(fonte: str = None) -> dict:
+    """hooks= para requests.get: latência até os cabeçalhos (Response.elapsed) por fonte."""
+    def ao_responder(resposta, *args, **kwargs):
+        registrar_upstream(fonte or _fonte_da_url(resposta.url), resposta.elapsed.total_seconds(),
+                           resposta.status_code)
+    return {"response": ao_responder}
+
+
+def ganchos_httpx(fonte: str = None) -> dict:
+    """event_hooks= para httpx.AsyncClient; sem `fonte`, o host da URL vira o rótulo."""
+    async def ao_pedir(pedido):
+        pedido.extensions["telemetria_inicio"] = time.perf_counter()
+
+    async def ao_responder(resposta):
+        inicio = resposta.request.extensions.get("telemetria_inicio")
+        if inicio is not None:
+            registrar_upstream(fonte or _fonte_da_url(resposta.request.url), time.perf_counter() - inicio,
+                               resposta.status_code)
+    return {"request": [ao_pedir], "response": [ao_responder]}
+
+
+def registrar_cache(cache: str, resultado: str):
+    CACHE_CONSULTAS.incrementar(cache=cache, resultado=resultado)
+
+
+def registrar_lote(fonte: str, linhas: int, segundos: float):
+    """Um lote gravado no grafo."""
+    INGESTAO_LINHAS.incrementar(linhas, fonte=fonte)
+    INGESTAO_LOTE_DURACAO.observar(segundos, fonte=fonte)
+
+
+@contextmanager
+def medir_etapa(fonte: str):
+    """
+    Etapa de carga inteira: `with medir_etapa("tse_bens") as etapa: etapa["linhas"] = ...`.
+    Publica duração e linhas/s da etapa; linhas por lote ficam com registrar_lote.
+    """
+    etapa = {"linhas": 0}
+    inicio = time.perf_counter()
+    with span(f"ingestao.{fonte}") as s:
+        try:
+            yield etapa
+        finally:
+            duracao = time.perf_counter() - inicio
+            s.definir(linhas=etapa["linhas"])
+            INGESTAO_DURACAO.definir(duracao, fonte=fonte)
+            if etapa["linhas"]:
+                INGESTAO_VAZAO.definir(etapa["linhas"] / duracao if duracao > 0 else 0.0, fonte=fonte)
+
+
+# ─── EXPORTADOR DOS PROCESSOS DE LINHA DE COMANDO ────────────────────────────
+def exportar(job: str, pasta: str = None, pushgateway: str = None):
+    """Grava <pasta>/<job>.prom (troca atômica) e/ou faz PUT no Pushgateway."""
+    pasta = METRICAS_TEXTFILE_DIR if pasta is None else pasta
+    pushgateway = METRICAS_PUSHGATEWAY if pushgateway is None else pushgateway
+    texto = _registro.texto_prometheus()
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+        destino = os.path.join(pasta, f"{job}.prom")
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporario, destino)
+    if pushgateway:
+        import httpx
+        try:
+            httpx.put(f"{pushgateway.rstrip('/')}/metrics/job/{job}", content=texto.encode("utf-8"),
+                      headers={"Content-Type": "text/plain; version=0.0.4"}, timeout=5)
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ Pushgateway indisponível ({pushgateway}): {e}")
+
+
+_exportadores: dict = {}
+
+
+def iniciar_exportador(job: str, intervalo: float = METRICAS_INTERVALO):
+    """Exporta a cada `intervalo` s numa thread daemon e uma última vez na saída do processo."""
+    if not (METRICAS_TEXTFILE_DIR or METRICAS_PUSHGATEWAY) or job in _exportadores:
+        return
+    parar = threading.Event()
+
+    def laco():
+        while not parar.wait(intervalo):
+            try:
+                exportar(job)
+            except OSError as e:
+                logger.warning(f"⚠️ Falha ao exportar métricas de {job}: {e}")
+
+    def finalizar():
+        parar.set()
+        exportar(job)
+
+    _exportadores[job] = threading.Thread(target=laco, name=f"metricas-{job}", daemon=True)
+    _exportadores[job].start()
+    atexit.register(finalizar)
+    logger.info(f"📈 Métricas de {job} exportadas a cada {intervalo:g}s "
+                f"({METRICAS_TEXTFILE_DIR or METRICAS_PUSHGATEWAY}).")
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+np = pytest.importorskip("numpy")
+sparse = pytest.importorskip("scipy.sparse")
+
+from analise_grafo import louvain, pagerank, componentes
+
+
+# 1. Análise estrutural sem GDS: duas panelinhas ligadas por uma ponte
+def test_louvain_e_pagerank_em_matriz_esparsa():
+    arestas = [(b + i, b + j) for b in (0, 5) for i in range(5) for j in range(i + 1, 5)] + [(4, 5)]
+    a, v = zip(*arestas)
+    adjacencia = sparse.csr_matrix((np.ones(2 * len(a)), (a + v, v + a)), shape=(11, 11))
+    comunidades = louvain(adjacencia)
+    assert len(set(comunidades[:5])) == 1 and len(set(comunidades[5:10])) == 1
+    assert comunidades[0] != comunidades[5] != comunidades[10]
+    assert componentes(adjacencia).tolist() == [0] * 10 + [1]
+    pr = pagerank(adjacencia)
+    assert abs(pr.sum() - 1) < 1e-9 and pr[4] == pr.max() and pr[10] == pr.min()
@@ -0,0 +1,176 @@
+import os
+import sys
+import time
+import asyncio
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import auditor_em_massa
+from auditor_em_massa import (EscalonadorAuditoria, ControladorAIMD, OrcamentoTokens, EstatisticasFila,
+                              diagnosticar_gargalo, _dados_politico)
+from database.dossie_store import DossieStore
+from database.neo4j_conn import chave_politico
+
+
+def escalonador_de_teste(neo4j=None) -> EscalonadorAuditoria:
+    auditor = type("Auditor", (), {"_system_prompt": "sistema"})()
+    return EscalonadorAuditoria(auditor, neo4j, workers_neo4j=1)
+
+
+class Neo4jPaginado:
+    """Responde ao _buscar_pagina como o índice de p.chave: chave > cursor, em ordem, até o lote."""
+
+    def __init__(self, nos: list):
+        self.nos = sorted(nos, key=lambda p: p["chave"])
+        self.driver = self
+        self.cursores = []
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *a):
+        pass
+
+    def run(self, query, cursor, lote, pagerank_min=None):
+        assert "p.chave > $cursor" in query and "ORDER BY p.chave" in query
+        self.cursores.append(cursor)
+        return [{"p": p} for p in self.nos if p["chave"] > cursor][:lote]
+
+
+# 1. Cursor pela chave universal: deputados só da Câmara (sem id_tse) entram na passada
+def test_produtor_pagina_tambem_deputados_sem_id_tse(monkeypatch):
+    nos = [{"id_tse": "250000000002", "nome": "A"}, {"id_camara": 204554, "nome": "B"},
+           {"id_tse": "250000000001", "nome": "C"}, {"id_camara": 73701, "nome": "D"}]
+    for p in nos:
+        p["chave"] = chave_politico(p)
+    neo4j = Neo4jPaginado(nos)
+    escalonador = escalonador_de_teste(neo4j)
+    monkeypatch.setattr("auditor_em_massa.BATCH_SIZE", 2)  # depois de criar a fila (maxsize=BATCH_SIZE)
+    monkeypatch.setattr(escalonador, "_triar", lambda ids: {})
+
+    asyncio.run(escalonador._produtor())
+    lidos = []
+    while (item := escalonador.fila_politicos.get_nowait()) is not None:
+        lidos.append(item[0]["nome"])
+    assert lidos == ["C", "A", "B", "D"]  # ordem de string, como no índice
+    assert neo4j.cursores == ["", "250000000002", "camara:73701"]
+    assert list(escalonador._pendentes) == ["250000000001", "250000000002", "camara:204554", "camara:73701"]
+
+
+def test_chave_politico():
+    assert chave_politico({"id_tse": 250000000001}) == "250000000001"
+    assert chave_politico({"id_camara": 204554, "nome": "X"}) == "camara:204554"
+    assert chave_politico({"chave": "camara:1", "id_camara": 1}) == "camara:1"
+    assert chave_politico({"nome": "sem chave"}) is None
+
+
+def test_dossie_de_deputado_usa_o_id_da_camara():
+    assert _dados_politico({"id_camara": 204554, "chave": "camara:204554", "uf": "sp"})[:3:2] == ("204554", "SP")
+    assert _dados_politico({"id_tse": "250000000001", "id_camara": 73701})[0] == "73701"
+    assert _dados_politico({"id_tse": "250000000001"})[0] == "250000000001"
+
+
+# 2. AIMD: aumento aditivo por rodada, no máximo um corte pela metade por janela
+def test_controlador_aimd_sobe_devagar_e_corta_uma_vez_por_janela():
+    async def cenario():
+        aimd = ControladorAIMD(inicial=2, maximo=4, latencia_alvo=1.0, janela_corte=60)
+        await aimd.registrar_sucesso(0.5)
+        assert aimd.limite == pytest.approx(2.5)
+        for _ in range(20):
+            await aimd.registrar_sucesso(0.5)
+        assert aimd.limite == 4
+        await aimd.registrar_sucesso(1.5)        # lento, mas abaixo de 2x o alvo: mantém
+        assert aimd.limite == 4
+        await aimd.registrar_limite_taxa(retry_after=30)
+        assert aimd.limite == 2
+        assert aimd.pausa_ate - time.monotonic() == pytest.approx(30, abs=1)
+        await aimd.registrar_limite_taxa()
+        await aimd.registrar_sucesso(5.0)        # mesma janela: nenhum corte a mais
+        assert aimd.limite == 2
+
+        aimd = ControladorAIMD(inicial=1)
+        async with aimd.slot():
+            assert aimd.em_voo == 1
+            assert not await _consegue_slot(aimd)
+        assert aimd.em_voo == 0 and await _consegue_slot(aimd)
+
+    asyncio.run(cenario())
+
+
+async def _consegue_slot(aimd) -> bool:
+    async def entrar():
+        async with aimd.slot():
+            pass
+    try:
+        await asyncio.wait_for(entrar(), timeout=0.05)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+# 3. Orçamento de tokens: reserva a estimativa, devolve a sobra no acerto
+def test_orcamento_tokens_reserva_e_acerta():
+    async def cenario():
+        orcamento = OrcamentoTokens(por_minuto=6000)
+        assert await orcamento.reservar(10_000) == 6000     # nunca mais que a capacidade
+        assert orcamento.saldo == pytest.approx(0, abs=5)
+        orcamento.acertar(6000, 1000)                     # gastou só 1000
+        assert orcamento.saldo == pytest.approx(5000, abs=5)
+        assert await orcamento.reservar(5000) == 5000
+        orcamento.acertar(5000, 0)                        # laudo do cache devolve tudo
+        assert orcamento.saldo == pytest.approx(5000, abs=5)
+        orcamento.acertar(0, 0)
+        assert orcamento.saldo <= orcamento.capacidade
+
+    asyncio.run(cenario())
+
+
+# 4. Gravação em lote: o cursor confirmado só avança sobre chaves já persistidas, em ordem
+def test_gravacao_em_lote_confirma_o_cursor_em_ordem(tmp_path, monkeypatch):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    monkeypatch.setattr(auditor_em_massa, "get_dossie_store", lambda: store)
+    escalonador = escalonador_de_teste()
+    escalonador._pendentes.extend(["a", "b", "c", "d"])
+
+    escalonador._concluir("b")
+    assert escalonador.cursor_confirmado == ""          # "a" ainda em voo
+
+    async def gravar():
+        for chave in ("a", "c"):
+            escalonador.fila_dossies.put_nowait((chave, {"id": chave, "uf": "SP", "cidade": "CAMPINAS"}))
+        escalonador.fila_dossies.put_nowait(None)
+        await escalonador._worker_gravacao()
+
+    asyncio.run(gravar())
+    assert escalonador.stats["gravados"] == 2 and store.versao() == 1   # uma transação para o lote
+    assert store.obter("c")["uf"] == "SP"
+    assert escalonador.cursor_confirmado == "c" and list(escalonador._pendentes) == ["d"]
+
+
+# 5. Filas amostradas e o estágio que limita a vazão
+def test_estatisticas_fila_e_gargalo():
+    fila = asyncio.Queue(maxsize=2)
+    estagio = EstatisticasFila(fila, workers=4)
+    estagio.amostrar()
+    fila.put_nowait(1)
+    fila.put_nowait(2)
+    estagio.ocupados = 4
+    estagio.amostrar()
+    assert estagio.resumo() == {"tamanho": 2, "capacidade": 2, "media": 1.0, "cheia": 0.5, "vazia": 0.5,
+                                "workers": 4, "ocupacao": 0.5}
+
+    def filas(politicos=0.0, teias=(0.0, 0.0), dossies=0.0):
+        return {"politicos": {"vazia": politicos, "cheia": 0.0}, "teias": {"cheia": teias[0], "vazia": teias[1]},
+                "dossies": {"cheia": dossies, "vazia": 0.0}}
+
+    assert diagnosticar_gargalo(filas(dossies=0.9, teias=(0.9, 0))) == "gravação dos dossiês"
+    assert diagnosticar_gargalo(filas(teias=(0.9, 0))) == "LLM"
+    assert diagnosticar_gargalo(filas(teias=(0, 0.9))) == "leitura do Neo4j"
+    assert diagnosticar_gargalo(filas(politicos=0.9, teias=(0, 0.9))) == "paginação/triagem por regras"
+    assert diagnosticar_gargalo(filas()) == "nenhum (estágios equilibrados)"
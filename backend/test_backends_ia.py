@@ -0,0 +1,87 @@
+import os
+import sys
+import asyncio
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import motor_ia_qwen
+from backends_ia import BackendIA, RoteadorIA, carregar_backends, QWEN_MODELO
+from database.cache_ia import chave_laudo
+
+TEIA = {"politico": {"nome": "FULANO"}, "empresas": [{"cnpj": "11222333000181"}]}
+
+
+class CacheFalso:
+    def __init__(self):
+        self.laudos = {}
+
+    def obter(self, chave):
+        laudo = self.laudos.get(chave)
+        return laudo and {"laudo": dict(laudo), "criado_em": 0.0, "acertos": 1}
+
+    def gravar(self, chave, modelo, prompt_versao, laudo):
+        self.laudos[chave] = laudo
+
+
+def auditor(monkeypatch, cache, *backends, modelo_que_responde=None):
+    """Auditor cujo LLM responde como o backend `modelo_que_responde` (sem rede)."""
+    monkeypatch.setattr(motor_ia_qwen, "get_cache_ia", lambda: cache)
+    ia = motor_ia_qwen.AuditorGovernamentalIA(usar_cache=True, roteador=RoteadorIA(list(backends)))
+    ia.chamadas_llm = 0
+
+    async def analisar_no_llm(teia):
+        ia.chamadas_llm += 1
+        return {"score_risco": 10, "red_flags": [], "resumo_investigativo": modelo_que_responde,
+                "proveniencia": {"origem": "llm", "modelo": modelo_que_responde}}
+
+    ia._analisar_no_llm = analisar_no_llm
+    return ia
+
+
+QWEN = BackendIA("qwen", "https://qwen/v1/chat/completions", "qwen-max", "k", peso=3)
+SIMULADO = BackendIA("simulado", "http://127.0.0.1:8089/v1/chat/completions", "simulado", peso=1)
+
+
+# 1. Laudo do servidor simulado fica na chave dele: o auditor só com o modelo real não o reaproveita
+def test_cache_pela_chave_do_modelo_que_respondeu(monkeypatch):
+    cache = CacheFalso()
+    misto = auditor(monkeypatch, cache, SIMULADO, QWEN, modelo_que_responde="simulado")
+    assert misto.modelos == ["qwen-max", "simulado"]
+    laudo = asyncio.run(misto.analisar_teia_financeira(TEIA))
+    assert laudo["proveniencia"]["chave_cache"] == chave_laudo("simulado", misto.versao_prompt, TEIA)
+    assert list(cache.laudos) == [laudo["proveniencia"]["chave_cache"]]
+    assert asyncio.run(misto.analisar_teia_financeira(TEIA))["proveniencia"]["origem"] == "cache"
+    assert misto.chamadas_llm == 1
+
+    real = auditor(monkeypatch, cache, QWEN, modelo_que_responde="qwen-max")
+    laudo = asyncio.run(real.analisar_teia_financeira(TEIA))
+    assert real.chamadas_llm == 1 and laudo["resumo_investigativo"] == "qwen-max"
+    assert laudo["proveniencia"]["modelo"] == "qwen-max"
+
+    # Com os dois configurados, o laudo do modelo real (maior peso) é o primeiro consultado.
+    assert asyncio.run(misto.analisar_teia_financeira(TEIA))["resumo_investigativo"] == "qwen-max"
+
+
+# 2. Fallback não entra no cache
+def test_fallback_nao_e_gravado(monkeypatch):
+    cache = CacheFalso()
+    monkeypatch.setattr(motor_ia_qwen, "get_cache_ia", lambda: cache)
+    ia = motor_ia_qwen.AuditorGovernamentalIA(usar_cache=True, roteador=RoteadorIA([]))
+    assert ia.modelos == [QWEN_MODELO]
+    laudo = asyncio.run(ia.analisar_teia_financeira(TEIA))
+    assert laudo["proveniencia"]["origem"] == "fallback" and cache.laudos == {}
+
+
+def test_carregar_backends(monkeypatch):
+    monkeypatch.setenv("CHAVE_TESTE", "segredo")
+    monkeypatch.delenv("CHAVE_AUSENTE", raising=False)
+    backends = carregar_backends(
+        '[{"nome": "a", "url": "u", "modelo": "m", "chave_env": "CHAVE_TESTE", "peso": 2},'
+        ' {"nome": "b", "url": "u", "modelo": "m", "chave_env": "CHAVE_AUSENTE"},'
+        ' {"url": "u", "modelo": "simulado", "concorrencia": 0}]')
+    assert [(b.nome, b.api_key, b.concorrencia) for b in backends] == [("a", "segredo", 8), ("simulado", None, 1)]
+    with pytest.raises(ValueError):
+        carregar_backends('[{"nome": "a", "url": "u", "modelo": "m"}, {"nome": "a", "url": "u", "modelo": "n"}]')
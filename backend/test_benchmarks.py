@@ -0,0 +1,28 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from benchmarks.gerador import GeradorSintetico, cnpj_com_dv
+from benchmarks.resultados import resumo, comparar
+from injetor_neo4j import _ler_ceap
+from database.cnpj_local import construir_base, CnpjLocal
+
+
+# 1. Dumps sintéticos no layout que o injetor e a base CNPJ local leem
+def test_gerador_sintetico_no_layout_dos_leitores(tmp_path):
+    manifesto = GeradorSintetico(2000, semente=1).gerar(str(tmp_path))
+    despesas = list(_ler_ceap(tmp_path / "ceap_camara_2024.csv.zip"))
+    assert 0 < len(despesas) <= manifesto["arquivos"]["ceap"]["linhas"] == 1000
+    assert all(len(d["cnpj"]) == 14 and d["valor"] > 0 for d in despesas)
+    base = CnpjLocal(construir_base(str(tmp_path / "receita"), str(tmp_path / "cnpj.sqlite3")))
+    assert base.buscar(manifesto["amostras"]["cnpjs"][0])["qsa"]
+    assert cnpj_com_dv("11222333") == "11222333000181"
+
+
+# 2. Resultados: percentis em ms e comparação entre execuções
+def test_resumo_e_comparacao_de_resultados():
+    assert resumo([0.001, 0.002, 0.003])["p50_ms"] == 2.0
+    assert comparar({"resultados": {"a": {"p50_ms": 2.0}}}, {"resultados": {"a": {"p50_ms": 3.0}}}) == \
+        [("a.p50_ms", 2.0, 3.0, 0.5)]
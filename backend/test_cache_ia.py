@@ -0,0 +1,52 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from database import cache_ia
+from database.cache_ia import CacheLaudosIA, chave_laudo
+
+LAUDO = {"score_risco": 30, "red_flags": [], "resumo_investigativo": "ok"}
+
+
+# 1. Chave pelo conteúdo: a ordem das linhas do Neo4j não muda a chave; modelo e prompt mudam
+def test_chave_laudo_normaliza_a_teia():
+    teia = {"empresas": [{"cnpj": "1", "valor": 10.0}, {"cnpj": "2", "valor": 5}], "politico": {"nome": "X"}}
+    invertida = {"politico": {"nome": "X"}, "empresas": [{"valor": 5.0, "cnpj": "2"}, {"valor": 10, "cnpj": "1"}]}
+    assert chave_laudo("qwen-max", "2", teia) == chave_laudo("qwen-max", "2", invertida)
+    assert chave_laudo("qwen-max", "2", teia) != chave_laudo("simulado", "2", teia)
+    assert chave_laudo("qwen-max", "2", teia) != chave_laudo("qwen-max", "3", teia)
+
+
+# 2. TTL: a entrada vencida some na leitura e na limpeza
+def test_ttl_expira_entradas(tmp_path, monkeypatch):
+    relogio = [1_000_000.0]
+    monkeypatch.setattr(cache_ia.time, "time", lambda: relogio[0])
+    cache = CacheLaudosIA(str(tmp_path / "cache.sqlite3"), ttl_dias=1, max_entradas=100)
+    cache.gravar("a", "qwen-max", "2", LAUDO)
+    cache.gravar("b", "qwen-max", "2", LAUDO)
+    assert cache.obter("a")["acertos"] == 1
+    assert cache.obter("a") == {"laudo": LAUDO, "modelo": "qwen-max", "prompt_versao": "2",
+                                "criado_em": 1_000_000.0, "acertos": 2}
+    relogio[0] += 86400 + 1
+    assert cache.obter("a") is None
+    assert cache.limpar_expirados() == 1
+    assert cache.estatisticas()["entradas"] == 0
+
+
+# 3. Teto de entradas: sai quem foi usado há mais tempo (com folga de 5%)
+def test_despejo_pelo_ultimo_acesso(tmp_path, monkeypatch):
+    relogio = [1_000_000.0]
+    monkeypatch.setattr(cache_ia.time, "time", lambda: relogio[0])
+    cache = CacheLaudosIA(str(tmp_path / "cache.sqlite3"), ttl_dias=30, max_entradas=20)
+    for i in range(20):
+        relogio[0] += 1
+        cache.gravar(f"k{i}", "qwen-max", "2", LAUDO)
+    relogio[0] += 1
+    assert cache.obter("k0")
+    relogio[0] += 1
+    cache.gravar("k20", "qwen-max", "2", LAUDO)
+    chaves = {c for (c,) in cache._conn().execute("SELECT chave FROM laudos")}
+    assert len(chaves) == 19
+    assert {"k0", "k20"} <= chaves and not {"k1", "k2"} & chaves
@@ -0,0 +1,39 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from database import cnpj_local
+
+
+class RespostaFalsa:
+    def __init__(self, status_code, dados=None):
+        self.status_code = status_code
+        self._dados = dados
+
+    def json(self):
+        return dict(self._dados)
+
+
+# 1. LRU remoto: guarda dados e 404, mas não uma falha transitória (429)
+def test_consultar_cnpj_so_guarda_respostas_definitivas(monkeypatch):
+    respostas = {"11222333000181": [RespostaFalsa(429), RespostaFalsa(200, {"razao_social": "ALFA"})],
+                 "44555666000199": [RespostaFalsa(404)]}
+    chamadas = []
+
+    def get(url, timeout=None, hooks=None):
+        cnpj = url.rsplit("/", 1)[1]
+        chamadas.append(cnpj)
+        return respostas[cnpj].pop(0)
+
+    monkeypatch.setattr(cnpj_local, "get_cnpj_local", lambda: None)
+    monkeypatch.setattr(cnpj_local.requests, "get", get)
+    monkeypatch.setattr(cnpj_local, "_cache_remoto", cnpj_local.OrderedDict())
+
+    assert cnpj_local.consultar_cnpj("11.222.333/0001-81") is None
+    assert cnpj_local.consultar_cnpj("11222333000181")["razao_social"] == "ALFA"
+    assert cnpj_local.consultar_cnpj("11222333000181")["fonte"] == "brasilapi"
+    assert cnpj_local.consultar_cnpj("44555666000199") is None
+    assert cnpj_local.consultar_cnpj("44555666000199") is None
+    assert chamadas == ["11222333000181", "11222333000181", "44555666000199"]
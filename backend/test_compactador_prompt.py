@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from compactador_prompt import compactar_teia, estimar_tokens
+
+EMPRESA = "CONSTRUTORA ALFA E BETA LTDA"
+
+
+def teia_com_contratos(n: int) -> dict:
+    return {
+        "politico": {"nome": "FULANO DE TAL", "id_tse": "250000000001"},
+        "contratos": [{"empresa": EMPRESA, "valor": float(i), "tipo": "OBRA" if i % 2 else "SERVICO",
+                       "observacao": None} for i in range(1, n + 1)],
+        "familiares_mapeados": [],
+    }
+
+
+# 1. Tabela: top-K pelo valor por extenso, cauda resumida, colunas nulas e listas vazias fora
+def test_compactar_teia_top_k_e_cauda():
+    texto, medidas = compactar_teia(teia_com_contratos(10), top_k=3)
+    compacta = json.loads(texto)
+    contratos = compacta["contratos"]
+    assert contratos["colunas"] == ["empresa", "valor", "tipo"]
+    assert [linha[1] for linha in contratos["linhas"]] == [10, 9, 8]
+    assert contratos["cauda"] == {"omitidos": 7, "campo": "valor", "soma": 28.0, "media": 4.0, "max": 7.0,
+                                  "por_tipo": {"OBRA": 4, "SERVICO": 3}}
+    assert "familiares_mapeados" not in compacta
+    assert medidas["linhas_omitidas"] == 7
+    assert medidas["tokens_depois"] < medidas["tokens_antes"]
+
+
+# 2. Nomes longos repetidos viram "#n" com legenda; nomes de coluna e textos curtos ficam
+def test_compactar_teia_referencias():
+    texto, medidas = compactar_teia(teia_com_contratos(3), top_k=10)
+    compacta = json.loads(texto)
+    assert compacta["referencias"] == {"#1": EMPRESA}
+    assert all(linha[0] == "#1" for linha in compacta["contratos"]["linhas"])
+    assert compacta["politico"]["nome"] == "FULANO DE TAL"   # aparece uma vez só
+    assert EMPRESA not in texto.replace('"#1":"' + EMPRESA + '"', "")
+    assert medidas["referencias"] == 1
+
+
+def test_estimar_tokens():
+    assert estimar_tokens("") == 0
+    assert 0 < estimar_tokens("auditoria investigativa") < len("auditoria investigativa")
@@ -0,0 +1,64 @@
+import os
+import sys
+from datetime import date, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from detector_fracionamento import (DetectorFracionamento, agrupar_fracionamento, limite_dispensa,
+                                    Q_GRAVAR_ALERTAS, Q_REMOVER_ANTIGOS)
+
+
+def itens(*dias, valor=16_000.0, inicio=date(2024, 1, 1)):
+    return [{"id": f"c{n}", "valor": valor, "data": (inicio + timedelta(days=d)).isoformat()}
+            for n, d in enumerate(dias)]
+
+
+# 1. Faixa de Dispensa: só valores entre 80% e 100% de um dos limites
+def test_limite_dispensa():
+    assert limite_dispensa(16_000) == 17_600.00
+    assert limite_dispensa(17_600) == 17_600.00
+    assert limite_dispensa(10_000) is None
+    assert limite_dispensa(20_000) is None              # acima de 17,6k, longe de 33k
+    assert limite_dispensa(57_000) == 57_208.33
+    assert limite_dispensa(150_000) is None
+
+
+# 2. Janela deslizante: janelas sobrepostas se fundem; grupo curto ou soma baixa não alerta
+def test_agrupar_fracionamento():
+    assert agrupar_fracionamento(itens(0, 10)) == []
+    assert agrupar_fracionamento(itens(0, 100, 200)) == []
+    sem_data = {"id": "x", "valor": 16_000.0, "data": "sem-data"}
+    [alerta] = agrupar_fracionamento(itens(0, 40, 80, 130) + itens(300) + [sem_data])
+    assert alerta == {"inicio": "2024-01-01", "fim": "2024-05-10", "qtd": 4, "soma": 64_000.0,
+                      "limite": 17_600.00, "itens": ["c0", "c1", "c2", "c3"]}
+    # Três itens colados em 50k: 3 × 41k passa do limite de 50k
+    assert agrupar_fracionamento(itens(0, 1, 2, valor=41_000.0))[0]["limite"] == 50_000.00
+    assert agrupar_fracionamento(itens(0, 1, 2, valor=5_000.0)) == []
+
+
+class Neo4jFalso:
+    def __init__(self, removidos=(3, 0)):
+        self.gravados = []
+        self.removidos = list(removidos)
+
+    def execute_query(self, query, parametros=None, nome=None):
+        if query is Q_GRAVAR_ALERTAS:
+            self.gravados += parametros["rows"]
+        elif query is Q_REMOVER_ANTIGOS:
+            return [{"removidos": self.removidos.pop(0)}]
+        return []
+
+
+# 3. CEAP: despesas do arquivo agrupadas por (deputado, fornecedor); alertas antigos removidos em lotes
+def test_detectar_ceap_grava_alertas_do_deputado():
+    despesa = {"id_camara": 204554, "nome": "FULANO", "cnpj": "11222333000181", "fornecedor": "GRAFICA X"}
+    despesas = [{**despesa, "valor": 16_500.0, "data": d} for d in ("2024-01-02", "2024-01-20", "2024-02-10")]
+    despesas += [{**despesa, "cnpj": "44555666000199", "valor": 16_500.0, "data": "2024-01-02"},
+                 {**despesa, "valor": 900.0, "data": "2024-01-03"}]
+    neo4j = Neo4jFalso()
+    assert DetectorFracionamento(neo4j).detectar_ceap(despesas, 2024) == 1
+    [alerta] = neo4j.gravados
+    assert alerta["id"] == "CEAP:204554:11222333000181:2024-01-02"
+    assert (alerta["id_camara"], alerta["pagador"], alerta["ano"], alerta["qtd"]) == (204554, "204554", 2024, 3)
+    assert neo4j.removidos == []
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from database.dossie_store import DossieStore
+
+
+def dossie(id_politico, score=None, uf="SP", cidade="CAMPINAS", nome=None, **extra):
+    return {"id_politico": id_politico, "nome_politico": nome or f"POLITICO {id_politico}",
+            "uf": uf, "cidade": cidade, "ia_analise": {"score_risco": score}, **extra}
+
+
+# 1. Gravação atômica por id; dossiê do agente (sem UF/cidade) herda a localização gravada
+def test_salvar_substitui_e_herda_localizacao(tmp_path):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    store.salvar(dossie("1", 40))
+    assert store.obter(1)["ia_analise"]["score_risco"] == 40
+    store.salvar({"id": "1", "score_risco_calculado": 90})
+    conn = store._conn()
+    assert conn.execute("SELECT uf, cidade, score, nome FROM dossies").fetchall() == \
+        [("SP", "CAMPINAS", 90, "POLITICO 1")]
+    store.salvar({"id": "2", "pontos_perdidos": 350})
+    assert conn.execute("SELECT uf, cidade, score FROM dossies WHERE id = '2'").fetchone() == ("BR", "OUTROS", 35)
+    assert store.obter("3") is None
+
+
+# 2. Migração: layout plano e UF/CIDADE, o arquivo mais novo de um mesmo id prevalece
+def test_migrar_arquivos(tmp_path):
+    antigos = tmp_path / "dossies"
+    (antigos / "RJ" / "NITEROI").mkdir(parents=True)
+    (antigos / "dossie_7.json").write_text(json.dumps({"nome": "ANTIGO"}), encoding="utf-8")
+    (antigos / "RJ" / "NITEROI" / "dossie_7.json").write_text(
+        json.dumps({"id_politico": "7", "nome_politico": "NOVO"}), encoding="utf-8")
+    os.utime(antigos / "dossie_7.json", (1_000_000, 1_000_000))
+    (antigos / "dossie_quebrado.json").write_text("{", encoding="utf-8")
+
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    assert store.migrar_arquivos(str(antigos)) == 2
+    assert store.obter("7")["nome_politico"] == "NOVO"
+    assert store._conn().execute("SELECT uf, cidade FROM dossies WHERE id = '7'").fetchone() == ("RJ", "NITEROI")
+
+
+def agregados(store):
+    conn = store._conn()
+    return (conn.execute("SELECT * FROM agregados_cidade ORDER BY uf, cidade").fetchall(),
+            conn.execute("SELECT * FROM histograma_cidade ORDER BY uf, cidade, faixa").fetchall())
+
+
+# 3. Agregados mantidos na gravação: nova versão e mudança de cidade ajustam as duas pontas
+def test_agregados_acompanham_regravacao_e_mudanca_de_cidade(tmp_path):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    store.salvar_lote([dossie("1", 80), dossie("2", 20), dossie("3"), dossie("4", 75, uf="RJ", cidade="NITEROI")])
+    store.salvar(dossie("2", 95))
+    store.salvar(dossie("1", 80, uf="RJ", cidade="NITEROI"))
+
+    pastas, proximo = store.listar_pastas()
+    assert proximo is None
+    assert [(p["nome"], p["total"], p["risco_alto"], p["score_medio"]) for p in pastas] == \
+        [("RJ", 2, 2, 77.5), ("SP", 2, 1, 95.0)]
+    assert pastas[1]["histograma"] == {"sem_score": 1, "90-100": 1}
+    cidades, _ = store.listar_pastas("sp")
+    assert [(c["nome"], c["total"]) for c in cidades] == [("CAMPINAS", 2)]
+
+    mantidos = agregados(store)
+    store.reconstruir_agregados()
+    assert agregados(store) == mantidos
+
+
+# 4. Cursor keyset: páginas sem repetição nem buraco, por nome e por score (empates pelo id)
+def test_listar_pagina_por_cursor(tmp_path):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    scores = [50, None, 50, 90, 10, 50, 70]
+    store.salvar_lote([dossie(str(i), s, nome=f"NOME {i}") for i, s in enumerate(scores)])
+
+    def todas(ordenar):
+        ids, cursor = [], None
+        while True:
+            pagina, cursor = store.listar("sp", "campinas", ordenar, limite=2, cursor=cursor)
+            assert len(pagina) <= 2
+            ids += [d["id"] for d in pagina]
+            if not cursor:
+                return ids
+
+    assert todas("nome") == [str(i) for i in range(7)]
+    assert todas("score") == ["3", "6", "5", "2", "0", "4", "1"]
+    pagina, cursor = store.listar("SP", "CAMPINAS", "score", limite=3)
+    assert [d["score"] for d in pagina] == [90, 70, 50] and cursor
+    for invalido in ("xyz", cursor[:-2] + "!!"):
+        with pytest.raises(ValueError):
+            store.listar("SP", "CAMPINAS", "score", cursor=invalido)
+
+
+# 5. Painel: alertas graves do laudo, versão por gravação e resposta memorizada entre gravações
+def test_painel_alertas_e_versao(tmp_path):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    flags = [{"nivel": "CRÍTICO", "motivo": "### 🔴 Empresa Bebê\nDetalhe\n📎 [Ver](https://pncp.gov.br/1)"},
+             {"nivel": "MÉDIO", "motivo": "### Ignorado"}]
+    store.salvar(dossie("1", 90, ia_analise={"score_risco": 90, "red_flags": flags}))
+    store.salvar(dossie("2", 30, uf="RJ", cidade="NITEROI"))
+    versao = store.versao()
+
+    painel = store.painel(limite_top=1)
+    assert painel["versao"] == versao
+    assert [p["id"] for p in painel["top_risco"]] == ["1"]
+    assert [(a["id"], a["nivel"], a["mensagem"]) for a in painel["alertas_recentes"]] == \
+        [("1", "CRÍTICO", "🔴 Empresa Bebê")]
+    assert [u["nome"] for u in painel["distribuicao_uf"]] == ["RJ", "SP"]
+    assert store.painel(limite_top=1) is painel
+
+    store.salvar(dossie("1", 20))                    # laudo novo sem red flags apaga os alertas
+    assert store.versao() == versao + 1
+    novo = store.painel(limite_top=1)
+    assert novo is not painel and novo["alertas_recentes"] == []
+    assert [p["id"] for p in novo["top_risco"]] == ["2"]
@@ -0,0 +1,110 @@
+import os
+import sys
+import asyncio
+from datetime import date
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from workers import extrator_licitacoes_pncp as pncp
+
+
+class Neo4jFalso:
+    def __init__(self):
+        self.lotes = []
+
+    def execute_query(self, query, parametros=None, nome=None):
+        self.lotes.append(parametros["rows"])
+        return []
+
+
+def coletor_com_paginas(monkeypatch, tmp_path, paginas: dict):
+    """ColetorPNCP cujo _buscar_pagina responde do dicionário (None = página que falhou)."""
+    monkeypatch.setattr(pncp, "ARQUIVO_WATERMARK", tmp_path / "watermark.json")
+    monkeypatch.setattr(pncp, "TENTATIVAS_JANELA", 2)
+    dormir = asyncio.sleep
+    monkeypatch.setattr(pncp.asyncio, "sleep", lambda *_: dormir(0))
+    coletor = pncp.ColetorPNCP(Neo4jFalso(), workers_qsa=0)
+    coletor.base_cnpj = None
+    chamadas = []
+
+    async def buscar(dia_ini, dia_fim, pagina):
+        chamadas.append((dia_ini, pagina))
+        return paginas[dia_ini].get(pagina)
+
+    coletor._buscar_pagina = buscar
+    return coletor, chamadas
+
+
+def contrato(i):
+    return {"niFornecedor": "11222333000181", "valorGlobal": 10.0, "numeroControlePNCP": f"c{i}"}
+
+
+# 1. Primeira página perdida: o dia não é dado como coletado (com 0 contratos)
+def test_primeira_pagina_perdida_nao_avanca_marca_dagua(monkeypatch, tmp_path):
+    d1, d2 = date(2024, 5, 1), date(2024, 5, 2)
+    coletor, chamadas = coletor_com_paginas(monkeypatch, tmp_path, {
+        d1: {1: {"totalPaginas": 1, "data": [contrato(1)]}},
+        d2: {1: None},
+    })
+    assert asyncio.run(coletor.executar(d1, date(2024, 5, 3))) is False
+    assert pncp.ler_watermark() == d1
+    assert chamadas.count((d2, 1)) == 2 and (date(2024, 5, 3), 1) not in chamadas
+
+
+# 2. Página do meio perdida: a janela é refeita e só avança quando sai completa
+def test_pagina_do_meio_perdida_refaz_a_janela(monkeypatch, tmp_path):
+    d1 = date(2024, 5, 1)
+    respostas = {1: {"totalPaginas": 2, "data": [contrato(1)]}, 2: None}
+    coletor, _ = coletor_com_paginas(monkeypatch, tmp_path, {d1: respostas})
+    n, falhas = asyncio.run(coletor.coletar_janela(d1, d1))
+    assert (n, falhas) == (1, [2])
+    assert pncp.ler_watermark() is None
+
+    respostas[2] = {"totalPaginas": 2, "data": [contrato(2)]}
+    assert asyncio.run(coletor.executar(d1, d1)) is True
+    assert pncp.ler_watermark() == d1
+
+
+# 3. Detalhe que falhou derruba a página; só o 404 ({}) descarta o contrato
+def test_detalhe_perdido_refaz_a_janela(monkeypatch, tmp_path):
+    d1 = date(2024, 5, 1)
+    incompleto = {"orgaoEntidade": {"cnpj": "00394460000141"}, "anoContrato": 2024, "sequencialContrato": 7}
+    coletor, _ = coletor_com_paginas(monkeypatch, tmp_path, {
+        d1: {1: {"totalPaginas": 1, "data": [contrato(1), incompleto]}}})
+    detalhes = [None]
+
+    async def detalhar(item):
+        return detalhes.pop(0)
+
+    coletor._detalhar = detalhar
+    assert asyncio.run(coletor.coletar_janela(d1, d1)) == (0, [1])
+
+    detalhes[:] = [{}]
+    assert asyncio.run(coletor.executar(d1, d1)) is True
+    assert pncp.ler_watermark() == d1
+
+
+# 4. QSA indisponível na BrasilAPI: a empresa não é marcada como resolvida sem sócios;
+#    CNPJ desconhecido (404) é marcado como consultado, sem sócios
+def test_qsa_indisponivel_nao_e_gravado(monkeypatch, tmp_path):
+    coletor, _ = coletor_com_paginas(monkeypatch, tmp_path, {})
+    respostas = {"11222333000181": None, "44555666000199": {"qsa": [{"nome_socio": "Fulano"}]},
+                 "77888999000100": {}}
+
+    async def get_json(url, limitador, params=None, tentativas=4):
+        return respostas[url.rsplit("/", 1)[1]]
+
+    async def rodar():
+        coletor._get_json = get_json
+        worker = asyncio.create_task(coletor._worker_qsa())
+        for cnpj in respostas:
+            coletor.fila_qsa.put_nowait(cnpj)
+        await coletor.fila_qsa.join()
+        worker.cancel()
+        await coletor.cliente.aclose()
+
+    asyncio.run(rodar())
+    assert [linha["cnpj"] for linha in coletor.buffer_socios] == ["44555666000199", "77888999000100"]
+    assert coletor.buffer_socios[0]["socios"][0]["nome"] == "FULANO"
+    assert coletor.buffer_socios[1] == {"cnpj": "77888999000100", "props": {}, "socios": []}
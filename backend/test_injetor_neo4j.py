@@ -0,0 +1,53 @@
+import os
+import sys
+import zipfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from injetor_neo4j import injetar_ceap_camara, _parse_valor_ceap
+
+CABECALHO = "txNomeParlamentar;ideCadastro;sgUF;sgPartido;txtFornecedor;txtCNPJCPF;datEmissao;vlrDocumento;vlrLiquido;numMes;numAno"
+LINHAS = [
+    "Fulano;204554;sp;PT;Grafica X;11.222.333/0001-81;2024-01-02T00:00:00;100.00;100.00;1;2024",
+    "Fulano;204554;sp;PT;Grafica X;11222333000181;2024-01-20;1.000,50;;1;2024",
+    "Fulano;204554;sp;PT;Posto Y;44.555.666/0001-99;2024-02-03;;50.25;2;2024",
+    "Fulano;204554;sp;PT;Taxi Z;123.456.789-00;2024-02-04;30.00;30.00;2;2024",   # CPF: fica de fora
+    "LIDERANÇA DO PT;;DF;PT;Grafica X;11222333000181;2024-01-05;900.00;900.00;1;2024",  # sem ideCadastro
+    "Beltrana;73701;rj;PL;Grafica X;11222333000181;2024-03-01;10.00;10.00;;2024",       # sem mês
+]
+
+
+class Neo4jFalso:
+    def __init__(self):
+        self.lotes = {}
+
+    def execute_query(self, query, parametros=None, nome=None):
+        self.lotes.setdefault(nome, []).extend(parametros["rows"])
+        return []
+
+
+# 1. CEAP: uma leitura do ZIP agrega PAGOU_A por deputado×CNPJ e GastoMensal por mês
+def test_injetar_ceap_agrega_por_fornecedor_e_mes(tmp_path):
+    with zipfile.ZipFile(tmp_path / "ceap_camara_2024.csv.zip", "w") as z:
+        z.writestr("Ano-2024.csv", "﻿" + "\n".join([CABECALHO] + LINHAS))
+    neo4j = Neo4jFalso()
+    assert injetar_ceap_camara(neo4j, 2024, tmp_path) == 3
+
+    deputados = {d["id_camara"]: d for d in neo4j.lotes["injetor.ceap_deputados"]}
+    assert set(deputados) == {204554, 73701}
+    assert (deputados[204554]["nome"], deputados[204554]["uf"]) == ("FULANO", "SP")
+
+    pagou = {(r["id_camara"], r["cnpj"]): (round(r["valor"], 2), r["qtd"]) for r in neo4j.lotes["injetor.ceap_pagou_a"]}
+    assert pagou == {(204554, "11222333000181"): (1100.5, 2), (204554, "44555666000199"): (50.25, 1),
+                     (73701, "11222333000181"): (10.0, 1)}
+    assert {r["ano"] for r in neo4j.lotes["injetor.ceap_pagou_a"]} == {2024}   # ano da substituição em PAGOU_A
+
+    meses = {(r["id_camara"], r["mes"]): (round(r["valor"], 2), r["qtd"]) for r in neo4j.lotes["injetor.ceap_gasto_mensal"]}
+    assert meses == {(204554, 1): (1100.5, 2), (204554, 2): (50.25, 1)}
+
+
+def test_parse_valor_ceap():
+    assert _parse_valor_ceap("1234.56") == 1234.56
+    assert _parse_valor_ceap("1.234,56") == 1234.56
+    assert _parse_valor_ceap("") == 0.0 and _parse_valor_ceap("abc") == 0.0
@@ -0,0 +1,66 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from fastapi.testclient import TestClient
+
+import main
+from database.dossie_store import DossieStore
+
+
+# 1. Painel: 304 sem corpo enquanto a versão do armazém não muda; nova auditoria troca o ETag
+def test_dashboard_guerra_responde_304_pelo_etag(tmp_path, monkeypatch):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    monkeypatch.setattr(main, "dossies", store)
+    store.salvar({"id_politico": "1", "nome_politico": "FULANO", "uf": "SP", "cidade": "CAMPINAS",
+                  "ia_analise": {"score_risco": 85, "red_flags": [
+                      {"nivel": "ALTO", "motivo": "### Fracionamento\n📎 [Ver](https://pncp.gov.br/1)"}]}})
+    cliente = TestClient(main.app)
+
+    resposta = cliente.get("/api/dashboard/guerra")
+    assert resposta.status_code == 200
+    etag = resposta.headers["etag"]
+    corpo = resposta.json()
+    assert corpo["top_risco"][0]["estado"] == "SP"
+    assert corpo["alertas_recentes"][0]["urgencia"] == "ALTA"
+    assert corpo["alertas_recentes"][0]["fonte"] == "CAMPINAS/SP"
+
+    resposta = cliente.get("/api/dashboard/guerra", headers={"If-None-Match": etag})
+    assert resposta.status_code == 304 and resposta.content == b""
+    assert cliente.get("/api/dashboard/guerra?limite=5", headers={"If-None-Match": etag}).status_code == 200
+
+    store.salvar({"id_politico": "2", "uf": "RJ", "cidade": "NITEROI", "ia_analise": {"score_risco": 10}})
+    resposta = cliente.get("/api/dashboard/guerra", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200 and resposta.headers["etag"] != etag
+
+
+# 2. Detalhes de político ainda não auditado: score provisório só na resposta, nada gravado no armazém
+def test_detalhes_sem_dossie_nao_grava_provisorio(tmp_path, monkeypatch):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    monkeypatch.setattr(main, "dossies", store)
+    monkeypatch.setattr(main, "CACHE_DOSSIES", {})
+    monkeypatch.setattr(main.requests, "get", lambda *a, **k: main.requests.Response())
+    monkeypatch.setattr(main, "DDGS", None)
+    disparados = []
+    monkeypatch.setattr(main, "disparar_worker_assincrono", lambda *args: disparados.append(args))
+
+    resposta = TestClient(main.app).get("/api/politico/detalhes/204554")
+    assert resposta.status_code == 200
+    assert resposta.json()["dados"]["score_auditoria"] == 800
+    assert disparados == [(204554, "ID 204554", "00000000000")]
+    assert store.obter(204554) is None and store.versao() == 0
+
+
+# 3. Score dos cards pelo score de risco do armazém, nos dois formatos de dossiê
+def test_score_dossie_nos_dois_formatos(tmp_path, monkeypatch):
+    store = DossieStore(str(tmp_path / "dossies.sqlite3"))
+    monkeypatch.setattr(main, "dossies", store)
+    store.salvar_lote([{"id": "204554", "ia_analise": {"score_risco": 85}},
+                       {"id_politico": "900001", "pontos_perdidos": 350},
+                       {"id": "900002", "ia_analise": {}}])
+    assert [main.obter_score_dossie(i) for i in (204554, "900001", "900002", "900003")] == \
+        [150, 650, "Pendente", "Pendente"]
+    cards = TestClient(main.app).get("/api/politicos/presidenciais").json()["dados"]
+    assert {c["id"]: c["score"] for c in cards}["900001"] == 650
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from metricas_patrimoniais import calcular_metricas, ranking, Q_CALCULAR
+
+
+class Neo4jMetricas:
+    """Pagina as chaves como o índice de p.chave e conta os lotes enviados ao Q_CALCULAR."""
+
+    def __init__(self, chaves: list):
+        self.chaves = sorted(chaves)
+        self.lotes = []
+        self.consultas = []
+
+    def execute_query(self, query, parametros=None, nome=None):
+        self.consultas.append((query, parametros))
+        if query is Q_CALCULAR:
+            self.lotes.append(parametros["ids"])
+            return [{"n": len(parametros["ids"])}]
+        if "p.chave > $cursor" in query:
+            return [{"id": c} for c in self.chaves if c > parametros["cursor"]][:parametros["lote"]]
+        return []
+
+
+# 1. Todos os políticos entram, inclusive os deputados só da Câmara
+def test_calcular_metricas_percorre_chaves_do_tse_e_da_camara():
+    neo4j = Neo4jMetricas(["250000000001", "250000000002", "camara:204554"])
+    assert calcular_metricas(neo4j, lote=2) == 3
+    assert neo4j.lotes == [["250000000001", "250000000002"], ["camara:204554"]]
+    assert "MATCH (p:Politico {chave: id})" in Q_CALCULAR
+    assert any("SET p.chave" in q for q, _ in neo4j.consultas)   # chave dos nós antigos preenchida antes
+
+
+# 2. Ranking: só métricas conhecidas (entram no Cypher) e limite dentro da faixa
+def test_ranking_valida_metrica_e_limite():
+    neo4j = Neo4jMetricas([])
+    with pytest.raises(ValueError):
+        ranking(neo4j, "nome} RETURN 1 //")
+    ranking(neo4j, "capital_vinculado", uf="sp", limite=10_000)
+    query, parametros = neo4j.consultas[-1]
+    assert "ORDER BY p.capital_vinculado DESC" in query and "p.chave AS id" in query
+    assert parametros == {"uf": "SP", "minimo": 0.0, "limite": 500}
@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import asyncio
+
+import httpx
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import motor_ia_qwen
+from motor_ia_qwen import AuditorGovernamentalIA, LimiteDeTaxaIA
+from backends_ia import BackendIA, RoteadorIA
+
+LAUDO = {"score_risco": 60, "red_flags": [{"nivel": "ALTO", "motivo": "### X\n📎 [Ver](https://pncp.gov.br/1)"}],
+         "resumo_investigativo": "Resumo."}
+TEIA = {"politico": {"nome": "FULANO"}, "empresas": [{"cnpj": "11222333000181"}]}
+
+
+def sse(texto: str) -> bytes:
+    eventos = [{"choices": [{"delta": {"content": texto[i:i + 9]}}]} for i in range(0, len(texto), 9)]
+    eventos.append({"choices": [], "usage": {"prompt_tokens": 100, "completion_tokens": 20}})
+    return "".join(f"data: {json.dumps(e)}\n\n" for e in eventos).encode() + b"data: [DONE]\n\n"
+
+
+def auditor_com_transporte(responder):
+    """Auditor com um backend servido por httpx.MockTransport no cliente do loop atual."""
+    backend = BackendIA("teste", "http://ia.local/v1/chat/completions", "modelo-teste")
+    ia = AuditorGovernamentalIA(usar_cache=False, roteador=RoteadorIA([backend]))
+    motor_ia_qwen._clientes[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(responder))
+    return ia, backend
+
+
+# 1. Stream SSE e JSON comum dão o mesmo laudo, pelo mesmo cliente do loop
+def test_completar_le_stream_e_json_comum():
+    pedidos = []
+
+    def responder(pedido):
+        corpo = json.loads(pedido.content)
+        pedidos.append(corpo)
+        if len(pedidos) == 1:
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=sse(json.dumps(LAUDO)))
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(LAUDO)}}],
+                                         "usage": {"prompt_tokens": 100}})
+
+    async def cenario():
+        ia, backend = auditor_com_transporte(responder)
+        cliente = ia._cliente()
+        texto, uso = await ia._completar({"messages": []}, backend)
+        assert json.loads(texto) == LAUDO and uso["completion_tokens"] == 20
+        texto, uso = await ia._completar({"messages": []}, backend)
+        assert json.loads(texto) == LAUDO and uso == {"prompt_tokens": 100}
+        assert ia._cliente() is cliente
+        await AuditorGovernamentalIA.aclose()
+        assert cliente.is_closed and asyncio.get_running_loop() not in motor_ia_qwen._clientes
+
+    asyncio.run(cenario())
+    assert pedidos[0]["stream"] is True and pedidos[0]["model"] == "modelo-teste"
+
+
+# 2. Erro HTTP vira fallback; 429 sobe como LimiteDeTaxaIA com o Retry-After
+def test_erro_http_vira_fallback_e_429_informa_espera():
+    async def cenario():
+        ia, backend = auditor_com_transporte(lambda pedido: httpx.Response(500, text="falhou"))
+        laudo = await ia.analisar_teia_financeira(TEIA)
+        assert laudo["proveniencia"]["origem"] == "fallback"
+        assert backend.stats["falhas"] == 1
+
+        ia, backend = auditor_com_transporte(lambda pedido: httpx.Response(429, headers={"retry-after": "7"}))
+        with pytest.raises(LimiteDeTaxaIA) as erro:
+            await ia._completar({"messages": []}, backend)
+        assert erro.value.retry_after == 7.0
+        await AuditorGovernamentalIA.aclose()
+
+    asyncio.run(cenario())
+
+
+# 3. Cancelar quem aguarda o laudo encerra o stream (não vira fallback)
+def test_cancelamento_fecha_o_stream():
+    async def sem_fim():
+        yield b'data: {"choices": [{"delta": {"content": "{"}}]}\n\n'
+        await asyncio.sleep(60)
+
+    async def cenario():
+        ia, _ = auditor_com_transporte(lambda pedido: httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=sem_fim()))
+        tarefa = asyncio.create_task(ia.analisar_teia_financeira(TEIA))
+        await asyncio.sleep(0.1)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(tarefa, timeout=2)
+        await AuditorGovernamentalIA.aclose()
+
+    asyncio.run(cenario())
@@ -0,0 +1,102 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import motor_regras
+from motor_regras import MotorRegras, laudo_deterministico, achados_para_ia
+
+
+class Neo4jRegras:
+    """Devolve as linhas de cada regra pela consulta (Q_*) recebida; `falhar` lista as que estouram."""
+
+    def __init__(self, linhas: dict, falhar=()):
+        self.linhas = linhas
+        self.falhar = falhar
+        self.consultas = []
+
+    def execute_query(self, query, parametros=None, nome=None):
+        self.consultas.append((query, parametros))
+        for regra, q in vars(motor_regras).items():
+            if q is query:
+                if regra in self.falhar:
+                    raise RuntimeError("timeout")
+                return self.linhas.get(regra, [])
+        return []
+
+
+ALERTA_CEAP = {"id": "camara:204554", "fonte": "CEAP", "cnpj": "11.222.333/0001-81", "nome": "GRAFICA X",
+               "pagador": "204554", "pagador_nome": "DEP. FULANO", "inicio": "2024-01-02", "fim": "2024-02-10",
+               "qtd": 3, "soma": 150000.0, "limite": 57208.33, "itens": None}
+BEBE = {"id": "250000000001", "cnpj": "44555666000199", "nome": "BEBE LTDA", "via": "PAGOU_A",
+        "abertura": "2023-01-01", "valor": 2_500_000.0, "qtd": 2,
+        "contratos": ["44555666000199-2-000012/2023"]}
+
+
+# 1. Deputado só da Câmara: a regra casa pela chave e o alerta da CEAP pontua
+def test_fracionamento_ceap_pontua_deputado_sem_id_tse():
+    neo4j = Neo4jRegras({"Q_FRACIONAMENTO": [ALERTA_CEAP]})
+    resultado = MotorRegras(neo4j, limiar=40).avaliar("camara:204554")
+    assert all("MATCH (p:Politico {chave: id})" in q for q, _ in neo4j.consultas)
+    assert neo4j.consultas[0][1]["ids"] == ["camara:204554"]
+    assert resultado["heuristicas"] == ["FRACIONAMENTO"]
+    assert resultado["score"] == 20 and not resultado["enviar_llm"]
+    evidencia = resultado["evidencias"][0]
+    assert evidencia["nivel"] == "ALTO"             # 3 itens: abaixo de 2x o mínimo
+    assert "despesas da cota parlamentar" in evidencia["motivo"]
+    assert "(https://portaldatransparencia.gov.br/pessoa-juridica/11222333000181)" in evidencia["motivo"]
+
+
+# 2. Score: cada heurística conta uma vez, pelo achado mais grave; teto de 100
+def test_score_soma_heuristicas_pelo_achado_mais_grave():
+    vizinha = {"cnpj": "1", "nome": "V"}
+    linhas = {
+        "Q_BEBE_MILIONARIA": [BEBE, {**BEBE, "cnpj": "77888999000100"}],
+        "Q_ENDERECO_FANTASMA": [{"id": "250000000001", "cnpj": "44555666000199", "nome": "BEBE LTDA",
+                                 "endereco": "RUA A 1", "via": "PAGOU_A", "vizinhas": [vizinha]}],
+        "Q_FRACIONAMENTO": [{**ALERTA_CEAP, "id": "250000000001", "qtd": 6}],
+        "Q_MONOPOLIO": [{"id": "250000000001", "municipio": "X", "uf": "SP", "cnpj": "9", "nome": "M",
+                         "via": "SOCIO", "valor_empresa": 95.0, "qtd_empresa": 9, "total_municipio": 100.0,
+                         "qtd_municipio": 10}],
+    }
+    resultados = MotorRegras(Neo4jRegras(linhas), limiar=40).avaliar_lote(["250000000001", "250000000002"])
+    um = resultados["250000000001"]
+    assert um["heuristicas"] == ["EMPRESA_BEBE_MILIONARIA", "ENDERECO_FANTASMA", "FRACIONAMENTO",
+                                 "MONOPOLIO_GEOGRAFICO"]
+    assert um["score"] == 100 and um["enviar_llm"]     # 40 + 20 + 40 + 40, com teto
+    assert len([e for e in um["evidencias"] if e["heuristica"] == "EMPRESA_BEBE_MILIONARIA"]) == 2
+    assert "(https://pncp.gov.br/app/contratos/44555666000199/2023/12)" in um["evidencias"][0]["motivo"]
+    dois = resultados["250000000002"]
+    assert (dois["score"], dois["evidencias"], dois["enviar_llm"]) == (0, [], False)
+
+
+# 3. Regra que falha: ninguém do lote é poupado do LLM e o score não é gravado
+def test_regra_com_falha_manda_todos_para_o_llm():
+    neo4j = Neo4jRegras({}, falhar=("Q_NEPOTISMO",))
+    motor = MotorRegras(neo4j, limiar=40)
+    resultados = motor.avaliar_lote(["250000000002"])
+    assert resultados["250000000002"]["enviar_llm"]
+    assert resultados["250000000002"]["regras_com_falha"] == ["NEPOTISMO_OCULTO"]
+    motor.gravar_scores(resultados)
+    assert neo4j.consultas[-1][1]["rows"] == []
+
+
+# 4. Avaliadores: nível por gravidade e laudo determinístico no formato da IA
+def test_avaliadores_e_laudo_deterministico():
+    nepotismo = {"sobrenome": "TAL", "socio": "BELTRANO TAL", "cnpj": "11222333000181", "nome": "E", "via": "SOCIO"}
+    assert motor_regras._avaliar_nepotismo(nepotismo)[0]["nivel"] == "ALTO"
+    assert motor_regras._avaliar_nepotismo({**nepotismo, "via": "PAGOU_A", "valor_via": 10.0})[0]["nivel"] == "CRÍTICO"
+    patrimonio = {"patrimonio": 0.0, "capital_total": 2_000_000.0,
+                  "empresas": [{"cnpj": "1", "nome": "A", "capital": 500_000.0},
+                               {"cnpj": "2", "nome": "B", "capital": 1_500_000.0}]}
+    evidencia = motor_regras._avaliar_patrimonio(patrimonio)[0]
+    assert evidencia["nivel"] == "CRÍTICO" and "Maior: B" in evidencia["motivo"]
+    assert motor_regras._brl(1234567.891) == "R$ 1.234.567,89"
+    assert motor_regras._link_contrato("sem-padrao").startswith("https://pncp.gov.br/app/contratos?q=")
+
+    resultado = MotorRegras(Neo4jRegras({"Q_FRACIONAMENTO": [ALERTA_CEAP]})).avaliar("camara:204554")
+    laudo = laudo_deterministico(resultado)
+    assert laudo["score_risco"] == 20 and laudo["proveniencia"]["origem"] == "regras"
+    assert laudo["red_flags"] == [{"nivel": "ALTO", "motivo": resultado["evidencias"][0]["motivo"]}]
+    assert achados_para_ia(resultado)[0]["heuristica"] == "FRACIONAMENTO"
@@ -0,0 +1,76 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from database.neo4j_conn import Neo4jConnection, fragmento_documento, grau_por_tipo
+
+
+# 1. Chave do sócio: homônimos se separam pelo miolo do CPF publicado no QSA
+def test_fragmento_documento_do_socio():
+    assert fragmento_documento("***123456**") == "123456"
+    assert fragmento_documento("987.123.456-00") == "123456"
+    assert fragmento_documento("11.222.333/0001-44") == "11222333000144"
+    assert fragmento_documento(None) == "" and fragmento_documento("***") == ""
+
+
+# Grafo em memória: id -> (tipo, nome, grau); arestas (origem, destino, relação, peso)
+NOS = {"p": ("Politico", "FULANO", 2), "s": ("Socio", "FULANO", 2), "e1": ("Empresa", "ALFA LTDA", 3),
+       "c1": ("Contrato", "OBRA", 1), "c2": ("Contrato", "REFORMA", 1), "h": ("Empresa", "GIGANTE SA", 10_000)}
+ARESTAS = [("s", "e1", "SOCIO_DE", 0.0), ("e1", "c1", "GANHOU_LICITACAO", 500.0),
+           ("e1", "c2", "GANHOU_LICITACAO", 300.0), ("p", "h", "PAGOU_A", 50.0)]
+
+
+class GrafoFalso(Neo4jConnection):
+    """Neo4jConnection sem driver: a raiz e a expansão de fronteira respondem do grafo acima."""
+
+    def __init__(self, falhar_no_salto: int = None):
+        self.saltos = 0
+        self.falhar_no_salto = falhar_no_salto
+
+    def execute_query(self, query, parameters=None, nome=None):
+        assert nome == "seguir_dinheiro.raiz" and parameters == {"id": "250000000001"}
+        return [{"id": "p", "nome": "FULANO", "id_tse": "250000000001",
+                 "socios": [{"id": "s", "grau": 2, "grau_por_tipo": None}]}]
+
+    def _consultar(self, nome, query, parametros=None, timeout=None):
+        self.saltos += 1
+        if self.saltos == self.falhar_no_salto:
+            raise TimeoutError("transação expirou")
+        linhas = []
+        for origem in parametros["fronteira"]:
+            vizinhos = [(b, rel, peso, True) for a, b, rel, peso in ARESTAS if a == origem] + \
+                       [(a, rel, peso, False) for a, b, rel, peso in ARESTAS if b == origem]
+            vizinhos = sorted((v for v in vizinhos if v[0] not in parametros["visitados"]), key=lambda v: -v[2])
+            for id_no, rel, peso, saida in vizinhos[:parametros["fanout"]]:
+                tipo, nome_no, grau = NOS[id_no]
+                linhas.append({"origem_id": origem, "id": id_no, "tipo": tipo, "nome": nome_no, "relacao": rel,
+                               "saida": saida, "peso": peso, "grau": grau,
+                               "grau_por_tipo": ["PAGOU_A:9000", "GANHOU_LICITACAO:1000"] if id_no == "h" else None})
+        return linhas
+
+
+# 2. Siga o dinheiro: parte do político e do sócio homônimo, respeita fanout e não expande hubs
+def test_seguir_dinheiro_fanout_hubs_e_trilhas():
+    resultado = GrafoFalso().seguir_dinheiro("250000000001", profundidade=4, fanout=1, grau_hub=1000)
+    assert resultado["saltos"] == 2
+    assert resultado["por_tipo"] == {"Politico": 1, "Socio": 1, "Empresa": 2, "Contrato": 1}
+    assert resultado["caminhos"][0] == {
+        "valor_acumulado": 500.0, "saltos": 3,
+        "trilha": "FULANO —MESMO_NOME→ FULANO (Socio) —SOCIO_DE→ ALFA LTDA (Empresa) "
+                  "—GANHOU_LICITACAO→ OBRA (Contrato)"}
+    cortes = resultado["cortes"]
+    assert cortes["nos_no_limite_de_fanout"] == 3 and not cortes["tempo_esgotado"]
+    assert cortes["hubs_nao_expandidos"] == [{"nome": "GIGANTE SA", "tipo": "Empresa", "grau": 10_000,
+                                              "grau_por_tipo": {"PAGOU_A": 9000, "GANHOU_LICITACAO": 1000}}]
+
+
+# 3. Estouro do orçamento de tempo (timeout da transação): devolve os saltos já feitos
+def test_seguir_dinheiro_devolve_parcial_no_timeout():
+    resultado = GrafoFalso(falhar_no_salto=2).seguir_dinheiro("250000000001", fanout=5)
+    assert resultado["saltos"] == 1 and resultado["cortes"]["tempo_esgotado"]
+    assert resultado["por_tipo"] == {"Politico": 1, "Socio": 1, "Empresa": 2}
+    sem_tempo = GrafoFalso().seguir_dinheiro("250000000001", tempo_max=0)
+    assert sem_tempo["saltos"] == 0 and sem_tempo["cortes"]["tempo_esgotado"]
+    assert grau_por_tipo(["PAGOU_A:3", "lixo", "A:B:2"]) == {"PAGOU_A": 3, "A:B": 2}
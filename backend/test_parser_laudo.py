@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from parser_laudo import ParserLaudoIncremental, LaudoInvalido, separar_lote
+
+
+def texto_laudo_valido():
+    return json.dumps({
+        "score_risco": 50,
+        "red_flags": [{
+            "nivel": "CRÍTICO",
+            "motivo": "### 🔴 Fraude {detectada}\n\"aspas\" e [colchetes]\n\n📎 Evidência: [Ver no Portal](https://portaldatransparencia.gov.br/123)"
+        }],
+        "resumo_investigativo": "Resumo aqui."
+    }, ensure_ascii=False)
+
+
+# 1. Parser incremental do laudo (stream em pedaços)
+def test_parser_incremental_le_laudo_em_pedacos():
+    laudo = "```json\n" + texto_laudo_valido() + "\n```"
+    parser = ParserLaudoIncremental()
+    for i in range(0, len(laudo), 7):
+        parser.alimentar(laudo[i:i + 7])
+    resultado = parser.resultado()
+    assert resultado["score_risco"] == 50
+    assert parser.flags_validadas == 1
+
+
+def test_parser_incremental_aborta_red_flag_sem_link_no_meio_do_stream():
+    laudo = json.dumps({
+        "score_risco": 10,
+        "red_flags": [{"nivel": "ALTO", "motivo": "Apenas um texto sem link clicável."}],
+        "resumo_investigativo": "Resumo que nunca precisa ser lido." * 50,
+    })
+    parser = ParserLaudoIncremental()
+    corte = laudo.index("resumo_investigativo")
+    with pytest.raises(LaudoInvalido, match="sem link"):
+        parser.alimentar(laudo[:corte])
+    assert not parser.concluido
+
+
+# 2. Modo lote: só o item inválido (ou ausente) volta para refazer
+def test_separar_lote_isola_item_invalido():
+    valido = json.loads(texto_laudo_valido())
+    resposta = {"laudos": [
+        {"id": "P1", **valido},
+        {"id": "P2", "score_risco": 10, "red_flags": [{"nivel": "ALTO", "motivo": "sem link"}],
+         "resumo_investigativo": "x"},
+    ]}
+    validos, falhas = separar_lote(resposta, ["P1", "P2", "P3"])
+    assert list(validos) == ["P1"]
+    assert validos["P1"]["score_risco"] == 50 and "id" not in validos["P1"]
+    assert set(falhas) == {"P2", "P3"}
@@ -0,0 +1,42 @@
+import os
+import sys
+import json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from database.perfil_cypher import PerfilCypher, percentil
+
+PLANO = {"dbHits": 5, "children": [{"dbHits": 7, "children": []}]}
+
+
+class Resultado:
+    def data(self): return [{"n": 1}, {"n": 2}]
+    def consume(self):
+        return type("Resumo", (), {"result_available_after": 3, "result_consumed_after": 1, "profile": PLANO})()
+
+
+class Sessao:
+    def __init__(self):
+        self.consultas = []
+
+    def run(self, query, parametros=None):
+        self.consultas.append(str(getattr(query, "text", query)))
+        return Resultado()
+
+
+# 1. Perfil Cypher: agrega por nome, soma db hits do PROFILE e redige parâmetros das lentas
+def test_perfil_cypher_agrega_e_redige_parametros():
+    perfil = PerfilCypher(ativo=True, amostra=1.0, lenta_ms=0)
+    sessao = Sessao()
+    for _ in range(3):
+        perfil.executar(sessao, "buscar_por_termo", "MATCH (p) RETURN p", {"termo": "12345678900", "ids": [1, 2]})
+    perfil.executar(sessao, "indice", "CREATE INDEX x IF NOT EXISTS FOR (n:A) ON (n.b)")
+    assert sessao.consultas[0].startswith("PROFILE ") and not sessao.consultas[-1].startswith("PROFILE")
+    estado = perfil.instantaneo()
+    termo = estado["consultas"]["buscar_por_termo"]
+    assert (termo["contagem"], termo["linhas"], termo["db_hits"], termo["servidor_ms"]) == (3, 6, 36, 12.0)
+    assert estado["lentas"][0]["parametros"] == {"termo": "<str[11]>", "ids": "<lista[2]>"}
+    assert "12345678900" not in json.dumps(estado)
+    assert 'neo4j_consulta_db_hits_total{consulta="buscar_por_termo"} 36' in perfil.texto_prometheus()
+    assert percentil([0, 9, 1] + [0] * 12, 0.95) == 5.0
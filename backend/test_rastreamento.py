@@ -0,0 +1,38 @@
+import os
+import sys
+import asyncio
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+import rastreamento
+
+
+# 1. Árvore de spans, traceparent de entrada e contexto seguindo a corrotina
+def test_rastreamento_arvore_traceparent_e_exportacao(tmp_path, monkeypatch):
+    arquivo = tmp_path / "rastros.jsonl"
+    monkeypatch.setattr(rastreamento, "RASTREAMENTO", True)
+    monkeypatch.setattr(rastreamento, "RASTREAMENTO_ARQUIVO", str(arquivo))
+    monkeypatch.setattr(rastreamento, "RASTREAMENTO_OTLP", "")
+
+    @rastreamento.rastrear("auditoria.malha_fina")
+    async def auditoria():
+        rastreamento.atual().definir(politico=7)
+        rastreamento.registrar_span("llm local", 0.01, **{"gen_ai.usage.input_tokens": 120})
+
+    entrada = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    with rastreamento.continuar(entrada), rastreamento.span("GET /api/politico/detalhes/{id}") as raiz:
+        assert raiz.traceparent().startswith("00-4bf92f3577b34da6a3ce929d0e0e4736-")
+        asyncio.run(auditoria())
+    with rastreamento.continuar("00-" + "a" * 32 + "-" + "b" * 16 + "-00"), rastreamento.span("fora") as s:
+        assert not s.gravando
+    assert rastreamento.traceparent() is None
+    rastreamento.descarregar()
+
+    spans = {s["nome"]: s for s in rastreamento.carregar_spans(str(arquivo))}
+    assert set(spans) == {"GET /api/politico/detalhes/{id}", "auditoria.malha_fina", "llm local"}
+    assert {s["trace"] for s in spans.values()} == {"4bf92f3577b34da6a3ce929d0e0e4736"}
+    assert spans["GET /api/politico/detalhes/{id}"]["pai"] == "00f067aa0ba902b7"
+    assert spans["llm local"]["pai"] == spans["auditoria.malha_fina"]["id"]
+    assert spans["auditoria.malha_fina"]["atributos"]["politico"] == "7"
+    assert "auditoria.malha_fina" in rastreamento.arvore(list(spans.values()))
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+pytest.importorskip("numpy")
+
+from snapshot_csr import exportar, SnapshotCSR
+
+NOS = [{"eid": "e0", "rotulo": "Politico", "chave": "camara:204554", "nome": "FULANO"},
+       {"eid": "e1", "rotulo": "Empresa", "chave": "111", "nome": "ALFA LTDA"},
+       {"eid": "e2", "rotulo": "Contrato", "chave": "c1", "nome": "OBRA"},
+       {"eid": "e3", "rotulo": "Contrato", "chave": "c2", "nome": "REFORMA"}]
+ARESTAS = [{"a": "e0", "b": "e1", "tipo": "PAGOU_A", "valor": 10.0},
+           {"a": "e1", "b": "e2", "tipo": "GANHOU_LICITACAO", "valor": 500.0},
+           {"a": "e1", "b": "e3", "tipo": "GANHOU_LICITACAO", "valor": 250.0}]
+
+
+class Sessao:
+    def __enter__(self): return self
+    def __exit__(self, *a): pass
+    def run(self, query): return iter(ARESTAS if "(a)-[r]->(b)" in query else NOS)
+
+
+class Conexao:
+    driver = type("Driver", (), {"session": lambda self: Sessao()})()
+
+
+# 1. Snapshot CSR: exporta de um driver falso e consulta pelo mmap
+def test_snapshot_csr_vizinhos_k_saltos_e_somas(tmp_path):
+    exportar(Conexao(), tmp_path / "snap")
+    snap = SnapshotCSR.carregar(tmp_path / "snap")
+    assert [v["chave"] for v in snap.vizinhos("Empresa:111", "saida")] == ["Contrato:c1", "Contrato:c2"]
+    resultado = snap.k_saltos("Politico:camara:204554", k=2, direcao="saida")
+    assert dict(zip(resultado["nos"].tolist(), resultado["distancias"].tolist())) == {0: 0, 1: 1, 2: 2, 3: 2}
+    assert snap.soma_ponderada("saida", tipos=["GANHOU_LICITACAO"])[snap.no("Empresa:111")] == 750.0
+    assert snap.grau().tolist() == [1, 3, 1, 1]
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+
+from telemetria import Registro, exportar, get_registro, registrar_lote
+
+
+# 1. Histograma cumulativo, contadores grandes sem perda e rótulos conferidos
+def test_telemetria_formato_prometheus():
+    registro = Registro()
+    latencia = registro.histograma("teste_duracao_segundos", "Teste.", ("fonte",), limites=(0.1, 1))
+    for segundos in (0.05, 0.5, 2):
+        latencia.observar(segundos, fonte="pncp")
+    registro.contador("teste_bytes_total", "Teste.", ("fonte",)).incrementar(1234567891, fonte="tse")
+    texto = registro.texto_prometheus()
+    assert 'teste_duracao_segundos_bucket{fonte="pncp",le="0.1"} 1' in texto
+    assert 'teste_duracao_segundos_bucket{fonte="pncp",le="+Inf"} 3' in texto
+    assert 'teste_bytes_total{fonte="tse"} 1234567891' in texto
+    with pytest.raises(ValueError):
+        latencia.observar(1, rota="x")
+
+
+# 2. Textfile: o que as cargas registram no registro compartilhado sai no .prom
+def test_telemetria_exporta_registro_compartilhado(tmp_path):
+    registrar_lote("teste_textfile", 10, 0.5)
+    linha = 'ingestao_linhas_total{fonte="teste_textfile"} 10'
+    assert linha in get_registro().texto_prometheus()
+    exportar("teste", pasta=str(tmp_path), pushgateway="")
+    texto = (tmp_path / "teste.prom").read_text(encoding="utf-8")
+    assert "# TYPE ingestao_linhas_total counter" in texto and linha in texto
@@ -9,7 +9,7 @@ logger = logging.getLogger("ETL_RFB_QSA")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
-from database.neo4j_conn import get_neo4j_connection
+from database.neo4j_conn import get_neo4j_connection, fragmento_documento
 
 async def processar_qsa_rfb_em_lote():
     """
@@ -20,10 +20,12 @@ async def processar_qsa_rfb_em_lote():
     logger.info("📂 INICIANDO INGESTÃO DO DUMP RECEITA FEDERAL (Sócios e Empresas)")
     neo4j_db = get_neo4j_connection()
     
-    # Lê as tuplas: CNPJ <-> Nome do Sócio
+    # Lê as tuplas: CNPJ <-> Nome do Sócio (+ CPF mascarado, que desambigua homônimos)
     linhas_dump_exemplo = [
-        {"cnpj": "11222333000144", "razao_social": "EMPRESA MOCK LTDA", "nome_socio": "ESPOSA DO POLITICO MOCK UM"},
-        {"cnpj": "99888777000166", "razao_social": "EMPRESA AMIGA S/A", "nome_socio": "AMIGO DO POLITICO MOCK UM"}
+        {"cnpj": "11222333000144", "razao_social": "EMPRESA MOCK LTDA", "nome_socio": "ESPOSA DO POLITICO MOCK UM",
+         "cnpj_cpf_do_socio": "***123456**"},
+        {"cnpj": "99888777000166", "razao_social": "EMPRESA AMIGA S/A", "nome_socio": "AMIGO DO POLITICO MOCK UM",
+         "cnpj_cpf_do_socio": "***654321**"}
     ]
 
     count = 0
@@ -38,9 +40,11 @@ async def processar_qsa_rfb_em_lote():
             # Aqui é Cypher puro para fazer o vínculo
             neo4j_db.execute_query("""
                 MATCH (e:Empresa {cnpj: $cnpj})
-                MERGE (s:Socio {nome: $nome_socio})
+                MERGE (s:Socio {nome: $nome_socio, doc_fragmento: $doc})
                 MERGE (s)-[:E_SOCIO_DE]->(e)
-            """, {"cnpj": cnpj, "nome_socio": socio.upper()})
+                SET s.grau = COUNT { (s)--() }, e.grau = COUNT { (e)--() }
+            """, {"cnpj": cnpj, "nome_socio": socio.upper(),
+                  "doc": fragmento_documento(linha.get("cnpj_cpf_do_socio"))})
             count += 1
             
         await asyncio.sleep(0.01)
@@ -6,9 +6,12 @@ import sys
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
-from database.neo4j_conn import get_neo4j_connection
+from database.neo4j_conn import get_neo4j_connection, CHAVE_POLITICO, SUBSTITUIR_ANO_PAGOU_A
+from telemetria import ganchos_requests, iniciar_exportador
+from rastreamento import span, iniciar_rastreamento
 
 CAMARA_API = "https://dadosabertos.camara.leg.br/api/v2"
+GANCHOS_CAMARA = ganchos_requests("camara")
 
 def extrair_todos_deputados_com_despesas():
     """
@@ -16,13 +19,16 @@ def extrair_todos_deputados_com_despesas():
     1. Lista TODOS os deputados ativos
     2. Registra o nó [Politico] no Neo4j
     3. Puxa TODAS as despesas paginando do 1 ao fim
-    4. Cria ou Conecta o Nó [Empresa] ao [Politico] com relação [PAGOU_A]
+    4. Cria ou Conecta o Nó [Empresa] ao [Politico] com relação [PAGOU_A],
+       somando por ano. Anos já carregados do arquivo anual da CEAP (a fonte
+       oficial, em r.ceap_anos) ficam como estão; rodar de novo substitui a
+       soma do ano em vez de acumular.
     """
     print("🔥 INICIANDO ASPIRADOR DE DADOS: CÂMARA DOS DEPUTADOS 🔥")
     neo4j_db = get_neo4j_connection()
     
     try:
-        res_dep = requests.get(f"{CAMARA_API}/deputados", params={"itens": 1000})
+        res_dep = requests.get(f"{CAMARA_API}/deputados", params={"itens": 1000}, hooks=GANCHOS_CAMARA)
         deputados = res_dep.json().get("dados", [])
         print(f"📥 {len(deputados)} Deputados Ativos Encontrados. Iniciando Ingestão Infinita...")
     except Exception as e:
@@ -40,17 +46,19 @@ def extrair_todos_deputados_com_despesas():
         # 1. Registra o Politico Base
         neo4j_db.execute_query('''
             MERGE (p:Politico {id_camara: $id_camara})
-            SET p.nome = $nome, p.estado = $uf, p.partido = $partido, p.cargo = "Deputado Federal"
-        ''', {'id_camara': id_dep, 'nome': nome, 'uf': siglaUf, 'partido': siglaPartido})
+            SET p.nome = $nome, p.uf = $uf, p.partido = $partido, p.cargo = "Deputado Federal",
+                p.chave = ''' + CHAVE_POLITICO + '''
+            REMOVE p.estado''', {'id_camara': id_dep, 'nome': nome, 'uf': siglaUf, 'partido': siglaPartido})
         
         # 2. Inicia Paginação Infinita de Despesas
         pagina = 1
         total_despesas = 0
+        por_ano = {}
         while True:
             try:
                 res_desp = requests.get(f"{CAMARA_API}/deputados/{id_dep}/despesas", params={
                     "itens": 100, "pagina": pagina, "ordem": "DESC", "ordenarPor": "dataDocumento"
-                })
+                }, hooks=GANCHOS_CAMARA)
                 
                 if res_desp.status_code != 200: 
                     print(f"  ⚠️ Limite de Taxa ou Erro. Resfriando por 5s...")
@@ -65,33 +73,39 @@ def extrair_todos_deputados_com_despesas():
                     cnpj_raw = str(d.get("cnpjCpfFornecedor", "")).replace(".", "").replace("-", "").replace("/", "").strip()
                     if not cnpj_raw or len(cnpj_raw) != 14: continue # Pula CPFs ou inválidos
                     
-                    valor = float(d.get("valorDocumento", 0))
-                    nome_fornecedor = d.get("nomeFornecedor", "Desconhecido").upper()
-                    
-                    # 3. Cria Relação Neo4j (Politico -> PAGOU_A -> Empresa)
-                    neo4j_db.execute_query('''
-                        MATCH (p:Politico {id_camara: $id_camara})
-                        MERGE (e:Empresa {cnpj: $cnpj})
-                        ON CREATE SET e.nome = $nome_empresa
-                        MERGE (p)-[r:PAGOU_A]->(e)
-                        ON CREATE SET r.valor_total = $valor, r.qtd_transacoes = 1
-                        ON MATCH SET r.valor_total = r.valor_total + $valor, r.qtd_transacoes = r.qtd_transacoes + 1
-                    ''', {
-                        'id_camara': id_dep, 
-                        'cnpj': cnpj_raw, 
-                        'nome_empresa': nome_fornecedor, 
-                        'valor': valor
+                    ano = int(d.get("ano") or 0)
+                    if not ano: continue
+
+                    agg = por_ano.setdefault((cnpj_raw, ano), {
+                        'cnpj': cnpj_raw, 'ano': ano, 'valor': 0.0, 'qtd': 0,
+                        'nome_empresa': d.get("nomeFornecedor", "Desconhecido").upper()
                     })
+                    agg['valor'] += float(d.get("valorDocumento", 0))
+                    agg['qtd'] += 1
                     total_despesas += 1
                 
-                print(f"  👉 {total_despesas} despesas registradas no Grafo...")
+                print(f"  👉 {total_despesas} despesas lidas...")
                 pagina += 1
                 time.sleep(0.5) # Respeito à API Cidadã
                 
             except Exception as e:
                 print(f"  ❌ Erro processando página {pagina} de {nome}: {e}")
                 break
-                
+
+        # 3. Cria Relação Neo4j (Politico -> PAGOU_A -> Empresa). Uma consulta por ano:
+        #    a substituição lê as listas da aresta, então cada aresta aparece uma vez no lote.
+        for ano in sorted({a for _, a in por_ano}):
+            neo4j_db.execute_query('''
+                UNWIND $rows AS row
+                MATCH (p:Politico {id_camara: $id_camara})
+                MERGE (e:Empresa {cnpj: row.cnpj})
+                ON CREATE SET e.nome = row.nome_empresa
+                MERGE (p)-[r:PAGOU_A]->(e)
+            ''' + SUBSTITUIR_ANO_PAGOU_A + '''
+                SET r.api_anos = r.api_anos + row.ano, r.api_valores = r.api_valores + row.valor,
+                    r.api_qtds = r.api_qtds + row.qtd
+            ''', {'id_camara': id_dep, 'rows': [r for r in por_ano.values() if r['ano'] == ano]})
+
         print(f"✅ {nome} finalizado. Total Inserido: {total_despesas} transações.")
         time.sleep(1) # Intervalo entre políticos
 
@@ -99,4 +113,7 @@ def extrair_todos_deputados_com_despesas():
     print("🏁 EXTRAÇÃO TOTAL DA CÂMARA CONCLUÍDA.")
 
 if __name__ == "__main__":
-    extrair_todos_deputados_com_despesas()
+    iniciar_exportador("extrator_camara")
+    iniciar_rastreamento("extrator_camara")
+    with span("extrator_camara"):
+        extrair_todos_deputados_com_despesas()
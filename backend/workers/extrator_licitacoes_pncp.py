@@ -1,9 +1,14 @@
-import requests
+import asyncio
+import argparse
+import json
 import time
 import os
 import sys
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
 
 # Configuração de Logging Profissional
 logging.basicConfig(
@@ -15,121 +20,436 @@ logger = logging.getLogger("ExtratorPNCP")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
-from database.neo4j_conn import get_neo4j_connection
+from database.neo4j_conn import get_neo4j_connection, fragmento_documento
+from database.cnpj_local import get_cnpj_local, consultar_cnpj, propriedades_empresa
+from telemetria import ganchos_httpx, registrar_lote, medir_etapa, iniciar_exportador
+from rastreamento import span, iniciar_rastreamento
 
-# A URL base do PNCP para contratos públicos - vamos consumir usando o de compras gerais (pode ser iterado por órgão)
-# Porém, a API v1 exige orgao CNPJ. Para contornar e buscar diariamente, usaremos a rota de publicações ativas abertas se disponível ou a busca textual.
+# API de consulta do PNCP: aceita janela de datas sem exigir o CNPJ do órgão e
+# devolve totalPaginas, então dá para varrer o dia inteiro em vez de 3 páginas.
 PNCP_API = "https://pncp.gov.br/api/pncp/v1"
-PNCP_API_SEARCH = "https://pncp.gov.br/api/search"
+PNCP_API_CONSULTA = "https://pncp.gov.br/api/consulta/v1"
+BRASILAPI_CNPJ = "https://brasilapi.com.br/api/cnpj/v1"
+
+# Marca d'água: último dia cuja janela foi totalmente gravada no grafo.
+ARQUIVO_WATERMARK = Path(BASE_DIR) / "estado" / "pncp_watermark.json"
+
+TAMANHO_PAGINA = 500
+TAMANHO_LOTE_GRAFO = 500
+# Uma janela com página perdida é varrida de novo (os MERGE são idempotentes);
+# esgotadas as tentativas, a coleta para sem avançar a marca d'água.
+TENTATIVAS_JANELA = 3
+
 
 def buscar_qsa_brasilapi(cnpj: str):
     """
-    Busca o Quadro de Sócios e Administradores (QSA) via BrasilAPI.
+    Busca o Quadro de Sócios e Administradores (QSA).
+    Consulta primeiro a base local da Receita; a BrasilAPI só é chamada
+    para CNPJs ausentes dela.
+    """
+    dados = consultar_cnpj(cnpj)
+    return (dados or {}).get("qsa", [])
+
+
+class LimitadorTaxa:
+    """
+    Token bucket assíncrono: libera no máximo `por_segundo` requisições por
+    segundo, com rajada de até `rajada`. Compartilhado por todas as corrotinas
+    que batem na mesma origem.
     """
+
+    def __init__(self, por_segundo: float, rajada: int = 1):
+        self.intervalo = 1.0 / por_segundo
+        self.capacidade = float(max(1, rajada))
+        self.tokens = self.capacidade
+        self.ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self):
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) / self.intervalo)
+                self.ultimo = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.intervalo)
+
+
+def ler_watermark() -> date | None:
     try:
-        url = f"https://brasilapi.com.br/api/cnpj/v1/{cnpj}"
-        res = requests.get(url, timeout=10)
-        if res.status_code == 200:
-            dados = res.json()
-            return dados.get("qsa", [])
-        return []
-    except Exception as e:
-        logger.error(f"Erro ao buscar QSA para CNPJ {cnpj}: {e}")
-        return []
-
-def extrair_licitacoes_recentes():
+        with open(ARQUIVO_WATERMARK, "r", encoding="utf-8") as f:
+            return date.fromisoformat(json.load(f)["ultimo_dia"])
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+
+def gravar_watermark(dia: date, total_contratos: int):
+    """Grava a marca d'água de forma atômica (arquivo temporário + rename)."""
+    ARQUIVO_WATERMARK.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ARQUIVO_WATERMARK.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"ultimo_dia": dia.isoformat(), "contratos": total_contratos,
+                   "gravado_em": datetime.now().isoformat()}, f)
+    os.replace(tmp, ARQUIVO_WATERMARK)
+
+
+class ColetorPNCP:
     """
-    Motor PNCP Robusto: 
-    1. Busca índices de contratos via /api/search/
-    2. Detalha cada contrato via /api/pncp/v1/orgaos/... para pegar CNPJ
-    3. Cruza com QSA (BrasilAPI)
+    Motor PNCP de alta vazão:
+    1. Varre TODAS as páginas de uma janela de datas (/api/consulta/v1/contratos),
+       páginas em paralelo sob um limitador de taxa exclusivo do PNCP.
+    2. Itens que vierem sem fornecedor/valor são detalhados em paralelo
+       via /api/pncp/v1/orgaos/... (mesmo limitador).
+    3. Grava contratos em lote (UNWIND) e resolve os CNPJs sem QSA na base
+       local da Receita (microssegundos, sem rede).
+    4. Só os CNPJs que a base local não conhece vão para um pipeline separado
+       e deduplicado na BrasilAPI, com limitador próprio; sócios são gravados em lote.
     """
-    logger.info("🔥 INICIANDO CAÇADOR DE LICITAÇÕES (SEARCH + DETAILS) 🔥")
-    neo4j_db = get_neo4j_connection()
-    
-    pagina = 1
-    while pagina <= 3: # Primeiras 3 páginas para evitar sobrecarga
-        try:
-            # Busca índices de contratos vigentes e recentes
-            url_search = f"{PNCP_API_SEARCH}/?q=&tipos_documento=contrato&ordenacao=-data&status=vigente&pagina={pagina}"
-            logger.info(f"🔎 Buscando Índices PNCP: {url_search}")
-            res = requests.get(url_search, timeout=15)
-            res.raise_for_status()
-            items = res.json().get("items", [])
-            
-            if not items: break
-            
-            for item in items:
-                try:
-                    # Dados básicos para bater no endpoint de detalhes
-                    orgao_cnpj = item.get("orgao_cnpj")
-                    ano = item.get("ano")
-                    sequencial = item.get("numero_sequencial")
-                    
-                    if not (orgao_cnpj and ano and sequencial): continue
-                    
-                    url_detail = f"{PNCP_API}/orgaos/{orgao_cnpj}/contratos/{ano}/{sequencial}"
-                    logger.info(f"   📄 Detalhando contrato: {url_detail}")
-                    res_det = requests.get(url_detail, timeout=10)
-                    if res_det.status_code != 200: continue
-                    
-                    det = res_det.json()
-                    id_controle = det.get("numeroControlePNCP")
-                    cnpj_fornecedor = det.get("niFornecedor") # CNPJ DO GANHADOR
-                    nome_fornecedor = det.get("nomeRazaoSocialFornecedor", "DESCONHECIDO").upper()
-                    valor = float(det.get("valorGlobal", 0))
-                    objeto = det.get("objetoContrato", "Sem Objeto")
-                    orgao_nome = det.get("orgaoEntidade", {}).get("razaoSocial", "GOVERNO").upper()
-
-                    if cnpj_fornecedor and len(str(cnpj_fornecedor)) >= 11:
-                        logger.warning(f"   💰 CONTRATO DETECTADO: {nome_fornecedor} - R$ {valor:,.2f}")
-                        
-                        # Injeta no Neo4j
-                        neo4j_db.execute_query('''
-                            MERGE (e:Empresa {cnpj: $cnpj})
-                            ON CREATE SET e.nome = $nome_empresa
-                            MERGE (c:Contrato {id: $id})
-                            ON CREATE SET 
-                                c.valor = $valor, 
-                                c.orgao = $orgao, 
-                                c.objeto = $objeto,
-                                c.data_cad = date()
-                            MERGE (e)-[:GANHOU_LICITACAO]->(c)
-                        ''', {
-                            'cnpj': cnpj_fornecedor, 
-                            'nome_empresa': nome_fornecedor,
-                            'id': id_controle, 
-                            'valor': valor, 
-                            'orgao': orgao_nome, 
-                            'objeto': objeto
-                        })
-                        
-                        # Busca QSA (OSINT) e Injeta Sócios
-                        socios = buscar_qsa_brasilapi(cnpj_fornecedor)
-                        for s in socios:
-                            nome_socio = s.get("nome_socio", "").upper()
-                            if nome_socio:
-                                neo4j_db.execute_query('''
-                                    MATCH (e:Empresa {cnpj: $cnpj})
-                                    MERGE (s:Socio {nome: $nome_socio})
-                                    MERGE (s)-[:E_SOCIO_DE]->(e)
-                                ''', {'cnpj': cnpj_fornecedor, 'nome_socio': nome_socio})
-                                logger.info(f"      👥 Sócio detectado: {nome_socio}")
-                    
-                    time.sleep(1) # Intervalo entre contratos
 
+    def __init__(self, neo4j, concorrencia: int = 8, req_por_segundo: float = 5.0,
+                 qsa_por_segundo: float = 1.0, workers_qsa: int = 2):
+        self.neo4j = neo4j
+        self.concorrencia = concorrencia
+        self.workers_qsa = workers_qsa
+        self.limitador_pncp = LimitadorTaxa(req_por_segundo, rajada=concorrencia)
+        self.limitador_qsa = LimitadorTaxa(qsa_por_segundo, rajada=1)
+        self.cliente = httpx.AsyncClient(
+            timeout=httpx.Timeout(connect=10.0, read=60.0, write=10.0, pool=30.0),
+            limits=httpx.Limits(max_connections=concorrencia + workers_qsa,
+                                max_keepalive_connections=concorrencia + workers_qsa),
+            headers={"User-Agent": "GovTech-Trasparente/3.0 (Auditoria Cidada; opensource)"},
+            event_hooks=ganchos_httpx(),
+        )
+        self.fila_qsa: asyncio.Queue = asyncio.Queue()
+        self.cnpjs_enfileirados: set[str] = set()
+        self.buffer_contratos: list[dict] = []
+        self.buffer_socios: list[dict] = []
+        self.base_cnpj = get_cnpj_local()
+        self.stats = {"paginas": 0, "contratos": 0, "detalhes": 0, "qsa": 0, "qsa_local": 0, "socios": 0, "erros": 0}
+
+    # ── HTTP ──────────────────────────────────────────────────────────────────
+    async def _get_json(self, url: str, limitador: LimitadorTaxa, params: dict = None,
+                        tentativas: int = 4) -> dict | None:
+        """
+        GET com limitador, backoff exponencial e respeito ao Retry-After em 429/5xx.
+        Devolve {} quando o recurso não existe (404/204) e None quando não foi
+        possível obter a resposta (outros erros ou tentativas esgotadas).
+        """
+        for tentativa in range(tentativas):
+            await limitador.aguardar()
+            try:
+                res = await self.cliente.get(url, params=params)
+            except httpx.TransportError as e:
+                logger.warning(f"   ⚠️ Falha de transporte em {url}: {e}")
+            else:
+                if res.status_code == 204:
+                    return {}
+                if res.status_code == 200:
+                    return res.json()
+                if res.status_code == 404:
+                    return {}
+                if res.status_code != 429 and res.status_code < 500:
+                    logger.error(f"   ❌ HTTP {res.status_code} em {url}")
+                    return None
+                logger.warning(f"   ⚠️ HTTP {res.status_code} em {url} (tentativa {tentativa + 1}/{tentativas})")
+                retry_after = res.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    await asyncio.sleep(int(retry_after))
+                    continue
+            await asyncio.sleep(2 ** tentativa)
+        self.stats["erros"] += 1
+        return None
+
+    # ── CONTRATOS ─────────────────────────────────────────────────────────────
+    async def _buscar_pagina(self, dia_ini: date, dia_fim: date, pagina: int) -> dict | None:
+        """Página da janela; None se ela não pôde ser baixada (esgotou as tentativas)."""
+        params = {
+            "dataInicial": dia_ini.strftime("%Y%m%d"),
+            "dataFinal": dia_fim.strftime("%Y%m%d"),
+            "pagina": pagina,
+            "tamanhoPagina": TAMANHO_PAGINA,
+        }
+        dados = await self._get_json(f"{PNCP_API_CONSULTA}/contratos", self.limitador_pncp, params)
+        self.stats["paginas"] += 1
+        return dados
+
+    async def _detalhar(self, item: dict) -> dict | None:
+        """
+        Completa um item do índice com o endpoint de detalhe do contrato.
+        {} se o item não tem as chaves do detalhe ou o contrato não existe (404);
+        None se a consulta falhou.
+        """
+        orgao_cnpj = (item.get("orgaoEntidade") or {}).get("cnpj") or item.get("orgao_cnpj")
+        ano = item.get("anoContrato") or item.get("ano")
+        sequencial = item.get("sequencialContrato") or item.get("numero_sequencial")
+        if not (orgao_cnpj and ano and sequencial):
+            return {}
+        det = await self._get_json(f"{PNCP_API}/orgaos/{orgao_cnpj}/contratos/{ano}/{sequencial}", self.limitador_pncp)
+        self.stats["detalhes"] += 1
+        return det
+
+    @staticmethod
+    def _normalizar(det: dict) -> dict | None:
+        cnpj_fornecedor = str(det.get("niFornecedor") or "").strip()
+        id_controle = det.get("numeroControlePNCP")
+        if len(cnpj_fornecedor) < 11 or not id_controle:
+            return None
+        orgao = det.get("orgaoEntidade") or {}
+        unidade = det.get("unidadeOrgao") or {}
+        return {
+            "cnpj": cnpj_fornecedor,
+            "nome_empresa": (det.get("nomeRazaoSocialFornecedor") or "DESCONHECIDO").upper(),
+            "id": id_controle,
+            "valor": float(det.get("valorGlobal") or 0),
+            "orgao": (orgao.get("razaoSocial") or "GOVERNO").upper(),
+            "orgao_cnpj": orgao.get("cnpj"),
+            "objeto": det.get("objetoContrato") or "Sem Objeto",
+            "data_assinatura": (det.get("dataAssinatura") or "")[:10] or None,
+            "uf": unidade.get("ufSigla"),
+            "municipio": (unidade.get("municipioNome") or "").upper() or None,
+        }
+
+    async def _processar_pagina(self, dia_ini: date, dia_fim: date, pagina: int, dados: dict = None) -> bool:
+        """Processa uma página; False se ela ou o detalhe de algum contrato não pôde ser baixado."""
+        if dados is None:
+            dados = await self._buscar_pagina(dia_ini, dia_fim, pagina)
+            if dados is None:
+                return False
+        items = dados.get("data") or []
+
+        completos, incompletos = [], []
+        for item in items:
+            (completos if item.get("niFornecedor") and item.get("valorGlobal") is not None else incompletos).append(item)
+        if incompletos:
+            detalhes = await asyncio.gather(*(self._detalhar(i) for i in incompletos))
+            if any(d is None for d in detalhes):
+                # Contrato sem detalhe ficaria de fora sem aviso; a página falha
+                # para a janela ser refeita e a marca d'água não passar dele.
+                return False
+            completos.extend(d for d in detalhes if d)
+
+        for det in completos:
+            contrato = self._normalizar(det)
+            if contrato:
+                self.buffer_contratos.append(contrato)
+        if len(self.buffer_contratos) >= TAMANHO_LOTE_GRAFO:
+            await self._flush_contratos()
+        return True
+
+    async def coletar_janela(self, dia_ini: date, dia_fim: date) -> tuple[int, list[int]]:
+        """
+        Varre todas as páginas da janela. Devolve (contratos gravados, páginas
+        que falharam); se a primeira falhar, o total de páginas é desconhecido
+        e nada mais é buscado.
+        """
+        antes = self.stats["contratos"]
+        primeira = await self._buscar_pagina(dia_ini, dia_fim, 1)
+        if primeira is None:
+            logger.error(f"❌ Primeira página da janela {dia_ini}→{dia_fim} indisponível.")
+            return 0, [1]
+        total_paginas = int(primeira.get("totalPaginas") or 0)
+        logger.info(f"🔎 Janela {dia_ini}→{dia_fim}: {primeira.get('totalRegistros', 0)} contratos em {total_paginas} página(s)")
+
+        semaforo = asyncio.Semaphore(self.concorrencia)
+        falhas = [] if await self._processar_pagina(dia_ini, dia_fim, 1, primeira) else [1]
+
+        async def com_limite(pagina):
+            async with semaforo:
+                try:
+                    if not await self._processar_pagina(dia_ini, dia_fim, pagina):
+                        falhas.append(pagina)
                 except Exception as ex:
-                    logger.error(f"Erro ao detalhar contrato {item.get('id')}: {ex}")
-
-            pagina += 1
-            time.sleep(2)
-            
-        except Exception as e:
-            logger.error(f"Erro na varredura PNCP: {e}")
-            break
-            
-    neo4j_db.close()
-    logger.info("🏁 CAÇA ÀS LICITAÇÕES E SÓCIOS CONCLUÍDA.")
+                    self.stats["erros"] += 1
+                    falhas.append(pagina)
+                    logger.error(f"Erro na página {pagina} da janela {dia_ini}: {ex}")
+
+        await asyncio.gather(*(com_limite(p) for p in range(2, total_paginas + 1)))
+        await self._flush_contratos()
+        return self.stats["contratos"] - antes, sorted(falhas)
+
+    async def _flush_contratos(self):
+        lote, self.buffer_contratos = self.buffer_contratos, []
+        if not lote:
+            return
+        inicio = time.perf_counter()
+        sem_qsa = await asyncio.to_thread(self._gravar_contratos, lote)
+        registrar_lote("pncp_contratos", len(lote), time.perf_counter() - inicio)
+        self.stats["contratos"] += len(lote)
+        logger.info(f"   💰 {len(lote)} contratos gravados (total: {self.stats['contratos']:,})")
+        for cnpj in sem_qsa:
+            if cnpj in self.cnpjs_enfileirados:
+                continue
+            self.cnpjs_enfileirados.add(cnpj)
+            dados = self.base_cnpj.buscar(cnpj) if self.base_cnpj else None
+            if dados:
+                self.buffer_socios.append(self._linha_qsa(cnpj, dados))
+                self.stats["qsa_local"] += 1
+            else:
+                self.fila_qsa.put_nowait(cnpj)
+        if len(self.buffer_socios) >= 100:
+            await self._flush_socios()
+
+    def _gravar_contratos(self, lote: list[dict]) -> list[str]:
+        """MERGE em lote de Empresa→Contrato. Devolve os CNPJs que ainda não têm QSA no grafo."""
+        resultado = self.neo4j.execute_query('''
+            UNWIND $rows AS row
+            MERGE (e:Empresa {cnpj: row.cnpj})
+            ON CREATE SET e.nome = row.nome_empresa
+            MERGE (c:Contrato {id: row.id})
+            ON CREATE SET
+                c.valor = row.valor,
+                c.orgao = row.orgao,
+                c.objeto = row.objeto,
+                c.data_cad = date()
+            SET c.orgao_cnpj = row.orgao_cnpj,
+                c.uf = row.uf,
+                c.municipio = row.municipio,
+                c.data_assinatura = CASE WHEN row.data_assinatura IS NULL THEN null
+                                         ELSE date(row.data_assinatura) END
+            MERGE (e)-[:GANHOU_LICITACAO]->(c)
+            WITH DISTINCT e
+            SET e.grau = COUNT { (e)--() }
+            WITH e
+            WHERE e.qsa_atualizado_em IS NULL
+            RETURN e.cnpj AS cnpj
+        ''', {"rows": lote})
+        return [r["cnpj"] for r in resultado]
+
+    # ── PIPELINE DE QSA ───────────────────────────────────────────────────────
+    async def _worker_qsa(self):
+        while True:
+            cnpj = await self.fila_qsa.get()
+            try:
+                dados = await self._get_json(f"{BRASILAPI_CNPJ}/{cnpj}", self.limitador_qsa, tentativas=3)
+                if dados is None:
+                    # Sem resposta não há como saber o QSA: a empresa fica sem
+                    # qsa_atualizado_em e volta a ser consultada na próxima execução.
+                    logger.warning(f"   ⚠️ QSA do CNPJ {cnpj} indisponível; fica para a próxima execução.")
+                    continue
+                if not dados:
+                    # 404: a BrasilAPI não conhece o CNPJ. A empresa é marcada como
+                    # consultada, sem sócios, para não voltar à fila a cada execução.
+                    logger.info(f"   🔍 CNPJ {cnpj} desconhecido na BrasilAPI; gravado sem sócios.")
+                self.buffer_socios.append(self._linha_qsa(cnpj, dados))
+                self.stats["qsa"] += 1
+                if len(self.buffer_socios) >= 100:
+                    await self._flush_socios()
+            except Exception as ex:
+                self.stats["erros"] += 1
+                logger.error(f"Erro no QSA do CNPJ {cnpj}: {ex}")
+            finally:
+                self.fila_qsa.task_done()
+
+    @staticmethod
+    def _linha_qsa(cnpj: str, dados: dict) -> dict:
+        socios = [{"nome": (s.get("nome_socio") or "").upper(),
+                   "doc": fragmento_documento(s.get("cnpj_cpf_do_socio"))} for s in dados.get("qsa", [])]
+        return {"cnpj": cnpj, "props": propriedades_empresa(dados) if dados else {},
+                "socios": [s for s in socios if s["nome"]]}
+
+    async def _flush_socios(self):
+        lote, self.buffer_socios = self.buffer_socios, []
+        if not lote:
+            return
+        inicio = time.perf_counter()
+        await asyncio.to_thread(self.neo4j.execute_query, '''
+            UNWIND $rows AS row
+            MATCH (e:Empresa {cnpj: row.cnpj})
+            SET e += row.props, e.qsa_atualizado_em = date()
+            WITH e, row
+            UNWIND row.socios AS socio
+            MERGE (s:Socio {nome: socio.nome, doc_fragmento: socio.doc})
+            MERGE (s)-[:E_SOCIO_DE]->(e)
+            SET s.grau = COUNT { (s)--() }, e.grau = COUNT { (e)--() }
+        ''', {"rows": lote})
+        n = sum(len(r["socios"]) for r in lote)
+        registrar_lote("pncp_qsa", len(lote), time.perf_counter() - inicio)
+        self.stats["socios"] += n
+        logger.info(f"      👥 QSA de {len(lote)} empresas gravado ({n} sócios) | fila: {self.fila_qsa.qsize()}")
+
+    # ── ORQUESTRAÇÃO ──────────────────────────────────────────────────────────
+    async def _coletar_janela_completa(self, dia_ini: date, dia_fim: date) -> int | None:
+        """Repete a janela até ela sair sem páginas perdidas; None se as tentativas acabarem."""
+        for tentativa in range(1, TENTATIVAS_JANELA + 1):
+            n, falhas = await self.coletar_janela(dia_ini, dia_fim)
+            if not falhas:
+                return n
+            logger.warning(f"⚠️ Janela {dia_ini}→{dia_fim}: página(s) {falhas[:10]} falharam "
+                           f"(tentativa {tentativa}/{TENTATIVAS_JANELA}).")
+            await asyncio.sleep(2 ** tentativa)
+        return None
+
+    async def executar(self, inicio: date, fim: date, janela_dias: int = 1) -> bool:
+        """Coleta de inicio a fim; False se parou numa janela incompleta (a marca d'água fica antes dela)."""
+        workers = [asyncio.create_task(self._worker_qsa()) for _ in range(self.workers_qsa)]
+        completo = True
+        try:
+            dia = inicio
+            while dia <= fim:
+                dia_fim = min(fim, dia + timedelta(days=janela_dias - 1))
+                n = await self._coletar_janela_completa(dia, dia_fim)
+                if n is None:
+                    logger.error(f"🛑 Janela {dia}→{dia_fim} incompleta: coleta interrompida, "
+                                 f"marca d'água mantida antes de {dia}.")
+                    completo = False
+                    break
+                gravar_watermark(dia_fim, n)
+                logger.info(f"📌 Marca d'água avançada para {dia_fim} ({n} contratos na janela)")
+                dia = dia_fim + timedelta(days=1)
+
+            logger.info(f"⏳ Aguardando pipeline de QSA ({self.fila_qsa.qsize()} CNPJs na fila)...")
+            await self.fila_qsa.join()
+            await self._flush_socios()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self.cliente.aclose()
+        logger.info(f"📊 Estatísticas PNCP: {self.stats}")
+        return completo
+
+
+def extrair_licitacoes_recentes(inicio: date = None, fim: date = None, concorrencia: int = 8,
+                                req_por_segundo: float = 5.0, janela_dias: int = 1) -> bool:
+    """
+    Execução incremental: sem datas explícitas, continua a partir da marca
+    d'água até ontem (o dia corrente ainda está sendo publicado no PNCP).
+    Devolve False se parou numa janela que não pôde ser baixada por inteiro.
+    """
+    logger.info("🔥 INICIANDO CAÇADOR DE LICITAÇÕES (VARREDURA COMPLETA + QSA) 🔥")
+    ontem = date.today() - timedelta(days=1)
+    if inicio is None:
+        ultimo = ler_watermark()
+        inicio = ultimo + timedelta(days=1) if ultimo else ontem
+    fim = fim or ontem
+    if inicio > fim:
+        logger.info(f"✅ Nada a fazer: marca d'água já em {inicio - timedelta(days=1)}.")
+        return True
+
+    neo4j_db = get_neo4j_connection()
+    try:
+        coletor = ColetorPNCP(neo4j_db, concorrencia=concorrencia, req_por_segundo=req_por_segundo)
+        with medir_etapa("pncp_contratos") as etapa:
+            completo = asyncio.run(coletor.executar(inicio, fim, janela_dias))
+            etapa["linhas"] = coletor.stats["contratos"]
+    finally:
+        neo4j_db.close()
+    logger.info("🏁 CAÇA ÀS LICITAÇÕES E SÓCIOS CONCLUÍDA." if completo else
+                "⚠️ CAÇA ÀS LICITAÇÕES INTERROMPIDA: rode de novo para retomar da marca d'água.")
+    return completo
 
 if __name__ == "__main__":
-    extrair_licitacoes_recentes()
+    parser = argparse.ArgumentParser(description="Coletor incremental de contratos do PNCP")
+    parser.add_argument("--inicio", type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD). Padrão: marca d'água + 1")
+    parser.add_argument("--fim", type=date.fromisoformat, help="Último dia (AAAA-MM-DD). Padrão: ontem")
+    parser.add_argument("--concorrencia", type=int, default=8, help="Requisições PNCP simultâneas")
+    parser.add_argument("--rps", type=float, default=5.0, help="Limite de requisições/s no PNCP")
+    parser.add_argument("--janela-dias", type=int, default=1, help="Tamanho da janela de datas por varredura")
+    args = parser.parse_args()
+    iniciar_exportador("extrator_pncp")
+    iniciar_rastreamento("extrator_pncp")
+    with span("extrator_pncp"):
+        completo = extrair_licitacoes_recentes(args.inicio, args.fim, args.concorrencia, args.rps, args.janela_dias)
+    sys.exit(0 if completo else 1)
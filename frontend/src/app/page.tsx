@@ -18,6 +18,17 @@ const SalaArquivos = dynamic(() => import('@/components/SalaArquivos'), { ssr: f
 // NEXT_PUBLIC_MAPBOX_TOKEN=pk.eyJ1Ij...
 const MAPBOX_TOKEN = process.env.NEXT_PUBLIC_MAPBOX_TOKEN || "COLE_SUA_CHAVE_PK_AQUI_SE_FOR_RODAR_LOCAL_SEM_ENV";
 
+const INTERVALO_PAINEL_MS = 30000;
+
+// "há 10 min" a partir do ISO gravado no alerta (calculado no cliente para o ETag do painel não mudar com o relógio)
+const tempoRelativo = (iso?: string) => {
+  if (!iso) return "";
+  const minutos = Math.max(0, Math.round((Date.now() - new Date(iso).getTime()) / 60000));
+  if (minutos < 60) return `${minutos} min atrás`;
+  if (minutos < 60 * 24) return `${Math.round(minutos / 60)}h atrás`;
+  return `${Math.round(minutos / (60 * 24))}d atrás`;
+};
+
 // Cidades Estratégicas Base
 const CIDADES_RADAR_FIXAS = [
   { nome: "Brasília", lat: -15.8267, lng: -47.9218, tipo: "Centro de Poder Supremo" }
@@ -78,7 +89,9 @@ export default function Home() {
 
   // Init: Carrega Dashboard Esquerdo (Guerra & Top Risco) e Localização Real
   useEffect(() => {
-    fetch("http://localhost:8000/api/dashboard/guerra")
+    // Polling barato: o backend responde 304 (ETag) enquanto nenhuma auditoria nova terminar,
+    // e o cache HTTP do navegador devolve o corpo anterior.
+    const carregarPainel = () => fetch("http://localhost:8000/api/dashboard/guerra", { cache: "no-cache" })
       .then(res => res.json())
       .then(data => {
         if (data.status === "sucesso") {
@@ -87,6 +100,8 @@ export default function Home() {
         }
       })
       .catch(err => console.error("Erro ao carregar Dashboard:", err));
+    carregarPainel();
+    const intervaloPainel = setInterval(carregarPainel, INTERVALO_PAINEL_MS);
 
     // Capturar localização do usuário
     if ("geolocation" in navigator) {
@@ -113,6 +128,7 @@ export default function Home() {
         }
       );
     }
+    return () => clearInterval(intervaloPainel);
   }, []);
 
   // Ação de Clique Dinâmico no Mapa (Qualquer Cidade do Brasil)
@@ -462,8 +478,8 @@ export default function Home() {
                     <div>
                       <p className="text-xs text-neutral-300 leading-tight mb-1">{alerta.mensagem}</p>
                       <div className="flex gap-2 text-[9px] font-mono tracking-widest text-neutral-500 uppercase">
-                        <span className={alerta.urgencia === 'ALTA' ? 'text-red-500' : 'text-yellow-500'}>[{alerta.urgencia}]</span>
-                        <span>{alerta.tempo}</span>
+                        <span className={['ALTA', 'CRÍTICA'].includes(alerta.urgencia) ? 'text-red-500' : 'text-yellow-500'}>[{alerta.urgencia}]</span>
+                        <span>{tempoRelativo(alerta.criado_em)}</span>
                       </div>
                     </div>
                   </div>
@@ -36,6 +36,9 @@ interface SalaArquivosProps {
 }
 
 type NavegacaoModo = 'estados' | 'cidades' | 'arquivos' | 'dossie'
+type Ordenacao = 'nome' | 'score'
+
+const TAMANHO_PAGINA = 60
 
 export default function SalaArquivos({ aoFechar }: SalaArquivosProps) {
     const [modo, setModo] = useState<NavegacaoModo>('estados')
@@ -44,28 +47,35 @@ export default function SalaArquivos({ aoFechar }: SalaArquivosProps) {
     const [dossieSel, setDossieSel] = useState<any | null>(null)
 
     const [items, setItems] = useState<any[]>([])
+    const [proximoCursor, setProximoCursor] = useState<string | null>(null)
+    const [ordenar, setOrdenar] = useState<Ordenacao>('nome')
     const [carregando, setCarregando] = useState(false)
+    const [carregandoMais, setCarregandoMais] = useState(false)
     const [busca, setBusca] = useState('')
 
     // Carregar Estados inicialmente
     useEffect(() => {
-        carregarEstrutura()
-    }, [modo, estadoSel, cidadeSel])
+        if (modo !== 'dossie') carregarEstrutura()
+    }, [modo, estadoSel, cidadeSel, ordenar])
 
-    const carregarEstrutura = async () => {
-        setCarregando(true)
+    // A árvore é paginada no servidor: cada página traz TAMANHO_PAGINA itens e
+    // o cursor da seguinte, então o navegador nunca recebe o arquivo nacional inteiro.
+    const carregarEstrutura = async (cursor?: string) => {
+        cursor ? setCarregandoMais(true) : setCarregando(true)
         try {
-            let url = 'http://localhost:8000/api/dossies/arvore'
-            if (modo === 'cidades') url += `?uf=${estadoSel}`
-            if (modo === 'arquivos') url += `?uf=${estadoSel}&cidade=${cidadeSel}`
+            const params = new URLSearchParams({ ordenar, limite: String(TAMANHO_PAGINA) })
+            if (modo === 'cidades' || modo === 'arquivos') params.set('uf', estadoSel)
+            if (modo === 'arquivos') params.set('cidade', cidadeSel)
+            if (cursor) params.set('cursor', cursor)
 
-            const res = await fetch(url)
+            const res = await fetch(`http://localhost:8000/api/dossies/arvore?${params}`)
             const data = await res.json()
-            setItems(data.items || [])
+            setItems(anteriores => cursor ? [...anteriores, ...(data.items || [])] : (data.items || []))
+            setProximoCursor(data.proximo_cursor || null)
         } catch (error) {
             console.error("Erro ao carregar estrutura:", error)
         } finally {
-            setCarregando(false)
+            cursor ? setCarregandoMais(false) : setCarregando(false)
         }
     }
 
@@ -155,16 +165,31 @@ export default function SalaArquivos({ aoFechar }: SalaArquivosProps) {
                     )}
                 </nav>
 
-                {/* BUSCA RÁPIDA (Clear Input) */}
-                <div className="mb-12 relative max-w-4xl">
-                    <Search className="absolute left-6 top-1/2 -translate-y-1/2 w-10 h-10 text-neutral-300" />
-                    <input
-                        type="text"
-                        placeholder="Pesquisar nos arquivos nacionais..."
-                        className="w-full bg-white border-4 border-neutral-100 rounded-3xl p-8 pl-20 text-3xl font-bold shadow-xl outline-none focus:border-red-500 transition-all placeholder-neutral-200"
-                        value={busca}
-                        onChange={(e) => setBusca(e.target.value)}
-                    />
+                {/* BUSCA RÁPIDA (Clear Input) + ORDENAÇÃO */}
+                <div className="mb-12 flex items-center gap-6">
+                    <div className="relative flex-1 max-w-4xl">
+                        <Search className="absolute left-6 top-1/2 -translate-y-1/2 w-10 h-10 text-neutral-300" />
+                        <input
+                            type="text"
+                            placeholder="Pesquisar nos arquivos nacionais..."
+                            className="w-full bg-white border-4 border-neutral-100 rounded-3xl p-8 pl-20 text-3xl font-bold shadow-xl outline-none focus:border-red-500 transition-all placeholder-neutral-200"
+                            value={busca}
+                            onChange={(e) => setBusca(e.target.value)}
+                        />
+                    </div>
+                    {modo !== 'dossie' && (
+                        <div className="flex bg-white border-4 border-neutral-100 rounded-3xl p-2 shadow-xl">
+                            {(['nome', 'score'] as Ordenacao[]).map(o => (
+                                <button
+                                    key={o}
+                                    onClick={() => setOrdenar(o)}
+                                    className={`px-6 py-4 rounded-2xl text-lg font-black uppercase transition-colors ${ordenar === o ? 'bg-red-600 text-white' : 'text-neutral-400 hover:text-red-600'}`}
+                                >
+                                    {o === 'nome' ? 'A-Z' : 'Risco'}
+                                </button>
+                            ))}
+                        </div>
+                    )}
                 </div>
 
                 <div className="flex-1 overflow-y-auto pr-6 custom-scrollbar">
@@ -295,6 +320,9 @@ export default function SalaArquivos({ aoFechar }: SalaArquivosProps) {
                                                 <div>
                                                     <h3 className="text-4xl font-black uppercase leading-none mb-2">{item.nome}</h3>
                                                     <p className="text-xl font-bold text-neutral-400 uppercase tracking-widest">{item.total || 0} Registros</p>
+                                                    {item.risco_alto > 0 && (
+                                                        <p className="text-sm font-black text-red-600 uppercase tracking-widest mt-1">{item.risco_alto} em alto risco · média {item.score_medio ?? '-'}</p>
+                                                    )}
                                                 </div>
                                             </div>
                                         ) : (
@@ -318,6 +346,19 @@ export default function SalaArquivos({ aoFechar }: SalaArquivosProps) {
                             </motion.div>
                         )}
                     </AnimatePresence>
+
+                    {/* PAGINAÇÃO POR CURSOR */}
+                    {!carregando && modo !== 'dossie' && proximoCursor && (
+                        <div className="flex justify-center py-12">
+                            <button
+                                onClick={() => carregarEstrutura(proximoCursor)}
+                                disabled={carregandoMais}
+                                className="px-12 py-6 bg-neutral-900 text-white rounded-full text-2xl font-black uppercase hover:bg-black transition-colors disabled:opacity-50"
+                            >
+                                {carregandoMais ? 'Carregando...' : 'Carregar mais'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </main>
 